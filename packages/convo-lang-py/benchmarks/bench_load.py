@@ -0,0 +1,100 @@
+"""
+Load test of the SDK against a simulated model (no Node.js, network or API keys).
+
+Drives many Conversations concurrently through MockConvoRunner with a latency
+distribution, failure rate and transcript size, optionally through a
+CompletionScheduler, and reports throughput, latency percentiles and SDK overhead.
+
+    python benchmarks/bench_load.py --conversations 500 --concurrency 8,32,128
+    python benchmarks/bench_load.py --latency lognormal:0.8,0.6 --failure-rate 0.02 --rpm 600
+"""
+import argparse
+import json
+import os
+import sys
+from typing import Any, Dict, List
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.abspath(os.path.join(HERE, "..", "src")))
+from convo_lang import CompletionScheduler, Conversation, ModelLimits
+from convo_lang.load_harness import run_load
+from convo_lang.mock_runner import (
+    ConstantLatency,
+    LatencyDistribution,
+    LogNormalLatency,
+    MockConvoRunner,
+    UniformLatency,
+)
+
+
+def parse_latency(spec: str) -> LatencyDistribution:
+    """"0.5", "uniform:0.2,1.0" or "lognormal:<median>,<sigma>[,<max>]" (seconds)."""
+    kind, _, params = spec.partition(":")
+    if not params:
+        return ConstantLatency(float(kind))
+    values = [float(v) for v in params.split(",")]
+    if kind == "constant":
+        return ConstantLatency(*values)
+    if kind == "uniform":
+        return UniformLatency(*values)
+    if kind == "lognormal":
+        return LogNormalLatency(*values)
+    raise argparse.ArgumentTypeError(f"unknown latency distribution {kind!r}")
+
+
+def run(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    results = []
+    for concurrency in args.concurrency:
+        scheduler = None
+        if args.rpm or args.max_in_flight:
+            scheduler = CompletionScheduler(default_limits=ModelLimits(
+                requests_per_minute=args.rpm,
+                max_concurrency=args.max_in_flight or concurrency,
+            ))
+        runner = MockConvoRunner(
+            latency=args.latency,
+            failure_rate=args.failure_rate,
+            reply_bytes=args.reply_bytes,
+            seed=args.seed,
+            scheduler=scheduler,
+        )
+        report = run_load(
+            lambda n: Conversation(convo_cli_runner=runner),
+            conversations=args.conversations,
+            turns=args.turns,
+            concurrency=concurrency,
+            runner=runner,
+            scheduler=scheduler,
+        )
+        results.append(report.to_dict())
+    return results
+
+
+def main(argv: List[str] = None) -> None:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--conversations", type=int, default=200)
+    ap.add_argument("--turns", type=int, default=3)
+    ap.add_argument("--concurrency", type=lambda s: [int(v) for v in s.split(",")], default=[8, 32, 128],
+                    help="comma separated thread counts")
+    ap.add_argument("--latency", type=parse_latency, default=LogNormalLatency(0.05, 0.5),
+                    help='"0.5", "uniform:lo,hi" or "lognormal:median,sigma[,max]" in seconds')
+    ap.add_argument("--failure-rate", type=float, default=0.0)
+    ap.add_argument("--reply-bytes", type=int, default=2000)
+    ap.add_argument("--rpm", type=float, default=None, help="schedule at this many requests per minute")
+    ap.add_argument("--max-in-flight", type=int, default=None, help="scheduler concurrency limit")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--json", action="store_true", help="print results as JSON")
+    args = ap.parse_args(argv)
+    results = run(args)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'threads':>8} {'done':>7} {'failed':>7} {'per_s':>9} {'p50_ms':>9} {'p99_ms':>9} {'overhead_ms':>12}")
+    for r in results:
+        print(f"{r['concurrency']:>8} {r['completions']:>7} {r['failures']:>7} {r['throughput']:>9.1f} "
+              f"{r['latency']['p50'] * 1000:>9.1f} {r['latency']['p99'] * 1000:>9.1f} "
+              f"{(r['sdk_overhead'] or 0) * 1000:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Microbenchmark for Conversation._parse_prefixed.
+
+Compares the previous four-pass parser with the single-pass parse_prefixed for each
+available JSON backend over synthetic transcripts from 1 KB to 50 MB.
+
+    python benchmarks/bench_parse_prefixed.py
+    python benchmarks/bench_parse_prefixed.py --sizes 1K,1M --json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "src")
+))
+from convo_lang import json_backend
+from convo_lang.transcript_parser import parse_prefixed
+
+DEFAULT_SIZES = "1K,10K,100K,1M,10M,50M"
+_UNITS = {"K": 1024, "M": 1024 * 1024}
+
+
+def parse_size(value: str) -> int:
+    value = value.strip().upper()
+    if value[-1] in _UNITS:
+        return int(float(value[:-1]) * _UNITS[value[-1]])
+    return int(value)
+
+
+def legacy_parse_prefixed(transcript: str) -> Dict[str, Any]:
+    """The original implementation: four splitlines passes and stdlib json."""
+    state_lines = [l[2:] for l in transcript.splitlines() if l.startswith("s:")]
+    syntax_lines = [l[2:] for l in transcript.splitlines() if l.startswith("m:")]
+    flat_lines = [l[2:] for l in transcript.splitlines() if l.startswith("f:")]
+    result_lines = [l[2:] if l.startswith(": ") else l[1:]
+                    for l in transcript.splitlines() if l.startswith(":")]
+    return {
+        "state": json.loads("".join(state_lines)) if state_lines else {},
+        "syntax_messages": json.loads("".join(syntax_lines)) if syntax_lines else [],
+        "messages": json.loads("".join(flat_lines)) if flat_lines else [],
+        "convo_text": "\n\n".join(result_lines).strip(),
+    }
+
+
+def _prefixed(prefix: str, value: Any) -> List[str]:
+    # Mirrors the CLI: JSON.stringify(value, null, 4) with every line prefixed
+    return [prefix + line for line in json.dumps(value, indent=4).split("\n")]
+
+
+def synthetic_transcript(target_bytes: int) -> str:
+    """Build a CLI-shaped transcript (:, f:, s:, m: sections) of roughly target_bytes."""
+    sentence = "The quick brown fox jumps over the lazy dog while the model keeps talking. "
+    body = (sentence * 6).strip()
+    messages: List[Dict[str, Any]] = []
+    convo: List[str] = []
+    size = 0
+    i = 0
+    while size < target_bytes or not messages:
+        role = "user" if i % 2 == 0 else "assistant"
+        content = f"{i}: {body}"
+        messages.append({"role": role, "content": content})
+        convo += [f"> {role}", content, ""]
+        # Each message appears in the convo text and in both message dumps
+        size += len(content) * 3 + 120
+        i += 1
+    lines = [":" + l for l in convo]
+    lines += _prefixed("f:", messages)
+    lines += _prefixed("s:", {"turns": i, "tags": ["a", "b"]})
+    lines += _prefixed("m:", [{"role": m["role"], "content": m["content"], "tags": []} for m in messages])
+    return "\n".join(lines) + "\n"
+
+
+def _time(fn: Callable[[str], Any], transcript: str, min_time: float) -> float:
+    runs = 0
+    start = time.perf_counter()
+    while True:
+        fn(transcript)
+        runs += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return elapsed / runs
+
+
+def _peak_memory(fn: Callable[[str], Any], transcript: str) -> int:
+    tracemalloc.start()
+    try:
+        fn(transcript)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run(sizes: List[int], min_time: float, memory: bool) -> List[Dict[str, Any]]:
+    results = []
+    for size in sizes:
+        transcript = synthetic_transcript(size)
+        nbytes = len(transcript.encode("utf-8"))
+        cases: List[Any] = [("legacy", "json", legacy_parse_prefixed)]
+        for backend in json_backend.available_backends():
+            cases.append(("single_pass", backend, parse_prefixed))
+        for name, backend, fn in cases:
+            previous = json_backend.get_json_backend()
+            json_backend.set_json_backend(backend)
+            try:
+                seconds = _time(fn, transcript, min_time)
+                peak = _peak_memory(fn, transcript) if memory else None
+            finally:
+                json_backend.set_json_backend(previous)
+            results.append({
+                "parser": name,
+                "json_backend": backend,
+                "transcript_bytes": nbytes,
+                "seconds": seconds,
+                "mb_per_s": nbytes / seconds / 1e6,
+                "peak_alloc_bytes": peak,
+            })
+    return results
+
+
+def main(argv: List[str] = None) -> None:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--sizes", default=DEFAULT_SIZES, help="comma separated, e.g. 1K,1M,50M")
+    ap.add_argument("--min-time", type=float, default=0.5, help="seconds to repeat each case")
+    ap.add_argument("--no-memory", action="store_true", help="skip tracemalloc peak measurement")
+    ap.add_argument("--json", action="store_true", help="print results as JSON")
+    args = ap.parse_args(argv)
+    sizes = [parse_size(s) for s in args.sizes.split(",") if s.strip()]
+    results = run(sizes, args.min_time, not args.no_memory)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'bytes':>12} {'parser':>12} {'json':>7} {'ms':>10} {'MB/s':>8} {'peak MB':>9}")
+    for r in results:
+        peak = "-" if r["peak_alloc_bytes"] is None else f"{r['peak_alloc_bytes'] / 1e6:.1f}"
+        print(f"{r['transcript_bytes']:>12} {r['parser']:>12} {r['json_backend']:>7} "
+              f"{r['seconds'] * 1000:>10.3f} {r['mb_per_s']:>8.1f} {peak:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Size and speed of Conversation.dump()/load() compared with plain JSON.
+
+The baseline is what callers stored before: json.dumps of convo_text, messages,
+syntax_messages and state. Every available codec / compression is measured on
+synthetic conversations of a few sizes; "load" leaves messages undecoded (lazy) and
+"load+messages" also decodes them.
+
+    python benchmarks/bench_persistence.py
+    python benchmarks/bench_persistence.py --json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Any, Callable, Dict, List
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.abspath(os.path.join(HERE, "..", "src")))
+from convo_lang import Conversation
+from convo_lang.persistence import available_codecs, available_compressions
+
+
+def make_conversation(turns: int) -> Conversation:
+    convo = Conversation()
+    convo.add_system_message("You are a support agent for ACME. Answer briefly and cite the docs.")
+    messages: List[Dict[str, Any]] = [{"role": "system", "content": "You are a support agent for ACME."}]
+    for turn in range(turns):
+        question = f"Question {turn}: how do I reset the password for account {turn * 7919}?"
+        answer = f"Answer {turn}: open Settings > Security, choose Reset and follow the e-mail link. " * 3
+        convo.add_user_message(question)
+        convo.add_assistant_message(answer)
+        messages.append({"role": "user", "content": question})
+        messages.append({
+            "role": "assistant",
+            "content": answer,
+            "model": "gpt-4o",
+            "tags": {"turn": str(turn)},
+            "tokenUsage": {"input": 120 + turn, "output": 60},
+        })
+    convo.messages = messages
+    convo.syntax_messages = list(messages)
+    convo.state = {"vars": {"account": "acme", "turns": turns}}
+    return convo
+
+
+def json_dump(convo: Conversation) -> bytes:
+    return json.dumps({
+        "convo_text": convo.convo_text,
+        "messages": convo.messages,
+        "syntax_messages": convo.syntax_messages,
+        "state": convo.state,
+    }).encode("utf-8")
+
+
+def json_load(data: bytes) -> Dict[str, Any]:
+    return json.loads(data)
+
+
+def measure(fn: Callable[[], Any], min_time: float) -> float:
+    runs = 0
+    start = time.perf_counter()
+    while True:
+        fn()
+        runs += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return elapsed / runs
+
+
+def run(turn_counts: List[int], min_time: float) -> List[Dict[str, Any]]:
+    results = []
+    for turns in turn_counts:
+        convo = make_conversation(turns)
+        baseline = json_dump(convo)
+        results.append({
+            "turns": turns,
+            "format": "plain_json",
+            "bytes": len(baseline),
+            "ratio": 1.0,
+            "dump_us": measure(lambda: json_dump(convo), min_time) * 1e6,
+            "load_us": measure(lambda: json_load(baseline), min_time) * 1e6,
+            "load_messages_us": None,
+        })
+        for codec in available_codecs():
+            for compression in available_compressions():
+                data = convo.dump(codec=codec, compression=compression)
+                results.append({
+                    "turns": turns,
+                    "format": f"{codec}+{compression or 'raw'}",
+                    "bytes": len(data),
+                    "ratio": len(data) / len(baseline),
+                    "dump_us": measure(lambda: convo.dump(codec=codec, compression=compression), min_time) * 1e6,
+                    "load_us": measure(lambda: Conversation.load(data), min_time) * 1e6,
+                    "load_messages_us": measure(lambda: Conversation.load(data).messages, min_time) * 1e6,
+                })
+    return results
+
+
+def main(argv: List[str] = None) -> None:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--turns", type=lambda s: [int(v) for v in s.split(",")], default=[5, 50, 500],
+                    help="comma separated conversation lengths")
+    ap.add_argument("--min-time", type=float, default=0.3, help="seconds to repeat each measurement")
+    ap.add_argument("--json", action="store_true", help="print results as JSON")
+    args = ap.parse_args(argv)
+    results = run(args.turns, args.min_time)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'turns':>6} {'format':>16} {'bytes':>9} {'ratio':>6} {'dump_us':>9} {'load_us':>9} {'load+msgs_us':>13}")
+    for r in results:
+        load_messages = f"{r['load_messages_us']:>13.1f}" if r["load_messages_us"] is not None else f"{'-':>13}"
+        print(f"{r['turns']:>6} {r['format']:>16} {r['bytes']:>9} {r['ratio']:>6.2f} "
+              f"{r['dump_us']:>9.1f} {r['load_us']:>9.1f} {load_messages}")
+
+
+if __name__ == "__main__":
+    main()
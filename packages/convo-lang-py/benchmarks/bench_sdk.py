@@ -0,0 +1,304 @@
+"""
+Overhead benchmarks for the convo_lang Python SDK.
+
+Runs against benchmarks/fake_convo.py (a stub CLI with configurable latency) and
+an in-process latency runner, so no Node.js, CLI or model access is needed.
+
+Groups:
+    spawn       process start cost: bare interpreter vs. run_text through the stub CLI
+    tempfile    temp .convo/config file write + unlink vs. the content-addressed config cache
+    serializer  ConvoVarsSerializer encoding of flat, nested and document-sized vars
+    parse       parse_prefixed throughput on synthetic transcripts
+    e2e         complete_many completions/s at several concurrency levels
+
+    python benchmarks/bench_sdk.py
+    python benchmarks/bench_sdk.py --only serializer,parse --output results.json
+    python benchmarks/bench_sdk.py --quick --baseline results.json --tolerance 0.2
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.abspath(os.path.join(HERE, "..", "src")))
+sys.path.insert(0, HERE)
+from convo_lang import Conversation, ConvoCLIRunner, json_backend
+from convo_lang.convo_vars_serializer import ConvoVarsSerializer
+from convo_lang.mock_runner import MockConvoRunner
+from convo_lang.transcript_parser import parse_prefixed
+from bench_parse_prefixed import parse_size, synthetic_transcript
+
+GROUPS = ["spawn", "tempfile", "serializer", "parse", "e2e"]
+SCHEMA_VERSION = 1
+
+
+class LatencyRunner(MockConvoRunner):
+    """MockConvoRunner that sleeps `latency` seconds per call, like a remote model."""
+
+    def __init__(self, *, latency: float = 0.0, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.latency = latency
+        self.config: Dict[str, Any] = {}
+
+    def run_text(self, convo_text: str, **kwargs: Any) -> str:
+        if self.latency:
+            time.sleep(self.latency)
+        return super().run_text(convo_text, **kwargs)
+
+
+def write_fake_cli(directory: str) -> str:
+    """Create an executable launcher for fake_convo.py bound to this interpreter."""
+    path = Path(directory) / "convo"
+    path.write_text(
+        f"#!{sys.executable}\n"
+        "import runpy, sys\n"
+        f"sys.argv[0] = {os.path.join(HERE, 'fake_convo.py')!r}\n"
+        "runpy.run_path(sys.argv[0], run_name='__main__')\n",
+        encoding="utf-8",
+    )
+    path.chmod(0o755)
+    return str(path)
+
+
+def measure(fn: Callable[[], Any], min_time: float, min_runs: int = 3) -> float:
+    """Mean seconds per call over at least min_time seconds and min_runs calls."""
+    fn()
+    runs = 0
+    start = time.perf_counter()
+    while True:
+        fn()
+        runs += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time and runs >= min_runs:
+            return elapsed / runs
+
+
+def result(group: str, case: str, value: float, unit: str, *, higher_is_better: bool, **params: Any) -> Dict[str, Any]:
+    return {
+        "group": group,
+        "case": case,
+        "params": params,
+        "value": value,
+        "unit": unit,
+        "higher_is_better": higher_is_better,
+    }
+
+
+def bench_spawn(cli: str, min_time: float) -> List[Dict[str, Any]]:
+    out = []
+    seconds = measure(lambda: subprocess.run([sys.executable, "-c", "pass"], check=True), min_time)
+    out.append(result("spawn", "python_baseline", seconds * 1000, "ms", higher_is_better=False))
+    source = "> user\nhello\n"
+    for use_stdin in (False, True):
+        runner = ConvoCLIRunner(convo_bin=cli, use_stdin=use_stdin)
+        seconds = measure(lambda: runner.run_text(source), min_time)
+        out.append(result(
+            "spawn", "run_text", seconds * 1000, "ms",
+            higher_is_better=False, transport="stdin" if use_stdin else "tempfile",
+        ))
+    return out
+
+
+def bench_tempfile(min_time: float) -> List[Dict[str, Any]]:
+    out = []
+    for size in ("1K", "100K", "1M"):
+        text = "x" * parse_size(size)
+
+        def write_and_unlink() -> None:
+            tmp = tempfile.NamedTemporaryFile(
+                prefix="convo_", suffix=".convo", delete=False, mode="w", encoding="utf-8"
+            )
+            tmp.write(text)
+            tmp.close()
+            os.unlink(tmp.name)
+
+        seconds = measure(write_and_unlink, min_time)
+        out.append(result("tempfile", "convo_source", seconds * 1e6, "us", higher_is_better=False, size=size))
+    config = {"env": {"openAiApiKey": "sk-" + "0" * 48, "defaultModel": "gpt-4.1"}}
+    cache_dir = tempfile.mkdtemp(prefix="convo_bench_cache_")
+    try:
+        for cache_config in (False, True):
+            runner = ConvoCLIRunner(convo_bin="convo", config=config, cache_config=cache_config, cache_dir=cache_dir)
+
+            def config_file() -> None:
+                with runner._temporary_config_path():
+                    pass
+
+            seconds = measure(config_file, min_time)
+            out.append(result(
+                "tempfile", "config", seconds * 1e6, "us",
+                higher_is_better=False, cached=cache_config,
+            ))
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+    return out
+
+
+def _nested(depth: int) -> Dict[str, Any]:
+    node: Dict[str, Any] = {"leaf": True}
+    for i in range(depth):
+        node = {"level": i, "items": [1, 2.5, None, "text"], "child": node}
+    return node
+
+
+def serializer_cases() -> Dict[str, Dict[str, Any]]:
+    doc = ("Senior engineer with ten years of experience in distributed systems. " * 700).strip()
+    return {
+        "flat": {f"key_{i}": (i if i % 3 else f"value {i}") for i in range(50)},
+        "nested": {"root": _nested(200)},
+        "json_strings": {f"payload_{i}": json.dumps({"id": i, "tags": ["a", "b"]}) for i in range(100)},
+        "document": {"job_description": doc, "candidate_profile": doc},
+    }
+
+
+def bench_serializer(min_time: float) -> List[Dict[str, Any]]:
+    out = []
+    serializer = ConvoVarsSerializer()
+    for name, variables in serializer_cases().items():
+        encoded = serializer.to_convo_vars(vars_dict=variables)
+        seconds = measure(lambda: serializer.to_convo_vars(vars_dict=variables), min_time)
+        out.append(result("serializer", name, seconds * 1e6, "us", higher_is_better=False, output_bytes=len(encoded)))
+        out.append(result("serializer", name, len(encoded) / seconds / 1e6, "MB/s", higher_is_better=True))
+    return out
+
+
+def bench_parse(sizes: List[str], min_time: float) -> List[Dict[str, Any]]:
+    out = []
+    for size in sizes:
+        transcript = synthetic_transcript(parse_size(size))
+        nbytes = len(transcript.encode("utf-8"))
+        seconds = measure(lambda: parse_prefixed(transcript), min_time)
+        out.append(result(
+            "parse", "parse_prefixed", nbytes / seconds / 1e6, "MB/s",
+            higher_is_better=True, size=size, json_backend=json_backend.get_json_backend(),
+        ))
+    return out
+
+
+def bench_e2e(cli: str, concurrency: List[int], completions: int, latency_ms: float) -> List[Dict[str, Any]]:
+    out = []
+    variables = [{"n": i} for i in range(completions)]
+    os.environ["FAKE_CONVO_LATENCY_MS"] = str(latency_ms)
+    runners = {
+        "mock_runner": LatencyRunner(latency=latency_ms / 1000),
+        "fake_cli": ConvoCLIRunner(convo_bin=cli),
+    }
+    try:
+        for runner_name, runner in runners.items():
+            for level in concurrency:
+                convo = Conversation(convo_cli_runner=runner)
+                convo.add_user_message("Say something about {{n}}")
+                batch = convo.complete_many(variables, max_concurrency=level)
+                if batch.stats.failed:
+                    raise RuntimeError(f"{runner_name}: {batch.errors[0]!r}")
+                out.append(result(
+                    "e2e", runner_name, batch.stats.throughput, "completions/s",
+                    higher_is_better=True, concurrency=level, latency_ms=latency_ms,
+                ))
+                out.append(result(
+                    "e2e", runner_name, batch.stats.latency_p95 * 1000, "p95_ms",
+                    higher_is_better=False, concurrency=level, latency_ms=latency_ms,
+                ))
+    finally:
+        os.environ.pop("FAKE_CONVO_LATENCY_MS", None)
+    return out
+
+
+def _result_id(r: Dict[str, Any]) -> str:
+    params = ",".join(f"{k}={r['params'][k]}" for k in sorted(r["params"]))
+    return f"{r['group']}/{r['case']}[{params}]({r['unit']})"
+
+
+def compare(results: List[Dict[str, Any]], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Describe every result that is worse than the baseline by more than `tolerance`."""
+    previous = {_result_id(r): r for r in baseline.get("results", [])}
+    regressions = []
+    for r in results:
+        old = previous.get(_result_id(r))
+        if not old or not old["value"]:
+            continue
+        change = (r["value"] - old["value"]) / old["value"]
+        worse = -change if r["higher_is_better"] else change
+        if worse > tolerance:
+            regressions.append(f"{_result_id(r)}: {old['value']:.4g} -> {r['value']:.4g} ({worse:+.0%} worse)")
+    return regressions
+
+
+def run(groups: List[str], *, quick: bool, concurrency: List[int], latency_ms: float) -> Dict[str, Any]:
+    min_time = 0.1 if quick else 0.5
+    results: List[Dict[str, Any]] = []
+    workdir = tempfile.mkdtemp(prefix="convo_bench_")
+    try:
+        cli = write_fake_cli(workdir)
+        if "spawn" in groups:
+            results += bench_spawn(cli, min_time)
+        if "tempfile" in groups:
+            results += bench_tempfile(min_time)
+        if "serializer" in groups:
+            results += bench_serializer(min_time)
+        if "parse" in groups:
+            results += bench_parse(["10K", "1M"] if quick else ["10K", "1M", "10M"], min_time)
+        if "e2e" in groups:
+            results += bench_e2e(cli, concurrency, 16 if quick else 64, latency_ms)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return {
+        "schema_version": SCHEMA_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "json_backend": json_backend.get_json_backend(),
+        "quick": quick,
+        "results": results,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--only", default=",".join(GROUPS), help=f"comma separated subset of {','.join(GROUPS)}")
+    ap.add_argument("--quick", action="store_true", help="shorter runs and smaller inputs")
+    ap.add_argument("--concurrency", default="1,4,16", help="e2e concurrency levels")
+    ap.add_argument("--latency-ms", type=float, default=20.0, help="simulated model latency for e2e")
+    ap.add_argument("--output", help="write JSON results to this file")
+    ap.add_argument("--json", action="store_true", help="print JSON results instead of a table")
+    ap.add_argument("--baseline", help="JSON results to compare against; exits 1 on regressions")
+    ap.add_argument("--tolerance", type=float, default=0.15, help="allowed relative regression")
+    args = ap.parse_args(argv)
+    groups = [g.strip() for g in args.only.split(",") if g.strip()]
+    unknown = set(groups) - set(GROUPS)
+    if unknown:
+        ap.error(f"unknown groups: {', '.join(sorted(unknown))}")
+    report = run(
+        groups,
+        quick=args.quick,
+        concurrency=[int(c) for c in args.concurrency.split(",")],
+        latency_ms=args.latency_ms,
+    )
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for r in report["results"]:
+            params = " ".join(f"{k}={v}" for k, v in r["params"].items())
+            print(f"{r['group']:>10} {r['case']:>16} {r['value']:>12.3f} {r['unit']:<14} {params}")
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        regressions = compare(report["results"], baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+"""
+Microbenchmark for ConvoVarsSerializer.
+
+Compares the previous recursive encoder with the current iterative one (with and
+without JSON sniffing) on the serializer cases from bench_sdk.py plus a wide tree.
+Outputs of the legacy and current encoder are checked to be identical.
+
+    python benchmarks/bench_vars_serializer.py
+    python benchmarks/bench_vars_serializer.py --json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Any, Callable, Dict, List
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.abspath(os.path.join(HERE, "..", "src")))
+sys.path.insert(0, HERE)
+from convo_lang.convo_vars_serializer import ConvoVarsSerializer
+from bench_sdk import serializer_cases
+
+
+class LegacyConvoVarsSerializer:
+    """The original implementation: recursive, one string per nested value."""
+
+    def to_convo_vars(self, vars_dict: Dict[str, Any]) -> str:
+        return self._encode_object(vars_dict)
+
+    def _encode_value(self, value: Any) -> str:
+        if isinstance(value, bool):
+            return "true" if value else "false"
+        if value is None:
+            return "null"
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return str(value)
+        if isinstance(value, dict):
+            return self._encode_object(value)
+        if isinstance(value, (list, tuple)):
+            return self._encode_array(list(value))
+        if isinstance(value, str):
+            parsed = self._try_parse_json_string(value)
+            if parsed is not None:
+                return self._encode_value(parsed)
+            return json.dumps(value, ensure_ascii=False)
+        normalized = value.replace("\r\n", " ").replace("\n", " ").strip()
+        return json.dumps(normalized, ensure_ascii=False)
+
+    def _try_parse_json_string(self, value: str) -> Any:
+        value = value.strip()
+        if not value or value[0] not in "{[":
+            return None
+        try:
+            return json.loads(value)
+        except Exception:
+            return None
+
+    def _encode_object(self, obj: Dict[str, Any]) -> str:
+        return "{" + ", ".join(f"{k}:{self._encode_value(v)}" for k, v in obj.items()) + "}"
+
+    def _encode_array(self, arr: List[Any]) -> str:
+        return "[" + ", ".join(self._encode_value(v) for v in arr) + "]"
+
+
+def _cases() -> Dict[str, Dict[str, Any]]:
+    cases = serializer_cases()
+    cases["wide"] = {
+        "rows": [{"id": i, "name": f"row {i}", "score": i / 7, "ok": i % 2 == 0} for i in range(5000)]
+    }
+    return cases
+
+
+def _time(fn: Callable[[], Any], min_time: float) -> float:
+    runs = 0
+    start = time.perf_counter()
+    while True:
+        fn()
+        runs += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return elapsed / runs
+
+
+def run(min_time: float) -> List[Dict[str, Any]]:
+    encoders = {
+        "legacy": LegacyConvoVarsSerializer(),
+        "iterative": ConvoVarsSerializer(),
+        "iterative_no_sniff": ConvoVarsSerializer(sniff_json=False),
+    }
+    results = []
+    for name, variables in _cases().items():
+        expected = encoders["legacy"].to_convo_vars(variables)
+        if encoders["iterative"].to_convo_vars(variables) != expected:
+            raise AssertionError(f"{name}: iterative output differs from legacy output")
+        for encoder_name, encoder in encoders.items():
+            seconds = _time(lambda: encoder.to_convo_vars(variables), min_time)
+            results.append({
+                "case": name,
+                "encoder": encoder_name,
+                "output_bytes": len(expected),
+                "seconds": seconds,
+                "mb_per_s": len(expected) / seconds / 1e6,
+            })
+    return results
+
+
+def main(argv: List[str] = None) -> None:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--min-time", type=float, default=0.5, help="seconds to repeat each case")
+    ap.add_argument("--json", action="store_true", help="print results as JSON")
+    args = ap.parse_args(argv)
+    results = run(args.min_time)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'case':>14} {'encoder':>20} {'bytes':>9} {'us':>10} {'MB/s':>8}")
+    for r in results:
+        print(f"{r['case']:>14} {r['encoder']:>20} {r['output_bytes']:>9} "
+              f"{r['seconds'] * 1e6:>10.1f} {r['mb_per_s']:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
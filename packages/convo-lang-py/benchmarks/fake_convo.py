@@ -0,0 +1,91 @@
+"""
+Stand-in for the `convo` CLI used by the SDK benchmarks.
+
+Accepts the arguments ConvoCLIRunner passes (source path or --stdin, --vars,
+--config, --prefixOutput, --print-*), waits FAKE_CONVO_LATENCY_MS milliseconds
+and prints a transcript shaped like the real CLI output: the conversation as `:`
+lines followed by the `f:`, `s:` and `m:` JSON sections.
+
+Environment:
+    FAKE_CONVO_LATENCY_MS   simulated model latency (default 0)
+    FAKE_CONVO_REPLY_BYTES  size of the generated assistant reply (default 64)
+    FAKE_CONVO_EXIT_CODE    exit with this code after printing (default 0)
+"""
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+
+def _parse_args(argv: List[str]) -> Dict[str, Any]:
+    args: Dict[str, Any] = {"source_path": None, "stdin": False, "vars": None, "prefix": False, "print": set()}
+    i = 0
+    while i < len(argv):
+        arg = argv[i]
+        if arg == "--stdin":
+            args["stdin"] = True
+        elif arg in ("--vars", "--config", "--vars-path"):
+            args[arg[2:].replace("-", "_")] = argv[i + 1] if i + 1 < len(argv) else None
+            i += 1
+        elif arg == "--prefixOutput":
+            args["prefix"] = True
+        elif arg.startswith("--print-"):
+            args["print"].add(arg[len("--print-"):])
+        elif not arg.startswith("--") and args["source_path"] is None:
+            args["source_path"] = arg
+        i += 1
+    return args
+
+
+def _prefixed(prefix: str, value: Any) -> List[str]:
+    return [prefix + line for line in json.dumps(value, indent=4).split("\n")]
+
+
+def _messages(source: str) -> List[Dict[str, str]]:
+    messages: List[Dict[str, str]] = []
+    role: Optional[str] = None
+    body: List[str] = []
+    for line in source.splitlines() + ["> end"]:
+        if line.startswith(">"):
+            if role in ("user", "assistant", "system"):
+                messages.append({"role": role, "content": "\n".join(body).strip()})
+            role = line[1:].strip().split(" ")[0]
+            body = []
+        else:
+            body.append(line)
+    return messages
+
+
+def main(argv: List[str]) -> int:
+    args = _parse_args(argv)
+    if args["stdin"]:
+        source = sys.stdin.read()
+    elif args["source_path"]:
+        with open(args["source_path"], encoding="utf-8") as f:
+            source = f.read()
+    else:
+        sys.stderr.write("No source provided\n")
+        return 1
+    latency = float(os.environ.get("FAKE_CONVO_LATENCY_MS", "0")) / 1000
+    if latency > 0:
+        time.sleep(latency)
+    reply_bytes = int(os.environ.get("FAKE_CONVO_REPLY_BYTES", "64"))
+    reply = ("lorem ipsum " * (reply_bytes // 12 + 1))[:reply_bytes].strip() or "ok"
+    convo = source.rstrip() + f"\n\n> assistant\n{reply}\n"
+    messages = _messages(source) + [{"role": "assistant", "content": reply}]
+    lead = ":" if args["prefix"] else ""
+    out = [lead + line for line in convo.split("\n")]
+    if "flat" in args["print"]:
+        out += _prefixed("f:" if args["prefix"] else "", messages)
+    if "state" in args["print"]:
+        state = {"vars_bytes": len(args["vars"] or "")}
+        out += _prefixed("s:" if args["prefix"] else "", state)
+    if "messages" in args["print"]:
+        out += _prefixed("m:" if args["prefix"] else "", [dict(m, tags=[]) for m in messages])
+    sys.stdout.write("\n".join(out) + "\n")
+    return int(os.environ.get("FAKE_CONVO_EXIT_CODE", "0"))
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -2,7 +2,7 @@ import json
 import os
 
 from dotenv import load_dotenv
-from convo_lang import Conversation
+from convo_lang import Pipeline
 
 from exporters.txt_exporter import resume_to_txt
 
@@ -14,49 +14,51 @@ agent_configs={
     "defaultModel": defaultModel
 }
 
-print("Running JobDescriptionAnalyzer agent...")
 with open("data/job_description.txt", "r", encoding="utf-8") as f:
-        job_description = f.read()
-convo_job_description_analyzer = Conversation(agent_configs)
-convo_job_description_analyzer.add_convo_file(
-    "agents/jobDescriptionAnalyzer.convo"
-)
-job_data = convo_job_description_analyzer.complete(
-    variables={"job_description": job_description}
-)
-
-print("Running CandidateProfileAnalyzer agent...")
+    job_description = f.read()
 with open("data/candidate_profile.txt", "r", encoding="utf-8") as f:
     candidate_profile = f.read()
-convo_candidate_profile_analyzer = Conversation(agent_configs)
-convo_candidate_profile_analyzer.add_convo_file(
-    "agents/candidateProfileAnalyzer.convo"
+
+# The two analyzers don't depend on each other and run concurrently,
+# as do the resume writer and the fit evaluator once matching is done
+pipeline = Pipeline(config=agent_configs)
+pipeline.add(
+    "job_data",
+    "agents/jobDescriptionAnalyzer.convo",
+    inputs={"job_description": "job_description"},
 )
-profile_data = convo_candidate_profile_analyzer.complete(
-    variables={"candidate_profile": candidate_profile}
+pipeline.add(
+    "profile_data",
+    "agents/candidateProfileAnalyzer.convo",
+    inputs={"candidate_profile": "candidate_profile"},
 )
-
-print("Running ProfileJobMatcher agent...")
-convo_profile_job_matcher = Conversation(agent_configs)
-convo_profile_job_matcher.add_convo_file("agents/profileJobMatcher.convo")
-match_data = convo_profile_job_matcher.complete(
-    variables={"job_data": job_data, "profile_data": profile_data}
+pipeline.add(
+    "match_data",
+    "agents/profileJobMatcher.convo",
+    inputs={"job_data": "job_data", "profile_data": "profile_data"},
 )
-
-print("Running ResumeWriter agent...")
-convo_resume_writer = Conversation(agent_configs)
-convo_resume_writer.add_convo_file("agents/resumeWriter.convo")
-resume_data = convo_resume_writer.complete(
-    variables={"job_data": job_data, "match_data": match_data}
+pipeline.add(
+    "resume_data",
+    "agents/resumeWriter.convo",
+    inputs={"job_data": "job_data", "match_data": "match_data"},
 )
-
-print("Running FitEvaluator agent...")
-convo_fit_evaluator = Conversation(agent_configs)
-convo_fit_evaluator.add_convo_file("agents/fitEvaluator.convo")
-job_apply_decision = convo_fit_evaluator.complete(
-    variables={"job_data": job_data, "match_data": match_data}
+pipeline.add(
+    "job_apply_decision",
+    "agents/fitEvaluator.convo",
+    inputs={"job_data": "job_data", "match_data": "match_data"},
 )
 
+print("Running agents...")
+result = pipeline.run({
+    "job_description": job_description,
+    "candidate_profile": candidate_profile,
+})
+print(result.timings())
+if not result.ok:
+    raise SystemExit(f"Pipeline failed: {result.errors}")
+resume_data = result["resume_data"]
+job_apply_decision = result["job_apply_decision"]
+
 print("Creating resume...")
 txt_content = resume_to_txt(json.loads(resume_data))
 resume_file = "output/resume.txt"
@@ -1,17 +1,82 @@
-from .conversation import Conversation
+from .batch import BatchItemResult, BatchResult, BatchStats
+from .callback_bridge import CallbackCall
+from .completion_cache import (
+    CompletionCache,
+    MemoryCompletionCache,
+    SQLiteCompletionCache,
+)
+from .conversation import Conversation, complete_all
+from .conversation_store import ConversationStore, StoreStats
 from .convo_cli_runner import ConvoCLIRunner
+from .convo_segments import ConvoSegment
+from .convo_cli_pool import ConvoCLIPool
+from .async_convo_cli_runner import AsyncConvoCLIRunner
+from .http_runner import AsyncHttpChatRunner, HttpChatRunner
+from .instrumentation import (
+    HistogramAggregator,
+    Instrumentation,
+    InstrumentationHook,
+    RunEvent,
+    SpanEmitter,
+)
+from .resilience import HedgePolicy, ResilienceStats, RetryPolicy
+from .scheduler import CompletionScheduler, ModelLimits
+from .windowing import WindowPolicy, WindowReport
+from .templates import ConvoTemplate, TemplateRegistry
+from .pipeline import Pipeline, PipelineResult, PipelineStep, StepResult
+from .transcript_parser import OutputProfile
+from .convo_parser import parse_convo
 from .errors import (
     ConvoNotFound,
     ExecFailed,
     Timeout,
     ParseError,
+    ConvoSyntaxError,
+    UnsupportedConvoSyntax,
 )
 
 __all__ = [
     "Conversation",
+    "complete_all",
+    "ConversationStore",
+    "StoreStats",
     "ConvoCLIRunner",
+    "ConvoSegment",
+    "ConvoCLIPool",
+    "AsyncConvoCLIRunner",
+    "HttpChatRunner",
+    "AsyncHttpChatRunner",
+    "BatchItemResult",
+    "BatchResult",
+    "BatchStats",
+    "CallbackCall",
+    "CompletionCache",
+    "MemoryCompletionCache",
+    "SQLiteCompletionCache",
+    "Instrumentation",
+    "InstrumentationHook",
+    "HistogramAggregator",
+    "SpanEmitter",
+    "RunEvent",
+    "CompletionScheduler",
+    "ModelLimits",
+    "RetryPolicy",
+    "HedgePolicy",
+    "ResilienceStats",
+    "WindowPolicy",
+    "WindowReport",
+    "ConvoTemplate",
+    "TemplateRegistry",
+    "Pipeline",
+    "PipelineStep",
+    "PipelineResult",
+    "StepResult",
+    "OutputProfile",
+    "parse_convo",
     "ConvoNotFound",
     "ExecFailed",
     "Timeout",
     "ParseError",
+    "ConvoSyntaxError",
+    "UnsupportedConvoSyntax",
 ]
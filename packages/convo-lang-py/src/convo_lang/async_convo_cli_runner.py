@@ -0,0 +1,359 @@
+from __future__ import annotations
+import asyncio
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+import os
+from pathlib import Path
+import signal
+import subprocess
+import tempfile
+import time
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from .batch import BatchItemResult, BatchResult, arun_batch
+from .convo_cli_runner import ConvoCLIRunner
+from .error_utils import raise_for_cli_failure
+from .errors import ConvoNotFound, ExecFailed, Timeout
+from .instrumentation import current_event, maybe_span, record_process
+
+
+@dataclass
+class AsyncConvoCLIRunner(ConvoCLIRunner):
+    """
+    asyncio variant of ConvoCLIRunner built on create_subprocess_exec.
+    scheduler / retry / hedge apply as in ConvoCLIRunner, with runs admitted through
+    CompletionScheduler.aadmit() and hedged runs started as concurrent tasks.
+    With instrumentation, child rusage is not recorded since the event loop reaps the process.
+    """
+
+    async def _aresilient(self, fn: Callable[[], Awaitable[str]]) -> str:
+        return await self._resilience.acall(fn) if self._resilience else await fn()
+
+    async def run_file(
+        self,
+        script_path: str,
+        *,
+        variables: Optional[Dict] = None,
+        timeout: Optional[float] = 120.0,
+        working_dir: Optional[str] = None,
+        extra_args: Optional[List[str]] = None,
+    ) -> str:
+        """
+        Run a .convo file via CLI without blocking the event loop.
+        Raises ConvoNotFound, ExecFailed, or Timeout on errors.
+        """
+        return await self._aresilient(lambda: self._run_file_once(
+            script_path,
+            variables=variables,
+            timeout=timeout,
+            working_dir=working_dir,
+            extra_args=extra_args,
+        ))
+
+    async def _run_file_once(
+        self,
+        script_path: str,
+        *,
+        variables: Optional[Dict],
+        timeout: Optional[float],
+        working_dir: Optional[str],
+        extra_args: Optional[List[str]],
+    ) -> str:
+        path = Path(script_path).resolve()
+        async with self._aadmit(path=path):
+            with self._cli_command(path, variables=variables, extra_args=extra_args) as cmd:
+                with maybe_span(self.instrumentation, "cli", transport="file"):
+                    proc = await self._run_subprocess(
+                        cmd,
+                        timeout=timeout,
+                        working_dir=working_dir,
+                    )
+                    self._raise_on_nonzero_exit(proc)
+                    return proc.stdout or ""
+
+    @asynccontextmanager
+    async def _aadmit(self, convo_text: Optional[str] = None, *, path: Optional[Path] = None) -> AsyncIterator[None]:
+        """Wait for the scheduler (if any) to admit a run without blocking the event loop."""
+        if self.scheduler is None:
+            yield
+            return
+        if convo_text is None:
+            try:
+                convo_text = path.read_text(encoding="utf-8", errors="replace") if path else ""
+            except OSError:
+                convo_text = ""
+        async with self.scheduler.aadmit_source(convo_text, self.config):
+            yield
+
+    async def run_many(
+        self,
+        items: Iterable[Optional[Dict]],
+        *,
+        script_path: Optional[str] = None,
+        convo_text: Optional[str] = None,
+        max_concurrency: Optional[int] = None,
+        ordered: bool = True,
+        timeout: Optional[float] = 120.0,
+        working_dir: Optional[str] = None,
+        extra_args: Optional[List[str]] = None,
+        on_result: Optional[Callable[[BatchItemResult], None]] = None,
+    ) -> BatchResult:
+        """Async counterpart of ConvoCLIRunner.run_many; items run as concurrent tasks."""
+        with self._batch_script_path(script_path, convo_text) as path:
+            async def run_one(variables: Optional[Dict]) -> str:
+                return await self.run_file(
+                    str(path),
+                    variables=variables,
+                    timeout=timeout,
+                    working_dir=working_dir,
+                    extra_args=extra_args,
+                )
+            return await arun_batch(
+                run_one,
+                items,
+                max_concurrency=max_concurrency,
+                ordered=ordered,
+                on_result=on_result,
+            )
+
+    async def _run_subprocess(
+        self,
+        cmd: List[str],
+        *,
+        timeout: Optional[float],
+        working_dir: Optional[str],
+        input_text: Optional[str] = None,
+    ) -> subprocess.CompletedProcess[str]:
+        """
+        Run subprocess in its own process group and map low-level errors to SDK errors.
+        On timeout or task cancellation the whole process group is killed.
+        """
+        event = current_event()
+        start = time.perf_counter()
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdin=asyncio.subprocess.PIPE if input_text is not None else None,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                cwd=working_dir or None,
+                start_new_session=os.name == "posix",
+            )
+        except FileNotFoundError as e:
+            raise ConvoNotFound(f"Convo CLI binary not found: {e}") from e
+        except OSError as e:
+            raise ExecFailed(f"Failed to execute Convo CLI: {e}") from e
+        spawned = time.perf_counter()
+        try:
+            stdout, stderr = await asyncio.wait_for(
+                proc.communicate(input_text.encode("utf-8") if input_text is not None else None),
+                timeout=timeout,
+            )
+        except asyncio.TimeoutError as e:
+            await self._kill_process_group(proc)
+            raise Timeout(f"Convo CLI timed out after {timeout} seconds") from e
+        except asyncio.CancelledError:
+            await self._kill_process_group(proc)
+            raise
+        completed = subprocess.CompletedProcess(
+            cmd,
+            proc.returncode,
+            stdout.decode("utf-8", errors="replace"),
+            stderr.decode("utf-8", errors="replace"),
+        )
+        record_process(
+            event,
+            spawn_time=spawned - start,
+            wall_time=time.perf_counter() - spawned,
+            returncode=proc.returncode,
+            stdout=completed.stdout,
+            stderr=completed.stderr,
+        )
+        return completed
+
+    @staticmethod
+    async def _kill_process_group(proc: asyncio.subprocess.Process) -> None:
+        """Kill the CLI and every process it spawned."""
+        if proc.returncode is not None:
+            return
+        try:
+            if os.name == "posix":
+                os.killpg(proc.pid, signal.SIGKILL)
+            else:
+                proc.kill()
+        except (ProcessLookupError, PermissionError):
+            pass
+        await proc.wait()
+
+    async def run_text(
+        self,
+        convo_text: str,
+        *,
+        variables: Optional[Dict] = None,
+        timeout: Optional[float] = 120.0,
+        working_dir: Optional[str] = None,
+        extra_args: Optional[List[str]] = None,
+        keep_temp: bool = False,
+    ) -> str:
+        """
+        Materialize `convo_text` to a temp file and run it via CLI.
+        If keep_temp=True, the temp file is preserved (useful for debugging).
+        With use_stdin the source is piped to the CLI and no file is written.
+        """
+        if not convo_text.strip():
+            raise ExecFailed("Empty .convo text submitted to runner.")
+        if self.use_stdin:
+            return await self._aresilient(lambda: self._run_stdin(
+                convo_text,
+                variables=variables,
+                timeout=timeout,
+                working_dir=working_dir,
+                extra_args=extra_args,
+            ))
+        tmp = tempfile.NamedTemporaryFile(
+            prefix="convo_",
+            suffix=".convo",
+            delete=False,
+            mode="w",
+            encoding="utf-8"
+        )
+        tmp_path = Path(tmp.name)
+        try:
+            tmp.write(convo_text)
+            tmp.close()
+            return await self.run_file(
+                str(tmp_path),
+                variables=variables,
+                timeout=timeout,
+                working_dir=working_dir,
+                extra_args=extra_args,
+            )
+        finally:
+            if not keep_temp:
+                try:
+                    tmp_path.unlink(missing_ok=True)
+                except Exception:
+                    pass
+
+    async def _run_stdin(
+        self,
+        convo_text: str,
+        *,
+        variables: Optional[Dict],
+        timeout: Optional[float],
+        working_dir: Optional[str],
+        extra_args: Optional[List[str]],
+    ) -> str:
+        async with self._aadmit(convo_text):
+            with self._cli_command(None, variables=variables, extra_args=extra_args) as cmd:
+                with maybe_span(self.instrumentation, "cli", transport="stdin"):
+                    proc = await self._run_subprocess(
+                        cmd,
+                        timeout=timeout,
+                        working_dir=working_dir,
+                        input_text=convo_text,
+                    )
+                    self._raise_on_nonzero_exit(proc)
+                    return proc.stdout or ""
+
+    async def stream_text(
+        self,
+        convo_text: str,
+        *,
+        variables: Optional[Dict] = None,
+        timeout: Optional[float] = 120.0,
+        working_dir: Optional[str] = None,
+        extra_args: Optional[List[str]] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Run `convo_text` via CLI and yield stdout lines (without newlines) as they
+        are written. Errors are raised once the CLI exits; on timeout, cancellation
+        or early close the process group is killed.
+        """
+        if not convo_text.strip():
+            raise ExecFailed("Empty .convo text submitted to runner.")
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        with self._stream_source(convo_text) as (path, input_text):
+            async with self._aadmit(convo_text):
+                with self._cli_command(path, variables=variables, extra_args=extra_args) as cmd:
+                    try:
+                        proc = await asyncio.create_subprocess_exec(
+                            *cmd,
+                            stdin=asyncio.subprocess.PIPE if input_text is not None else asyncio.subprocess.DEVNULL,
+                            stdout=asyncio.subprocess.PIPE,
+                            stderr=asyncio.subprocess.PIPE,
+                            cwd=working_dir or None,
+                            start_new_session=os.name == "posix",
+                        )
+                    except FileNotFoundError as e:
+                        raise ConvoNotFound(f"Convo CLI binary not found: {e}") from e
+                    except OSError as e:
+                        raise ExecFailed(f"Failed to execute Convo CLI: {e}") from e
+
+                    async def feed_stdin() -> None:
+                        if input_text is None:
+                            return
+                        try:
+                            proc.stdin.write(input_text.encode("utf-8"))
+                            await proc.stdin.drain()
+                            proc.stdin.close()
+                        except (BrokenPipeError, ConnectionResetError):
+                            pass
+
+                    stdin_task = asyncio.ensure_future(feed_stdin())
+                    stderr_task = asyncio.ensure_future(proc.stderr.read())
+                    stdout_parts: List[str] = []
+                    lines = _read_lines(proc.stdout)
+                    try:
+                        while True:
+                            remaining = None if deadline is None else max(0.0, deadline - loop.time())
+                            try:
+                                raw = await asyncio.wait_for(lines.__anext__(), timeout=remaining)
+                            except StopAsyncIteration:
+                                break
+                            except asyncio.TimeoutError as e:
+                                raise Timeout(f"Convo CLI timed out after {timeout} seconds") from e
+                            line = raw.decode("utf-8", errors="replace")
+                            stdout_parts.append(line)
+                            yield line.rstrip("\r\n")
+                        await proc.wait()
+                    except BaseException:
+                        stderr_task.cancel()
+                        raise
+                    finally:
+                        await lines.aclose()
+                        await self._kill_process_group(proc)
+                        stdin_task.cancel()
+                    stderr = (await stderr_task).decode("utf-8", errors="replace")
+                    if proc.returncode != 0:
+                        raise_for_cli_failure(
+                            returncode=proc.returncode,
+                            stdout="".join(stdout_parts),
+                            stderr=stderr,
+                        )
+
+
+async def _read_lines(stream: asyncio.StreamReader, chunk_size: int = 64 * 1024) -> AsyncIterator[bytes]:
+    """
+    Yield lines (with their newline) read in fixed-size chunks. Unlike
+    StreamReader.readline() there is no line length limit: a long reply or a large
+    `f:`/`s:` JSON line does not raise ValueError.
+    """
+    pending: List[bytes] = []
+    while True:
+        chunk = await stream.read(chunk_size)
+        if not chunk:
+            if pending:
+                yield b"".join(pending)
+            return
+        start = 0
+        end = chunk.find(b"\n")
+        while end != -1:
+            pending.append(chunk[start:end + 1])
+            yield b"".join(pending)
+            pending = []
+            start = end + 1
+            end = chunk.find(b"\n", start)
+        if start < len(chunk):
+            pending.append(chunk[start:])
@@ -0,0 +1,188 @@
+from __future__ import annotations
+import asyncio
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+import itertools
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, Iterator, List, Optional
+
+
+def default_concurrency() -> int:
+    return os.cpu_count() or 4
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Linear-interpolated percentile (q in 0..100) of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    pos = (len(sorted_values) - 1) * q / 100.0
+    lo = int(pos)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (pos - lo)
+
+
+@dataclass
+class BatchItemResult:
+    """Outcome of one item in a batch run."""
+    index: int
+    item: Any
+    value: Any = None
+    error: Optional[BaseException] = None
+    duration: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@dataclass
+class BatchStats:
+    """Aggregate throughput and latency (seconds) for a batch run."""
+    count: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    wall_time: float = 0.0
+    throughput: float = 0.0
+    latency_min: float = 0.0
+    latency_mean: float = 0.0
+    latency_p50: float = 0.0
+    latency_p90: float = 0.0
+    latency_p95: float = 0.0
+    latency_p99: float = 0.0
+    latency_max: float = 0.0
+
+    @classmethod
+    def from_results(cls, results: Iterable[BatchItemResult], wall_time: float) -> "BatchStats":
+        results = list(results)
+        durations = sorted(r.duration for r in results)
+        failed = sum(1 for r in results if not r.ok)
+        return cls(
+            count=len(results),
+            succeeded=len(results) - failed,
+            failed=failed,
+            wall_time=wall_time,
+            throughput=len(results) / wall_time if wall_time > 0 else 0.0,
+            latency_min=durations[0] if durations else 0.0,
+            latency_mean=sum(durations) / len(durations) if durations else 0.0,
+            latency_p50=percentile(durations, 50),
+            latency_p90=percentile(durations, 90),
+            latency_p95=percentile(durations, 95),
+            latency_p99=percentile(durations, 99),
+            latency_max=durations[-1] if durations else 0.0,
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(self.__dict__)
+
+
+@dataclass
+class BatchResult:
+    """Per-item results plus aggregate stats; failed items carry their exception."""
+    results: List[BatchItemResult] = field(default_factory=list)
+    stats: BatchStats = field(default_factory=BatchStats)
+
+    @property
+    def values(self) -> List[Any]:
+        return [r.value for r in self.results]
+
+    @property
+    def errors(self) -> List[BatchItemResult]:
+        return [r for r in self.results if not r.ok]
+
+
+def _timed_call(fn: Callable[[Any], Any], index: int, item: Any) -> BatchItemResult:
+    start = time.perf_counter()
+    try:
+        value = fn(item)
+        return BatchItemResult(index, item, value=value, duration=time.perf_counter() - start)
+    except Exception as e:
+        return BatchItemResult(index, item, error=e, duration=time.perf_counter() - start)
+
+
+def iter_batch(
+    fn: Callable[[Any], Any],
+    items: Iterable[Any],
+    *,
+    max_concurrency: Optional[int] = None,
+) -> Iterator[BatchItemResult]:
+    """
+    Apply `fn` to every item on a thread pool and yield results as they complete.
+    At most `max_concurrency` items are in flight, so `items` may be a lazy iterable.
+    Exceptions raised by `fn` are captured on the result instead of aborting the batch.
+    """
+    limit = max(1, max_concurrency or default_concurrency())
+    pending = iter(enumerate(items))
+    with ThreadPoolExecutor(max_workers=limit) as pool:
+        in_flight = set()
+        for index, item in itertools.islice(pending, limit):
+            in_flight.add(pool.submit(_timed_call, fn, index, item))
+        while in_flight:
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for fut in done:
+                yield fut.result()
+            for index, item in itertools.islice(pending, len(done)):
+                in_flight.add(pool.submit(_timed_call, fn, index, item))
+
+
+def run_batch(
+    fn: Callable[[Any], Any],
+    items: Iterable[Any],
+    *,
+    max_concurrency: Optional[int] = None,
+    ordered: bool = True,
+    on_result: Optional[Callable[[BatchItemResult], None]] = None,
+) -> BatchResult:
+    """
+    Run `fn` over `items` with bounded parallelism and collect a BatchResult.
+    Results are in input order when `ordered`, otherwise in completion order.
+    `on_result` is called as each item completes.
+    """
+    start = time.perf_counter()
+    results: List[BatchItemResult] = []
+    for result in iter_batch(fn, items, max_concurrency=max_concurrency):
+        if on_result:
+            on_result(result)
+        results.append(result)
+    wall_time = time.perf_counter() - start
+    if ordered:
+        results.sort(key=lambda r: r.index)
+    return BatchResult(results=results, stats=BatchStats.from_results(results, wall_time))
+
+
+async def arun_batch(
+    fn: Callable[[Any], Awaitable[Any]],
+    items: Iterable[Any],
+    *,
+    max_concurrency: Optional[int] = None,
+    ordered: bool = True,
+    on_result: Optional[Callable[[BatchItemResult], None]] = None,
+) -> BatchResult:
+    """
+    asyncio counterpart of run_batch for a coroutine function `fn`: at most
+    `max_concurrency` items are awaited at a time, pulled lazily from `items`.
+    """
+    start = time.perf_counter()
+    results: List[BatchItemResult] = []
+    pending = iter(enumerate(items))
+
+    async def worker() -> None:
+        for index, item in pending:
+            item_start = time.perf_counter()
+            try:
+                result = BatchItemResult(index, item, value=await fn(item))
+            except Exception as e:
+                result = BatchItemResult(index, item, error=e)
+            result.duration = time.perf_counter() - item_start
+            if on_result:
+                on_result(result)
+            results.append(result)
+
+    limit = max(1, max_concurrency or default_concurrency())
+    await asyncio.gather(*(worker() for _ in range(limit)))
+    wall_time = time.perf_counter() - start
+    if ordered:
+        results.sort(key=lambda r: r.index)
+    return BatchResult(results=results, stats=BatchStats.from_results(results, wall_time))
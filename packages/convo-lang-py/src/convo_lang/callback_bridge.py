@@ -0,0 +1,174 @@
+from __future__ import annotations
+import asyncio
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from dataclasses import dataclass, field
+import inspect
+import json
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+CALL_PREFIX = "CALL:"
+# Marker lines the CLI prints around its output sections in --cmd-mode
+CMD_MODE_MARKERS = frozenset(("FLAT:", "STATE:", "MESSAGES:", "END:"))
+
+
+@dataclass
+class CallbackCall:
+    """One function call made by the CLI into a Python callback."""
+    index: int
+    fn: str
+    args: List[Any]
+    result: Any = None
+    error: Optional[str] = None
+    latency: Optional[float] = None
+    timed_out: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@dataclass
+class CallbackBridge:
+    """
+    Answers `CALL:{"fn", "args"}` requests from `convo --cmd-mode` using Python callbacks.
+
+    Calls are dispatched as soon as they are read, so several calls made in one turn
+    run concurrently: plain functions on a thread pool of `max_workers`, coroutine
+    functions on an event loop owned by the bridge. The CLI matches replies to calls
+    in order, so `RESULT:`/`ERROR:` lines are written in call order. A call that does
+    not finish within `timeout` seconds is answered with an error (a running thread
+    cannot be interrupted and keeps its pool slot until it returns).
+    """
+    callbacks: Dict[str, Callable[..., Any]]
+    write: Callable[[str], None]
+    max_workers: int = 4
+    timeout: Optional[float] = 30.0
+    on_call: Optional[Callable[[CallbackCall], None]] = None
+    calls: List[CallbackCall] = field(init=False, default_factory=list)
+    _executor: Optional[ThreadPoolExecutor] = field(init=False, repr=False, default=None)
+    _loop: Optional[asyncio.AbstractEventLoop] = field(init=False, repr=False, default=None)
+    # Guards the lazy start of _loop: worker threads awaiting callback results race for it
+    _loop_lock: threading.Lock = field(init=False, repr=False, default_factory=threading.Lock)
+    _pending: "queue.Queue[Optional[Tuple[CallbackCall, Future, Optional[float]]]]" = field(
+        init=False, repr=False, default_factory=queue.Queue
+    )
+    _writer: Optional[threading.Thread] = field(init=False, repr=False, default=None)
+
+    def __enter__(self) -> "CallbackBridge":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def dispatch(self, line: str) -> None:
+        """Start the call described by a `CALL:` line; its reply is written asynchronously."""
+        payload = line[len(CALL_PREFIX):] if line.startswith(CALL_PREFIX) else line
+        call = CallbackCall(index=len(self.calls), fn="", args=[])
+        self.calls.append(call)
+        try:
+            request = json.loads(payload)
+            call.fn = str(request.get("fn") or "")
+            call.args = list(request.get("args") or [])
+            future = self._submit(call)
+        except Exception as e:
+            future = Future()
+            future.set_exception(e)
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        if self._writer is None:
+            self._writer = threading.Thread(target=self._write_replies, daemon=True)
+            self._writer.start()
+        self._pending.put((call, future, deadline))
+
+    def _submit(self, call: CallbackCall) -> Future:
+        fn = self.callbacks.get(call.fn)
+        if fn is None:
+            raise LookupError(f"Unknown function {call.fn!r}")
+        if inspect.iscoroutinefunction(fn):
+            return asyncio.run_coroutine_threadsafe(self._timed_async(call, fn), self._event_loop())
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix="convo_callback")
+        return self._executor.submit(self._timed, call, fn)
+
+    def _timed(self, call: CallbackCall, fn: Callable[..., Any]) -> Any:
+        start = time.perf_counter()
+        try:
+            result = fn(*call.args)
+            if inspect.isawaitable(result):
+                result = asyncio.run_coroutine_threadsafe(_await(result), self._event_loop()).result()
+            return result
+        finally:
+            call.latency = time.perf_counter() - start
+
+    async def _timed_async(self, call: CallbackCall, fn: Callable[..., Any]) -> Any:
+        start = time.perf_counter()
+        try:
+            return await fn(*call.args)
+        finally:
+            call.latency = time.perf_counter() - start
+
+    def _event_loop(self) -> asyncio.AbstractEventLoop:
+        with self._loop_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=_run_loop, args=(loop,), daemon=True, name="convo_callback_loop").start()
+                self._loop = loop
+            return self._loop
+
+    def _write_replies(self) -> None:
+        while True:
+            item = self._pending.get()
+            if item is None:
+                return
+            call, future, deadline = item
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                call.result = future.result(timeout=remaining)
+                reply = "RESULT:" + json.dumps(call.result, ensure_ascii=False, default=str)
+            except FutureTimeout:
+                future.cancel()
+                call.timed_out = True
+                call.latency = self.timeout
+                call.error = f"Callback {call.fn!r} timed out after {self.timeout} seconds"
+                reply = "ERROR:" + call.error
+            except BaseException as e:
+                call.error = f"{type(e).__name__}: {e}"
+                reply = "ERROR:" + call.error
+            if self.on_call:
+                try:
+                    self.on_call(call)
+                except Exception:
+                    pass
+            try:
+                # Replies are line framed, so a multi-line error message must be flattened
+                self.write(reply.replace("\r", " ").replace("\n", " ") + "\n")
+            except OSError:
+                pass
+
+    def close(self) -> None:
+        """Wait for outstanding replies to be written, then stop the pool and loop."""
+        if self._writer is not None:
+            self._pending.put(None)
+            self._writer.join()
+            self._writer = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        with self._loop_lock:
+            loop, self._loop = self._loop, None
+        if loop is not None:
+            loop.call_soon_threadsafe(loop.stop)
+
+
+async def _await(awaitable: Any) -> Any:
+    return await awaitable
+
+
+def _run_loop(loop: asyncio.AbstractEventLoop) -> None:
+    try:
+        loop.run_forever()
+    finally:
+        loop.close()
@@ -0,0 +1,231 @@
+from __future__ import annotations
+from collections import OrderedDict
+from dataclasses import dataclass
+import hashlib
+import json
+from pathlib import Path
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .convo_vars_serializer import ConvoVarsSerializer
+
+
+def completion_cache_key(
+    convo_text: str,
+    variables: Optional[Dict[str, Any]] = None,
+    config: Optional[Dict[str, Any]] = None,
+    extra_args: Optional[List[str]] = None,
+) -> str:
+    """Stable SHA-256 over the source, serialized vars, config and CLI args."""
+    parts = [
+        convo_text,
+        ConvoVarsSerializer().to_convo_vars(vars_dict=variables) if variables else "",
+        json.dumps(config or {}, sort_keys=True, ensure_ascii=False, default=str),
+        json.dumps(list(extra_args or [])),
+    ]
+    h = hashlib.sha256()
+    for part in parts:
+        data = part.encode("utf-8")
+        # Length prefixes keep ("ab", "c") and ("a", "bc") from colliding
+        h.update(len(data).to_bytes(8, "big"))
+        h.update(data)
+    return h.hexdigest()
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    sets: int = 0
+    evictions: int = 0
+    expirations: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**self.__dict__, "hit_rate": self.hit_rate}
+
+
+class CompletionCache:
+    """
+    Base class for transcript caches consulted by Conversation.complete.
+    Implementations map a completion_cache_key to the raw CLI transcript.
+    """
+
+    def __init__(self) -> None:
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        raise NotImplementedError
+
+    def set(self, key: str, transcript: str) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+
+class MemoryCompletionCache(CompletionCache):
+    """Thread-safe in-memory LRU bounded by entry count and total transcript size."""
+
+    def __init__(
+        self,
+        *,
+        max_entries: int = 1024,
+        max_bytes: Optional[int] = None,
+        ttl: Optional[float] = None,
+    ):
+        super().__init__()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._bytes = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats.misses += 1
+                return None
+            transcript, created = entry
+            if self.ttl is not None and time.time() - created > self.ttl:
+                self._remove(key)
+                self.stats.expirations += 1
+                self.stats.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return transcript
+
+    def set(self, key: str, transcript: str) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (transcript, time.time())
+            self._bytes += len(transcript)
+            self.stats.sets += 1
+            while self._entries and (
+                len(self._entries) > self.max_entries
+                or (self.max_bytes is not None and self._bytes > self.max_bytes)
+            ):
+                self._remove(next(iter(self._entries)))
+                self.stats.evictions += 1
+
+    def _remove(self, key: str) -> None:
+        transcript, _ = self._entries.pop(key)
+        self._bytes -= len(transcript)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+class SQLiteCompletionCache(CompletionCache):
+    """
+    On-disk cache in a single SQLite file, shared across processes.
+    Entries expire after `ttl` seconds; least recently used entries are evicted
+    once `max_entries` or `max_bytes` is exceeded.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        max_entries: Optional[int] = 100_000,
+        max_bytes: Optional[int] = None,
+        ttl: Optional[float] = None,
+    ):
+        super().__init__()
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS completions ("
+                " key TEXT PRIMARY KEY,"
+                " transcript TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " created REAL NOT NULL,"
+                " accessed REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS completions_accessed ON completions(accessed)"
+            )
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT transcript, created FROM completions WHERE key=?", (key,)
+            ).fetchone()
+            if row is None:
+                self.stats.misses += 1
+                return None
+            transcript, created = row
+            if self.ttl is not None and now - created > self.ttl:
+                self._conn.execute("DELETE FROM completions WHERE key=?", (key,))
+                self.stats.expirations += 1
+                self.stats.misses += 1
+                return None
+            self._conn.execute("UPDATE completions SET accessed=? WHERE key=?", (now, key))
+            self.stats.hits += 1
+            return transcript
+
+    def set(self, key: str, transcript: str) -> None:
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO completions (key, transcript, size, created, accessed)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, transcript, len(transcript), now, now),
+            )
+            self.stats.sets += 1
+            self._evict()
+
+    def _evict(self) -> None:
+        if self.ttl is not None:
+            cur = self._conn.execute(
+                "DELETE FROM completions WHERE created < ?", (time.time() - self.ttl,)
+            )
+            self.stats.expirations += max(cur.rowcount, 0)
+        count, total = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM completions"
+        ).fetchone()
+        while count and (
+            (self.max_entries is not None and count > self.max_entries)
+            or (self.max_bytes is not None and total > self.max_bytes)
+        ):
+            key, size = self._conn.execute(
+                "SELECT key, size FROM completions ORDER BY accessed LIMIT 1"
+            ).fetchone()
+            self._conn.execute("DELETE FROM completions WHERE key=?", (key,))
+            self.stats.evictions += 1
+            count -= 1
+            total -= size
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM completions").fetchone()[0]
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM completions")
+
+    def close(self) -> None:
+        self._conn.close()
@@ -0,0 +1,181 @@
+from __future__ import annotations
+import atexit
+from collections import OrderedDict
+from dataclasses import dataclass, field
+import hashlib
+import os
+from pathlib import Path
+import shutil
+import stat
+import tempfile
+import threading
+from typing import Dict, Optional, Tuple
+
+CACHE_DIR_ENV = "CONVO_LANG_CACHE_DIR"
+# Budget for unused files kept by private_files() before the least recently used are deleted
+PRIVATE_FILES_MAX_BYTES = 64 * 1024 * 1024
+
+
+def default_cache_dir() -> Path:
+    """
+    Directory for SDK-managed cache files ($CONVO_LANG_CACHE_DIR or
+    <tmp>/convo_lang_cache-<uid>, one per user on POSIX).
+    """
+    env = os.environ.get(CACHE_DIR_ENV)
+    if env:
+        return Path(env)
+    name = f"convo_lang_cache-{os.getuid()}" if hasattr(os, "getuid") else "convo_lang_cache"
+    return Path(tempfile.gettempdir()) / name
+
+
+def content_hash(content: str) -> str:
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def ensure_private_dir(root: Path) -> None:
+    """
+    Create `root` with 0700 permissions, or check an existing one: it must be a real
+    directory owned by the current user, and group/other access is removed.
+    Raises PermissionError for a symlink, a non-directory or another user's directory.
+    """
+    root.mkdir(mode=0o700, parents=True, exist_ok=True)
+    info = os.lstat(root)
+    if not stat.S_ISDIR(info.st_mode):
+        raise PermissionError(f"Cache directory {root} is not a directory (or is a symlink)")
+    if not hasattr(os, "getuid"):  # pragma: no cover - no POSIX ownership on Windows
+        return
+    if info.st_uid != os.getuid():
+        raise PermissionError(f"Cache directory {root} is owned by another user (uid {info.st_uid})")
+    if info.st_mode & 0o077:
+        os.chmod(root, 0o700)
+
+
+@dataclass
+class ContentAddressedFiles:
+    """
+    Write-once files named by the SHA-256 of their content.
+    Writing the same content again returns the existing path without touching disk.
+    Files are created with 0600 permissions since they may contain secrets (API keys),
+    in a directory checked by ensure_private_dir().
+
+    acquire()/release() count the runs using a file; with max_bytes set, files no
+    run holds are deleted least recently used first once the files this instance
+    wrote exceed max_bytes in total.
+    """
+    directory: Optional[str] = None
+    max_bytes: Optional[int] = None
+    # name -> (path, size), least recently used first
+    _known: "OrderedDict[str, Tuple[Path, int]]" = field(init=False, repr=False, default_factory=OrderedDict)
+    _refs: Dict[str, int] = field(init=False, repr=False, default_factory=dict)
+    _total: int = field(init=False, repr=False, default=0)
+    _lock: threading.Lock = field(init=False, repr=False, default_factory=threading.Lock)
+
+    @property
+    def root(self) -> Path:
+        return Path(self.directory) if self.directory else default_cache_dir()
+
+    def write(self, content: str, *, prefix: str = "", suffix: str = "") -> Path:
+        """Return the path of a file holding `content`, creating it if needed."""
+        return self._write(content, prefix, suffix, hold=False)
+
+    def acquire(self, content: str, *, prefix: str = "", suffix: str = "") -> Path:
+        """write(), keeping the file from eviction until release(path)."""
+        return self._write(content, prefix, suffix, hold=True)
+
+    def release(self, path: Path) -> None:
+        """Drop one hold on a file returned by acquire() and evict if over budget."""
+        with self._lock:
+            name = path.name
+            count = self._refs.get(name, 0) - 1
+            if count > 0:
+                self._refs[name] = count
+            else:
+                self._refs.pop(name, None)
+            self._evict()
+
+    @property
+    def total_bytes(self) -> int:
+        """Size of the files this instance wrote that still exist."""
+        with self._lock:
+            return self._total
+
+    def _write(self, content: str, prefix: str, suffix: str, *, hold: bool) -> Path:
+        name = f"{prefix}{content_hash(content)}{suffix}"
+        with self._lock:
+            known = self._known.get(name)
+            if known is not None and known[0].exists():
+                self._known.move_to_end(name)
+                if hold:
+                    self._refs[name] = self._refs.get(name, 0) + 1
+                return known[0]
+        root = self.root
+        ensure_private_dir(root)
+        path = root / name
+        if not path.exists():
+            self._write_atomic(path, content)
+        size = len(content.encode("utf-8"))
+        with self._lock:
+            previous = self._known.pop(name, None)
+            self._total += size - (previous[1] if previous else 0)
+            self._known[name] = (path, size)
+            if hold:
+                self._refs[name] = self._refs.get(name, 0) + 1
+            self._evict()
+        return path
+
+    def _evict(self) -> None:
+        """Delete unheld files, least recently used first, until within max_bytes; lock held."""
+        if self.max_bytes is None:
+            return
+        for name in list(self._known):
+            if self._total <= self.max_bytes:
+                return
+            if self._refs.get(name):
+                continue
+            path, size = self._known.pop(name)
+            self._total -= size
+            try:
+                path.unlink(missing_ok=True)
+            except OSError:
+                pass
+
+    @staticmethod
+    def _write_atomic(path: Path, content: str) -> None:
+        """Write via a 0600 temp file + rename so concurrent readers never see partial content."""
+        fd, tmp_name = tempfile.mkstemp(prefix=".tmp_", dir=str(path.parent))
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(content)
+            os.replace(tmp_name, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_name)
+            except OSError:
+                pass
+            raise
+
+
+_private: Optional[Tuple[int, ContentAddressedFiles]] = None
+_private_lock = threading.Lock()
+
+
+def private_files() -> ContentAddressedFiles:
+    """
+    Process-wide ContentAddressedFiles in a private mkdtemp() directory that is
+    removed at exit, for content that must not outlive the process (variables).
+    Unheld files are evicted beyond PRIVATE_FILES_MAX_BYTES. A forked child gets
+    its own directory.
+    """
+    global _private
+    with _private_lock:
+        pid = os.getpid()
+        if _private is None or _private[0] != pid:
+            directory = tempfile.mkdtemp(prefix="convo_lang_private_")
+            atexit.register(_remove_private_dir, pid, directory)
+            _private = pid, ContentAddressedFiles(directory, max_bytes=PRIVATE_FILES_MAX_BYTES)
+        return _private[1]
+
+
+def _remove_private_dir(pid: int, directory: str) -> None:
+    if os.getpid() == pid:
+        shutil.rmtree(directory, ignore_errors=True)
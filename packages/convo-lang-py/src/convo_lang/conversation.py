@@ -1,17 +1,52 @@
 from __future__ import annotations
+import asyncio
+import contextvars
 from dataclasses import dataclass, field
-import json
+import functools
+import inspect
 from pathlib import Path
-from typing import Any, Callable, Dict, List, Optional
+import time
+from typing import TYPE_CHECKING, Any, AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
+from .async_convo_cli_runner import AsyncConvoCLIRunner
+from .batch import BatchItemResult, BatchResult, run_batch
+from .callback_bridge import CallbackCall
+from .completion_cache import CompletionCache, completion_cache_key
 from .convo_cli_runner import ConvoCLIRunner
+from .convo_parser import parse_convo
+from .convo_segments import ConvoSegment
 from .errors import ParseError
+from .instrumentation import Instrumentation, RunEvent, maybe_span
+from .persistence import dump_conversation, load_conversation
+from .windowing import WindowPolicy, WindowReport, apply_window
+from .transcript_parser import (
+    OutputProfile,
+    OutputSpec,
+    ParsedTranscript,
+    PrefixedTranscriptParser,
+    count_assistant_blocks,
+    output_profile,
+    parse_prefixed,
+)
 
+if TYPE_CHECKING:
+    from .templates import ConvoTemplate, TemplateRegistry
 
 @dataclass
 class Conversation:
     """
     Minimal in-memory builder for .convo with pluggable CLI runner.
+    The source is kept as a list of ConvoSegment objects so appends are O(1);
+    convo_text / to_convo() join them lazily and cache the result.
+    Functions called but not defined in the .convo source are answered by `callbacks`
+    when the runner supports run_with_callbacks; see callback_calls for the last run.
+    With a `window` policy the oldest turns are dropped or summarized before each run
+    to keep the source within a token budget; see last_window for the last pass.
+    `output` selects what a completion asks the CLI for (per call via `output=`):
+    "full" updates state, syntax_messages and messages; "messages" only messages;
+    "text" none of them. Attributes outside the profile are reset to empty after
+    the run, and the returned text is then read from the transcript. convo_text is
+    always updated.
     """
     config: Dict[str, Any] = field(default_factory=dict)
     callbacks: Dict[str, Callable[..., Any]] = field(default_factory=dict)
@@ -20,27 +55,180 @@ class Conversation:
     syntax_messages: List[Dict[str, Any]] = field(default_factory=list)
     state: Dict[str, Any] = field(default_factory=dict)
     convo_cli_runner: Optional[ConvoCLIRunner] = None
+    async_convo_cli_runner: Optional[AsyncConvoCLIRunner] = None
+    completion_cache: Optional[CompletionCache] = None
+    callback_timeout: Optional[float] = 30.0
+    callback_max_workers: int = 4
+    callback_calls: List[CallbackCall] = field(init=False, default_factory=list)
+    instrumentation: Optional[Instrumentation] = None
+    window: Optional[WindowPolicy] = None
+    output: OutputSpec = "full"
+    last_window: Optional[WindowReport] = field(init=False, default=None)
+    # Caches behind the convo_text / messages properties, left out of eq and repr.
+    # The convo_text setter fills the source ones in __init__, so they have no default.
+    _segments: List[ConvoSegment] = field(init=False, repr=False, compare=False)
+    _rendered: Optional[str] = field(init=False, repr=False, compare=False)
+    _source_size: int = field(init=False, repr=False, compare=False)
+    # Frozen segments shared with forks, plus their rendered text and size
+    _prefix: Tuple[ConvoSegment, ...] = field(init=False, repr=False, compare=False)
+    _prefix_text: str = field(init=False, repr=False, compare=False)
+    _prefix_size: int = field(init=False, repr=False, compare=False)
+    # Set by load(): decodes `messages` on first access
+    _messages_loader: Optional[Callable[[], List[Dict[str, Any]]]] = field(
+        init=False, repr=False, compare=False, default=None
+    )
+    # Last reply read from the transcript when the output profile has no messages
+    _reply: Optional[str] = field(init=False, repr=False, compare=False, default=None)
+
+    def _append_segment(self, segment: ConvoSegment) -> None:
+        self._segments.append(segment)
+        self._source_size += len(segment)
+        self._rendered = None
+
+    def _get_convo_text(self) -> str:
+        return self.to_convo()
+
+    def _set_convo_text(self, value: str) -> None:
+        """Replace the whole source with `value` (e.g. the transcript returned by the CLI)."""
+        self._prefix = ()
+        self._prefix_text = ""
+        self._prefix_size = 0
+        self._segments = []
+        self._source_size = 0
+        self._rendered = None
+        if value:
+            self._append_segment(ConvoSegment.from_source(value))
+
+    def _get_messages(self) -> List[Dict[str, Any]]:
+        if self._messages_loader is not None:
+            self._messages = self._messages_loader()
+            self._messages_loader = None
+        return self._messages
+
+    def _set_messages(self, value: List[Dict[str, Any]]) -> None:
+        self._messages_loader = None
+        self._messages = value
+
+    def dump(self, *, codec: Optional[str] = None, compression: Optional[str] = None) -> bytes:
+        """
+        Serialize convo_text, messages, syntax_messages and state to compact bytes
+        (msgpack when installed, else JSON; optional "zlib" or "zstd" compression).
+        Config, callbacks and runners are not included.
+        """
+        return dump_conversation(
+            self.convo_text,
+            self.messages,
+            self.syntax_messages,
+            self.state,
+            codec=codec,
+            compression=compression,
+        )
+
+    @classmethod
+    def load(cls, data: bytes, **kwargs: Any) -> "Conversation":
+        """
+        Restore a conversation written by dump(); kwargs (config, runners, ...) go to
+        the constructor. messages are decoded on first access.
+        """
+        loaded = load_conversation(data)
+        convo = cls(convo_text=loaded.convo_text, **kwargs)
+        convo.state = loaded.state
+        convo.syntax_messages = loaded.syntax_messages
+        convo._messages_loader = loaded.decode_messages
+        return convo
+
+    @property
+    def segments(self) -> Tuple[ConvoSegment, ...]:
+        return self._prefix + tuple(self._segments)
+
+    @property
+    def message_count(self) -> int:
+        """Number of `> ...` blocks in the source, counted per segment without re-parsing."""
+        return sum(seg.message_count for seg in self.segments)
+
+    @property
+    def source_size(self) -> int:
+        """Length of the rendered .convo source in characters."""
+        return self._prefix_size + self._source_size
+
+    def fork(self) -> "Conversation":
+        """
+        Return a branch that shares this conversation's source as an immutable prefix.
+        Segments appended afterwards to either side are stored only on that side.
+        messages, syntax_messages, state and callbacks are shallow-copied (the message
+        dicts themselves are shared); config, runners and completion_cache are shared.
+        """
+        self._freeze_prefix()
+        child = Conversation(
+            config=self.config,
+            callbacks=dict(self.callbacks),
+            messages=list(self.messages),
+            syntax_messages=list(self.syntax_messages),
+            state=dict(self.state),
+            convo_cli_runner=self.convo_cli_runner,
+            async_convo_cli_runner=self.async_convo_cli_runner,
+            completion_cache=self.completion_cache,
+            callback_timeout=self.callback_timeout,
+            callback_max_workers=self.callback_max_workers,
+            instrumentation=self.instrumentation,
+            window=self.window,
+            output=self.output,
+        )
+        child._prefix = self._prefix
+        child._prefix_text = self._prefix_text
+        child._prefix_size = self._prefix_size
+        return child
+
+    def _freeze_prefix(self) -> None:
+        """Move pending segments into the shared prefix so forks don't copy them."""
+        if not self._segments:
+            return
+        self._prefix_text = self.to_convo()
+        self._prefix = self._prefix + tuple(self._segments)
+        self._prefix_size += self._source_size
+        self._segments = []
+        self._source_size = 0
 
     def add_convo_text(self, content: str) -> None:
         """Append raw text into the .convo source (accepts content that may start with '*convo*')."""
-        if content.startswith("*convo*"):
-            content = content[7:].lstrip()
-        self.convo_text += content.rstrip() + "\n\n"
+        self._append_segment(ConvoSegment.from_text(content))
 
-    def add_convo_file(self, file_path: str) -> None:
-        """Load .convo file and append its content to the conversation."""
+    @classmethod
+    def from_template(cls, template: "ConvoTemplate", **kwargs: Any) -> "Conversation":
+        """
+        New conversation whose source starts with `template`. The template's segments
+        and text become the shared prefix, as with fork(), so nothing is copied.
+        """
+        convo = cls(**kwargs)
+        convo._prefix = template.segments
+        convo._prefix_text = template.text
+        convo._prefix_size = len(template.text)
+        return convo
+
+    def add_template(self, template: "ConvoTemplate") -> None:
+        """Append a template's segments (shared, not copied) to the conversation."""
+        for segment in template.segments:
+            self._append_segment(segment)
+
+    def add_convo_file(self, file_path: str, *, registry: Optional["TemplateRegistry"] = None) -> None:
+        """
+        Load .convo file and append its content to the conversation.
+        With a TemplateRegistry the file is only read again after it changes.
+        """
+        if registry is not None:
+            self.add_template(registry.get(file_path))
+            return
         path = Path(file_path)
         if not path.exists():
             raise FileNotFoundError(f"Convo file not found: {path}")
         if path.suffix != ".convo":
             raise ValueError("Only .convo files are supported")
         content = path.read_text(encoding="utf-8")
-        self.add_convo_text(content)
+        self._append_segment(ConvoSegment.from_file(str(path), content))
 
     def add_message(self, role: str, content: str) -> None:
         """Append a role block into the .convo source."""
-        role = role.strip()
-        self.convo_text += f"> {role}\n{content.rstrip()}\n\n"
+        self._append_segment(ConvoSegment.from_message(role, content))
 
     def add_user_message(self, content: str) -> None:
         self.add_message("user", content)
@@ -57,57 +245,495 @@ class Conversation:
         variables: Optional[Dict[str, Any]] = None,
         timeout: Optional[float] = 120.0,
         working_dir: Optional[str] = None,
+        on_token: Optional[Callable[[str], None]] = None,
+        output: Optional[OutputSpec] = None,
     ) -> str:
         """
         Run the current in-memory .convo via the injected ConvoCLIRunner.
         Returns (full_transcript, last_assistant_text).
+        If on_token is given, output is streamed and assistant text is passed to it as it arrives.
+        `output` overrides the conversation's output profile for this call.
         """
+        profile = output_profile(output or self.output)
+        if on_token is not None:
+            with maybe_span(self.instrumentation, "complete", output=profile.name) as event:
+                for _ in self._stream(
+                    variables=variables,
+                    timeout=timeout,
+                    working_dir=working_dir,
+                    on_token=on_token,
+                    profile=profile,
+                    event=event,
+                ):
+                    pass
+                return self._last_assistant_content()
         if not self.convo_cli_runner:
-            self.convo_cli_runner = ConvoCLIRunner(config=self.config)
-        transcript = self.convo_cli_runner.run_text(
-            self.convo_text,
+            self.convo_cli_runner = ConvoCLIRunner(config=self.config, instrumentation=self.instrumentation)
+        with maybe_span(self.instrumentation, "complete", output=profile.name) as event:
+            self._apply_window(event)
+            key = self._cache_key(self.convo_cli_runner, self.convo_text, variables, profile)
+            transcript = self._cached_transcript(key)
+            if event:
+                event.attributes["cache_hit"] = transcript is not None
+            if transcript is not None:
+                self._parse_prefixed(transcript, event, profile)
+                return self._last_assistant_content()
+            transcript = self._run_transcript(
+                self.convo_cli_runner,
+                self.convo_text,
+                variables=variables,
+                timeout=timeout,
+                working_dir=working_dir,
+                profile=profile,
+            )
+            self._parse_prefixed(transcript, event, profile)
+            self._store_transcript(key, transcript)
+            return self._last_assistant_content()
+
+    def _apply_window(self, event: Optional[RunEvent] = None) -> None:
+        """Trim the source to the window policy's budget (no-op without a policy)."""
+        if self.window is None:
+            return
+        windowed, self.last_window = apply_window(self.convo_text, self.window)
+        if self.last_window.dropped_turns:
+            self.convo_text = windowed
+        if event is not None:
+            event.attributes["trimmed_tokens"] = self.last_window.trimmed_tokens
+
+    def _run_transcript(
+        self,
+        runner: Any,
+        convo_text: str,
+        *,
+        variables: Optional[Dict[str, Any]],
+        timeout: Optional[float],
+        working_dir: Optional[str],
+        profile: OutputProfile,
+    ) -> str:
+        """Run convo_text on a sync runner, through the callback bridge when callbacks are set."""
+        if self._uses_callbacks(runner):
+            calls: List[CallbackCall] = []
+            transcript = runner.run_with_callbacks(
+                convo_text,
+                callbacks=self.callbacks,
+                variables=variables,
+                timeout=timeout,
+                working_dir=working_dir,
+                extra_args=profile.args,
+                callback_timeout=self.callback_timeout,
+                max_workers=self.callback_max_workers,
+                on_call=calls.append,
+            )
+            self.callback_calls = calls
+            return transcript
+        return runner.run_text(
+            convo_text,
+            variables=variables,
+            timeout=timeout,
+            working_dir=working_dir,
+            extra_args=profile.args,
+        )
+
+    def _uses_callbacks(self, runner: Any) -> bool:
+        return bool(self.callbacks) and hasattr(runner, "run_with_callbacks")
+
+    async def acomplete(
+        self,
+        *,
+        variables: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = 120.0,
+        working_dir: Optional[str] = None,
+        output: Optional[OutputSpec] = None,
+    ) -> str:
+        """
+        Async counterpart of complete() that does not block the event loop.
+        Uses async_convo_cli_runner, or an injected sync convo_cli_runner in a worker thread.
+        """
+        runner: Any = self.async_convo_cli_runner or self.convo_cli_runner
+        if runner is None:
+            runner = self.async_convo_cli_runner = AsyncConvoCLIRunner(
+                config=self.config,
+                instrumentation=self.instrumentation,
+            )
+        profile = output_profile(output or self.output)
+        with maybe_span(self.instrumentation, "complete", output=profile.name) as event:
+            self._apply_window(event)
+            key = self._cache_key(runner, self.convo_text, variables, profile)
+            transcript = self._cached_transcript(key)
+            if event:
+                event.attributes["cache_hit"] = transcript is not None
+            if transcript is not None:
+                self._parse_prefixed(transcript, event, profile)
+                return self._last_assistant_content()
+            if self._uses_callbacks(runner):
+                # The callback bridge is thread based, so even async runners run it off the loop
+                run_text = functools.partial(
+                    self._run_transcript,
+                    runner,
+                    self.convo_text,
+                    variables=variables,
+                    timeout=timeout,
+                    working_dir=working_dir,
+                    profile=profile,
+                )
+            else:
+                run_text = functools.partial(
+                    runner.run_text,
+                    self.convo_text,
+                    variables=variables,
+                    timeout=timeout,
+                    working_dir=working_dir,
+                    extra_args=profile.args,
+                )
+            if inspect.iscoroutinefunction(run_text.func):
+                transcript = await run_text()
+            else:
+                # Copy the context so the runner's spans are nested under this one
+                loop = asyncio.get_running_loop()
+                transcript = await loop.run_in_executor(None, contextvars.copy_context().run, run_text)
+            self._parse_prefixed(transcript, event, profile)
+            self._store_transcript(key, transcript)
+            return self._last_assistant_content()
+
+    def stream(
+        self,
+        *,
+        variables: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = 120.0,
+        working_dir: Optional[str] = None,
+        on_token: Optional[Callable[[str], None]] = None,
+        output: Optional[OutputSpec] = None,
+    ) -> Iterator[str]:
+        """
+        Run the current .convo and yield new assistant text as the CLI output is read.
+        messages, syntax_messages, state and convo_text are updated once the stream
+        is fully consumed. Runners without stream_text are read after they finish.
+        """
+        return self._stream(
             variables=variables,
             timeout=timeout,
             working_dir=working_dir,
-            extra_args=["--print-state", "--print-messages", "--print-flat"],
+            on_token=on_token,
+            profile=output_profile(output or self.output),
+        )
+
+    def _stream(
+        self,
+        *,
+        variables: Optional[Dict[str, Any]],
+        timeout: Optional[float],
+        working_dir: Optional[str],
+        on_token: Optional[Callable[[str], None]],
+        profile: OutputProfile,
+        event: Optional[RunEvent] = None,
+    ) -> Iterator[str]:
+        """stream() recording window trimming and cache hits on `event` (complete's span)."""
+        if not self.convo_cli_runner:
+            self.convo_cli_runner = ConvoCLIRunner(config=self.config, instrumentation=self.instrumentation)
+        runner: Any = self.convo_cli_runner
+        kwargs = dict(
+            variables=variables,
+            timeout=timeout,
+            working_dir=working_dir,
+            extra_args=profile.args,
+        )
+        self._apply_window(event)
+        key = self._cache_key(runner, self.convo_text, variables, profile)
+        cached = self._cached_transcript(key)
+        if event is not None:
+            event.attributes["cache_hit"] = cached is not None
+        if cached is not None:
+            lines = iter(cached.splitlines())
+        elif self._uses_callbacks(runner):
+            lines = iter(self._run_transcript(
+                runner,
+                self.convo_text,
+                variables=variables,
+                timeout=timeout,
+                working_dir=working_dir,
+                profile=profile,
+            ).splitlines())
+        elif hasattr(runner, "stream_text"):
+            lines = runner.stream_text(self.convo_text, **kwargs)
+        else:
+            lines = iter(runner.run_text(self.convo_text, **kwargs).splitlines())
+        parser = PrefixedTranscriptParser(
+            skip_assistant_blocks=count_assistant_blocks(self.convo_text),
+            profile=profile,
+        )
+        seen: List[str] = []
+        for line in lines:
+            if key and cached is None:
+                seen.append(line)
+            token = parser.feed_line(line)
+            if token:
+                if on_token:
+                    on_token(token)
+                yield token
+        self._apply_parsed(parser.result())
+        if cached is None:
+            self._store_transcript(key, "\n".join(seen))
+
+    async def astream(
+        self,
+        *,
+        variables: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = 120.0,
+        working_dir: Optional[str] = None,
+        on_token: Optional[Callable[[str], None]] = None,
+        output: Optional[OutputSpec] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Async counterpart of stream(). Uses the async runner's stream_text, or runs an
+        injected sync runner in a worker thread and parses its output afterwards.
+        """
+        runner: Any = self.async_convo_cli_runner or self.convo_cli_runner
+        if runner is None:
+            runner = self.async_convo_cli_runner = AsyncConvoCLIRunner(
+                config=self.config,
+                instrumentation=self.instrumentation,
+            )
+        profile = output_profile(output or self.output)
+        kwargs = dict(
+            variables=variables,
+            timeout=timeout,
+            working_dir=working_dir,
+            extra_args=profile.args,
+        )
+        with maybe_span(self.instrumentation, "complete", output=profile.name) as event:
+            self._apply_window(event)
+            parser = PrefixedTranscriptParser(
+                skip_assistant_blocks=count_assistant_blocks(self.convo_text),
+                profile=profile,
+            )
+
+            def feed(line: str) -> Optional[str]:
+                token = parser.feed_line(line)
+                if token and on_token:
+                    on_token(token)
+                return token
+
+            key = self._cache_key(runner, self.convo_text, variables, profile)
+            cached = self._cached_transcript(key)
+            if event is not None:
+                event.attributes["cache_hit"] = cached is not None
+            seen: List[str] = []
+            streams = inspect.isasyncgenfunction(getattr(runner, "stream_text", None))
+            if cached is None and streams and not self._uses_callbacks(runner):
+                async for line in runner.stream_text(self.convo_text, **kwargs):
+                    if key:
+                        seen.append(line)
+                    token = feed(line)
+                    if token:
+                        yield token
+                transcript = "\n".join(seen)
+            else:
+                if cached is not None:
+                    transcript = cached
+                elif self._uses_callbacks(runner):
+                    loop = asyncio.get_running_loop()
+                    run_text = functools.partial(
+                        self._run_transcript,
+                        runner,
+                        self.convo_text,
+                        variables=variables,
+                        timeout=timeout,
+                        working_dir=working_dir,
+                        profile=profile,
+                    )
+                    # Copy the context so the runner's spans are nested under this one
+                    transcript = await loop.run_in_executor(None, contextvars.copy_context().run, run_text)
+                elif inspect.iscoroutinefunction(runner.run_text):
+                    transcript = await runner.run_text(self.convo_text, **kwargs)
+                else:
+                    loop = asyncio.get_running_loop()
+                    transcript = await loop.run_in_executor(
+                        None,
+                        contextvars.copy_context().run,
+                        functools.partial(runner.run_text, self.convo_text, **kwargs),
+                    )
+                for line in transcript.splitlines():
+                    token = feed(line)
+                    if token:
+                        yield token
+            self._apply_parsed(parser.result())
+            if cached is None:
+                self._store_transcript(key, transcript)
+
+    def _cache_key(
+        self,
+        runner: Any,
+        convo_text: str,
+        variables: Optional[Dict[str, Any]],
+        profile: OutputProfile,
+    ) -> Optional[str]:
+        """
+        Cache key for a completion, or None when no completion_cache is set.
+        Runs that invoke callbacks are never cached since the callbacks may have side effects.
+        """
+        if self.completion_cache is None or self._uses_callbacks(runner):
+            return None
+        config = getattr(runner, "config", None) or self.config
+        return completion_cache_key(convo_text, variables, config, profile.args)
+
+    def _cached_transcript(self, key: Optional[str]) -> Optional[str]:
+        if key is None:
+            return None
+        return self.completion_cache.get(key)
+
+    def _store_transcript(self, key: Optional[str], transcript: str) -> None:
+        """Store a transcript that already parsed successfully."""
+        if key is not None:
+            self.completion_cache.set(key, transcript)
+
+    def _apply_parsed(self, parsed: ParsedTranscript) -> None:
+        self.state = parsed.state
+        self.syntax_messages = parsed.syntax_messages
+        self.messages = parsed.messages
+        # End with a blank line, like added segments, so later messages start a new block
+        self.convo_text = parsed.convo_text + "\n\n" if parsed.convo_text else ""
+        self._reply = parsed.reply
+
+    def complete_many(
+        self,
+        variables_list: Iterable[Optional[Dict[str, Any]]],
+        *,
+        max_concurrency: Optional[int] = None,
+        ordered: bool = True,
+        timeout: Optional[float] = 120.0,
+        working_dir: Optional[str] = None,
+        on_result: Optional[Callable[[BatchItemResult], None]] = None,
+        output: Optional[OutputSpec] = None,
+    ) -> BatchResult:
+        """
+        Complete the current .convo once per variables dict with bounded parallelism.
+        Each result value is the last assistant text of that run; this conversation
+        is left unchanged (the window policy only applies to the runs) and per-item
+        errors are collected on the results. Only the returned text is used, so
+        output="messages" or "text" avoids printing and parsing the rest.
+        """
+        if not self.convo_cli_runner:
+            self.convo_cli_runner = ConvoCLIRunner(config=self.config, instrumentation=self.instrumentation)
+        runner = self.convo_cli_runner
+        convo_text = self.convo_text
+        if self.window is not None:
+            convo_text, self.last_window = apply_window(convo_text, self.window)
+        profile = output_profile(output or self.output)
+
+        def complete_one(variables: Optional[Dict[str, Any]]) -> str:
+            run = Conversation(
+                config=self.config,
+                callbacks=self.callbacks,
+                completion_cache=self.completion_cache,
+                callback_timeout=self.callback_timeout,
+                callback_max_workers=self.callback_max_workers,
+            )
+            key = run._cache_key(runner, convo_text, variables, profile)
+            transcript = run._cached_transcript(key)
+            if transcript is not None:
+                run._parse_prefixed(transcript, profile=profile)
+                return run._last_assistant_content()
+            transcript = run._run_transcript(
+                runner,
+                convo_text,
+                variables=variables,
+                timeout=timeout,
+                working_dir=working_dir,
+                profile=profile,
+            )
+            run._parse_prefixed(transcript, profile=profile)
+            run._store_transcript(key, transcript)
+            return run._last_assistant_content()
+
+        return run_batch(
+            complete_one,
+            variables_list,
+            max_concurrency=max_concurrency,
+            ordered=ordered,
+            on_result=on_result,
         )
-        self._parse_prefixed(transcript)
-        return self._last_assistant_content()
 
     def _last_assistant_content(self) -> str:
-        last_message = self.messages[-1]
+        if self._reply is not None:
+            return self._reply
+        last_message = self.messages[-1] if self.messages else {}
         if last_message.get("role") == "assistant":
             return last_message.get("content", "")
         raise ParseError("No assistant message found in transcript.")
 
-    def _parse_prefixed(self, transcript: str) -> None:
-        state_lines = [l[2:] for l in transcript.splitlines()
-                       if l.startswith("s:")]
-        syntax_lines   = [l[2:] for l in transcript.splitlines()
-                          if l.startswith("m:")]
-        flat_lines  = [l[2:] for l in transcript.splitlines()
-                       if l.startswith("f:")]
-        result_lines  = [l[2:] if l.startswith(": ") else l[1:]
-                         for l in transcript.splitlines() if l.startswith(":")]
-        try:
-            self.state = (json.loads("".join(state_lines))
-                          if state_lines else {})
-            self.syntax_messages = (json.loads("".join(syntax_lines))
-                                    if syntax_lines else [])
-            self.messages = (json.loads("".join(flat_lines))
-                             if flat_lines else [])
-        except json.JSONDecodeError as e:
-            raise ParseError(
-                f"Failed to parse CLI output JSON: {e}\n"
-                f"Transcript:\n{transcript}"
-            ) from e
-        self.convo_text = "\n\n".join(result_lines).strip()
+    def _parse_prefixed(
+        self,
+        transcript: str,
+        event: Optional[RunEvent] = None,
+        profile: Optional[OutputProfile] = None,
+    ) -> None:
+        start = time.perf_counter()
+        parsed = parse_prefixed(transcript, profile or output_profile(self.output))
+        if event is not None:
+            event.parse_time = time.perf_counter() - start
+        self._apply_parsed(parsed)
 
     def clear(self) -> None:
         self.convo_text = ""
+        self._reply = None
         self.messages.clear()
         self.syntax_messages.clear()
         self.state.clear()
 
     def to_convo(self) -> str:
-        return self.convo_text
+        if self._rendered is None:
+            self._rendered = self._prefix_text + "".join(seg.source for seg in self._segments)
+        return self._rendered
+
+    def parse(self) -> List[Dict[str, Any]]:
+        """
+        Parse the current source in-process into the message dicts the CLI reports as
+        `m:` output, without running it. Raises ConvoSyntaxError / UnsupportedConvoSyntax.
+        """
+        return parse_convo(self.to_convo())
+
+
+def complete_all(
+    conversations: Iterable[Conversation],
+    *,
+    variables: Optional[Dict[str, Any]] = None,
+    max_concurrency: Optional[int] = None,
+    ordered: bool = True,
+    timeout: Optional[float] = 120.0,
+    working_dir: Optional[str] = None,
+    on_result: Optional[Callable[[BatchItemResult], None]] = None,
+) -> BatchResult:
+    """
+    Call complete() on each conversation (typically forks of one parent) with bounded
+    parallelism. Each conversation is updated in place as with complete(); result values
+    are the last assistant texts and per-item errors are collected on the results.
+    """
+    def complete_one(conversation: Conversation) -> str:
+        return conversation.complete(
+            variables=variables,
+            timeout=timeout,
+            working_dir=working_dir,
+        )
+
+    return run_batch(
+        complete_one,
+        conversations,
+        max_concurrency=max_concurrency,
+        ordered=ordered,
+        on_result=on_result,
+    )
+
+
+# Defined after the dataclass so the `convo_text` field keeps its "" default; __init__
+# assigns it through the setter and equality / repr read the rendered source
+Conversation.convo_text = property(  # type: ignore[assignment]
+    Conversation._get_convo_text,
+    Conversation._set_convo_text,
+    doc="The full .convo source; assigning replaces all segments.",
+)
+# A property rather than a plain field so load() can defer decoding messages
+Conversation.messages = property(  # type: ignore[assignment]
+    Conversation._get_messages,
+    Conversation._set_messages,
+    doc="Flat messages of the last completion.",
+)
@@ -0,0 +1,290 @@
+from __future__ import annotations
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+import os
+from pathlib import Path
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from .conversation import Conversation
+
+
+@dataclass
+class StoreStats:
+    hits: int = 0
+    creates: int = 0
+    loads: int = 0
+    spills: int = 0
+    spilled_bytes: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(self.__dict__)
+
+
+class _Slot:
+    """A session's lock and, while it is in memory, its conversation and measured size."""
+
+    __slots__ = ("lock", "convo", "size", "measured_source", "users")
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.convo: Optional[Conversation] = None
+        self.size = 0
+        # convo.source_size when `size` was measured; None forces a new measurement
+        self.measured_source: Optional[int] = None
+        # Threads inside session() or spilling it; a slot in use is never evicted or dropped
+        self.users = 0
+
+
+class ConversationStore:
+    """
+    Thread-safe map of session id -> Conversation that keeps recently used sessions
+    in memory while their total size stays under `max_bytes`, and spills the least
+    recently used ones to a SQLite file. Sessions are encoded with Conversation.dump()
+    (`codec` / `compression`) and reloaded transparently on their next use; the row
+    stays on disk until the session is spilled again, so a crash only loses changes
+    made since the last spill. A session's size is the length of its uncompressed
+    dump, re-measured on release only when its source length changed.
+    Spilled sessions outlive the process when `path` is given; without it a temporary
+    file is used and removed by close().
+
+    New sessions are created with `factory(session_id)` or Conversation(**conversation_kwargs),
+    and reloaded ones get conversation_kwargs too, since dump() does not keep config,
+    runners or callbacks.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        *,
+        max_bytes: int = 64 * 1024 * 1024,
+        codec: Optional[str] = None,
+        compression: Optional[str] = "zlib",
+        conversation_kwargs: Optional[Dict[str, Any]] = None,
+        factory: Optional[Callable[[str], Conversation]] = None,
+    ):
+        self.max_bytes = max_bytes
+        self.codec = codec
+        self.compression = compression
+        self.conversation_kwargs = dict(conversation_kwargs or {})
+        self.factory = factory
+        self.stats = StoreStats()
+        self._temp_path: Optional[Path] = None
+        if path is None:
+            fd, temp = tempfile.mkstemp(prefix="convo-sessions-", suffix=".sqlite")
+            os.close(fd)
+            path = temp
+            self._temp_path = Path(temp)
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._slots: "OrderedDict[str, _Slot]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                " id TEXT PRIMARY KEY,"
+                " data BLOB NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " updated REAL NOT NULL)"
+            )
+
+    @property
+    def memory_bytes(self) -> int:
+        """Total measured size of the sessions held in memory."""
+        with self._lock:
+            return self._memory_bytes
+
+    def resident(self) -> List[str]:
+        """Ids of the sessions held in memory, least recently used first."""
+        with self._lock:
+            return [sid for sid, slot in self._slots.items() if slot.convo is not None]
+
+    def spilled(self) -> List[str]:
+        """Ids of the sessions stored only on disk (not also held in memory)."""
+        with self._db_lock:
+            ids = [row[0] for row in self._conn.execute("SELECT id FROM sessions ORDER BY updated")]
+        resident = set(self.resident())
+        return [sid for sid in ids if sid not in resident]
+
+    def __len__(self) -> int:
+        return len(set(self.resident()) | set(self.spilled()))
+
+    def __contains__(self, session_id: str) -> bool:
+        with self._lock:
+            slot = self._slots.get(session_id)
+            if slot is not None and slot.convo is not None:
+                return True
+        return self._read(session_id) is not None
+
+    @contextmanager
+    def session(self, session_id: str, *, create: bool = True) -> Iterator[Conversation]:
+        """
+        Hold the session's lock and yield its conversation, loading it from disk or
+        creating it as needed (KeyError if it does not exist and create is False).
+        Other threads using the same session wait until the block exits; the
+        conversation must not be used after that, since it may be spilled at any time.
+        """
+        slot = self._acquire_slot(session_id)
+        slot.lock.acquire()
+        try:
+            convo = self._ensure_loaded(session_id, slot, create)
+            yield convo
+        finally:
+            self._release(session_id, slot)
+        self._evict()
+
+    def complete(self, session_id: str, **kwargs: Any) -> str:
+        """Run Conversation.complete(**kwargs) on the session while holding its lock."""
+        with self.session(session_id) as convo:
+            return convo.complete(**kwargs)
+
+    def put(self, session_id: str, convo: Conversation) -> None:
+        """Store `convo` as the session, replacing any existing one."""
+        slot = self._acquire_slot(session_id)
+        slot.lock.acquire()
+        try:
+            self._delete_row(session_id)
+            slot.convo = convo
+            slot.measured_source = None
+        finally:
+            self._release(session_id, slot)
+        self._evict()
+
+    def delete(self, session_id: str) -> bool:
+        """Remove the session from memory and disk; returns whether it existed."""
+        slot = self._acquire_slot(session_id)
+        slot.lock.acquire()
+        try:
+            existed = slot.convo is not None
+            slot.convo = None
+            existed = self._delete_row(session_id) or existed
+        finally:
+            self._release(session_id, slot)
+        return existed
+
+    def flush(self) -> None:
+        """
+        Spill every session to disk, waiting for sessions in use by other threads.
+        Must not be called from inside a session() block.
+        """
+        with self._lock:
+            session_ids = [sid for sid, slot in self._slots.items() if slot.convo is not None]
+        for session_id in session_ids:
+            slot = self._acquire_slot(session_id)
+            slot.lock.acquire()
+            if slot.convo is not None:
+                self._spill(session_id, slot)
+            else:
+                self._release(session_id, slot)
+
+    def close(self) -> None:
+        """Spill every session (when `path` was given) and close the file; a temporary file is removed."""
+        if self._temp_path is None:
+            self.flush()
+        with self._db_lock:
+            self._conn.close()
+        if self._temp_path is not None:
+            for suffix in ("", "-wal", "-shm"):
+                Path(str(self._temp_path) + suffix).unlink(missing_ok=True)
+
+    def _acquire_slot(self, session_id: str) -> _Slot:
+        with self._lock:
+            slot = self._slots.get(session_id)
+            if slot is None:
+                slot = self._slots[session_id] = _Slot()
+            slot.users += 1
+            return slot
+
+    def _ensure_loaded(self, session_id: str, slot: _Slot, create: bool) -> Conversation:
+        """Called with slot.lock held."""
+        if slot.convo is not None:
+            with self._lock:
+                self.stats.hits += 1
+            return slot.convo
+        data = self._read(session_id)
+        if data is not None:
+            # The row is kept until the next spill replaces it
+            slot.convo = Conversation.load(data, **self.conversation_kwargs)
+            slot.measured_source = None
+            with self._lock:
+                self.stats.loads += 1
+        elif create:
+            if self.factory is not None:
+                slot.convo = self.factory(session_id)
+            else:
+                slot.convo = Conversation(**self.conversation_kwargs)
+            slot.measured_source = None
+            with self._lock:
+                self.stats.creates += 1
+        else:
+            raise KeyError(session_id)
+        return slot.convo
+
+    def _release(self, session_id: str, slot: _Slot) -> None:
+        """Re-measure the session if its source changed, mark it most recently used and release its lock."""
+        size = slot.size
+        if slot.convo is None:
+            size = 0
+            slot.measured_source = None
+        elif slot.convo.source_size != slot.measured_source:
+            size = len(slot.convo.dump(codec=self.codec))
+            slot.measured_source = slot.convo.source_size
+        with self._lock:
+            self._memory_bytes += size - slot.size
+            slot.size = size
+            slot.users -= 1
+            if slot.convo is None and slot.users == 0:
+                del self._slots[session_id]
+            else:
+                self._slots.move_to_end(session_id)
+        slot.lock.release()
+
+    def _evict(self, max_bytes: Optional[int] = None) -> None:
+        """Spill least recently used idle sessions until memory is within `max_bytes`."""
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        while True:
+            with self._lock:
+                if self._memory_bytes <= limit:
+                    return
+                victim = None
+                for session_id, slot in self._slots.items():
+                    if slot.convo is not None and slot.users == 0 and slot.lock.acquire(blocking=False):
+                        victim = session_id, slot
+                        slot.users += 1
+                        break
+                if victim is None:
+                    return  # everything left is in use
+            self._spill(*victim)
+
+    def _spill(self, session_id: str, slot: _Slot) -> None:
+        """Write the session to disk and drop it from memory; called with slot.lock held."""
+        try:
+            data = slot.convo.dump(codec=self.codec, compression=self.compression)
+            with self._db_lock, self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO sessions (id, data, size, updated) VALUES (?, ?, ?, ?)",
+                    (session_id, data, len(data), time.time()),
+                )
+            slot.convo = None
+            with self._lock:
+                self.stats.spills += 1
+                self.stats.spilled_bytes += len(data)
+        finally:
+            self._release(session_id, slot)
+
+    def _read(self, session_id: str) -> Optional[bytes]:
+        with self._db_lock:
+            row = self._conn.execute("SELECT data FROM sessions WHERE id=?", (session_id,)).fetchone()
+        return bytes(row[0]) if row is not None else None
+
+    def _delete_row(self, session_id: str) -> bool:
+        with self._db_lock, self._conn:
+            return self._conn.execute("DELETE FROM sessions WHERE id=?", (session_id,)).rowcount > 0
@@ -0,0 +1,449 @@
+from __future__ import annotations
+from collections import deque
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+import itertools
+import json
+import os
+from pathlib import Path
+import queue
+import shutil
+import subprocess
+import threading
+import time
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional
+
+from .batch import BatchItemResult, BatchResult, run_batch
+from .callback_bridge import CallbackCall
+from .convo_cli_path import discover_convo_bin
+from .convo_cli_runner import ConvoCLIRunner
+from .error_utils import raise_for_cli_failure
+from .errors import ConvoCLIError, ConvoNotFound, ExecFailed, Timeout
+from .scheduler import CompletionScheduler
+
+WORKER_SCRIPT = Path(__file__).with_name("convo_pool_worker.js")
+CLI_PACKAGE_NAME = "@convo-lang/convo-lang-cli"
+
+
+def resolve_cli_module(convo_bin: str) -> Optional[str]:
+    """Find the @convo-lang/convo-lang-cli package directory behind a convo binary."""
+    start = Path(os.path.realpath(convo_bin))
+    for parent in start.parents:
+        pkg = parent / "package.json"
+        if pkg.exists():
+            try:
+                if json.loads(pkg.read_text(encoding="utf-8")).get("name") == CLI_PACKAGE_NAME:
+                    return str(parent)
+            except (OSError, ValueError):
+                pass
+        for base in (parent / "node_modules", parent / "lib" / "node_modules"):
+            cand = base / "@convo-lang" / "convo-lang-cli"
+            if cand.is_dir():
+                return str(cand)
+    return None
+
+
+class _PoolWorker:
+    """One long-lived worker process speaking the line-framed JSON protocol."""
+
+    def __init__(self, cmd: List[str]):
+        self.proc = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+            bufsize=1,
+        )
+        self._lines: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._stderr: Deque[str] = deque(maxlen=50)
+        threading.Thread(target=self._read_stdout, daemon=True).start()
+        threading.Thread(target=self._read_stderr, daemon=True).start()
+
+    def _read_stdout(self) -> None:
+        for line in self.proc.stdout:
+            self._lines.put(line)
+        self._lines.put(None)
+
+    def _read_stderr(self) -> None:
+        for line in self.proc.stderr:
+            self._stderr.append(line)
+
+    @property
+    def alive(self) -> bool:
+        return self.proc.poll() is None
+
+    def stderr_tail(self) -> str:
+        return "".join(self._stderr).strip()
+
+    def request(self, job: Dict[str, Any], timeout: Optional[float]) -> Dict[str, Any]:
+        """Send one job frame and wait for its result frame."""
+        try:
+            self.proc.stdin.write(json.dumps(job, ensure_ascii=False) + "\n")
+            self.proc.stdin.flush()
+        except OSError as e:
+            raise ConvoCLIError(f"Convo pool worker is not accepting jobs: {e}") from e
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                line = self._lines.get(timeout=remaining)
+            except queue.Empty:
+                raise Timeout(f"Convo CLI timed out after {timeout} seconds") from None
+            if line is None:
+                self.proc.wait()
+                raise ConvoCLIError(
+                    f"Convo pool worker exited with code {self.proc.returncode}"
+                    + (f":\n{self.stderr_tail()}" if self.stderr_tail() else "")
+                )
+            try:
+                result = json.loads(line)
+            except ValueError:
+                continue
+            if result.get("id") == job["id"]:
+                return result
+
+    def close(self, grace: float = 2.0) -> None:
+        try:
+            self.proc.stdin.close()
+        except OSError:
+            pass
+        try:
+            self.proc.wait(timeout=grace)
+        except subprocess.TimeoutExpired:
+            self.kill()
+
+    def kill(self) -> None:
+        try:
+            self.proc.kill()
+            self.proc.wait()
+        except OSError:
+            pass
+
+
+@dataclass
+class ConvoCLIPool:
+    """
+    Pool of long-lived Convo-Lang CLI workers.
+    Drop-in replacement for ConvoCLIRunner: run_text, run_file and run_many are
+    executed by warm Node processes instead of a fresh CLI per call. stream_text and
+    run_with_callbacks need a dedicated process, so they go to a ConvoCLIRunner
+    built from the same convo_bin, config and scheduler.
+    """
+    convo_bin: Optional[str] = None
+    config: Optional[Dict] = None
+    size: int = 4
+    node_bin: Optional[str] = None
+    cli_module: Optional[str] = None
+    worker_cmd: Optional[List[str]] = None
+    scheduler: Optional[CompletionScheduler] = None
+    _idle: "queue.LifoQueue[Optional[_PoolWorker]]" = field(init=False, repr=False, default=None)
+    _cmd_builder: Optional[ConvoCLIRunner] = field(init=False, repr=False, default=None)
+    _fallback: Optional[ConvoCLIRunner] = field(init=False, repr=False, default=None)
+    _workers: List[_PoolWorker] = field(init=False, repr=False, default_factory=list)
+    _lock: threading.Lock = field(init=False, repr=False, default_factory=threading.Lock)
+    _config_path: Optional[Path] = field(init=False, repr=False, default=None)
+    _job_ids: Any = field(init=False, repr=False, default_factory=itertools.count)
+    _closed: bool = field(init=False, repr=False, default=False)
+
+    def __post_init__(self) -> None:
+        if self.size < 1:
+            raise ValueError("Pool size must be at least 1")
+        if not self.worker_cmd:
+            if not self.convo_bin:
+                try:
+                    self.convo_bin = discover_convo_bin()
+                except Exception as e:
+                    raise ConvoNotFound(f"Convo CLI binary not found: {e}") from e
+            if not self.cli_module:
+                self.cli_module = resolve_cli_module(self.convo_bin) or CLI_PACKAGE_NAME
+        # Each None token is a free slot; a worker is spawned lazily when it is taken.
+        # LIFO so the most recently used (warm) worker is preferred over spawning.
+        self._idle = queue.LifoQueue()
+        for _ in range(self.size):
+            self._idle.put(None)
+        # Used only to compose per-job arguments exactly like the single-shot runner.
+        # Jobs reach the worker over a pipe, so variables never need the file transport.
+        self._cmd_builder = ConvoCLIRunner(convo_bin=self.convo_bin or "convo", vars_transport="argv")
+
+    def __enter__(self) -> "ConvoCLIPool":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def _worker_command(self) -> List[str]:
+        if self.worker_cmd:
+            cmd = list(self.worker_cmd)
+        else:
+            node = self.node_bin or shutil.which("node") or "node"
+            cmd = [node, str(WORKER_SCRIPT), "--cli-module", str(self.cli_module)]
+        if self.config:
+            with self._lock:
+                if self._config_path is None:
+                    self._config_path = self._cmd_builder._write_temp_config_json(self.config)
+            cmd += ["--config", str(self._config_path)]
+        return cmd
+
+    def _spawn(self) -> _PoolWorker:
+        try:
+            worker = _PoolWorker(self._worker_command())
+        except FileNotFoundError as e:
+            raise ConvoNotFound(f"Node.js or worker command not found: {e}") from e
+        except OSError as e:
+            raise ExecFailed(f"Failed to start Convo pool worker: {e}") from e
+        with self._lock:
+            self._workers.append(worker)
+        return worker
+
+    def _acquire(self) -> _PoolWorker:
+        if self._closed:
+            raise ExecFailed("Convo CLI pool is closed.")
+        worker = self._idle.get()
+        if worker is not None and worker.alive:
+            return worker
+        if worker is not None:
+            self._discard(worker)
+        try:
+            return self._spawn()
+        except BaseException:
+            self._idle.put(None)
+            raise
+
+    def _release(self, worker: _PoolWorker) -> None:
+        if self._closed:
+            self._discard(worker)
+            worker.close()
+            return
+        if worker.alive:
+            self._idle.put(worker)
+        else:
+            # Crashed or killed workers are replaced on next use
+            self._discard(worker)
+            self._idle.put(None)
+
+    def _discard(self, worker: _PoolWorker) -> None:
+        with self._lock:
+            if worker in self._workers:
+                self._workers.remove(worker)
+
+    def _run_job(
+        self,
+        source: str,
+        *,
+        source_path: Optional[Path],
+        variables: Optional[Dict],
+        timeout: Optional[float],
+        working_dir: Optional[str],
+        extra_args: Optional[List[str]],
+    ) -> str:
+        cmd = self._cmd_builder._build_cmd(
+            source_path or Path("inline.convo"),
+            variables=variables,
+            extra_args=extra_args,
+            use_prefix_output=True,
+        )
+        job = {
+            "id": next(self._job_ids),
+            "source": source,
+            "sourcePath": str(source_path) if source_path else None,
+            "cwd": working_dir or None,
+            "args": cmd[2:],
+        }
+        admit = self.scheduler.admit_source(source, self.config) if self.scheduler else nullcontext()
+        with self._cmd_builder._held_vars(cmd), admit:
+            worker = self._acquire()
+            try:
+                result = worker.request(job, timeout)
+            except (Timeout, ConvoCLIError):
+                worker.kill()
+                raise
+            finally:
+                self._release(worker)
+            if not result.get("ok"):
+                raise_for_cli_failure(
+                    returncode=1,
+                    stdout=result.get("stdout") or "",
+                    stderr=result.get("error") or "",
+                )
+            return result.get("stdout") or ""
+
+    def run_file(
+        self,
+        script_path: str,
+        *,
+        variables: Optional[Dict] = None,
+        timeout: Optional[float] = 120.0,
+        working_dir: Optional[str] = None,
+        extra_args: Optional[List[str]] = None,
+    ) -> str:
+        """
+        Run a .convo file on a pooled worker and return full transcript.
+        Raises ConvoNotFound, ExecFailed, or Timeout on errors.
+        """
+        path = Path(script_path).resolve()
+        try:
+            source = path.read_text(encoding="utf-8")
+        except FileNotFoundError as e:
+            raise ConvoNotFound(f"Convo file not found: {path}") from e
+        return self._run_job(
+            source,
+            source_path=path,
+            variables=variables,
+            timeout=timeout,
+            working_dir=working_dir,
+            extra_args=extra_args,
+        )
+
+    def run_text(
+        self,
+        convo_text: str,
+        *,
+        variables: Optional[Dict] = None,
+        timeout: Optional[float] = 120.0,
+        working_dir: Optional[str] = None,
+        extra_args: Optional[List[str]] = None,
+        keep_temp: bool = False,
+    ) -> str:
+        """
+        Run `convo_text` on a pooled worker; no temp file is written.
+        keep_temp is accepted for ConvoCLIRunner compatibility and ignored.
+        """
+        if not convo_text.strip():
+            raise ExecFailed("Empty .convo text submitted to runner.")
+        return self._run_job(
+            convo_text,
+            source_path=None,
+            variables=variables,
+            timeout=timeout,
+            working_dir=working_dir,
+            extra_args=extra_args,
+        )
+
+    def run_many(
+        self,
+        items: Iterable[Optional[Dict]],
+        *,
+        script_path: Optional[str] = None,
+        convo_text: Optional[str] = None,
+        max_concurrency: Optional[int] = None,
+        ordered: bool = True,
+        timeout: Optional[float] = 120.0,
+        working_dir: Optional[str] = None,
+        extra_args: Optional[List[str]] = None,
+        on_result: Optional[Callable[[BatchItemResult], None]] = None,
+    ) -> BatchResult:
+        """
+        Run one script (`script_path` or `convo_text`) once per item on pooled workers,
+        where each item is the variables dict for that run. At most `max_concurrency`
+        jobs are in flight at a time (default: pool size).
+        """
+        if (script_path is None) == (convo_text is None):
+            raise ValueError("Pass exactly one of script_path or convo_text")
+        source_path: Optional[Path] = None
+        if script_path is not None:
+            source_path = Path(script_path).resolve()
+            try:
+                source = source_path.read_text(encoding="utf-8")
+            except FileNotFoundError as e:
+                raise ConvoNotFound(f"Convo file not found: {source_path}") from e
+        else:
+            if not convo_text.strip():
+                raise ExecFailed("Empty .convo text submitted to runner.")
+            source = convo_text
+
+        def run_one(variables: Optional[Dict]) -> str:
+            return self._run_job(
+                source,
+                source_path=source_path,
+                variables=variables,
+                timeout=timeout,
+                working_dir=working_dir,
+                extra_args=extra_args,
+            )
+        return run_batch(
+            run_one,
+            items,
+            max_concurrency=max_concurrency or self.size,
+            ordered=ordered,
+            on_result=on_result,
+        )
+
+    def _single_shot(self) -> ConvoCLIRunner:
+        if self._closed:
+            raise ExecFailed("Convo CLI pool is closed.")
+        with self._lock:
+            if self._fallback is None:
+                self._fallback = ConvoCLIRunner(
+                    convo_bin=self.convo_bin,
+                    config=self.config,
+                    scheduler=self.scheduler,
+                )
+            return self._fallback
+
+    def stream_text(
+        self,
+        convo_text: str,
+        *,
+        variables: Optional[Dict] = None,
+        timeout: Optional[float] = 120.0,
+        working_dir: Optional[str] = None,
+        extra_args: Optional[List[str]] = None,
+    ) -> Iterator[str]:
+        """
+        Stream `convo_text` through a single-shot CLI process; see
+        ConvoCLIRunner.stream_text. Workers only report whole transcripts.
+        """
+        return self._single_shot().stream_text(
+            convo_text,
+            variables=variables,
+            timeout=timeout,
+            working_dir=working_dir,
+            extra_args=extra_args,
+        )
+
+    def run_with_callbacks(
+        self,
+        convo_text: str,
+        *,
+        callbacks: Dict[str, Callable[..., Any]],
+        variables: Optional[Dict] = None,
+        timeout: Optional[float] = 120.0,
+        working_dir: Optional[str] = None,
+        extra_args: Optional[List[str]] = None,
+        callback_timeout: Optional[float] = 30.0,
+        max_workers: int = 4,
+        on_call: Optional[Callable[[CallbackCall], None]] = None,
+    ) -> str:
+        """
+        Run `convo_text` with Python callbacks through a single-shot CLI process in
+        cmd-mode; see ConvoCLIRunner.run_with_callbacks.
+        """
+        return self._single_shot().run_with_callbacks(
+            convo_text,
+            callbacks=callbacks,
+            variables=variables,
+            timeout=timeout,
+            working_dir=working_dir,
+            extra_args=extra_args,
+            callback_timeout=callback_timeout,
+            max_workers=max_workers,
+            on_call=on_call,
+        )
+
+    def close(self) -> None:
+        """Stop all workers and remove the shared config file."""
+        self._closed = True
+        with self._lock:
+            workers = list(self._workers)
+            self._workers.clear()
+        for worker in workers:
+            worker.close()
+        if self._config_path:
+            try:
+                self._config_path.unlink(missing_ok=True)
+            except Exception:
+                pass
+            self._config_path = None
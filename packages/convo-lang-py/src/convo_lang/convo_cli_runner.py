@@ -1,63 +1,170 @@
 from __future__ import annotations
 from contextlib import contextmanager
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import json
 from pathlib import Path
 import subprocess
 import tempfile
-from typing import Any, Dict, Iterator, List, Optional
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
+from .batch import BatchItemResult, BatchResult, run_batch
+from .callback_bridge import CALL_PREFIX, CMD_MODE_MARKERS, CallbackBridge, CallbackCall
+from .content_store import ContentAddressedFiles, private_files
 from .convo_cli_path import discover_convo_bin
 from .error_utils import raise_for_cli_failure
 from .errors import ConvoNotFound, ExecFailed, Timeout
 from .convo_vars_serializer import ConvoVarsSerializer
+from .instrumentation import (
+    Instrumentation,
+    current_event,
+    maybe_span,
+    record_process,
+    wait_with_rusage,
+)
+from .resilience import HedgePolicy, ResilienceStats, ResilientCaller, RetryPolicy, current_cancel_scope
+from .scheduler import CompletionScheduler
+
+_VARS_TRANSPORTS = ("auto", "argv", "file")
+# Variables serialized to at least this many characters get a file of their own
+_VARS_BLOB_MIN_CHARS = 1024
 
 
 @dataclass
 class ConvoCLIRunner:
-    """Thin, testable wrapper around the Convo-Lang CLI."""
+    """
+    Thin, testable wrapper around the Convo-Lang CLI.
+    use_stdin: run_text pipes the source to `convo --stdin` instead of writing a temp file.
+    cache_config: config is written once to a content-hashed file in cache_dir and reused.
+    vars_transport: "argv" passes variables inline via --vars, "file" writes them to
+        content-hashed files passed via --vars-path, and "auto" (default) switches to
+        files once the serialized variables exceed vars_file_threshold bytes. Vars files
+        live in a private per-process directory removed at exit (see private_files).
+    instrumentation: records spawn time, CLI wall time, child rusage and output sizes
+        of every CLI run (see convo_lang.instrumentation).
+    scheduler: CompletionScheduler shared between runners that admits each run under
+        per-model rate limits and adaptive concurrency.
+    retry / hedge: RetryPolicy and HedgePolicy applied to run_text, run_file and
+        run_many; counts are available from resilience_stats.
+    """
     convo_bin: Optional[str] = None
     config: Optional[Dict] = None
+    use_stdin: bool = False
+    cache_config: bool = False
+    cache_dir: Optional[str] = None
+    vars_transport: str = "auto"
+    vars_file_threshold: int = 16 * 1024
+    instrumentation: Optional[Instrumentation] = None
+    scheduler: Optional[CompletionScheduler] = None
+    retry: Optional[RetryPolicy] = None
+    hedge: Optional[HedgePolicy] = None
+    _resilience: Optional[ResilientCaller] = field(init=False, repr=False, default=None)
+    _config_files: Optional[ContentAddressedFiles] = field(init=False, repr=False, default=None)
 
     def __post_init__(self) -> None:
+        if self.vars_transport not in _VARS_TRANSPORTS:
+            raise ValueError(
+                f"vars_transport must be one of {', '.join(_VARS_TRANSPORTS)}, got {self.vars_transport!r}"
+            )
         if not self.convo_bin:
             try:
                 self.convo_bin = discover_convo_bin()
             except Exception as e:
                 raise ConvoNotFound(f"Convo CLI binary not found: {e}") from e
+        if self.retry is not None or self.hedge is not None:
+            self._resilience = ResilientCaller(self.retry, self.hedge)
+
+    @property
+    def resilience_stats(self) -> ResilienceStats:
+        """Calls, attempts, retries and hedges made under retry / hedge."""
+        return self._resilience.stats if self._resilience else ResilienceStats()
+
+    def _resilient(self, fn: Callable[[], str]) -> str:
+        return self._resilience.call(fn) if self._resilience else fn()
     
     def _build_cmd(
         self,
-        path: Path,
+        path: Optional[Path],
         *,
         variables: Optional[Dict],
         extra_args: Optional[List[str]],
         use_prefix_output: bool = True,
     ) -> List[str]:
-        """Compose the CLI command arguments (no I/O, no shell quoting)."""
-        cmd: List[str] = [self.convo_bin, str(path)]
+        """
+        Compose the CLI command arguments (no shell quoting).
+        A None path makes the CLI read the source from stdin. The only I/O is writing
+        variable files when the file transport is used (see _vars_args).
+        """
+        cmd: List[str] = [self.convo_bin, str(path) if path else "--stdin"]
         if variables:
-            serializer = ConvoVarsSerializer()
-            cmd += ["--vars", serializer.to_convo_vars(vars_dict=variables)]
+            cmd += self._vars_args(variables)
         if use_prefix_output:
             cmd += ["--prefixOutput"]
         if extra_args:
             cmd += list(extra_args)
         return cmd
 
-    def _materialize_config_file(self) -> Optional[Path]:
-        if not self.config:
-            return None
-        tmp = tempfile.NamedTemporaryFile(
-            prefix="convo_config_",
-            suffix=".json",
-            delete=False,
-            mode="w",
-            encoding="utf-8",
-        )
-        json.dump(self.config, tmp, ensure_ascii=False, indent=2)
-        tmp.close()
-        return Path(tmp.name)
+    def _vars_args(self, variables: Dict) -> List[str]:
+        """
+        Arguments that pass `variables` to the CLI according to vars_transport.
+        For the file transport each large top-level variable gets its own file, so a
+        document reused across calls is written once; the remaining small variables
+        share one file. Files are named by content hash and held until the run that
+        uses them releases them (see _held_vars).
+        """
+        serializer = ConvoVarsSerializer()
+        if self.vars_transport == "argv":
+            return ["--vars", serializer.to_convo_vars(vars_dict=variables)]
+        if self.vars_transport == "auto":
+            inline = serializer.to_convo_vars(vars_dict=variables)
+            if len(inline.encode("utf-8")) <= self.vars_file_threshold:
+                return ["--vars", inline]
+        args: List[str] = []
+        small: Dict[str, Any] = {}
+        for key, value in variables.items():
+            encoded = serializer.to_convo_vars(vars_dict={key: value})
+            if len(encoded) >= _VARS_BLOB_MIN_CHARS:
+                args += ["--vars-path", str(self._write_vars_file(encoded))]
+            else:
+                small[key] = value
+        if small:
+            encoded = serializer.to_convo_vars(vars_dict=small)
+            args[:0] = ["--vars-path", str(self._write_vars_file(encoded))]
+        return args
+
+    def _write_vars_file(self, encoded: str) -> Path:
+        return private_files().acquire(encoded, prefix="convo_vars_", suffix=".json")
+
+    @contextmanager
+    def _held_vars(self, cmd: List[str]) -> Iterator[None]:
+        """Release the vars files `cmd` was built with once the block exits."""
+        try:
+            yield
+        finally:
+            files = private_files()
+            for i, arg in enumerate(cmd[:-1]):
+                if arg == "--vars-path" and Path(cmd[i + 1]).parent == files.root:
+                    files.release(Path(cmd[i + 1]))
+
+    @contextmanager
+    def _cli_command(
+        self,
+        script_path: Optional[Path],
+        *,
+        variables: Optional[Dict],
+        extra_args: Optional[List[str]],
+    ) -> Iterator[List[str]]:
+        """Yield the CLI command for one run; its config and vars files are released afterwards."""
+        with self._temporary_config_path() as config_path:
+            cmd = self._build_cli_command(
+                script_path,
+                variables=variables,
+                extra_args=extra_args,
+                config_path=config_path,
+            )
+            with self._held_vars(cmd):
+                yield cmd
 
     def run_file(
         self,
@@ -72,25 +179,58 @@ class ConvoCLIRunner:
         Run a .convo file via CLI and return full transcript (stdout).
         Raises ConvoNotFound, ExecFailed, or Timeout on errors.
         """
+        return self._resilient(lambda: self._run_file_once(
+            script_path,
+            variables=variables,
+            timeout=timeout,
+            working_dir=working_dir,
+            extra_args=extra_args,
+        ))
+
+    def _run_file_once(
+        self,
+        script_path: str,
+        *,
+        variables: Optional[Dict],
+        timeout: Optional[float],
+        working_dir: Optional[str],
+        extra_args: Optional[List[str]],
+    ) -> str:
         path = Path(script_path).resolve()
-        with self._temporary_config_path() as config_path:
-            cmd = self._build_cli_command(
-                path,
-                variables=variables,
-                extra_args=extra_args,
-                config_path=config_path,
-            )
-            proc = self._run_subprocess(
-                cmd,
-                timeout=timeout,
-                working_dir=working_dir,
-            )
-            self._raise_on_nonzero_exit(proc)
-            return proc.stdout or ""
+        with self._admit(path=path), self._cli_command(path, variables=variables, extra_args=extra_args) as cmd:
+            with maybe_span(self.instrumentation, "cli", transport="file"):
+                proc = self._run_subprocess(
+                    cmd,
+                    timeout=timeout,
+                    working_dir=working_dir,
+                )
+                self._raise_on_nonzero_exit(proc)
+                return proc.stdout or ""
+
+    @contextmanager
+    def _admit(self, convo_text: Optional[str] = None, *, path: Optional[Path] = None) -> Iterator[None]:
+        """Wait for the scheduler (if any) to admit a run of `convo_text` or the file at `path`."""
+        if self.scheduler is None:
+            yield
+            return
+        if convo_text is None:
+            try:
+                convo_text = path.read_text(encoding="utf-8", errors="replace") if path else ""
+            except OSError:
+                convo_text = ""
+        with self.scheduler.admit_source(convo_text, self.config):
+            yield
 
     @contextmanager
     def _temporary_config_path(self) -> Iterator[Optional[Path]]:
-        """Create a temporary JSON config file if self.config is provided."""
+        """
+        Provide a JSON config file if self.config is set. With cache_config the
+        content-hashed file is reused across calls, otherwise a temp file is
+        written and removed after the call.
+        """
+        if self.config and self.cache_config:
+            yield self._cached_config_path(self.config)
+            return
         config_path: Optional[Path] = None
         try:
             if self.config:
@@ -118,9 +258,16 @@ class ConvoCLIRunner:
             tmp_cfg.close()
         return Path(tmp_cfg.name)
 
+    def _cached_config_path(self, config: Dict) -> Path:
+        """Return the shared config file for this exact config content."""
+        if self._config_files is None:
+            self._config_files = ContentAddressedFiles(self.cache_dir)
+        content = json.dumps(config, ensure_ascii=False, indent=2, sort_keys=True)
+        return self._config_files.write(content, prefix="convo_config_", suffix=".json")
+
     def _build_cli_command(
         self,
-        script_path: Path,
+        script_path: Optional[Path],
         *,
         variables: Optional[Dict],
         extra_args: Optional[List[str]],
@@ -143,11 +290,20 @@ class ConvoCLIRunner:
         *,
         timeout: Optional[float],
         working_dir: Optional[str],
+        input_text: Optional[str] = None,
     ) -> subprocess.CompletedProcess[str]:
         """Run subprocess and map low-level errors to SDK errors."""
+        if self.instrumentation is not None or current_cancel_scope() is not None:
+            return self._run_instrumented(
+                cmd,
+                timeout=timeout,
+                working_dir=working_dir,
+                input_text=input_text,
+            )
         try:
             return subprocess.run(
                 cmd,
+                input=input_text,
                 capture_output=True,
                 text=True,
                 cwd=working_dir or None,
@@ -162,6 +318,90 @@ class ConvoCLIRunner:
         except OSError as e:
             raise ExecFailed(f"Failed to execute Convo CLI: {e}") from e
 
+    def _run_instrumented(
+        self,
+        cmd: List[str],
+        *,
+        timeout: Optional[float],
+        working_dir: Optional[str],
+        input_text: Optional[str],
+    ) -> subprocess.CompletedProcess[str]:
+        """
+        Popen-based _run_subprocess that measures the run on the current RunEvent and
+        lets the current CancelScope kill the process.
+        """
+        event = current_event()
+        scope = current_cancel_scope()
+        start = time.perf_counter()
+        try:
+            proc = subprocess.Popen(
+                cmd,
+                stdin=subprocess.PIPE if input_text is not None else None,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                cwd=working_dir or None,
+                text=True,
+                encoding="utf-8",
+                errors="replace",
+            )
+        except FileNotFoundError as e:
+            raise ConvoNotFound(f"Convo CLI binary not found: {e}") from e
+        except OSError as e:
+            raise ExecFailed(f"Failed to execute Convo CLI: {e}") from e
+        spawned = time.perf_counter()
+        if scope is not None:
+            scope.attach(proc)
+        # Not communicate(): it reaps the child before wait_with_rusage could read its rusage
+        stderr_parts: List[str] = []
+        timed_out = threading.Event()
+
+        def pump_stdio() -> None:
+            if input_text is not None:
+                try:
+                    proc.stdin.write(input_text)
+                    proc.stdin.close()
+                except OSError:
+                    pass
+            stderr_parts.append(proc.stderr.read())
+
+        def on_timeout() -> None:
+            timed_out.set()
+            proc.kill()
+
+        pump = threading.Thread(target=pump_stdio, daemon=True)
+        pump.start()
+        timer = threading.Timer(timeout, on_timeout) if timeout else None
+        if timer:
+            timer.daemon = True
+            timer.start()
+        stdout = ""
+        rusage = None
+        try:
+            stdout = proc.stdout.read()
+            rusage = wait_with_rusage(proc)
+        finally:
+            if timer:
+                timer.cancel()
+            if proc.poll() is None:
+                proc.kill()
+                proc.wait()
+            if scope is not None:
+                scope.detach(proc)
+        pump.join()
+        stderr = "".join(stderr_parts)
+        record_process(
+            event,
+            spawn_time=spawned - start,
+            wall_time=time.perf_counter() - spawned,
+            returncode=proc.returncode,
+            stdout=stdout,
+            stderr=stderr,
+            rusage=rusage,
+        )
+        if timed_out.is_set():
+            raise Timeout(f"Convo CLI timed out after {timeout} seconds")
+        return subprocess.CompletedProcess(cmd, proc.returncode, stdout, stderr)
+
     def _raise_on_nonzero_exit(self, proc: subprocess.CompletedProcess[str]) -> None:
         """Raise a normalized error if CLI returned non-zero exit code."""
         if proc.returncode != 0:
@@ -184,9 +424,18 @@ class ConvoCLIRunner:
         """
         Materialize `convo_text` to a temp file and run it via CLI.
         If keep_temp=True, the temp file is preserved (useful for debugging).
+        With use_stdin the source is piped to the CLI and no file is written.
         """
         if not convo_text.strip():
             raise ExecFailed("Empty .convo text submitted to runner.")
+        if self.use_stdin:
+            return self._resilient(lambda: self._run_stdin(
+                convo_text,
+                variables=variables,
+                timeout=timeout,
+                working_dir=working_dir,
+                extra_args=extra_args,
+            ))
         tmp = tempfile.NamedTemporaryFile(
             prefix="convo_",
             suffix=".convo",
@@ -212,3 +461,343 @@ class ConvoCLIRunner:
                     tmp_path.unlink(missing_ok=True)
                 except Exception:
                     pass
+
+    def _run_stdin(
+        self,
+        convo_text: str,
+        *,
+        variables: Optional[Dict],
+        timeout: Optional[float],
+        working_dir: Optional[str],
+        extra_args: Optional[List[str]],
+    ) -> str:
+        """Run `convo_text` via `convo --stdin`."""
+        with self._admit(convo_text), self._cli_command(None, variables=variables, extra_args=extra_args) as cmd:
+            with maybe_span(self.instrumentation, "cli", transport="stdin"):
+                proc = self._run_subprocess(
+                    cmd,
+                    timeout=timeout,
+                    working_dir=working_dir,
+                    input_text=convo_text,
+                )
+                self._raise_on_nonzero_exit(proc)
+                return proc.stdout or ""
+
+    def stream_text(
+        self,
+        convo_text: str,
+        *,
+        variables: Optional[Dict] = None,
+        timeout: Optional[float] = 120.0,
+        working_dir: Optional[str] = None,
+        extra_args: Optional[List[str]] = None,
+    ) -> Iterator[str]:
+        """
+        Run `convo_text` via CLI and yield stdout lines (without newlines) as they
+        are written. Errors are raised once the CLI exits, after all lines were yielded.
+        Closing the generator early kills the CLI.
+        """
+        if not convo_text.strip():
+            raise ExecFailed("Empty .convo text submitted to runner.")
+        with self._stream_source(convo_text) as (path, input_text):
+            with self._admit(convo_text), self._cli_command(path, variables=variables, extra_args=extra_args) as cmd:
+                with maybe_span(self.instrumentation, "cli_stream"):
+                    yield from self._stream_subprocess(
+                        cmd,
+                        timeout=timeout,
+                        working_dir=working_dir,
+                        input_text=input_text,
+                    )
+
+    @contextmanager
+    def _stream_source(self, convo_text: str) -> Iterator[Tuple[Optional[Path], Optional[str]]]:
+        """Yield (script path, stdin text) for convo_text according to use_stdin."""
+        if self.use_stdin:
+            yield None, convo_text
+            return
+        with self._batch_script_path(None, convo_text) as path:
+            yield path, None
+
+    def _stream_subprocess(
+        self,
+        cmd: List[str],
+        *,
+        timeout: Optional[float],
+        working_dir: Optional[str],
+        input_text: Optional[str] = None,
+    ) -> Iterator[str]:
+        """Popen-based counterpart of _run_subprocess that yields stdout lines."""
+        event = current_event()
+        start = time.perf_counter()
+        try:
+            proc = subprocess.Popen(
+                cmd,
+                stdin=subprocess.PIPE if input_text is not None else subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                cwd=working_dir or None,
+                text=True,
+                encoding="utf-8",
+                errors="replace",
+            )
+        except FileNotFoundError as e:
+            raise ConvoNotFound(f"Convo CLI binary not found: {e}") from e
+        except OSError as e:
+            raise ExecFailed(f"Failed to execute Convo CLI: {e}") from e
+
+        spawned = time.perf_counter()
+        stderr_parts: List[str] = []
+        timed_out = threading.Event()
+
+        def pump_stdio() -> None:
+            if input_text is not None:
+                try:
+                    proc.stdin.write(input_text)
+                    proc.stdin.close()
+                except OSError:
+                    pass
+            stderr_parts.append(proc.stderr.read())
+
+        def on_timeout() -> None:
+            timed_out.set()
+            proc.kill()
+
+        pump = threading.Thread(target=pump_stdio, daemon=True)
+        pump.start()
+        timer = threading.Timer(timeout, on_timeout) if timeout else None
+        if timer:
+            timer.daemon = True
+            timer.start()
+        stdout_parts: List[str] = []
+        rusage = None
+        try:
+            for line in proc.stdout:
+                stdout_parts.append(line)
+                yield line.rstrip("\r\n")
+            rusage = wait_with_rusage(proc)
+        finally:
+            if timer:
+                timer.cancel()
+            if proc.poll() is None:
+                proc.kill()
+                proc.wait()
+        pump.join()
+        record_process(
+            event,
+            spawn_time=spawned - start,
+            wall_time=time.perf_counter() - spawned,
+            returncode=proc.returncode,
+            stdout="".join(stdout_parts),
+            stderr="".join(stderr_parts),
+            rusage=rusage,
+        )
+        if timed_out.is_set():
+            raise Timeout(f"Convo CLI timed out after {timeout} seconds")
+        if proc.returncode != 0:
+            raise_for_cli_failure(
+                returncode=proc.returncode,
+                stdout="".join(stdout_parts),
+                stderr="".join(stderr_parts),
+            )
+
+    def run_with_callbacks(
+        self,
+        convo_text: str,
+        *,
+        callbacks: Dict[str, Callable[..., Any]],
+        variables: Optional[Dict] = None,
+        timeout: Optional[float] = 120.0,
+        working_dir: Optional[str] = None,
+        extra_args: Optional[List[str]] = None,
+        callback_timeout: Optional[float] = 30.0,
+        max_workers: int = 4,
+        on_call: Optional[Callable[[CallbackCall], None]] = None,
+    ) -> str:
+        """
+        Run `convo_text` with `convo --cmd-mode` so functions the .convo source calls but
+        does not define are answered by `callbacks` (called with the positional args).
+        Returns the transcript without the cmd-mode marker lines. Each call is reported
+        to `on_call` with its latency once answered. The source is always passed as a
+        file because stdin carries the callback replies.
+        """
+        if not convo_text.strip():
+            raise ExecFailed("Empty .convo text submitted to runner.")
+        with self._batch_script_path(None, convo_text) as path:
+            cmd_args = list(extra_args or []) + ["--cmd-mode"]
+            with self._admit(convo_text), self._cli_command(path, variables=variables, extra_args=cmd_args) as cmd:
+                with maybe_span(self.instrumentation, "cli_cmd_mode"):
+                    return self._run_cmd_mode(
+                        cmd,
+                        callbacks=callbacks,
+                        timeout=timeout,
+                        working_dir=working_dir,
+                        callback_timeout=callback_timeout,
+                        max_workers=max_workers,
+                        on_call=on_call,
+                    )
+
+    def _run_cmd_mode(
+        self,
+        cmd: List[str],
+        *,
+        callbacks: Dict[str, Callable[..., Any]],
+        timeout: Optional[float],
+        working_dir: Optional[str],
+        callback_timeout: Optional[float],
+        max_workers: int,
+        on_call: Optional[Callable[[CallbackCall], None]],
+    ) -> str:
+        event = current_event()
+        start = time.perf_counter()
+        try:
+            proc = subprocess.Popen(
+                cmd,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                cwd=working_dir or None,
+                text=True,
+                encoding="utf-8",
+                errors="replace",
+            )
+        except FileNotFoundError as e:
+            raise ConvoNotFound(f"Convo CLI binary not found: {e}") from e
+        except OSError as e:
+            raise ExecFailed(f"Failed to execute Convo CLI: {e}") from e
+
+        spawned = time.perf_counter()
+        write_lock = threading.Lock()
+
+        def write(reply: str) -> None:
+            with write_lock:
+                proc.stdin.write(reply)
+                proc.stdin.flush()
+
+        stderr_parts: List[str] = []
+        pump = threading.Thread(target=lambda: stderr_parts.append(proc.stderr.read()), daemon=True)
+        pump.start()
+        timed_out = threading.Event()
+
+        def on_timeout() -> None:
+            timed_out.set()
+            proc.kill()
+
+        timer = threading.Timer(timeout, on_timeout) if timeout else None
+        if timer:
+            timer.daemon = True
+            timer.start()
+        stdout_lines: List[str] = []
+        rusage = None
+        bridge = CallbackBridge(
+            callbacks,
+            write,
+            max_workers=max_workers,
+            timeout=callback_timeout,
+            on_call=on_call,
+        )
+        try:
+            with bridge:
+                for line in proc.stdout:
+                    if line.startswith(CALL_PREFIX):
+                        bridge.dispatch(line.rstrip("\r\n"))
+                    elif line.rstrip("\r\n") not in CMD_MODE_MARKERS:
+                        stdout_lines.append(line)
+            try:
+                proc.stdin.close()
+            except OSError:
+                pass
+            rusage = wait_with_rusage(proc)
+        finally:
+            if timer:
+                timer.cancel()
+            if proc.poll() is None:
+                proc.kill()
+                proc.wait()
+        pump.join()
+        stdout = "".join(stdout_lines)
+        record_process(
+            event,
+            spawn_time=spawned - start,
+            wall_time=time.perf_counter() - spawned,
+            returncode=proc.returncode,
+            stdout=stdout,
+            stderr="".join(stderr_parts),
+            rusage=rusage,
+        )
+        if timed_out.is_set():
+            raise Timeout(f"Convo CLI timed out after {timeout} seconds")
+        if proc.returncode != 0:
+            raise_for_cli_failure(
+                returncode=proc.returncode,
+                stdout=stdout,
+                stderr="".join(stderr_parts),
+            )
+        return stdout
+
+    def run_many(
+        self,
+        items: Iterable[Optional[Dict]],
+        *,
+        script_path: Optional[str] = None,
+        convo_text: Optional[str] = None,
+        max_concurrency: Optional[int] = None,
+        ordered: bool = True,
+        timeout: Optional[float] = 120.0,
+        working_dir: Optional[str] = None,
+        extra_args: Optional[List[str]] = None,
+        on_result: Optional[Callable[[BatchItemResult], None]] = None,
+    ) -> BatchResult:
+        """
+        Run one script (`script_path` or `convo_text`) once per item, where each item
+        is the variables dict for that run. At most `max_concurrency` CLI processes
+        run at a time (default: CPU count). Per-item errors are collected on the
+        results instead of failing the batch.
+        """
+        with self._batch_script_path(script_path, convo_text) as path:
+            def run_one(variables: Optional[Dict]) -> str:
+                return self.run_file(
+                    str(path),
+                    variables=variables,
+                    timeout=timeout,
+                    working_dir=working_dir,
+                    extra_args=extra_args,
+                )
+            return run_batch(
+                run_one,
+                items,
+                max_concurrency=max_concurrency,
+                ordered=ordered,
+                on_result=on_result,
+            )
+
+    @contextmanager
+    def _batch_script_path(
+        self,
+        script_path: Optional[str],
+        convo_text: Optional[str],
+    ) -> Iterator[Path]:
+        """Yield a script path shared by every item of a batch."""
+        if (script_path is None) == (convo_text is None):
+            raise ValueError("Pass exactly one of script_path or convo_text")
+        if script_path is not None:
+            yield Path(script_path).resolve()
+            return
+        if not convo_text.strip():
+            raise ExecFailed("Empty .convo text submitted to runner.")
+        tmp = tempfile.NamedTemporaryFile(
+            prefix="convo_",
+            suffix=".convo",
+            delete=False,
+            mode="w",
+            encoding="utf-8"
+        )
+        tmp_path = Path(tmp.name)
+        try:
+            tmp.write(convo_text)
+            tmp.close()
+            yield tmp_path
+        finally:
+            try:
+                tmp_path.unlink(missing_ok=True)
+            except Exception:
+                pass
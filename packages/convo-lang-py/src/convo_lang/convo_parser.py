@@ -0,0 +1,1042 @@
+from __future__ import annotations
+import json
+import math
+import re
+from typing import Any, Dict, List, Optional
+
+from .errors import ConvoSyntaxError, UnsupportedConvoSyntax
+
+# Port of the message / statement grammar of parseConvoCode in the convo-lang package
+# (convo-parser.ts). The result matches `convo --parse` and the CLI's `m:` output for
+# everything except the constructs listed in parse_convo's docstring. Regexes are kept
+# as close to the TypeScript ones as possible; JS `$` (no multiline flag) becomes `\Z`
+# and re.ASCII keeps `\w` ASCII-only like in JS.
+
+_FN_MESSAGE = re.compile(r"(>)[ \t]*(\w+)?[ \t]+(\w+)\s*(\()", re.S | re.A)
+_TOP_LEVEL_MESSAGE = re.compile(
+    r"(>)[ \t]*(do|thinkingResult|result|define|debug|end|target|make|stage|app|\w+[ \t]*!)([^\n\r]*)?",
+    re.A,
+)
+_ROLE = re.compile(r"(>)[ \t]*(\w+)([ \t]+[^\n\r]*)?", re.A)
+_ALPHA_START = re.compile(r"^\w", re.A)
+_STATEMENT = re.compile(
+    r"""([\s\n\r]*[,;]*[\s\n\r]*)((#|//|@|\)|\}\}|\}|\]|<<|>|\Z)|((\w+|"[^"]*"|'[^']*')(\??):)?\s*(([\w.]+)\s*=)?\s*('|"|\?{3,}|={3,}|\*{3,}|-{3,}|[\w.]+\s*(\()|[\w.]+|-?[\d.]+|\{|\[))""",
+    re.S | re.A,
+)
+_SPACE, _CC, _LABEL, _OPT, _SET, _VALUE, _FN_OPEN = 1, 3, 5, 6, 8, 9, 10
+_RETURN_TYPE = re.compile(r"\s*(\w+)?\s*->\s*(\w+)?\s*(\(?)", re.S | re.A)
+_NUMBER = re.compile(r"^-?[.\d]")
+_STRING_END = {
+    "'": re.compile(r"\{\{|'", re.S),
+    '"': re.compile(r'"', re.S),
+    "---": re.compile(r"-{3,}", re.S),
+    ">": re.compile(r"(\{\{|[\n\r]\s*>|\Z)", re.S),
+    "???": re.compile(r"\?\?\?", re.S),
+    "===": re.compile(r"\{\{|===", re.S),
+}
+_HEREDOC_OPENING = re.compile(r"^([^\n])*\n(\s*)")
+_HEREDOC_REPLACE = re.compile(r"\n(\s*)")
+_TAG = re.compile(r"(\w+)\s*((\w+\s*)?=)?(.*)", re.A)
+_LABELED_TAG_VALUE = re.compile(r"(\w+)[ \t]*(.*)", re.A)
+_ALL_SPACE = re.compile(r"^\s$")
+_TAG_OR_COMMENT = re.compile(r"(\n|\r|^)[ \t]*(#|@|//)")
+_HAS_MESSAGE = re.compile(r"(^|\n)\s*>")
+_UNESCAPE_STR = re.compile(r"\\(.)")
+_UNESCAPE_HEADER = re.compile(r"(\n|\r|^)([ \t]*)\\(\\*>)")
+_ESCAPE_HEADER = re.compile(r"((?:\n|\r|^)[ \t]*\\*)>")
+_ESCAPE_EMBED = re.compile(r"(\\*)\{\{")
+_JSON_ARRAY_TAG = re.compile(r"\s*array\((\w+)\)", re.A)
+_COMPONENT_BLOCK = re.compile(r"^\s*```([^\n]*).*```\s*$", re.S)
+_PARAM_PLACEHOLDER = "{{**PLACE_HOLDER**}}"
+
+_BODY_FN = "__body"
+_ARGS_NAME = "__args"
+_JSON_MAP_FN = "jsonMap"
+_JSON_ARRAY_FN = "jsonArray"
+_SWITCH_FN = "switch"
+_MATCH_FNS = ("case", "test", "default")
+_PIPE_FN = "pipe"
+_VALUE_CONSTANTS = {"true": True, "false": False, "null": None}
+_NON_FUNC_KEYWORDS = ("in",)
+_DYNAMIC_TAGS = ("condition", "disabled", "taskName", "taskDescription", "json", "to", "from", "exit", "on")
+_LABELED_TAGS = ("to", "from")
+_DISABLE_EVAL_TAGS = ("to", "from", "exit")
+_LOCAL_FUNCTION_TAGS = ("on", "messageHandler")
+_ROLES = frozenset((
+    "user", "assistant", "system", "group", "groupEnd", "prefix", "suffix", "append", "appendSystem",
+    "appendUser", "appendAssistant", "prepend", "replace", "replaceForModel", "thinking", "thinkingResult",
+    "rag", "ragPrefix", "ragSuffix", "ragTemplate", "importTemplate", "queue", "flush", "insert", "insertEnd",
+    "nop", "transformResult", "parallel", "parallelEnd", "agentEnd", "call", "do", "result", "define", "debug",
+    "end", "target", "make", "app", "stage", "graph", "graphEnd", "node", "nodeEnd", "goto", "exitGraph",
+    "exit", "to", "from", "_sourceRef", "template", "templateEnd", "run",
+))
+_HANDLER_ALLOWED_ROLES = ("make", "target", "app", "stage")
+_COMPONENT_MODES = ("render", "input")
+_DEFINITION_FUNCTIONS = frozenset((
+    "new", "struct", "map", "mapWithCapture", "array", "enum", _JSON_MAP_FN, _JSON_ARRAY_FN,
+    "getState", "enableRag", "clearRag", "defineForm", "uuid", "shortUuid", "getVar", "setVar",
+    "idx", "setDefault", "enableTransform", "enableAllTransforms", "isUndefined", "secondMs",
+    "minuteMs", "hourMs", "dayMs", "aryFindMatch", "aryRemoveMatch", "dbConfig", "merge", "print",
+    "setObjDefaults", "is", "and", "or", "not", "no", "neq", "eq", "gt", "gte", "lt", "lte", "isIn",
+    "contains", "regexMatch", "starMatch", "deepCompare", "add", "sub", "mul", "div", "mod", "pow",
+    "inc", "dec", "rand", "now", "dateTime", "encodeURI", "encodeURIComponent",
+))
+# Tags whose handling needs code that isn't ported (markdown parsing, triggers, ...)
+_UNSUPPORTED_TAGS = ("markdown", "markdownVars", "importMatch", "on", "transformComponent")
+_NODE_ROUTE_ROLES = ("to", "from", "exit")
+
+
+def _substring(text: str, start: int, end: int) -> str:
+    """String.prototype.substring: clamps to the string and swaps reversed bounds."""
+    start = min(max(start, 0), len(text))
+    end = min(max(end, 0), len(text))
+    if start > end:
+        start, end = end, start
+    return text[start:end]
+
+
+def _last_index_of(text: str, char: str, from_index: int) -> int:
+    """String.prototype.lastIndexOf with a fromIndex."""
+    return text.rfind(char, 0, max(from_index, 0) + 1)
+
+
+def _js_number(value: str) -> Any:
+    """Number(value); NaN is returned as None since JSON.stringify writes it as null."""
+    if "_" in value:
+        return None
+    try:
+        number = int(value, 0) if value[:2].lower() in ("0x", "0o", "0b") else float(value)
+    except ValueError:
+        return None
+    if isinstance(number, float):
+        if math.isnan(number) or math.isinf(number):
+            return None
+        if number.is_integer() and abs(number) < 2 ** 53:
+            return int(number)
+    return number
+
+
+def _unescape_str(value: str) -> str:
+    def replace(match: re.Match) -> str:
+        char = match.group(1)
+        return {"n": "\n", "r": "\n", "t": "\t"}.get(char, char)
+
+    return _UNESCAPE_STR.sub(replace, value)
+
+
+def unescape_convo(value: str) -> str:
+    """Undo the escaping of `{{` and line-leading `>` in message content."""
+    if "{{" in value:
+        value = value.replace("\\{{", "{{")
+    if ">" in value:
+        value = _UNESCAPE_HEADER.sub(lambda m: m.group(1) + m.group(2) + m.group(3), value)
+    return value
+
+
+def escape_convo(value: str) -> str:
+    """Escape `{{` and line-leading `>` so `value` reads back as plain message content."""
+    if "{{" in value:
+        value = _ESCAPE_EMBED.sub(lambda m: m.group(1) + "\\{{" if len(m.group(1)) % 2 == 0 else m.group(0), value)
+    if ">" in value:
+        value = _ESCAPE_HEADER.sub(lambda m: m.group(1) + "\\>", value)
+    return value
+
+
+def _remove_backslashes(params: List[Dict[str, Any]]) -> None:
+    for i in range(0, len(params) - 1, 2):
+        value = params[i].get("value")
+        if isinstance(value, str) and value.endswith("\\\\"):
+            params[i]["value"] = value[:-1]
+
+
+def _trim_left(value: str, count: int) -> str:
+    lines = value.split("\n")
+    for n, line in enumerate(lines):
+        i = 0
+        while i < count and i < len(line) and line[i] in " \t":
+            i += 1
+        if i:
+            lines[n] = line[i:]
+    return ("\r\n" if "\r" in value else "\n").join(lines)
+
+
+def _is_end_of_msg_str(code: str, index: int) -> bool:
+    while True:
+        end = code.find("\n", index)
+        if end == -1:
+            return False
+        line = code[index:end].strip()
+        index = end + 1
+        if not line:
+            continue
+        if line[0] == ">":
+            return True
+        if not _TAG_OR_COMMENT.search(line):
+            return False
+
+
+def _invalid_switch_statement(statement: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    count = 0
+    for param in statement.get("params") or []:
+        if not param.get("mc"):
+            count += 1
+            if count > 2:
+                return param
+        else:
+            count = 0
+    return None
+
+
+def _collapse_pipes(statement: Dict[str, Any]) -> None:
+    params = statement.get("params")
+    statement.pop("_hasPipes", None)
+    if not params:
+        return
+    i = 0
+    while i < len(params):
+        if not params[i].get("_pipe"):
+            i += 1
+            continue
+        if i == 0 or i == len(params) - 1:
+            # Pipes need a target and a source
+            del params[i]
+            continue
+        dest, src = params[i - 1], params[i + 1]
+        if dest.get("fn") == _PIPE_FN:
+            dest.setdefault("params", []).insert(0, src)
+            del params[i:i + 2]
+        else:
+            params[i - 1:i + 2] = [{"s": dest["s"], "e": dest["e"], "fn": _PIPE_FN, "params": [src, dest]}]
+        # JS decrements and then increments i, so the same index is checked again
+
+
+def _line_number(code: str, index: int) -> int:
+    return code.count("\n", 0, max(index, 0)) + 1
+
+
+class _Parser:
+    """State of one parse; mirrors the closure variables of parseConvoCode."""
+
+    def __init__(self, code: str):
+        code += "\n"
+        if not _HAS_MESSAGE.search(code):
+            code = "> user\n" + code
+        self.code = code
+        self.messages: List[Dict[str, Any]] = []
+        self.in_msg = False
+        self.in_fn_msg = False
+        self.in_fn_body = False
+        self.white_space_offset = 0
+        self.string_stack: List[str] = []
+        self.string_statement_stack: List[Dict[str, Any]] = []
+        self.in_string: Optional[str] = None
+        self.last_comment = ""
+        self.tags: List[Dict[str, Any]] = []
+        self.index = 0
+        self.current_message: Optional[Dict[str, Any]] = None
+        self.current_fn: Optional[Dict[str, Any]] = None
+        self.stack: List[Dict[str, Any]] = []
+        self.prev_source_msg: Optional[Dict[str, Any]] = None
+
+    def fail(self, message: str, index: Optional[int] = None) -> ConvoSyntaxError:
+        index = self.index if index is None else index
+        return ConvoSyntaxError(message, index=index, line=_line_number(self.code, index))
+
+    def unsupported(self, what: str) -> UnsupportedConvoSyntax:
+        return UnsupportedConvoSyntax(
+            f"{what} is not supported by the Python parser", index=self.index, line=_line_number(self.code, self.index)
+        )
+
+    # -- helpers shared with the TypeScript closures --
+
+    def push_new_message(self, msg: Dict[str, Any]) -> None:
+        code = self.code
+        self.messages.append(msg)
+        ci = self.index
+        e = ci - 1
+        while True:
+            s = _last_index_of(code, "\n", e)
+            if s == -1:
+                break
+            line = _substring(code, s, e + 1).strip()
+            is_meta = line.startswith(("#", "@", "//"))
+            if line and not is_meta:
+                break
+            e = s - 1
+            if is_meta:
+                ci = s
+            if e < 0:
+                break
+        if self.prev_source_msg is not None:
+            self.prev_source_msg["e"] = ci
+        msg["s"] = ci
+        msg["ln"] = _line_number(code, self.index)
+        self.prev_source_msg = msg
+
+    def open_string(self, kind: str, statement: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        self.in_string = kind
+        self.string_stack.append(kind)
+        if statement is None:
+            statement = self.add_statement({"s": self.index, "e": self.index + len(kind)})
+        self.string_statement_stack.append(statement)
+        return statement
+
+    def close_string(self) -> None:
+        if not self.string_statement_stack:
+            raise self.fail("No string on string stack")
+        last = self.string_statement_stack[-1]
+        last["c"] = self.index
+        if any(item is last for item in self.stack):
+            if self.stack[-1] is not last:
+                raise self.fail("String not on top of stack")
+            self.stack.pop()
+        self.string_stack.pop()
+        self.string_statement_stack.pop()
+        self.in_string = None
+
+    def take_comment(self, drop: bool = False) -> None:
+        self.index += 1
+        newline = self.code.find("\n", self.index)
+        if not drop:
+            comment = _substring(self.code, self.index, newline).strip()
+            if self.last_comment.strip():
+                self.last_comment += "\n" + comment
+            else:
+                self.last_comment = comment
+        self.index = newline
+
+    def take_tag(self) -> None:
+        self.index += 1
+        newline = self.code.find("\n", self.index)
+        match = _TAG.search(_substring(self.code, self.index, newline).strip())
+        if match:
+            value = (match.group(4) or "").strip() or None
+            tag: Dict[str, Any] = {"name": match.group(1) or ""}
+            if match.group(2):
+                if tag["name"] not in _DYNAMIC_TAGS:
+                    raise self.fail(f"Only {', '.join(_DYNAMIC_TAGS)} are allowed to have dynamic expressions")
+                if match.group(3):
+                    label = match.group(3).strip()
+                    if label:
+                        tag["label"] = label
+                if tag["name"] == "json":
+                    raise self.unsupported("An @json tag with a dynamic type")
+                try:
+                    body = _Parser("> do\n" + (value if value is not None else "undefined")).parse()
+                except ConvoSyntaxError as e:
+                    raise self.fail(e.message) from e
+                tag["srcValue"] = value
+                statement = body[0].get("fn", {}).get("body") if body else None
+                if statement is not None:
+                    tag["statement"] = statement
+                if tag["name"] in _DISABLE_EVAL_TAGS:
+                    tag["disableStatementEval"] = True
+            elif tag["name"] in _LABELED_TAGS:
+                labeled = _LABELED_TAG_VALUE.search(value or "")
+                if labeled:
+                    tag["label"] = labeled.group(1)
+                    if labeled.group(2):
+                        tag["value"] = labeled.group(2)
+                elif value is not None:
+                    tag["value"] = value
+            elif value is not None:
+                tag["value"] = value
+            self.tags.append(tag)
+        self.index = newline
+
+    def add_statement(self, statement: Dict[str, Any]) -> Dict[str, Any]:
+        if self.stack:
+            self.stack[-1].setdefault("params", []).append(statement)
+        return statement
+
+    def end_str_msg(self) -> None:
+        """Ends a text content message."""
+        code = self.code
+        msg = self.current_message
+        statement = msg.get("statement") if msg else None
+        start_index = statement.get("s", 0) if statement else 0
+        if statement is not None and not statement.get("fn") and isinstance(statement.get("value"), str):
+            msg["content"] = statement["value"].strip()
+        end = msg.get("content") if msg else None
+        if end is None and statement is not None and statement.get("params"):
+            end = statement["params"][-1].get("value")
+
+        # Remove tags and comments for the next message and move the index back
+        if msg is not None and isinstance(end, str) and _TAG_OR_COMMENT.search(end):
+            e = self.index - 1
+            has_newline = "\n" in end
+            while True:
+                s = _last_index_of(code, "\n", e)
+                if s < start_index:
+                    if not has_newline:
+                        s = start_index
+                    else:
+                        end = ""
+                        break
+                if s == -1:
+                    break
+                line = _substring(code, s, e + 1).strip()
+                if line and not line.startswith(("#", "//", "@")):
+                    break
+                e = s - 1
+                self.index = s
+                if e < 0:
+                    break
+
+            e = len(end) - 1
+            while e >= 0:
+                s = _last_index_of(end, "\n", e) if has_newline else 0
+                if s == -1:
+                    break
+                line = _substring(end, s, e + 1).strip()
+                if line and not line.startswith(("#", "//", "@")):
+                    break
+                e = s - 1
+                if e < 0:
+                    break
+            end = _substring(end, 0, e + 1).rstrip()
+            if _ALL_SPACE.match(end):
+                end = ""
+            if "content" in msg:
+                msg["content"] = end
+            elif statement is not None and statement.get("params"):
+                if end:
+                    statement["params"][-1]["value"] = end
+                else:
+                    statement["params"].pop()
+
+        if self.white_space_offset and msg is not None:
+            if isinstance(msg.get("content"), str):
+                msg["content"] = _trim_left(msg["content"], self.white_space_offset)
+            if statement is not None and statement.get("params"):
+                params = statement["params"]
+                joined = "".join(p["value"] if isinstance(p.get("value"), str) else _PARAM_PLACEHOLDER for p in params)
+                lines = _trim_left(joined, self.white_space_offset).split(_PARAM_PLACEHOLDER)
+                for i, value in enumerate(lines):
+                    n = 0 if i == 0 else i * 2
+                    if n < len(params):
+                        params[n]["value"] = value
+
+        if msg is not None:
+            format_tag = next((t for t in msg.get("tags") or [] if t.get("name") == "format"), None)
+            if format_tag is not None and format_tag.get("value") == "json":
+                if "content" not in msg:
+                    raise self.fail("Messages that contain embeds can not use @format json", start_index)
+                try:
+                    msg["jsonValue"] = json.loads(msg["content"])
+                except ValueError:
+                    # The CLI accepts JSON5 here; tell strict-JSON failures apart from real errors
+                    raise self.unsupported("@format json content that is not strict JSON") from None
+            if statement is not None:
+                statement["e"] = self.index
+            if msg.get("content") == "" and statement is not None and statement.get("value") == "":
+                del msg["statement"]
+        self.current_message = None
+        self.in_msg = False
+        self.stack.pop()
+
+    # -- main loop --
+
+    def parse(self) -> List[Dict[str, Any]]:
+        code = self.code
+        length = len(code)
+        while self.index < length:
+            if self.in_string:
+                self.parse_string()
+            elif self.in_msg or self.in_fn_msg:
+                self.parse_statement()
+            else:
+                self.parse_top()
+        self.finish()
+        return self.messages
+
+    def parse_string(self) -> None:
+        code = self.code
+        if not self.string_statement_stack:
+            raise self.fail("No string statement found")
+        statement = self.string_statement_stack[-1]
+        kind = self.in_string
+        end_reg = _STRING_END[kind]
+        is_msg = kind == ">"
+        next_index = self.index
+        while True:
+            found = end_reg.search(code, next_index)
+            if not found:
+                raise self.fail("End of string not found")
+            embed = found.group(0) == "{{"
+            if embed and is_msg:
+                # An embed in a dynamic tag value of the next message ends this message
+                next_index = _last_index_of(code, "\n", found.start())
+            if embed and is_msg and code[next_index + 1] == "@" and _is_end_of_msg_str(code, next_index + 1):
+                embed = False
+                end_index = next_index = next_index - 1
+            else:
+                end_index = found.start()
+                next_index = found.end() - 1 if (is_msg and not embed) else found.end()
+            if is_msg and not embed:
+                break
+            backslashes = 0
+            i = end_index - 1
+            while i >= 0 and code[i] == "\\":
+                backslashes += 1
+                i -= 1
+            if backslashes % 2 == 0:
+                break
+
+        content = _substring(code, self.index, end_index)
+        content = _unescape_str(content) if self.in_fn_msg else unescape_convo(content)
+
+        if embed:
+            params = statement.setdefault("params", [])
+            if not statement.get("fn"):
+                statement["fn"] = "md"
+                self.stack.append(statement)
+            params.append({"value": content, "s": self.index, "e": next_index})
+            self.in_string = None
+            self.index = next_index
+            return
+
+        if kind == "---":
+            opening = _HEREDOC_OPENING.match(content)
+            if opening:
+                indent = len(opening.group(2) or "")
+                value = _HEREDOC_REPLACE.sub(lambda m: "\n" + m.group(1)[indent:], content)
+                statement["value"] = value.strip() if (opening.group(1) or "").strip() else value
+            else:
+                statement["value"] = content
+        else:
+            if statement.get("params"):
+                if content:
+                    statement["params"].append({"value": content, "s": self.index, "e": next_index})
+                if is_msg:
+                    _remove_backslashes(statement["params"])
+            else:
+                statement["value"] = content
+            if kind in ("???", "==="):
+                raise self.unsupported("Inline prompts")
+        self.index = next_index
+        self.close_string()
+        if is_msg:
+            self.end_str_msg()
+
+    def parse_statement(self) -> None:
+        code = self.code
+        match = _STATEMENT.search(code, self.index)
+        if not match:
+            raise self.fail("Unexpected end of function" if self.in_fn_msg else "Unexpected end of message")
+        cc = match.group(_CC)
+        offset = len(match.group(0))
+        space_length = len(match.group(_SPACE) or "")
+        if match.start() != self.index:
+            self.index = match.start() - 1
+            raise self.fail(f"Invalid character in function body ({code[self.index]})")
+
+        if cc in ("#", "//"):
+            self.index += space_length
+            self.take_comment(cc == "//")
+            return
+        if cc == "@":
+            self.index += space_length
+            self.take_tag()
+            return
+        if cc == "<<":
+            last = self.stack[-1] if self.stack else None
+            if last is None:
+                raise self.fail("Pipe operator used outside of a parent statement")
+            if last.get("params") and last["params"][-1].get("_pipe"):
+                raise self.fail("Pipe operator followed by another pipe operator")
+            last["_hasPipes"] = True
+            self.add_statement({"s": self.index, "e": self.index + offset, "_pipe": True})
+            self.index += offset
+            return
+        if cc is not None:
+            self.close_statement(match, cc, offset)
+            return
+
+        value = match.group(_VALUE) or None
+        label = (match.group(_LABEL) or "").replace('"', "").replace("'", "") or None
+        fn_open = bool(match.group(_FN_OPEN))
+        if value == "{":
+            value, fn_open = _JSON_MAP_FN + "(", True
+        elif value == "[":
+            value, fn_open = _JSON_ARRAY_FN + "(", True
+
+        statement: Dict[str, Any] = {"s": self.index + space_length, "e": self.index + offset}
+        if label:
+            statement["label"] = label
+        if match.group(_OPT):
+            statement["opt"] = True
+        set_name = match.group(_SET)
+        if set_name:
+            if "." in set_name:
+                path = set_name.split(".")
+                statement["set"] = path[0]
+                statement["setPath"] = path[1:]
+            else:
+                statement["set"] = set_name
+        if self.last_comment:
+            statement["comment"] = self.last_comment
+            self.last_comment = ""
+        top_level = bool(self.current_fn and self.current_fn.get("topLevel"))
+        if top_level and not any(t["name"] == "local" for t in self.tags):
+            statement["shared"] = True
+        if self.tags:
+            statement["tags"] = self.tags
+            if not top_level and any(t["name"] == "shared" for t in self.tags):
+                statement["shared"] = True
+            self.tags = []
+        self.add_statement(statement)
+
+        if fn_open:
+            if not value or len(value) < 2:
+                self.index += offset - 1
+                raise self.fail("function call name expected")
+            fn = value[:-1].strip()
+            statement["fn"] = fn
+            if fn in _MATCH_FNS:
+                statement["mc"] = True
+                last = self.stack[-1] if self.stack else None
+                if last is None or last.get("fn") != _SWITCH_FN:
+                    raise self.fail("Switch match statement used outside of a switch", statement["s"])
+                last["hmc"] = True
+                if last.get("params") and last["params"][0] is statement:
+                    raise self.fail(
+                        "Switch match statement used before passing a value to match. The first parameter "
+                        "of a switch should be any value other than a switch match statement",
+                        statement["s"],
+                    )
+            if self.current_fn and self.current_fn.get("definitionBlock") and fn not in _DEFINITION_FUNCTIONS:
+                self.index += offset - 1
+                raise self.fail(f"Definition block calling illegal function ({fn})")
+            if "." in fn:
+                path = fn.split(".")
+                statement["fn"] = path[-1]
+                statement["fnPath"] = path[:-1]
+            self.stack.append(statement)
+        elif value in ('"', "'"):
+            self.open_string(value, statement)
+        elif value.startswith("---"):
+            self.open_string("---", statement)
+        elif value.startswith("???"):
+            self.open_string("???", statement)
+        elif value.startswith("==="):
+            self.open_string("===", statement)
+        elif _NUMBER.match(value):
+            statement["value"] = _js_number(value)
+        elif value in _VALUE_CONSTANTS:
+            statement["value"] = _VALUE_CONSTANTS[value]
+        elif value == "undefined":
+            pass  # value:undefined is dropped by JSON.stringify
+        elif value in _NON_FUNC_KEYWORDS:
+            statement["keyword"] = value
+        elif "." in value:
+            path = value.split(".")
+            statement["ref"] = path[0]
+            statement["refPath"] = path[1:]
+        else:
+            statement["ref"] = value
+        self.index += offset
+
+    def close_statement(self, match: re.Match, cc: str, offset: int) -> None:
+        top = self.stack[-1] if self.stack else None
+        if cc == "}" and (top is None or top.get("fn") != _JSON_MAP_FN):
+            self.index += offset - 1
+            raise self.fail("Unexpected closing of JSON object")
+        if cc == "]" and (top is None or top.get("fn") != _JSON_ARRAY_FN):
+            self.index += offset - 1
+            raise self.fail("Unexpected closing of JSON array")
+        if cc == ">" and not (self.current_fn and self.current_fn.get("topLevel")):
+            self.index += offset - 1
+            raise self.fail("Unexpected end of function using (>) character")
+        if cc != ">":
+            self.last_comment = ""
+            self.tags = []
+        if top is None:
+            self.index += offset - 1
+            raise self.fail("Unexpected end of function call")
+        if top.get("_hasPipes"):
+            _collapse_pipes(top)
+        if top.get("hmc"):
+            invalid = _invalid_switch_statement(top)
+            if invalid is not None:
+                raise self.fail(
+                    "Switch statements should not switch the current switch value without at least 1 match "
+                    "statement between the 2 value statements.Use a do or fn statement to execute multiple "
+                    "statements after a switch match",
+                    invalid["s"],
+                )
+        end_embed = cc == "}}"
+        start_index = self.index
+        self.index += len(match.group(_SPACE) or "") if cc == ">" else len(match.group(0))
+        if not end_embed:
+            top["c"] = self.index
+            self.stack.pop()
+        if end_embed:
+            if not self.string_stack:
+                self.index += offset - 1
+                raise self.fail("Unexpected string embed closing found")
+            self.in_string = self.string_stack[-1]
+            return
+        if self.stack:
+            return
+        if self.string_stack:
+            self.index += offset - 1
+            raise self.fail("End of call stack reached within a string")
+        fn = self.current_fn
+        if fn is None:
+            self.index += offset - 1
+            raise self.fail("End of call stack reached without being in function")
+        if not self.in_fn_body:
+            returns = _RETURN_TYPE.match(self.code, self.index)
+            if returns:
+                self.index += len(returns.group(0))
+                if returns.group(1):
+                    fn["paramType"] = returns.group(1)
+                    for param in fn["params"]:
+                        if param.get("label"):
+                            raise self.fail(
+                                "Functions that define a parameter collection type should not define "
+                                "individual parameter types",
+                                param["s"],
+                            )
+                if returns.group(2):
+                    fn["returnType"] = returns.group(2)
+                if returns.group(3):
+                    self.in_fn_body = True
+                    fn["body"] = []
+                    self.stack.append({"fn": _BODY_FN, "params": fn["body"], "s": start_index, "e": self.index})
+                    return
+        self.in_fn_msg = False
+        self.in_fn_body = False
+        self.current_fn = None
+
+    def take_message_meta(self, msg: Dict[str, Any]) -> None:
+        self.last_comment = ""
+        if self.tags:
+            msg["tags"] = self.tags
+            self.tags = []
+
+    def parse_top(self) -> None:
+        code = self.code
+        index = self.index
+        char = code[index]
+        if char == ">":
+            self.white_space_offset = 0
+            while index - self.white_space_offset - 1 >= 0 and code[index - self.white_space_offset - 1] in " \t":
+                self.white_space_offset += 1
+            description = self.last_comment or None
+
+            match = _FN_MESSAGE.match(code, index)
+            if match and match.group(2) != "thinking":
+                name = match.group(3) or ""
+                modifiers = [match.group(2)] if match.group(2) else []
+                fn: Dict[str, Any] = {"name": name, "params": [], "modifiers": modifiers, "topLevel": False}
+                if description:
+                    fn["description"] = description
+                if name == "invoke" or "invoke" in modifiers:
+                    fn["invoke"] = True
+                if fn.get("invoke") or "local" in modifiers:
+                    fn["local"] = True
+                if "call" in modifiers:
+                    fn["call"] = True
+                if "extern" in modifiers:
+                    fn["extern"] = True
+                msg: Dict[str, Any] = {"role": "function-call" if fn.get("call") else "function", "fn": fn}
+                if description:
+                    msg["description"] = description
+                self.current_message = msg
+                self.current_fn = fn
+                self.push_new_message(msg)
+                self.take_message_meta(msg)
+                self.index += len(match.group(0))
+                self.stack.append({"fn": "map", "params": fn["params"], "s": index, "e": self.index})
+                self.in_fn_msg = True
+                self.in_fn_body = False
+                return
+
+            match = _TOP_LEVEL_MESSAGE.match(code, index)
+            if match and not _ALPHA_START.match(match.group(3) or ""):
+                name = match.group(2) or "topLevelStatements"
+                if name.endswith("!"):
+                    name = name[:-1].strip()
+                body: List[Dict[str, Any]] = []
+                fn = {
+                    "name": name,
+                    "body": body,
+                    "params": [],
+                    "modifiers": [],
+                    "local": False,
+                    "call": False,
+                    "topLevel": True,
+                    "definitionBlock": name == "define",
+                }
+                if description:
+                    fn["description"] = description
+                msg = {"role": name, "fn": fn}
+                if description:
+                    msg["description"] = description
+                head = (match.group(3) or "").strip()
+                if head:
+                    msg["head"] = head
+                self.current_message = msg
+                self.current_fn = fn
+                self.push_new_message(msg)
+                self.take_message_meta(msg)
+                self.index += len(match.group(0))
+                self.stack.append({"fn": _BODY_FN, "params": body, "s": index, "e": self.index})
+                self.in_fn_msg = True
+                self.in_fn_body = True
+                return
+
+            match = _ROLE.match(code, index)
+            if match:
+                role = match.group(2)
+                msg = {"role": role}
+                if description:
+                    msg["description"] = description
+                head = (match.group(3) or "").strip()
+                if head:
+                    msg["head"] = head
+                self.current_message = msg
+                self.push_new_message(msg)
+                self.take_message_meta(msg)
+                self.in_msg = True
+                self.stack.append({"fn": _BODY_FN, "s": index, "e": index + len(match.group(0))})
+                msg["statement"] = self.open_string(">")
+                self.index += len(match.group(0))
+                if role == "insert":
+                    end = code.find("\n", self.index)
+                    if end == -1:
+                        end = len(code)
+                    parts = code[self.index:end].split(" ")
+                    msg["insert"] = {"label": parts[1] if len(parts) > 1 else "", "before": parts[0] == "before"}
+                    self.index = end
+                return
+            raise self.fail("Message or function expected")
+        if char == "#":
+            self.take_comment()
+        elif char == "/" and code[index + 1:index + 2] == "/":
+            self.index += 1
+            self.take_comment(True)
+        elif char == "@":
+            self.take_tag()
+        elif char.isspace() or char in ";,":
+            self.index += 1
+        else:
+            raise self.fail(f"Unexpected character ||{char}||")
+
+    def finish(self) -> None:
+        if self.tags or self.last_comment:
+            msg: Dict[str, Any] = {
+                "role": "define",
+                "fn": {
+                    "body": [],
+                    "call": False,
+                    "definitionBlock": True,
+                    "local": False,
+                    "modifiers": [],
+                    "name": "define",
+                    "params": [],
+                    "topLevel": True,
+                },
+            }
+            if self.tags:
+                msg["tags"] = self.tags
+            if self.last_comment:
+                msg["description"] = self.last_comment
+            self.push_new_message(msg)
+        if self.messages:
+            self.messages[-1]["e"] = len(self.code)
+        for msg in self.messages:
+            self.finish_message(msg)
+
+    def finish_message(self, msg: Dict[str, Any]) -> None:
+        role = msg.get("role")
+        head = (msg.get("head") or "").strip()
+        if role == "node":
+            msg["nodeId"] = head or "default"
+        elif role == "goto":
+            msg["gotoNodeId"] = head or "default"
+        elif role in _NODE_ROUTE_ROLES:
+            self.node_route(msg)
+
+        mode = self.component_mode(msg.get("content"))
+        if mode:
+            msg["component"] = mode
+            msg.setdefault("renderOnly", True)
+
+        fn = msg.get("fn")
+        if fn is not None:
+            if (
+                fn.get("body") is None and not fn.get("call") and not fn.get("extern")
+                and not fn.get("topLevel") and (fn.get("invoke") or not fn.get("local"))
+            ):
+                params = fn["params"]
+                ref = params[0]["label"] if len(params) == 1 and params[0].get("label") else _ARGS_NAME
+                fn["body"] = [{"s": 0, "e": 0, "fn": "return", "params": [{"s": 0, "e": 0, "ref": ref}]}]
+            if fn.get("invoke") and fn["params"]:
+                raise self.fail(
+                    f"Immediately invoked function ({fn['name']}) has more that 0 parameters", fn["params"][0]["s"]
+                )
+
+        for tag in list(msg.get("tags") or []):
+            self.apply_tag(msg, tag)
+
+        if "content" in msg and "source" not in (msg.get("statement") or {}):
+            msg.pop("statement", None)
+
+    def node_route(self, msg: Dict[str, Any]) -> None:
+        head = [part for part in (msg.get("head") or "").split(" ") if part]
+        auto = bool(head) and head[0] == "auto"
+        follow = bool(head) and head[0] == "next"
+        if auto or follow:
+            head.pop(0)
+        route: Dict[str, Any] = {"toNodeId": "next" if follow else "auto" if auto else (head[0] if head else "")}
+        if msg["role"] == "from":
+            route["from"] = True
+        if msg["role"] == "exit":
+            route["exit"] = True
+        if auto:
+            route["auto"] = head if head else True
+        if follow:
+            route["next"] = True
+        msg.setdefault("nodeRoutes", []).append(route)
+        content = msg.get("content")
+        if msg.get("tags") and isinstance(content, str) and content.strip():
+            raise self.unsupported("Tagged node route conditions")
+        if isinstance(content, str) and content.strip():
+            route["nlCondition"] = content
+        elif msg.get("statement"):
+            raise self.unsupported("Node route conditions with embeds")
+        elif msg.get("fn"):
+            route["condition"] = msg["fn"].get("body") or []
+
+    @staticmethod
+    def component_mode(content: Optional[str]) -> Optional[str]:
+        match = _COMPONENT_BLOCK.match(content) if content else None
+        if not match:
+            return None
+        last = match.group(1).strip().split(" ")[-1]
+        return last if last in _COMPONENT_MODES else None
+
+    def apply_tag(self, msg: Dict[str, Any], tag: Dict[str, Any]) -> None:
+        name = tag["name"]
+        value = tag.get("value")
+        fn = msg.get("fn")
+        if fn is not None and name in _LOCAL_FUNCTION_TAGS:
+            fn["local"] = True
+        if name in _UNSUPPORTED_TAGS:
+            raise self.unsupported(f"The @{name} tag")
+        if name == "template":
+            statement = msg.get("statement")
+            if statement is None:
+                raise self.fail("template message missing statement")
+            statement.setdefault("source", _substring(self.code, statement["s"], statement["e"]))
+        elif name == "component":
+            msg["component"] = value if value in _COMPONENT_MODES else "render"
+            msg.setdefault("renderOnly", True)
+        elif name == "renderOnly":
+            if value and value.lower() not in ("true", "false"):
+                raise self.unsupported("A non true/false @renderOnly value")
+            msg["renderOnly"] = not value or value.lower() == "true"
+        elif name == "suggestion":
+            msg["renderOnly"] = True
+            msg["isSuggestion"] = True
+        elif name in ("thread", "userId", "label", "cid", "name", "renderTarget"):
+            if value:
+                msg["tid" if name == "thread" else name] = value
+        elif name == "eval":
+            msg["eval"] = True
+        elif name == "preSpace":
+            msg["preSpace"] = True
+        elif name == "order":
+            order = _js_number(value) if value else None
+            if order is not None:
+                msg["order"] = order
+        elif name == "top":
+            msg["order"] = 0
+        elif name == "hidden":
+            msg["renderTarget"] = "hidden"
+        elif name == "json":
+            if "statement" not in tag and value:
+                array = _JSON_ARRAY_TAG.search(value)
+                if array:
+                    tag["srcValue"] = value
+                    tag["value"] = array.group(1) + "[]"
+        elif name == "messageHandler":
+            if value and fn is not None:
+                roles = fn.setdefault("handlesMessageRoles", [])
+                for role in re.split(r"\s+", value):
+                    if role in _ROLES and role not in _HANDLER_ALLOWED_ROLES:
+                        raise self.fail(f"Registering message handlers for role ({role}) is not allowed")
+                    if role not in roles:
+                        roles.append(role)
+        elif name == "docRef":
+            if value:
+                try:
+                    msg.setdefault("docRefs", []).append(json.loads(value))
+                except ValueError:
+                    raise self.unsupported("@docRef values that are not strict JSON") from None
+
+
+def parse_convo(source: str) -> List[Dict[str, Any]]:
+    """
+    Parse .convo source into the message structures the CLI prints for `--parse` and
+    in its `m:` output (ConvoMessage objects: role, content, tags, fn, statement, s, e,
+    ln, ...), without running Node.
+
+    Supported: content messages (including `{{ }}` embeds), tags, comments, `> define`
+    and other top-level blocks, and function messages. Raises UnsupportedConvoSyntax
+    for inline prompts (`???` / `===`), dynamic @json types, tags that need markdown
+    or trigger parsing (@markdown, @markdownVars, @on, @importMatch,
+    @transformComponent), JSON5-only content and routes with embedded conditions.
+    Raises ConvoSyntaxError where the CLI reports a parsing error.
+    """
+    return _Parser(source).parse()
+
+
+def validate_convo(source: str) -> Optional[ConvoSyntaxError]:
+    """The syntax error in `source`, or None if it parses (unsupported constructs count as valid)."""
+    try:
+        parse_convo(source)
+    except UnsupportedConvoSyntax:
+        return None
+    except ConvoSyntaxError as e:
+        return e
+    return None
+
+
+def literal_value(statement: Dict[str, Any]) -> Any:
+    """
+    Python value of a literal statement (string, number, boolean, null or JSON object /
+    array of those); raises ValueError for anything computed.
+    """
+    fn = statement.get("fn")
+    if fn == _JSON_MAP_FN:
+        return {p["label"]: literal_value(p) for p in statement.get("params") or []}
+    if fn == _JSON_ARRAY_FN:
+        return [literal_value(p) for p in statement.get("params") or []]
+    if fn or "ref" in statement or "keyword" in statement:
+        raise ValueError(f"Not a literal: {fn or statement.get('ref') or statement.get('keyword')}")
+    return statement.get("value")
+
+
+def define_variables(source: str) -> Dict[str, Any]:
+    """
+    Variables assigned a literal value (string, number, boolean, null or JSON object /
+    array of those) in the `> define` blocks of `source`, in assignment order. Values that
+    are computed (function calls, references, embeds) are skipped.
+    """
+    variables: Dict[str, Any] = {}
+    for msg in parse_convo(source):
+        if msg.get("role") != "define":
+            continue
+        for statement in msg["fn"].get("body") or []:
+            name = statement.get("set")
+            if not name or statement.get("setPath"):
+                continue
+            try:
+                variables[name] = literal_value(statement)
+            except ValueError:
+                continue
+    return variables
@@ -0,0 +1,105 @@
+#!/usr/bin/env node
+// Long-lived Convo-Lang CLI worker used by convo_lang.ConvoCLIPool.
+// Protocol: one JSON job per line on stdin, one JSON result per line on stdout.
+//   job    -> {"id":1,"source":"> user\nhi","sourcePath":null,"cwd":null,"args":["--prefixOutput"]}
+//   result <- {"id":1,"ok":true,"stdout":"..."} or {"id":1,"ok":false,"stdout":"","error":"..."}
+
+const fs=require('fs');
+const Path=require('path');
+const readline=require('readline');
+const {createRequire}=require('module');
+
+const argv=process.argv.slice(2);
+const argValue=(name)=>{
+    const i=argv.indexOf(name);
+    return i===-1?undefined:argv[i+1];
+}
+
+const cliEntry=require.resolve(argValue('--cli-module')??'@convo-lang/convo-lang-cli');
+const cli=require(cliEntry);
+const {parseJson5}=createRequire(cliEntry)('@iyio/json5');
+
+// Anything the CLI logs must not corrupt the result stream
+const send=process.stdout.write.bind(process.stdout);
+process.stdout.write=process.stderr.write.bind(process.stderr);
+console.log=console.error;
+
+const initialCwd=process.cwd();
+
+const mergeVars=(target,value)=>{
+    const obj=parseJson5(value.trim());
+    if(obj && (typeof obj === 'object')){
+        for(const e in obj){
+            target[e]=obj[e];
+        }
+    }
+}
+
+const runJobAsync=async (config,baseVars,job)=>
+{
+    const options=cli.getConvoCliArgs(job.args??[],0);
+    const vars={...baseVars};
+    for(const path of options.varsPath??[]){
+        mergeVars(vars,fs.readFileSync(path,'utf8'));
+    }
+    for(const v of options.vars??[]){
+        mergeVars(vars,v);
+    }
+    delete options.vars;
+    delete options.varsPath;
+    delete options.config;
+    delete options.stdin;
+
+    const chunks=[];
+    options.inline=job.source;
+    options.out=(...c)=>{chunks.push(...c)};
+    if(job.sourcePath){
+        options.source=job.sourcePath;
+        options.sourcePath=job.sourcePath;
+    }
+    if(job.cwd){
+        options.exeCwd=Path.resolve(job.cwd);
+    }
+
+    config.defaultVars=vars;
+    const convoCli=await cli.createConvoCliAsync(options);
+    try{
+        await convoCli.executeAsync();
+    }finally{
+        convoCli.dispose();
+        process.chdir(initialCwd);
+    }
+    return chunks.join('');
+}
+
+const mainAsync=async ()=>
+{
+    const configPath=argValue('--config');
+    const config=await cli.initConvoCliAsync(configPath?{config:configPath}:{});
+    const baseVars={...(config.defaultVars??{})};
+
+    const lines=readline.createInterface({input:process.stdin,crlfDelay:Infinity});
+    for await(const line of lines){
+        if(!line.trim()){
+            continue;
+        }
+        let job;
+        try{
+            job=JSON.parse(line);
+        }catch(ex){
+            send(JSON.stringify({id:null,ok:false,stdout:'',error:`Invalid job frame: ${ex?.message??ex}`})+'\n');
+            continue;
+        }
+        try{
+            const stdout=await runJobAsync(config,baseVars,job);
+            send(JSON.stringify({id:job.id,ok:true,stdout})+'\n');
+        }catch(ex){
+            send(JSON.stringify({id:job.id,ok:false,stdout:'',error:String(ex?.message??ex)})+'\n');
+        }
+    }
+}
+
+mainAsync().then(()=>process.exit(0),ex=>{
+    console.error('Convo pool worker failed',ex);
+    process.exit(1);
+});
@@ -0,0 +1,49 @@
+from __future__ import annotations
+from dataclasses import dataclass
+import functools
+import re
+from typing import Optional
+
+_ROLE_HEADER = re.compile(r"^>[ \t]*\S", re.MULTILINE)
+
+
+@dataclass(frozen=True)
+class ConvoSegment:
+    """
+    One piece of .convo source appended to a Conversation, rendered once on creation.
+    kind is "message" (add_message), "text" (add_convo_text), "file" (add_convo_file)
+    or "source" (raw text such as the transcript returned by the CLI).
+    """
+    kind: str
+    source: str
+    role: Optional[str] = None
+    path: Optional[str] = None
+
+    @classmethod
+    def from_message(cls, role: str, content: str) -> "ConvoSegment":
+        role = role.strip()
+        return cls("message", f"> {role}\n{content.rstrip()}\n\n", role=role)
+
+    @classmethod
+    def from_text(cls, content: str) -> "ConvoSegment":
+        if content.startswith("*convo*"):
+            content = content[7:].lstrip()
+        return cls("text", content.rstrip() + "\n\n")
+
+    @classmethod
+    def from_file(cls, path: str, content: str) -> "ConvoSegment":
+        return cls("file", cls.from_text(content).source, path=path)
+
+    @classmethod
+    def from_source(cls, source: str) -> "ConvoSegment":
+        return cls("source", source)
+
+    @functools.cached_property
+    def message_count(self) -> int:
+        """Number of `> ...` blocks (roles, defines, functions) in this segment."""
+        if self.kind == "message":
+            return 1
+        return len(_ROLE_HEADER.findall(self.source))
+
+    def __len__(self) -> int:
+        return len(self.source)
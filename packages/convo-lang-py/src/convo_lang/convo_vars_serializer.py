@@ -1,26 +1,124 @@
+import dataclasses
 import json
-from typing import Any, Dict, List
+from json.encoder import encode_basestring
+import re
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+# Same check as `value.strip()[0] in "{["` without copying every string
+_JSON_START = re.compile(r"\s*[\[{]")
+
 
 class ConvoVarsSerializer:
+    """
+    Encode a variables dict as the JSON5-style object accepted by `convo --vars`.
+
+    Encoding is iterative (deep trees cannot hit the recursion limit) and writes all
+    fragments into one output list. Strings that hold a JSON object or array are
+    parsed and encoded as structured values unless sniff_json=False. Dataclasses
+    and pydantic models are encoded as objects. Circular references raise ValueError.
+    """
+
+    def __init__(self, *, sniff_json: bool = True):
+        self.sniff_json = sniff_json
+
     def to_convo_vars(self, vars_dict: Dict[str, Any]) -> str:
-        return self._encode_object(vars_dict)
+        out: List[str] = []
+        self._encode(vars_dict, out.append)
+        return "".join(out)
 
-    def _encode_value(self, value: Any) -> str:
+    def _encode(self, root: Any, write: Callable[[str], None]) -> None:
+        # Each frame: (items iterator, closing bracket, is object, id of container)
+        stack: List[Tuple[Iterator[Any], str, bool, int]] = []
+        active: Set[int] = set()
+        sniff = self.sniff_json
+        json_start = _JSON_START.match
+        value = root
+        while True:
+            # Fast paths for exact builtin scalars; everything else goes through _container_items
+            t = type(value)
+            if t is str and not (sniff and json_start(value)):
+                write(encode_basestring(value))
+            elif t is int or t is float:
+                write(str(value))
+            elif t is bool:
+                write("true" if value else "false")
+            elif value is None:
+                write("null")
+            else:
+                items = self._container_items(value)
+                if items is None:
+                    write(self._encode_scalar(value))
+                else:
+                    iterator, is_object = items
+                    ident = id(value)
+                    if ident in active:
+                        raise ValueError(f"Circular reference detected in convo vars ({t.__name__})")
+                    active.add(ident)
+                    write("{" if is_object else "[")
+                    stack.append((iterator, "}" if is_object else "]", is_object, ident))
+                    item = next(iterator, _DONE)
+                    if item is not _DONE:
+                        if is_object:
+                            write(f"{item[0]}:")
+                            value = item[1]
+                        else:
+                            value = item
+                        continue
+                    write("}" if is_object else "]")
+                    stack.pop()
+                    active.discard(ident)
+            # Value written: advance to the next sibling, closing finished containers
+            while stack:
+                iterator, closer, is_object, ident = stack[-1]
+                item = next(iterator, _DONE)
+                if item is _DONE:
+                    write(closer)
+                    stack.pop()
+                    active.discard(ident)
+                    continue
+                if is_object:
+                    write(f", {item[0]}:")
+                    value = item[1]
+                else:
+                    write(", ")
+                    value = item
+                break
+            else:
+                return
+
+    def _container_items(self, value: Any) -> Optional[Tuple[Iterator[Any], bool]]:
+        """(items iterator, is_object) for values encoded as objects or arrays, else None."""
+        if isinstance(value, str):
+            if self.sniff_json:
+                parsed = self._try_parse_json_string(value)
+                if parsed is not None:
+                    return self._container_items(parsed)
+            return None
+        if isinstance(value, dict):
+            return iter(value.items()), True
+        if isinstance(value, (list, tuple)):
+            return iter(value), False
+        if isinstance(value, (bool, int, float)) or value is None:
+            return None
+        if dataclasses.is_dataclass(value) and not isinstance(value, type):
+            return ((f.name, getattr(value, f.name)) for f in dataclasses.fields(value)), True
+        model_dump = getattr(value, "model_dump", None)
+        if callable(model_dump):
+            return iter(model_dump().items()), True
+        if _is_pydantic_v1(value):
+            return iter(value.dict().items()), True
+        return None
+
+    @staticmethod
+    def _encode_scalar(value: Any) -> str:
+        if isinstance(value, str):
+            return encode_basestring(value)
         if isinstance(value, bool):
             return "true" if value else "false"
         if value is None:
             return "null"
-        if isinstance(value, (int, float)) and not isinstance(value, bool):
+        if isinstance(value, (int, float)):
             return str(value)
-        if isinstance(value, dict):
-            return self._encode_object(value)
-        if isinstance(value, (list, tuple)):
-            return self._encode_array(list(value))
-        if isinstance(value, str):
-            parsed = self._try_parse_json_string(value)
-            if parsed is not None:
-                return self._encode_value(parsed)
-            return json.dumps(value, ensure_ascii=False)
         normalized = value.replace("\r\n", " ").replace("\n", " ").strip()
         return json.dumps(normalized, ensure_ascii=False)
 
@@ -29,21 +127,16 @@ class ConvoVarsSerializer:
         Try to parse a string as JSON.
         Returns parsed object on success, otherwise None.
         """
-        value = value.strip()
-        if not value:
-            return None
-        if value[0] not in "{[":
+        if not _JSON_START.match(value):
             return None
         try:
-            return json.loads(value)
+            return json.loads(value.strip())
         except Exception:
             return None
 
-    def _encode_object(self, obj: Dict[str, Any]) -> str:
-        parts: List[str] = []
-        for key, value in obj.items():
-            parts.append(f"{key}:{self._encode_value(value)}")
-        return "{" + ", ".join(parts) + "}"
 
-    def _encode_array(self, arr: List[Any]) -> str:
-        return "[" + ", ".join(self._encode_value(v) for v in arr) + "]"
+_DONE = object()
+
+
+def _is_pydantic_v1(value: Any) -> bool:
+    return callable(getattr(value, "dict", None)) and hasattr(type(value), "__fields__")
@@ -28,3 +28,17 @@ class ConvoRuntimeError(ExecFailed):
 
 class ConvoCLIError(ExecFailed):
     """Raised when CLI failed for an unknown or unexpected reason."""
+
+
+class ConvoSyntaxError(ParseError):
+    """Raised when .convo source can not be parsed; `line` is 1-based."""
+
+    def __init__(self, message: str, index: int = 0, line: int = 0):
+        super().__init__(f"{message} (line {line})" if line else message)
+        self.message = message
+        self.index = index
+        self.line = line
+
+
+class UnsupportedConvoSyntax(ConvoSyntaxError):
+    """Raised for valid .convo syntax the Python parser does not handle; use the CLI instead."""
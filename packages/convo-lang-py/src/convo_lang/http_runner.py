@@ -0,0 +1,887 @@
+from __future__ import annotations
+import asyncio
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass, field
+import http.client
+import json
+import os
+from pathlib import Path
+import socket
+import ssl
+import threading
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from .async_convo_cli_runner import AsyncConvoCLIRunner
+from .convo_cli_runner import ConvoCLIRunner
+from .convo_parser import escape_convo, literal_value, parse_convo
+from .errors import ConvoRuntimeError, ConvoSyntaxError, ConvoValidationError, ExecFailed, Timeout
+from .instrumentation import Instrumentation, maybe_span
+from .resilience import HedgePolicy, ResilienceStats, ResilientCaller, RetryPolicy
+from .scheduler import CompletionScheduler
+
+# Same defaults as the CLI's OpenAI completion service
+DEFAULT_API_BASE_URL = "https://api.openai.com"
+COMPLETIONS_ENDPOINT = "/v1/chat/completions"
+DEFAULT_CHAT_MODEL = "gpt-4.1"
+
+_CHAT_ROLES = ("system", "user", "assistant")
+_PLAIN_MESSAGE_KEYS = frozenset(("role", "content", "statement", "description", "s", "e", "ln"))
+_TEXT_PART_KEYS = frozenset(("value", "s", "e"))
+_REF_PART_KEYS = frozenset(("ref", "refPath", "s", "e"))
+_MODEL_VAR = "__model"
+_UNRESOLVED = object()
+# A connection that was idle in the pool may have been closed by the server
+_STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)
+
+
+def _config_value(config: Dict[str, Any], key: str, env_name: str) -> Optional[str]:
+    """A config key, else the same setting from config["env"] or the environment."""
+    return config.get(key) or (config.get("env") or {}).get(env_name) or os.environ.get(env_name) or None
+
+
+@dataclass(frozen=True)
+class ChatRequest:
+    """OpenAI-compatible chat completion for a conversation that needs nothing from the CLI."""
+    url: str
+    model: str
+    messages: Tuple[Dict[str, str], ...]
+    state: Dict[str, Any]
+    api_key: Optional[str] = None
+
+    def body(self, *, stream: bool = False) -> bytes:
+        payload: Dict[str, Any] = {"model": self.model, "messages": list(self.messages)}
+        if stream:
+            payload["stream"] = True
+        return json.dumps(payload).encode("utf-8")
+
+    def headers(self) -> Dict[str, str]:
+        headers = {"Content-Type": "application/json", "Accept": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = "Bearer " + self.api_key
+        return headers
+
+
+def _embed_text(value: Any) -> Any:
+    """How an embedded variable renders in message content, or _UNRESOLVED when unsure."""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, str):
+        return value
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, float):
+        return str(int(value)) if value.is_integer() else repr(value)
+    return _UNRESOLVED
+
+
+def _resolve(part: Dict[str, Any], state: Dict[str, Any]) -> Any:
+    value = state.get(part["ref"], _UNRESOLVED)
+    for key in part.get("refPath") or []:
+        if isinstance(value, dict):
+            value = value.get(key, _UNRESOLVED)
+        elif isinstance(value, list) and key.isdigit() and int(key) < len(value):
+            value = value[int(key)]
+        else:
+            return _UNRESOLVED
+    return _UNRESOLVED if value is _UNRESOLVED else _embed_text(value)
+
+
+def _message_content(msg: Dict[str, Any], state: Dict[str, Any]) -> Optional[str]:
+    if "content" in msg:
+        return msg["content"]
+    statement = msg.get("statement") or {}
+    if statement.get("fn") != "md":
+        return None
+    parts: List[str] = []
+    for part in statement.get("params") or []:
+        keys = part.keys()
+        if keys <= _TEXT_PART_KEYS and isinstance(part.get("value"), str):
+            parts.append(part["value"])
+        elif "ref" in part and keys <= _REF_PART_KEYS:
+            text = _resolve(part, state)
+            if text is _UNRESOLVED:
+                return None
+            parts.append(text)
+        else:
+            return None
+    return "".join(parts).strip()
+
+
+def chat_request(
+    convo_text: str,
+    *,
+    variables: Optional[Dict[str, Any]] = None,
+    config: Optional[Dict[str, Any]] = None,
+) -> Optional[ChatRequest]:
+    """
+    The chat completion `convo_text` amounts to, or None if it needs the CLI.
+    Direct requests are only built for system / user / assistant messages with
+    `{{var}}` interpolation of strings, numbers and booleans, plus `> define` blocks
+    that assign literals (`__model` selects the model). Tags, functions, other roles,
+    `__` settings and unresolved variables all return None, as does invalid source
+    so the CLI can report it.
+    """
+    config = config or {}
+    try:
+        parsed = parse_convo(convo_text)
+    except ConvoSyntaxError:
+        return None
+    state = dict(variables or {})
+    for msg in parsed:
+        if msg.get("tags"):
+            return None
+        if msg["role"] != "define":
+            continue
+        for statement in msg["fn"].get("body") or []:
+            name = statement.get("set")
+            if not name or statement.get("setPath") or statement.get("tags"):
+                return None
+            try:
+                state[name] = literal_value(statement)
+            except ValueError:
+                return None
+    if any(name.startswith("__") and name != _MODEL_VAR for name in state):
+        return None
+    messages: List[Dict[str, str]] = []
+    for msg in parsed:
+        if msg["role"] == "define":
+            continue
+        if msg["role"] not in _CHAT_ROLES or not msg.keys() <= _PLAIN_MESSAGE_KEYS:
+            return None
+        content = _message_content(msg, state)
+        if content is None:
+            return None
+        messages.append({"role": msg["role"], "content": content})
+    if not messages or messages[-1]["role"] != "user":
+        return None
+    model = state.get(_MODEL_VAR)
+    if not isinstance(model, str) or not model:
+        model = (
+            _config_value(config, "chatModel", "OPENAI_CHAT_MODEL")
+            or config.get("defaultModel")
+            or DEFAULT_CHAT_MODEL
+        )
+    base_url = _config_value(config, "apiBaseUrl", "OPENAI_BASE_URL") or DEFAULT_API_BASE_URL
+    return ChatRequest(
+        url=base_url.rstrip("/") + COMPLETIONS_ENDPOINT,
+        model=model,
+        messages=tuple(messages),
+        state=state,
+        api_key=_config_value(config, "apiKey", "OPENAI_API_KEY"),
+    )
+
+
+def _transcript_head(convo_text: str) -> List[str]:
+    """Transcript lines for the source followed by the header of the new assistant block."""
+    return [": " + line for line in (convo_text.rstrip() + "\n\n> assistant").split("\n")]
+
+
+def _transcript_tail(
+    convo_text: str,
+    reply: str,
+    request: ChatRequest,
+    extra_args: Optional[List[str]],
+) -> List[str]:
+    """The JSON sections the CLI prints after the transcript for the `--print-*` flags in extra_args."""
+    args = extra_args or ()
+    lines: List[str] = []
+    if "--print-flat" in args:
+        flat = list(request.messages) + [{"role": "assistant", "content": reply}]
+        lines.append("f:" + json.dumps(flat, ensure_ascii=False))
+    if "--print-state" in args:
+        lines.append("s:" + json.dumps(request.state, ensure_ascii=False))
+    if "--print-messages" in args:
+        source = convo_text.rstrip() + "\n\n> assistant\n" + escape_convo(reply)
+        lines.append("m:" + json.dumps(parse_convo(source), ensure_ascii=False))
+    return lines
+
+
+def chat_transcript(
+    convo_text: str,
+    reply: str,
+    request: ChatRequest,
+    extra_args: Optional[List[str]] = None,
+) -> str:
+    """A --prefixOutput transcript of `convo_text` completed with `reply`, as the CLI would print it."""
+    lines = _transcript_head(convo_text)
+    lines += [": " + line for line in escape_convo(reply).split("\n")]
+    lines += _transcript_tail(convo_text, reply, request, extra_args)
+    return "\n".join(lines) + "\n"
+
+
+def _http_error(status: int, body: bytes) -> ExecFailed:
+    text = body[:1000].decode("utf-8", errors="replace")
+    message = f"Chat completion request failed with HTTP {status}: {text}"
+    # Other client errors would fail again; rate limits, timeouts and server errors are retryable
+    if 400 <= status < 500 and status not in (408, 409, 429):
+        return ConvoValidationError(message)
+    return ConvoRuntimeError(message)
+
+
+def _reply_content(body: bytes) -> str:
+    try:
+        return json.loads(body)["choices"][0]["message"].get("content") or ""
+    except (ValueError, KeyError, IndexError, TypeError, AttributeError) as e:
+        raise ConvoRuntimeError(f"Invalid chat completion response: {body[:1000]!r}") from e
+
+
+def _delta_content(line: str) -> Optional[str]:
+    """Text of one server-sent event line of a streamed completion; None for other lines."""
+    if not line.startswith("data:"):
+        return None
+    data = line[5:].strip()
+    if not data or data == "[DONE]":
+        return None
+    try:
+        choices = json.loads(data).get("choices") or []
+    except (ValueError, AttributeError) as e:
+        raise ConvoRuntimeError(f"Invalid chat completion stream event: {data[:1000]}") from e
+    return (choices[0].get("delta") or {}).get("content") if choices else None
+
+
+class _LineSplitter:
+    """Turns streamed reply text into complete, escaped transcript lines."""
+
+    def __init__(self) -> None:
+        self.reply: List[str] = []
+        self._buffer = ""
+
+    def feed(self, text: str) -> List[str]:
+        self.reply.append(text)
+        self._buffer += text
+        *lines, self._buffer = self._buffer.split("\n")
+        return [": " + escape_convo(line) for line in lines]
+
+    def close(self) -> List[str]:
+        return [": " + escape_convo(self._buffer)]
+
+
+class HttpConnectionPool:
+    """Keep-alive HTTP(S) connections shared between threads; at most `max_connections` are open."""
+
+    def __init__(self, max_connections: int = 10):
+        self.max_connections = max_connections
+        self._idle: Dict[Tuple[str, str, int], List[http.client.HTTPConnection]] = {}
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_connections)
+        self._ssl_context: Optional[ssl.SSLContext] = None
+
+    def _checkout(self, key: Tuple[str, str, int], timeout: Optional[float]) -> Tuple[http.client.HTTPConnection, bool]:
+        with self._lock:
+            idle = self._idle.get(key)
+            while idle:
+                conn = idle.pop()
+                if conn.sock is not None:
+                    conn.timeout = timeout
+                    conn.sock.settimeout(timeout)
+                    return conn, True
+        scheme, host, port = key
+        if scheme == "https":
+            if self._ssl_context is None:
+                self._ssl_context = ssl.create_default_context()
+            return http.client.HTTPSConnection(host, port, timeout=timeout, context=self._ssl_context), False
+        return http.client.HTTPConnection(host, port, timeout=timeout), False
+
+    def _checkin(self, key: Tuple[str, str, int], conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            self._idle.setdefault(key, []).append(conn)
+
+    @contextmanager
+    def open(
+        self,
+        url: str,
+        body: bytes,
+        headers: Dict[str, str],
+        timeout: Optional[float],
+    ) -> Iterator[http.client.HTTPResponse]:
+        """POST `body` and yield the response; the connection is reused if it was read to the end."""
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.hostname or "", parts.port or (443 if parts.scheme == "https" else 80))
+        path = (parts.path or "/") + ("?" + parts.query if parts.query else "")
+        with self._slots:
+            while True:
+                conn, reused = self._checkout(key, timeout)
+                try:
+                    conn.request("POST", path, body=body, headers=headers)
+                    response = conn.getresponse()
+                except _STALE_CONNECTION_ERRORS:
+                    conn.close()
+                    if reused:
+                        continue
+                    raise
+                except BaseException:
+                    conn.close()
+                    raise
+                break
+            try:
+                yield response
+            except BaseException:
+                conn.close()
+                raise
+            if response.isclosed() and not response.will_close:
+                self._checkin(key, conn)
+            else:
+                conn.close()
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for conn in conns:
+                conn.close()
+
+
+@dataclass
+class HttpChatRunner:
+    """
+    Runner that sends simple conversations (see chat_request) straight to an
+    OpenAI-compatible chat endpoint over pooled keep-alive connections and returns a
+    --prefixOutput transcript, so Conversation works unchanged. Everything else, and
+    any run with callbacks, goes to `fallback` (a ConvoCLIRunner created on first use).
+    Uses the apiKey / apiBaseUrl / chatModel / defaultModel config keys like the CLI,
+    falling back to config["env"] and the OPENAI_* environment variables.
+    scheduler / retry / hedge apply to direct requests as in ConvoCLIRunner.
+    """
+    config: Optional[Dict] = None
+    fallback: Any = None
+    max_connections: int = 10
+    instrumentation: Optional[Instrumentation] = None
+    scheduler: Optional[CompletionScheduler] = None
+    retry: Optional[RetryPolicy] = None
+    hedge: Optional[HedgePolicy] = None
+    direct_runs: int = field(init=False, default=0)
+    fallback_runs: int = field(init=False, default=0)
+    _pool: HttpConnectionPool = field(init=False, repr=False)
+    _resilience: Optional[ResilientCaller] = field(init=False, repr=False, default=None)
+    _lock: threading.Lock = field(init=False, repr=False, default_factory=threading.Lock)
+
+    def __post_init__(self) -> None:
+        self._pool = HttpConnectionPool(self.max_connections)
+        if self.retry is not None or self.hedge is not None:
+            self._resilience = ResilientCaller(self.retry, self.hedge)
+
+    @property
+    def resilience_stats(self) -> ResilienceStats:
+        return self._resilience.stats if self._resilience else ResilienceStats()
+
+    def _fallback_runner(self) -> Any:
+        if self.fallback is None:
+            self.fallback = ConvoCLIRunner(
+                config=self.config,
+                instrumentation=self.instrumentation,
+                scheduler=self.scheduler,
+                retry=self.retry,
+                hedge=self.hedge,
+            )
+        return self.fallback
+
+    def _route(self, convo_text: str, variables: Optional[Dict]) -> Optional[ChatRequest]:
+        request = chat_request(convo_text, variables=variables, config=self.config)
+        with self._lock:
+            if request is None:
+                self.fallback_runs += 1
+            else:
+                self.direct_runs += 1
+        return request
+
+    @contextmanager
+    def _admit(self, convo_text: str) -> Iterator[None]:
+        if self.scheduler is None:
+            yield
+            return
+        with self.scheduler.admit_source(convo_text, self.config):
+            yield
+
+    def run_text(
+        self,
+        convo_text: str,
+        *,
+        variables: Optional[Dict] = None,
+        timeout: Optional[float] = 120.0,
+        working_dir: Optional[str] = None,
+        extra_args: Optional[List[str]] = None,
+        keep_temp: bool = False,
+    ) -> str:
+        """Complete `convo_text` and return the transcript; see the class docstring for routing."""
+        if not convo_text.strip():
+            raise ExecFailed("Empty .convo text submitted to runner.")
+        request = self._route(convo_text, variables)
+        if request is None:
+            return self._fallback_runner().run_text(
+                convo_text,
+                variables=variables,
+                timeout=timeout,
+                working_dir=working_dir,
+                extra_args=extra_args,
+                keep_temp=keep_temp,
+            )
+        reply = self._complete(request, convo_text, timeout)
+        return chat_transcript(convo_text, reply, request, extra_args)
+
+    def run_file(
+        self,
+        script_path: str,
+        *,
+        variables: Optional[Dict] = None,
+        timeout: Optional[float] = 120.0,
+        working_dir: Optional[str] = None,
+        extra_args: Optional[List[str]] = None,
+    ) -> str:
+        convo_text = Path(script_path).read_text(encoding="utf-8")
+        request = self._route(convo_text, variables)
+        if request is None:
+            return self._fallback_runner().run_file(
+                script_path,
+                variables=variables,
+                timeout=timeout,
+                working_dir=working_dir,
+                extra_args=extra_args,
+            )
+        reply = self._complete(request, convo_text, timeout)
+        return chat_transcript(convo_text, reply, request, extra_args)
+
+    def run_with_callbacks(self, convo_text: str, **kwargs: Any) -> str:
+        """Callbacks need the CLI; always runs on the fallback runner."""
+        with self._lock:
+            self.fallback_runs += 1
+        return self._fallback_runner().run_with_callbacks(convo_text, **kwargs)
+
+    def _complete(self, request: ChatRequest, convo_text: str, timeout: Optional[float]) -> str:
+        def once() -> str:
+            with self._admit(convo_text):
+                return self._post(request, timeout)
+
+        return self._resilience.call(once) if self._resilience else once()
+
+    def _post(self, request: ChatRequest, timeout: Optional[float]) -> str:
+        with maybe_span(self.instrumentation, "http", model=request.model) as event:
+            try:
+                with self._pool.open(request.url, request.body(), request.headers(), timeout) as response:
+                    body = response.read()
+            except socket.timeout as e:
+                raise Timeout(f"Chat completion timed out after {timeout} seconds") from e
+            except (OSError, http.client.HTTPException) as e:
+                raise ConvoRuntimeError(f"Chat completion request failed: {e}") from e
+            if event is not None:
+                event.attributes["status"] = response.status
+                event.attributes["response_bytes"] = len(body)
+            if response.status >= 400:
+                raise _http_error(response.status, body)
+            return _reply_content(body)
+
+    def stream_text(
+        self,
+        convo_text: str,
+        *,
+        variables: Optional[Dict] = None,
+        timeout: Optional[float] = 120.0,
+        working_dir: Optional[str] = None,
+        extra_args: Optional[List[str]] = None,
+    ) -> Iterator[str]:
+        """
+        Yield transcript lines as the reply streams in (one line per completed reply line);
+        the JSON sections follow once the reply is complete.
+        """
+        if not convo_text.strip():
+            raise ExecFailed("Empty .convo text submitted to runner.")
+        request = self._route(convo_text, variables)
+        if request is None:
+            yield from self._fallback_runner().stream_text(
+                convo_text,
+                variables=variables,
+                timeout=timeout,
+                working_dir=working_dir,
+                extra_args=extra_args,
+            )
+            return
+        yield from _transcript_head(convo_text)
+        splitter = _LineSplitter()
+        with self._admit(convo_text), maybe_span(self.instrumentation, "http_stream", model=request.model):
+            try:
+                with self._pool.open(request.url, request.body(stream=True), request.headers(), timeout) as response:
+                    if response.status >= 400:
+                        raise _http_error(response.status, response.read())
+                    for raw in iter(response.readline, b""):
+                        delta = _delta_content(raw.decode("utf-8"))
+                        if delta:
+                            yield from splitter.feed(delta)
+            except socket.timeout as e:
+                raise Timeout(f"Chat completion timed out after {timeout} seconds") from e
+            except (OSError, http.client.HTTPException) as e:
+                raise ConvoRuntimeError(f"Chat completion request failed: {e}") from e
+        yield from splitter.close()
+        yield from _transcript_tail(convo_text, "".join(splitter.reply), request, extra_args)
+
+    def close(self) -> None:
+        """Close idle pooled connections."""
+        self._pool.close()
+
+
+class _AsyncResponse:
+    """Status, headers and body reader of one HTTP/1.1 response on a pooled connection."""
+
+    def __init__(self, reader: asyncio.StreamReader, status: int, headers: Dict[str, str], keep_alive: bool):
+        self.status = status
+        self.headers = headers
+        self._reader = reader
+        self._chunked = "chunked" in headers.get("transfer-encoding", "").lower()
+        length = headers.get("content-length")
+        self._length = int(length) if length is not None and not self._chunked else None
+        self.reusable = keep_alive and (self._chunked or self._length is not None)
+        self.done = False
+
+    async def _line(self) -> bytes:
+        # readline() returns b"" once the peer closed; that must not pass for the last chunk
+        line = await self._reader.readline()
+        if not line:
+            raise ConnectionResetError("Connection closed before the response was complete")
+        return line
+
+    async def chunks(self) -> AsyncIterator[bytes]:
+        reader = self._reader
+        if self._chunked:
+            while True:
+                size = int((await self._line()).split(b";")[0].strip() or b"0", 16)
+                if size == 0:
+                    while (await self._line()).strip():
+                        pass  # trailers
+                    break
+                data = await reader.readexactly(size)
+                await reader.readexactly(2)
+                yield data
+        elif self._length is not None:
+            remaining = self._length
+            while remaining > 0:
+                data = await reader.read(min(remaining, 65536))
+                if not data:
+                    raise ConnectionResetError("Connection closed before the response was complete")
+                remaining -= len(data)
+                yield data
+        else:
+            while True:
+                data = await reader.read(65536)
+                if not data:
+                    break
+                yield data
+        self.done = True
+
+    async def read(self) -> bytes:
+        return b"".join([chunk async for chunk in self.chunks()])
+
+    async def lines(self) -> AsyncIterator[str]:
+        buffer = b""
+        async for chunk in self.chunks():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                yield line.decode("utf-8")
+        if buffer:
+            yield buffer.decode("utf-8")
+
+
+_Stream = Tuple[asyncio.StreamReader, asyncio.StreamWriter]
+
+
+class AsyncHttpConnectionPool:
+    """
+    asyncio counterpart of HttpConnectionPool built on asyncio streams.
+    Connections belong to the event loop they were opened on; the pool starts over
+    when it is used from another loop. Idle connections are closed when their loop
+    shuts down its async generators (asyncio.run() does) or, at the latest, when the
+    pool moves to another loop.
+    """
+
+    def __init__(self, max_connections: int = 10):
+        self.max_connections = max_connections
+        self._idle: Dict[Tuple[str, str, int], List[_Stream]] = {}
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._ssl_context: Optional[ssl.SSLContext] = None
+        self._loop_watch: Optional[AsyncIterator[None]] = None
+
+    def _bind(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop or self._slots is None:
+            self._abort_idle()
+            self._slots = asyncio.Semaphore(self.max_connections)
+            self._loop = loop
+            self._loop_watch = None
+        return self._slots
+
+    async def _watch_loop(self) -> None:
+        """Park _close_at_shutdown() on the bound loop once."""
+        if self._loop_watch is None:
+            self._loop_watch = self._close_at_shutdown(self._loop)
+            await self._loop_watch.__anext__()
+
+    async def _close_at_shutdown(self, loop: Optional[asyncio.AbstractEventLoop]) -> AsyncIterator[None]:
+        # loop.shutdown_asyncgens() closes this generator while the loop still runs,
+        # so idle connections are closed on their own loop before it is closed
+        try:
+            yield
+        finally:
+            if self._loop is loop:
+                self.close()
+
+    def _abort_idle(self) -> None:
+        """Drop idle connections of the previously bound loop, aborting their transports."""
+        idle, self._idle = self._idle, {}
+        loop = self._loop
+        for streams in idle.values():
+            for _, writer in streams:
+                try:
+                    if loop is not None and loop.is_running():
+                        loop.call_soon_threadsafe(writer.transport.abort)
+                    else:
+                        writer.transport.abort()
+                except RuntimeError:
+                    pass  # the loop is closed; the transport is finalized with it
+
+    async def _checkout(self, key: Tuple[str, str, int]) -> Tuple[_Stream, bool]:
+        idle = self._idle.get(key)
+        while idle:
+            reader, writer = idle.pop()
+            if not writer.is_closing() and not reader.at_eof():
+                return (reader, writer), True
+            writer.close()
+        scheme, host, port = key
+        context = None
+        if scheme == "https":
+            if self._ssl_context is None:
+                self._ssl_context = ssl.create_default_context()
+            context = self._ssl_context
+        return await asyncio.open_connection(host, port, ssl=context), False
+
+    @staticmethod
+    async def _send(stream: _Stream, head: bytes, body: bytes) -> _AsyncResponse:
+        reader, writer = stream
+        writer.write(head + body)
+        await writer.drain()
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError("Connection closed before a response was received")
+        version, status, *_ = status_line.decode("latin-1").split(" ", 2)
+        headers: Dict[str, str] = {}
+        while True:
+            line = (await reader.readline()).decode("latin-1").strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+        return _AsyncResponse(reader, int(status), headers, keep_alive)
+
+    @asynccontextmanager
+    async def open(self, url: str, body: bytes, headers: Dict[str, str]) -> AsyncIterator[_AsyncResponse]:
+        """POST `body` and yield the response; the connection is reused if it was read to the end."""
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.hostname or "", parts.port or (443 if parts.scheme == "https" else 80))
+        path = (parts.path or "/") + ("?" + parts.query if parts.query else "")
+        lines = [f"POST {path} HTTP/1.1", f"Host: {parts.netloc}", f"Content-Length: {len(body)}"]
+        lines += [f"{name}: {value}" for name, value in headers.items()]
+        head = ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+        slots = self._bind()
+        await self._watch_loop()
+        async with slots:
+            while True:
+                stream, reused = await self._checkout(key)
+                try:
+                    response = await self._send(stream, head, body)
+                except (ConnectionResetError, BrokenPipeError, asyncio.IncompleteReadError):
+                    stream[1].close()
+                    if reused:
+                        continue
+                    raise
+                except BaseException:
+                    stream[1].close()
+                    raise
+                break
+            try:
+                yield response
+            except BaseException:
+                stream[1].close()
+                raise
+            if response.done and response.reusable:
+                self._idle.setdefault(key, []).append(stream)
+            else:
+                stream[1].close()
+
+    def close(self) -> None:
+        idle, self._idle = self._idle, {}
+        for streams in idle.values():
+            for _, writer in streams:
+                writer.close()
+
+
+@dataclass
+class AsyncHttpChatRunner(HttpChatRunner):
+    """
+    asyncio variant of HttpChatRunner: direct requests use an AsyncHttpConnectionPool
+    and never block the event loop; other conversations go to an AsyncConvoCLIRunner.
+    scheduler / retry / hedge apply to direct requests as in HttpChatRunner.
+    """
+    _async_pool: AsyncHttpConnectionPool = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        super().__post_init__()
+        self._async_pool = AsyncHttpConnectionPool(self.max_connections)
+
+    def _fallback_runner(self) -> Any:
+        if self.fallback is None:
+            self.fallback = AsyncConvoCLIRunner(
+                config=self.config,
+                instrumentation=self.instrumentation,
+                scheduler=self.scheduler,
+                retry=self.retry,
+                hedge=self.hedge,
+            )
+        return self.fallback
+
+    async def run_text(
+        self,
+        convo_text: str,
+        *,
+        variables: Optional[Dict] = None,
+        timeout: Optional[float] = 120.0,
+        working_dir: Optional[str] = None,
+        extra_args: Optional[List[str]] = None,
+        keep_temp: bool = False,
+    ) -> str:
+        if not convo_text.strip():
+            raise ExecFailed("Empty .convo text submitted to runner.")
+        request = self._route(convo_text, variables)
+        if request is None:
+            return await self._fallback_runner().run_text(
+                convo_text,
+                variables=variables,
+                timeout=timeout,
+                working_dir=working_dir,
+                extra_args=extra_args,
+                keep_temp=keep_temp,
+            )
+        reply = await self._acomplete(request, convo_text, timeout)
+        return chat_transcript(convo_text, reply, request, extra_args)
+
+    async def run_file(
+        self,
+        script_path: str,
+        *,
+        variables: Optional[Dict] = None,
+        timeout: Optional[float] = 120.0,
+        working_dir: Optional[str] = None,
+        extra_args: Optional[List[str]] = None,
+    ) -> str:
+        convo_text = Path(script_path).read_text(encoding="utf-8")
+        request = self._route(convo_text, variables)
+        if request is None:
+            return await self._fallback_runner().run_file(
+                script_path,
+                variables=variables,
+                timeout=timeout,
+                working_dir=working_dir,
+                extra_args=extra_args,
+            )
+        reply = await self._acomplete(request, convo_text, timeout)
+        return chat_transcript(convo_text, reply, request, extra_args)
+
+    @asynccontextmanager
+    async def _aadmit(self, convo_text: str) -> AsyncIterator[None]:
+        if self.scheduler is None:
+            yield
+            return
+        async with self.scheduler.aadmit_source(convo_text, self.config):
+            yield
+
+    async def _acomplete(self, request: ChatRequest, convo_text: str, timeout: Optional[float]) -> str:
+        async def once() -> str:
+            async with self._aadmit(convo_text):
+                return await self._apost(request, timeout)
+
+        return await self._resilience.acall(once) if self._resilience else await once()
+
+    async def _apost(self, request: ChatRequest, timeout: Optional[float]) -> str:
+        async def post() -> Tuple[int, bytes]:
+            async with self._async_pool.open(request.url, request.body(), request.headers()) as response:
+                return response.status, await response.read()
+
+        with maybe_span(self.instrumentation, "http", model=request.model) as event:
+            try:
+                status, body = await asyncio.wait_for(post(), timeout)
+            except asyncio.TimeoutError as e:
+                raise Timeout(f"Chat completion timed out after {timeout} seconds") from e
+            except OSError as e:
+                raise ConvoRuntimeError(f"Chat completion request failed: {e}") from e
+            if event is not None:
+                event.attributes["status"] = status
+                event.attributes["response_bytes"] = len(body)
+            if status >= 400:
+                raise _http_error(status, body)
+            return _reply_content(body)
+
+    async def stream_text(
+        self,
+        convo_text: str,
+        *,
+        variables: Optional[Dict] = None,
+        timeout: Optional[float] = 120.0,
+        working_dir: Optional[str] = None,
+        extra_args: Optional[List[str]] = None,
+    ) -> AsyncIterator[str]:
+        if not convo_text.strip():
+            raise ExecFailed("Empty .convo text submitted to runner.")
+        request = self._route(convo_text, variables)
+        if request is None:
+            async for line in self._fallback_runner().stream_text(
+                convo_text,
+                variables=variables,
+                timeout=timeout,
+                working_dir=working_dir,
+                extra_args=extra_args,
+            ):
+                yield line
+            return
+        for line in _transcript_head(convo_text):
+            yield line
+        splitter = _LineSplitter()
+        async with self._aadmit(convo_text):
+            loop = asyncio.get_running_loop()
+            deadline = None if timeout is None else loop.time() + timeout
+
+            def remaining() -> Optional[float]:
+                return None if deadline is None else max(0.0, deadline - loop.time())
+
+            with maybe_span(self.instrumentation, "http_stream", model=request.model):
+                try:
+                    opened = self._async_pool.open(request.url, request.body(stream=True), request.headers())
+                    response = await asyncio.wait_for(opened.__aenter__(), remaining())
+                    try:
+                        if response.status >= 400:
+                            raise _http_error(response.status, await asyncio.wait_for(response.read(), remaining()))
+                        events = response.lines()
+                        while True:
+                            try:
+                                raw = await asyncio.wait_for(events.__anext__(), remaining())
+                            except StopAsyncIteration:
+                                break
+                            delta = _delta_content(raw)
+                            if delta:
+                                for line in splitter.feed(delta):
+                                    yield line
+                    except BaseException as e:
+                        await opened.__aexit__(type(e), e, e.__traceback__)
+                        raise
+                    await opened.__aexit__(None, None, None)
+                except asyncio.TimeoutError as e:
+                    raise Timeout(f"Chat completion timed out after {timeout} seconds") from e
+                except OSError as e:
+                    raise ConvoRuntimeError(f"Chat completion request failed: {e}") from e
+        for line in splitter.close():
+            yield line
+        for line in _transcript_tail(convo_text, "".join(splitter.reply), request, extra_args):
+            yield line
+
+    def close(self) -> None:
+        """Close idle pooled connections of both pools."""
+        super().close()
+        self._async_pool.close()
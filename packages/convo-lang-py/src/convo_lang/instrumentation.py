@@ -0,0 +1,338 @@
+from __future__ import annotations
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+import math
+import os
+import subprocess
+import sys
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Numeric RunEvent fields recorded by HistogramAggregator
+METRIC_FIELDS = (
+    "duration",
+    "spawn_time",
+    "cli_wall_time",
+    "cpu_user",
+    "cpu_system",
+    "max_rss_bytes",
+    "stdout_bytes",
+    "stderr_bytes",
+    "parse_time",
+)
+
+_current_event: ContextVar[Optional["RunEvent"]] = ContextVar("convo_lang_run_event", default=None)
+
+
+def current_event() -> Optional["RunEvent"]:
+    """The innermost RunEvent being recorded in this thread / task, if any."""
+    return _current_event.get()
+
+
+@dataclass
+class RunEvent:
+    """
+    Timings and resource usage of one instrumented operation.
+    Times are in seconds; fields that do not apply to the operation stay None.
+    """
+    name: str
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    start_time: float = field(default_factory=time.time)
+    duration: Optional[float] = None
+    spawn_time: Optional[float] = None
+    cli_wall_time: Optional[float] = None
+    cpu_user: Optional[float] = None
+    cpu_system: Optional[float] = None
+    max_rss_bytes: Optional[int] = None
+    stdout_bytes: Optional[int] = None
+    stderr_bytes: Optional[int] = None
+    parse_time: Optional[float] = None
+    returncode: Optional[int] = None
+    error_class: Optional[str] = None
+    parent: Optional["RunEvent"] = field(default=None, repr=False)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {k: v for k, v in self.__dict__.items() if k != "parent"}
+        data["parent"] = self.parent.name if self.parent else None
+        return data
+
+    def record_rusage(self, rusage: Any) -> None:
+        if rusage is None:
+            return
+        self.cpu_user = rusage.ru_utime
+        self.cpu_system = rusage.ru_stime
+        # ru_maxrss is reported in kilobytes on Linux and in bytes on macOS
+        self.max_rss_bytes = rusage.ru_maxrss if sys.platform == "darwin" else rusage.ru_maxrss * 1024
+
+
+class InstrumentationHook:
+    """Base class for hooks; pre runs before an operation starts, post after it ends."""
+
+    def pre(self, event: RunEvent) -> None:
+        pass
+
+    def post(self, event: RunEvent) -> None:
+        pass
+
+
+class Instrumentation:
+    """
+    Collects RunEvents for runner and Conversation operations and passes them to hooks.
+    Hook errors are swallowed so instrumentation can never fail a completion.
+    """
+
+    def __init__(self, hooks: Iterable[InstrumentationHook] = ()):
+        self.hooks: List[InstrumentationHook] = list(hooks)
+
+    def add_hook(self, hook: InstrumentationHook) -> None:
+        self.hooks.append(hook)
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[RunEvent]:
+        event = RunEvent(name, attributes, parent=_current_event.get())
+        self._call("pre", event)
+        token = _current_event.set(event)
+        start = time.perf_counter()
+        try:
+            yield event
+        except BaseException as e:
+            event.error_class = type(e).__name__
+            raise
+        finally:
+            event.duration = time.perf_counter() - start
+            try:
+                _current_event.reset(token)
+            except ValueError:
+                # A generator holding the span was closed from another context
+                pass
+            self._call("post", event)
+
+    def _call(self, method: str, event: RunEvent) -> None:
+        for hook in self.hooks:
+            try:
+                getattr(hook, method)(event)
+            except Exception:
+                pass
+
+
+@contextmanager
+def maybe_span(instrumentation: Optional[Instrumentation], name: str, **attributes: Any) -> Iterator[Optional[RunEvent]]:
+    """Instrumentation.span when instrumentation is set, otherwise a no-op yielding None."""
+    if instrumentation is None:
+        yield None
+        return
+    with instrumentation.span(name, **attributes) as event:
+        yield event
+
+
+def record_process(
+    event: Optional[RunEvent],
+    *,
+    spawn_time: float,
+    wall_time: float,
+    returncode: Optional[int],
+    stdout: Optional[str],
+    stderr: Optional[str],
+    rusage: Any = None,
+) -> None:
+    """Store subprocess measurements on `event` (no-op when event is None)."""
+    if event is None:
+        return
+    event.spawn_time = spawn_time
+    event.cli_wall_time = wall_time
+    event.returncode = returncode
+    event.stdout_bytes = len(stdout.encode("utf-8")) if stdout is not None else None
+    event.stderr_bytes = len(stderr.encode("utf-8")) if stderr is not None else None
+    event.record_rusage(rusage)
+
+
+def wait_with_rusage(proc: subprocess.Popen, timeout: Optional[float] = None) -> Any:
+    """
+    Wait for `proc` like proc.wait(), reaping it with os.wait4 so its resource usage
+    can be returned; proc.returncode is set as usual. Returns None where os.wait4 is
+    unavailable or the child was already reaped (e.g. by proc.poll() elsewhere).
+    Raises subprocess.TimeoutExpired after `timeout` seconds.
+    """
+    if proc.returncode is not None or not hasattr(os, "wait4"):
+        proc.wait(timeout)
+        return None
+    deadline = None if timeout is None else time.monotonic() + timeout
+    delay = 0.0005
+    while True:
+        try:
+            pid, status, rusage = os.wait4(proc.pid, 0 if deadline is None else os.WNOHANG)
+        except ChildProcessError:
+            proc.wait()
+            return None
+        if pid:
+            proc.returncode = -os.WTERMSIG(status) if os.WIFSIGNALED(status) else os.WEXITSTATUS(status)
+            return rusage
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise subprocess.TimeoutExpired(proc.args, timeout)
+        time.sleep(min(delay, remaining))
+        delay = min(delay * 2, 0.05)
+
+
+class Histogram:
+    """
+    Fixed-memory histogram with log-scaled buckets; percentiles are accurate to
+    about `precision` relative error.
+    """
+
+    def __init__(self, precision: float = 0.01):
+        self._log_base = math.log1p(precision)
+        self._buckets: Dict[int, int] = {}
+        self._zeros = 0
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def record(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if value <= 0:
+            self._zeros += 1
+            return
+        index = math.ceil(math.log(value) / self._log_base)
+        self._buckets[index] = self._buckets.get(index, 0) + 1
+
+    def percentile(self, q: float) -> float:
+        """Value at percentile q (0-100)."""
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(q / 100 * self.count))
+        seen = self._zeros
+        if seen >= rank:
+            return max(self.min, 0.0)
+        for index in sorted(self._buckets):
+            seen += self._buckets[index]
+            if seen >= rank:
+                return min(max(math.exp(index * self._log_base), self.min), self.max)
+        return self.max
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "min": self.min if self.count else 0.0,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "max": self.max if self.count else 0.0,
+        }
+
+
+class HistogramAggregator(InstrumentationHook):
+    """In-memory percentiles of every RunEvent metric, keyed by operation name."""
+
+    def __init__(self, precision: float = 0.01):
+        self.precision = precision
+        self._lock = threading.Lock()
+        self._histograms: Dict[Tuple[str, str], Histogram] = {}
+        self._errors: Dict[Tuple[str, str], int] = {}
+
+    def post(self, event: RunEvent) -> None:
+        with self._lock:
+            for metric in METRIC_FIELDS:
+                value = getattr(event, metric)
+                if value is None:
+                    continue
+                key = (event.name, metric)
+                hist = self._histograms.get(key)
+                if hist is None:
+                    hist = self._histograms[key] = Histogram(self.precision)
+                hist.record(value)
+            if event.error_class:
+                key = (event.name, event.error_class)
+                self._errors[key] = self._errors.get(key, 0) + 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """{"metrics": {name: {metric: summary}}, "errors": {name: {error_class: count}}}"""
+        with self._lock:
+            metrics: Dict[str, Dict[str, Dict[str, float]]] = {}
+            for (name, metric), hist in sorted(self._histograms.items()):
+                metrics.setdefault(name, {})[metric] = hist.summary()
+            errors: Dict[str, Dict[str, int]] = {}
+            for (name, error_class), count in sorted(self._errors.items()):
+                errors.setdefault(name, {})[error_class] = count
+        return {"metrics": metrics, "errors": errors}
+
+    def dump(self) -> str:
+        """Human readable table of the snapshot."""
+        snap = self.snapshot()
+        lines = [f"{'operation':<20} {'metric':<14} {'count':>7} {'mean':>12} {'p50':>12} {'p90':>12} {'p99':>12} {'max':>12}"]
+        for name, metrics in snap["metrics"].items():
+            for metric, s in metrics.items():
+                lines.append(
+                    f"{name:<20} {metric:<14} {s['count']:>7} {s['mean']:>12.6g} {s['p50']:>12.6g} "
+                    f"{s['p90']:>12.6g} {s['p99']:>12.6g} {s['max']:>12.6g}"
+                )
+        for name, errors in snap["errors"].items():
+            for error_class, count in errors.items():
+                lines.append(f"{name:<20} error:{error_class} {count}")
+        return "\n".join(lines)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._errors.clear()
+
+
+class SpanEmitter(InstrumentationHook):
+    """
+    Emits one span per RunEvent through an OpenTelemetry-style tracer
+    (`tracer.start_span(name, attributes=...)` returning a span with `set_attribute`
+    and `end`). Works with an opentelemetry Tracer without importing the package;
+    spans of nested events are parented when opentelemetry is installed.
+    """
+
+    def __init__(self, tracer: Any, *, prefix: str = "convo_lang."):
+        self.tracer = tracer
+        self.prefix = prefix
+        self._spans: Dict[int, Any] = {}
+        self._lock = threading.Lock()
+
+    def pre(self, event: RunEvent) -> None:
+        kwargs: Dict[str, Any] = {"attributes": _span_attributes(event.attributes)}
+        parent = self._spans.get(id(event.parent)) if event.parent else None
+        if parent is not None:
+            try:
+                from opentelemetry import trace
+                kwargs["context"] = trace.set_span_in_context(parent)
+            except ImportError:
+                pass
+        span = self.tracer.start_span(self.prefix + event.name, **kwargs)
+        with self._lock:
+            self._spans[id(event)] = span
+
+    def post(self, event: RunEvent) -> None:
+        with self._lock:
+            span = self._spans.pop(id(event), None)
+        if span is None:
+            return
+        for metric in METRIC_FIELDS + ("returncode",):
+            value = getattr(event, metric)
+            if value is not None:
+                span.set_attribute(f"{self.prefix}{metric}", value)
+        if event.error_class:
+            span.set_attribute("error.type", event.error_class)
+        span.end()
+
+
+def _span_attributes(attributes: Dict[str, Any]) -> Dict[str, Any]:
+    # OpenTelemetry only accepts primitive attribute values
+    return {
+        k: v if isinstance(v, (str, bool, int, float)) else str(v)
+        for k, v in attributes.items()
+        if v is not None
+    }
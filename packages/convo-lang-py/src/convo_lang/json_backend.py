@@ -0,0 +1,44 @@
+from __future__ import annotations
+import json
+import os
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+JSON_BACKEND_ENV = "CONVO_LANG_JSON_BACKEND"
+
+_backend = "json"
+
+
+def available_backends() -> tuple:
+    return ("json", "orjson") if orjson is not None else ("json",)
+
+
+def get_json_backend() -> str:
+    return _backend
+
+
+def set_json_backend(name: str) -> None:
+    """Select the JSON decoder used for CLI output: "json" (stdlib) or "orjson"."""
+    global _backend
+    if name not in available_backends():
+        raise ValueError(f"JSON backend not available: {name}")
+    _backend = name
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    """Decode JSON with the selected backend; errors are json.JSONDecodeError subclasses."""
+    if _backend == "orjson":
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+# orjson is used automatically when installed unless the env var selects another backend
+_env_backend = os.environ.get(JSON_BACKEND_ENV)
+if _env_backend:
+    set_json_backend(_env_backend)
+elif orjson is not None:
+    _backend = "orjson"
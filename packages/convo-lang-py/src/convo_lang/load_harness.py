@@ -0,0 +1,103 @@
+from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Union
+
+from .conversation import Conversation
+from .instrumentation import Histogram
+from .mock_runner import MockConvoRunner
+from .scheduler import CompletionScheduler
+
+
+@dataclass
+class LoadReport:
+    """
+    Outcome of run_load. Latencies are seconds per complete() call. sdk_overhead is
+    the mean time per call not spent in simulated model latency (only when the
+    runner is a MockConvoRunner).
+    """
+    conversations: int = 0
+    turns: int = 0
+    concurrency: int = 0
+    completions: int = 0
+    failures: int = 0
+    errors: Dict[str, int] = field(default_factory=dict)
+    wall_time: float = 0.0
+    throughput: float = 0.0
+    latency: Dict[str, float] = field(default_factory=dict)
+    sdk_overhead: Optional[float] = None
+    scheduler: Optional[Dict[str, Dict[str, Any]]] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(self.__dict__)
+
+
+def run_load(
+    make_conversation: Callable[[int], Conversation],
+    *,
+    conversations: int = 100,
+    turns: int = 1,
+    concurrency: int = 16,
+    message: Union[str, Callable[[int, int], str]] = "Message {turn} of conversation {n}",
+    timeout: Optional[float] = 120.0,
+    runner: Optional[MockConvoRunner] = None,
+    scheduler: Optional[CompletionScheduler] = None,
+) -> LoadReport:
+    """
+    Drive `conversations` Conversations from `concurrency` threads. Each conversation
+    is created by make_conversation(n) and completes `turns` user messages in a row;
+    a failed turn ends that conversation. `message` is a format string with {n} and
+    {turn}, or a callable(n, turn). Pass the MockConvoRunner and CompletionScheduler
+    in use as `runner` / `scheduler` to include their numbers in the report.
+    """
+    hist = Histogram()
+    errors: Dict[str, int] = {}
+    lock = threading.Lock()
+    counts = {"completions": 0, "failures": 0, "call_time": 0.0}
+    start_simulated = runner.stats()["simulated_time"] if runner else 0.0
+
+    def drive(n: int) -> None:
+        convo = make_conversation(n)
+        for turn in range(turns):
+            text = message(n, turn) if callable(message) else message.format(n=n, turn=turn)
+            convo.add_user_message(text)
+            start = time.perf_counter()
+            try:
+                convo.complete(timeout=timeout)
+            except Exception as e:
+                with lock:
+                    counts["failures"] += 1
+                    counts["call_time"] += time.perf_counter() - start
+                    errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+                return
+            elapsed = time.perf_counter() - start
+            with lock:
+                counts["completions"] += 1
+                counts["call_time"] += elapsed
+                hist.record(elapsed)
+
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="convo_load") as pool:
+        for future in [pool.submit(drive, n) for n in range(conversations)]:
+            future.result()
+    wall_time = time.perf_counter() - wall_start
+
+    report = LoadReport(
+        conversations=conversations,
+        turns=turns,
+        concurrency=concurrency,
+        completions=counts["completions"],
+        failures=counts["failures"],
+        errors=errors,
+        wall_time=wall_time,
+        throughput=counts["completions"] / wall_time if wall_time > 0 else 0.0,
+        latency=hist.summary(),
+        scheduler=scheduler.stats() if scheduler else None,
+    )
+    calls = counts["completions"] + counts["failures"]
+    if runner is not None and calls:
+        simulated = runner.stats()["simulated_time"] - start_simulated
+        report.sdk_overhead = max(0.0, (counts["call_time"] - simulated) / calls)
+    return report
@@ -1,12 +1,88 @@
 from __future__ import annotations
-from typing import Dict, List, Optional
+from dataclasses import dataclass
+import json
+import math
+from pathlib import Path
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Union
 
-from .errors import ExecFailed
+from .errors import ConvoCLIError, ExecFailed, Timeout
+from .scheduler import CompletionScheduler
+
+
+class LatencyDistribution:
+    """Per-call latency in seconds, sampled from a random.Random."""
+
+    def sample(self, rng: random.Random) -> float:
+        raise NotImplementedError
+
+
+@dataclass
+class ConstantLatency(LatencyDistribution):
+    seconds: float
+
+    def sample(self, rng: random.Random) -> float:
+        return self.seconds
+
+
+@dataclass
+class UniformLatency(LatencyDistribution):
+    low: float
+    high: float
+
+    def sample(self, rng: random.Random) -> float:
+        return rng.uniform(self.low, self.high)
+
+
+@dataclass
+class LogNormalLatency(LatencyDistribution):
+    """Long-tailed latency like a model API: `median` seconds, spread `sigma`, capped at `maximum`."""
+    median: float
+    sigma: float = 0.5
+    maximum: Optional[float] = None
+
+    def sample(self, rng: random.Random) -> float:
+        value = rng.lognormvariate(math.log(self.median), self.sigma)
+        return min(value, self.maximum) if self.maximum is not None else value
+
+
+@dataclass
+class EmpiricalLatency(LatencyDistribution):
+    """Replays latencies measured in production, picked uniformly at random."""
+    samples: Sequence[float]
+
+    def sample(self, rng: random.Random) -> float:
+        return rng.choice(self.samples)
+
+
+LatencySpec = Union[None, float, LatencyDistribution, Callable[[random.Random], float]]
 
 
 class MockConvoRunner:
-    """In-memory runner for tests."""
-    def __init__(self, *, fail_with=None, response: str | None = None):
+    """
+    In-memory runner for tests and load testing.
+    latency: seconds per call, or a LatencyDistribution / callable(rng) sampled per call.
+    failure_rate: probability that a call raises `failure()` (default ConvoCLIError);
+        calls slower than their timeout raise Timeout.
+    reply_bytes: reply with a synthetic transcript that echoes the input and adds an
+        assistant message of about this size instead of `response`.
+    scheduler: CompletionScheduler the simulated calls are admitted through.
+    """
+    def __init__(
+        self,
+        *,
+        fail_with=None,
+        response: str | None = None,
+        latency: LatencySpec = None,
+        failure_rate: float = 0.0,
+        failure: Optional[Callable[[], BaseException]] = None,
+        reply_bytes: Optional[int] = None,
+        seed: Optional[int] = None,
+        scheduler: Optional[CompletionScheduler] = None,
+        config: Optional[Dict] = None,
+    ):
         self.fail_with = fail_with
         self.response = response or (
             's:{}\n'
@@ -15,6 +91,17 @@ class MockConvoRunner:
             ': assistant\n'
             'Hi there!\n'
         )
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.failure = failure or (lambda: ConvoCLIError("Simulated CLI failure"))
+        self.reply_bytes = reply_bytes
+        self.scheduler = scheduler
+        self.config = config
+        self.calls = 0
+        self.failures = 0
+        self.simulated_time = 0.0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
 
     def run_file(
         self,
@@ -27,7 +114,13 @@ class MockConvoRunner:
     ) -> str:
         if self.fail_with:
             raise self.fail_with
-        return self.response
+        if not self._simulated:
+            return self.response
+        try:
+            convo_text = Path(script_path).read_text(encoding="utf-8")
+        except OSError:
+            convo_text = ""
+        return self._simulate(convo_text, timeout)
 
     def run_text(
         self,
@@ -43,4 +136,88 @@ class MockConvoRunner:
             raise ExecFailed("Empty .convo text submitted to runner.")
         if self.fail_with:
             raise self.fail_with
-        return self.response
+        if not self._simulated:
+            return self.response
+        return self._simulate(convo_text, timeout)
+
+    def stream_text(
+        self,
+        convo_text: str,
+        *,
+        variables: Optional[Dict] = None,
+        timeout: Optional[float] = 120.0,
+        working_dir: Optional[str] = None,
+        extra_args: Optional[List[str]] = None,
+    ) -> Iterator[str]:
+        if not convo_text.strip():
+            raise ExecFailed("Empty .convo text submitted to runner.")
+        if self.fail_with:
+            raise self.fail_with
+        response = self._simulate(convo_text, timeout) if self._simulated else self.response
+        yield from response.splitlines()
+
+    @property
+    def _simulated(self) -> bool:
+        return any((
+            self.latency is not None,
+            self.failure_rate > 0,
+            self.reply_bytes is not None,
+            self.scheduler is not None,
+        ))
+
+    def _simulate(self, convo_text: str, timeout: Optional[float]) -> str:
+        with self._lock:
+            self.calls += 1
+            delay = self._sample_latency()
+            fails = self.failure_rate > 0 and self._rng.random() < self.failure_rate
+        if self.scheduler is None:
+            return self._respond(convo_text, delay, fails, timeout)
+        with self.scheduler.admit_source(convo_text, self.config):
+            return self._respond(convo_text, delay, fails, timeout)
+
+    def _sample_latency(self) -> float:
+        if self.latency is None:
+            return 0.0
+        if isinstance(self.latency, (int, float)):
+            return float(self.latency)
+        if isinstance(self.latency, LatencyDistribution):
+            return max(0.0, self.latency.sample(self._rng))
+        return max(0.0, self.latency(self._rng))
+
+    def _respond(self, convo_text: str, delay: float, fails: bool, timeout: Optional[float]) -> str:
+        timed_out = timeout is not None and delay > timeout
+        if timed_out:
+            delay = timeout
+        if delay:
+            time.sleep(delay)
+        with self._lock:
+            self.simulated_time += delay
+            if fails or timed_out:
+                self.failures += 1
+        if timed_out:
+            raise Timeout(f"Convo CLI timed out after {timeout} seconds")
+        if fails:
+            raise self.failure()
+        if self.reply_bytes is None:
+            return self.response
+        return synthetic_transcript(convo_text, self.reply_bytes)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"calls": self.calls, "failures": self.failures, "simulated_time": self.simulated_time}
+
+
+def synthetic_transcript(convo_text: str, reply_bytes: int) -> str:
+    """A --prefixOutput transcript that echoes `convo_text` and appends an assistant reply."""
+    words = ("lorem", "ipsum", "dolor", "sit", "amet", "consectetur", "adipiscing", "elit")
+    reply_words: List[str] = []
+    size = 0
+    while size < reply_bytes:
+        word = words[len(reply_words) % len(words)]
+        reply_words.append(word)
+        size += len(word) + 1
+    reply = " ".join(reply_words)[:max(reply_bytes, 1)]
+    lines = ["s:{}", "m:[]", "f:" + json.dumps([{"role": "assistant", "content": reply}])]
+    lines += [": " + line for line in convo_text.rstrip("\n").splitlines()]
+    lines += [": ", ": > assistant", ": " + reply]
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,199 @@
+from __future__ import annotations
+from dataclasses import dataclass
+import json
+import struct
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+# b"CVL" + format version, then one flags byte: codec in the low 3 bits, compression in the
+# high nibble, and _STDLIB_JSON when the JSON sections were written by the json module
+MAGIC = b"CVL\x01"
+_CODECS = {"json": 0, "msgpack": 1}
+_STDLIB_JSON = 0x08
+# msgpack ext type holding the decimal digits of an integer outside the 64-bit range
+_BIG_INT_EXT = 1
+_COMPRESSIONS = {None: 0, "zlib": 1, "zstd": 2}
+_SECTION_LEN = struct.Struct("<I")
+
+
+def available_codecs() -> Tuple[str, ...]:
+    return ("json", "msgpack") if msgpack is not None else ("json",)
+
+
+def available_compressions() -> Tuple[Optional[str], ...]:
+    return (None, "zlib", "zstd") if zstandard is not None else (None, "zlib")
+
+
+def default_codec() -> str:
+    return "msgpack" if msgpack is not None else "json"
+
+
+def _encode_sections(codec: str, values: Tuple[Any, ...]) -> Tuple[List[bytes], int]:
+    """Encode each value with `codec`; returns the sections and extra flag bits."""
+    if codec == "msgpack":
+        return [_pack(value) for value in values], 0
+    if orjson is not None:
+        try:
+            return [orjson.dumps(value) for value in values], 0
+        except TypeError:
+            # orjson rejects non-str keys and integers beyond 64 bits. json handles both,
+            # and orjson.loads would turn those integers into floats, so the dump is
+            # flagged to be decoded with json as well
+            pass
+    dumps = [json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8") for value in values]
+    return dumps, _STDLIB_JSON
+
+
+def _pack(value: Any) -> bytes:
+    try:
+        return msgpack.packb(value, use_bin_type=True)
+    except OverflowError:
+        return msgpack.packb(_wrap_big_ints(value), use_bin_type=True)
+
+
+def _wrap_big_ints(value: Any) -> Any:
+    if isinstance(value, int) and not isinstance(value, bool) and not -2**63 <= value < 2**64:
+        return msgpack.ExtType(_BIG_INT_EXT, str(value).encode("ascii"))
+    if isinstance(value, dict):
+        return {_wrap_big_ints(k): _wrap_big_ints(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_wrap_big_ints(v) for v in value]
+    return value
+
+
+def _ext_hook(code: int, data: bytes) -> Any:
+    if code == _BIG_INT_EXT:
+        return int(data)
+    return msgpack.ExtType(code, data)
+
+
+def _decode(codec: str, data: bytes, stdlib_json: bool = False) -> Any:
+    if codec == "msgpack":
+        return msgpack.unpackb(data, raw=False, strict_map_key=False, ext_hook=_ext_hook)
+    if orjson is not None and not stdlib_json:
+        return orjson.loads(data)
+    return json.loads(bytes(data))
+
+
+def intern_messages(messages: List[Any]) -> Any:
+    """
+    Store each message dict as [shape, *values], where shapes are the distinct key
+    tuples kept once in a table. Message lists are mostly dicts with the same few
+    keys, so this drops the repeated key names.
+    """
+    if not all(type(m) is dict for m in messages):
+        return messages
+    keys: Dict[str, int] = {}
+    shapes: Dict[Tuple[int, ...], int] = {}
+    rows = []
+    for message in messages:
+        shape = tuple(keys.setdefault(k, len(keys)) for k in message)
+        index = shapes.setdefault(shape, len(shapes))
+        rows.append([index, *message.values()])
+    return {"keys": list(keys), "shapes": [list(s) for s in shapes], "rows": rows}
+
+
+def restore_messages(value: Any) -> List[Any]:
+    if not isinstance(value, dict):
+        return value
+    keys = value["keys"]
+    shapes = [[keys[k] for k in shape] for shape in value["shapes"]]
+    return [dict(zip(shapes[row[0]], row[1:])) for row in value["rows"]]
+
+
+def dump_conversation(
+    convo_text: str,
+    messages: List[Dict[str, Any]],
+    syntax_messages: List[Dict[str, Any]],
+    state: Dict[str, Any],
+    *,
+    codec: Optional[str] = None,
+    compression: Optional[str] = None,
+) -> bytes:
+    """
+    Encode conversation state as MAGIC, a flags byte and a body of length-prefixed
+    sections: convo_text (UTF-8), state, syntax_messages and interned messages
+    (all in `codec`). With `compression` the body is compressed as a whole.
+    """
+    codec = codec or default_codec()
+    if codec not in available_codecs():
+        raise ValueError(f"Codec not available: {codec}")
+    if compression not in available_compressions():
+        raise ValueError(f"Compression not available: {compression}")
+    encoded, extra_flags = _encode_sections(codec, (state, syntax_messages, intern_messages(messages)))
+    sections = [convo_text.encode("utf-8"), *encoded]
+    body = b"".join(_SECTION_LEN.pack(len(s)) + s for s in sections)
+    if compression == "zlib":
+        body = zlib.compress(body, 1)
+    elif compression == "zstd":
+        body = zstandard.ZstdCompressor(level=3).compress(body)
+    flags = _CODECS[codec] | extra_flags | _COMPRESSIONS[compression] << 4
+    return MAGIC + bytes((flags,)) + body
+
+
+@dataclass
+class LoadedConversation:
+    """Decoded sections of a dump; messages stay encoded until decode_messages() is called."""
+    convo_text: str
+    state: Dict[str, Any]
+    syntax_messages: List[Dict[str, Any]]
+    codec: str
+    messages_data: bytes
+    stdlib_json: bool = False
+
+    def decode_messages(self) -> List[Dict[str, Any]]:
+        return restore_messages(_decode(self.codec, self.messages_data, self.stdlib_json))
+
+
+def load_conversation(data: bytes) -> LoadedConversation:
+    """Inverse of dump_conversation. Raises ValueError on data in another format."""
+    if data[:len(MAGIC)] != MAGIC or len(data) <= len(MAGIC):
+        raise ValueError("Not a dumped Conversation (bad header)")
+    flags = data[len(MAGIC)]
+    codec = {v: k for k, v in _CODECS.items()}.get(flags & 0x07)
+    stdlib_json = bool(flags & _STDLIB_JSON)
+    compression = {v: k for k, v in _COMPRESSIONS.items()}.get(flags >> 4, "unknown")
+    if codec not in available_codecs():
+        raise ValueError(f"Dump uses an unavailable codec: {codec or flags & 0x07}")
+    if compression not in available_compressions():
+        raise ValueError(f"Dump uses an unavailable compression: {compression}")
+    body = memoryview(data)[len(MAGIC) + 1:]
+    if compression == "zlib":
+        body = memoryview(zlib.decompress(body))
+    elif compression == "zstd":
+        body = memoryview(zstandard.ZstdDecompressor().decompressobj().decompress(body))
+    sections = []
+    offset = 0
+    for _ in range(4):
+        try:
+            (size,) = _SECTION_LEN.unpack_from(body, offset)
+        except struct.error as e:
+            raise ValueError("Truncated Conversation dump") from e
+        offset += _SECTION_LEN.size
+        if offset + size > len(body):
+            raise ValueError("Truncated Conversation dump")
+        sections.append(body[offset:offset + size])
+        offset += size
+    return LoadedConversation(
+        convo_text=str(sections[0], "utf-8"),
+        state=_decode(codec, sections[1], stdlib_json),
+        syntax_messages=_decode(codec, sections[2], stdlib_json),
+        codec=codec,
+        messages_data=bytes(sections[3]),
+        stdlib_json=stdlib_json,
+    )
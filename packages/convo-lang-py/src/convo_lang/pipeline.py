@@ -0,0 +1,304 @@
+from __future__ import annotations
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+import hashlib
+import os
+import re
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from .batch import default_concurrency
+from .completion_cache import CompletionCache, MemoryCompletionCache, completion_cache_key
+from .conversation import Conversation
+from .convo_cli_runner import ConvoCLIRunner
+from .instrumentation import Instrumentation, maybe_span
+from .templates import ConvoTemplate, TemplateRegistry
+
+# `@import <target>` tags; local targets are resolved relative to the importing file
+_IMPORT_TAG = re.compile(r"^[ \t]*@import[ \t]+(\S.*?)[ \t]*$", re.MULTILINE)
+
+
+@dataclass
+class PipelineStep:
+    """
+    One agent in a Pipeline: a .convo file (or inline convo_text) completed with
+    `variables` plus `inputs`, which map a variable name to the output of another
+    step or to a value passed to Pipeline.run(). `after` adds ordering-only
+    dependencies.
+    """
+    name: str
+    convo_file: Optional[str] = None
+    convo_text: Optional[str] = None
+    variables: Dict[str, Any] = field(default_factory=dict)
+    inputs: Dict[str, str] = field(default_factory=dict)
+    after: Tuple[str, ...] = ()
+
+    def __post_init__(self) -> None:
+        if (self.convo_file is None) == (self.convo_text is None):
+            raise ValueError(f"Step {self.name!r}: pass exactly one of convo_file or convo_text")
+
+
+@dataclass
+class StepResult:
+    """Outcome of one step; times are seconds relative to the start of the run."""
+    name: str
+    output: Optional[str] = None
+    error: Optional[BaseException] = None
+    cached: bool = False
+    skipped: bool = False
+    start: float = 0.0
+    end: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and not self.skipped
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+@dataclass
+class PipelineResult:
+    steps: Dict[str, StepResult] = field(default_factory=dict)
+    wall_time: float = 0.0
+    critical_path: List[str] = field(default_factory=list)
+    critical_path_time: float = 0.0
+
+    @property
+    def outputs(self) -> Dict[str, Optional[str]]:
+        return {name: r.output for name, r in self.steps.items()}
+
+    @property
+    def ok(self) -> bool:
+        return all(r.ok for r in self.steps.values())
+
+    @property
+    def errors(self) -> Dict[str, BaseException]:
+        return {name: r.error for name, r in self.steps.items() if r.error is not None}
+
+    def __getitem__(self, name: str) -> Optional[str]:
+        return self.steps[name].output
+
+    def timings(self) -> str:
+        """Human readable per-step timeline and critical path."""
+        lines = [f"{'step':<28} {'start':>8} {'end':>8} {'seconds':>8}  status"]
+        for r in sorted(self.steps.values(), key=lambda r: (r.start, r.name)):
+            status = "skipped" if r.skipped else "error" if r.error else "cached" if r.cached else "ok"
+            lines.append(f"{r.name:<28} {r.start:>8.3f} {r.end:>8.3f} {r.duration:>8.3f}  {status}")
+        lines.append(f"critical path ({self.critical_path_time:.3f}s): {' -> '.join(self.critical_path)}")
+        lines.append(f"wall time: {self.wall_time:.3f}s")
+        return "\n".join(lines)
+
+
+class Pipeline:
+    """
+    DAG of Conversation steps. run() completes every step whose dependencies are done
+    on a thread pool of `max_concurrency`, so independent agents run concurrently.
+    Step outputs are memoized by a hash of the step's source, variables and runner config,
+    the content of local files it @imports (recursively) and the runner's class and
+    convo_bin: re-running with a changed input only recomputes the steps whose inputs
+    changed. Imports that are not local files (URLs, packages) are keyed by name only.
+    A failed step skips its dependents; other branches still run.
+    """
+
+    def __init__(
+        self,
+        steps: Tuple[PipelineStep, ...] = (),
+        *,
+        config: Optional[Dict[str, Any]] = None,
+        runner: Any = None,
+        max_concurrency: Optional[int] = None,
+        memoize: bool = True,
+        cache: Optional[CompletionCache] = None,
+        templates: Optional[TemplateRegistry] = None,
+        instrumentation: Optional[Instrumentation] = None,
+    ):
+        self.config = config or {}
+        self.runner = runner
+        self.max_concurrency = max_concurrency
+        if cache is None and memoize:
+            cache = MemoryCompletionCache()
+        self.cache = cache if memoize else None
+        self.templates = templates or TemplateRegistry()
+        self.instrumentation = instrumentation
+        self.steps: Dict[str, PipelineStep] = {}
+        for step in steps:
+            self._add_step(step)
+
+    def add(
+        self,
+        name: str,
+        convo_file: Optional[str] = None,
+        *,
+        convo_text: Optional[str] = None,
+        variables: Optional[Dict[str, Any]] = None,
+        inputs: Optional[Dict[str, str]] = None,
+        after: Tuple[str, ...] = (),
+    ) -> PipelineStep:
+        return self._add_step(PipelineStep(
+            name,
+            convo_file=convo_file,
+            convo_text=convo_text,
+            variables=dict(variables or {}),
+            inputs=dict(inputs or {}),
+            after=tuple(after),
+        ))
+
+    def _add_step(self, step: PipelineStep) -> PipelineStep:
+        if step.name in self.steps:
+            raise ValueError(f"Duplicate step name: {step.name!r}")
+        self.steps[step.name] = step
+        return step
+
+    def dependencies(self, name: str) -> Set[str]:
+        step = self.steps[name]
+        return {ref for ref in step.inputs.values() if ref in self.steps} | set(step.after)
+
+    def _validate(self, inputs: Dict[str, Any]) -> None:
+        for step in self.steps.values():
+            for var, ref in step.inputs.items():
+                if ref in self.steps and ref in inputs:
+                    raise ValueError(f"Step {step.name!r}: input {ref!r} is both a step and a run input")
+                if ref not in self.steps and ref not in inputs:
+                    raise ValueError(f"Step {step.name!r}: unknown input {ref!r} for variable {var!r}")
+            for dep in step.after:
+                if dep not in self.steps:
+                    raise ValueError(f"Step {step.name!r}: unknown dependency {dep!r}")
+        # Kahn's algorithm; anything left over is part of a cycle
+        remaining = {name: set(self.dependencies(name)) for name in self.steps}
+        while True:
+            ready = [name for name, deps in remaining.items() if not deps]
+            if not ready:
+                break
+            for name in ready:
+                del remaining[name]
+            for deps in remaining.values():
+                deps.difference_update(ready)
+        if remaining:
+            raise ValueError(f"Pipeline has a dependency cycle: {', '.join(sorted(remaining))}")
+
+    def run(self, inputs: Optional[Dict[str, Any]] = None, *, timeout: Optional[float] = 120.0) -> PipelineResult:
+        """Run every step; `inputs` are the values steps reference by name in their `inputs`."""
+        inputs = dict(inputs or {})
+        self._validate(inputs)
+        if self.runner is None:
+            self.runner = ConvoCLIRunner(config=self.config, instrumentation=self.instrumentation)
+        results: Dict[str, StepResult] = {}
+        started = time.perf_counter()
+        pending = {name: self.dependencies(name) for name in self.steps}
+        limit = max(1, self.max_concurrency or default_concurrency())
+        with ThreadPoolExecutor(max_workers=limit, thread_name_prefix="convo_pipeline") as pool:
+            running: Dict[Future, str] = {}
+            while pending or running:
+                for name in [n for n, deps in pending.items() if deps.issubset(results)]:
+                    del pending[name]
+                    failed = [d for d in self.dependencies(name) if not results[d].ok]
+                    if failed:
+                        now = time.perf_counter() - started
+                        results[name] = StepResult(name, skipped=True, start=now, end=now, error=RuntimeError(
+                            f"Skipped because {', '.join(sorted(failed))} failed"
+                        ))
+                        continue
+                    variables = self._variables(self.steps[name], inputs, results)
+                    running[pool.submit(self._run_step, self.steps[name], variables, timeout, started)] = name
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results[running.pop(future)] = future.result()
+        result = PipelineResult(
+            steps={name: results[name] for name in self.steps},
+            wall_time=time.perf_counter() - started,
+        )
+        result.critical_path, result.critical_path_time = self._critical_path(results)
+        return result
+
+    def _variables(self, step: PipelineStep, inputs: Dict[str, Any], results: Dict[str, StepResult]) -> Dict[str, Any]:
+        variables = dict(step.variables)
+        for var, ref in step.inputs.items():
+            variables[var] = results[ref].output if ref in self.steps else inputs[ref]
+        return variables
+
+    def _template(self, step: PipelineStep) -> Optional[ConvoTemplate]:
+        return self.templates.get(step.convo_file) if step.convo_file else None
+
+    def _memo_key(
+        self,
+        step: PipelineStep,
+        template: Optional[ConvoTemplate],
+        source: str,
+        variables: Dict[str, Any],
+    ) -> str:
+        base = os.path.dirname(template.paths[0]) if template else os.getcwd()
+        runner = type(self.runner)
+        parts = [f"runner={runner.__module__}.{runner.__qualname__}:{getattr(self.runner, 'convo_bin', '')}"]
+        parts += self._import_digests(source, base, set())
+        # The runner executes with its own config, which may differ from the pipeline's
+        config = getattr(self.runner, "config", None) or self.config
+        return completion_cache_key(source, variables, config, extra_args=parts)
+
+    def _import_digests(self, source: str, base: str, seen: Set[str]) -> List[str]:
+        """`target=digest` for every @import in `source`, following imported .convo files."""
+        parts: List[str] = []
+        for target in _IMPORT_TAG.findall(source):
+            path = os.path.abspath(os.path.join(base, target))
+            if path in seen or not os.path.isfile(path):
+                parts.append(f"import={target}")
+                continue
+            seen.add(path)
+            if path.endswith(".convo"):
+                imported = self.templates.get(path)
+                parts.append(f"import={path}={imported.digest}")
+                parts += self._import_digests(imported.text, os.path.dirname(path), seen)
+            else:
+                with open(path, "rb") as f:
+                    parts.append(f"import={path}={hashlib.sha256(f.read()).hexdigest()}")
+        return parts
+
+    def _run_step(self, step: PipelineStep, variables: Dict[str, Any], timeout: Optional[float], started: float) -> StepResult:
+        result = StepResult(step.name, start=time.perf_counter() - started)
+        try:
+            with maybe_span(self.instrumentation, "pipeline_step", step=step.name) as event:
+                template = self._template(step)
+                source = template.text if template else step.convo_text
+                key = self._memo_key(step, template, source, variables) if self.cache is not None else None
+                cached = self.cache.get(key) if key else None
+                if cached is not None:
+                    result.output, result.cached = cached, True
+                else:
+                    convo = Conversation(
+                        config=self.config,
+                        convo_cli_runner=self.runner,
+                        instrumentation=self.instrumentation,
+                        output="messages",
+                    )
+                    if template:
+                        convo.add_template(template)
+                    else:
+                        convo.add_convo_text(step.convo_text)
+                    result.output = convo.complete(variables=variables, timeout=timeout)
+                    if key:
+                        self.cache.set(key, result.output)
+                if event is not None:
+                    event.attributes["cached"] = result.cached
+        except Exception as e:
+            result.error = e
+        result.end = time.perf_counter() - started
+        return result
+
+    def _critical_path(self, results: Dict[str, StepResult]) -> Tuple[List[str], float]:
+        """Chain of dependent steps with the largest total duration."""
+        best: Dict[str, Tuple[float, List[str]]] = {}
+
+        def longest(name: str) -> Tuple[float, List[str]]:
+            if name not in best:
+                tails = [longest(dep) for dep in self.dependencies(name)]
+                total, path = max(tails, key=lambda t: t[0], default=(0.0, []))
+                best[name] = (total + results[name].duration, path + [name])
+            return best[name]
+
+        if not results:
+            return [], 0.0
+        total, path = max((longest(name) for name in results), key=lambda t: t[0])
+        return path, total
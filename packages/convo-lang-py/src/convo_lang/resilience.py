@@ -0,0 +1,266 @@
+from __future__ import annotations
+import asyncio
+import contextvars
+from dataclasses import dataclass, field
+import queue
+import random
+import subprocess
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Type, TypeVar
+
+from .errors import ConvoCLIError, ConvoRuntimeError, Timeout
+from .instrumentation import Histogram, current_event
+
+T = TypeVar("T")
+
+_cancel_scope: contextvars.ContextVar[Optional["CancelScope"]] = contextvars.ContextVar(
+    "convo_lang_cancel_scope", default=None
+)
+
+
+def current_cancel_scope() -> Optional["CancelScope"]:
+    """The CancelScope CLI processes started in this thread should register with, if any."""
+    return _cancel_scope.get()
+
+
+class CancelScope:
+    """Kills the CLI processes of one attempt when the attempt loses a hedge."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._procs: List[subprocess.Popen] = []
+        self.cancelled = False
+
+    def attach(self, proc: subprocess.Popen) -> None:
+        with self._lock:
+            if not self.cancelled:
+                self._procs.append(proc)
+                return
+        _kill(proc)
+
+    def detach(self, proc: subprocess.Popen) -> None:
+        with self._lock:
+            if proc in self._procs:
+                self._procs.remove(proc)
+
+    def cancel(self) -> None:
+        with self._lock:
+            self.cancelled = True
+            procs, self._procs = self._procs, []
+        for proc in procs:
+            _kill(proc)
+
+
+def _kill(proc: subprocess.Popen) -> None:
+    try:
+        proc.kill()
+    except OSError:
+        pass
+
+
+@dataclass
+class RetryPolicy:
+    """
+    Retries a failed CLI run up to `max_attempts` times in total. The wait before
+    retry n is backoff_base * 2**(n-1) capped at backoff_max, reduced by a random
+    fraction of up to `jitter` so that concurrent callers do not retry in lockstep.
+    Only errors in `retry_on` are retried; validation errors would fail again.
+    """
+    max_attempts: int = 3
+    backoff_base: float = 0.5
+    backoff_max: float = 8.0
+    jitter: float = 1.0
+    retry_on: Tuple[Type[BaseException], ...] = (ConvoRuntimeError, ConvoCLIError, Timeout)
+
+    def should_retry(self, error: BaseException) -> bool:
+        return isinstance(error, self.retry_on)
+
+    def delay(self, attempt: int) -> float:
+        backoff = min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1))
+        return backoff * (1.0 - self.jitter * random.random())
+
+
+@dataclass
+class HedgePolicy:
+    """
+    Starts a second, identical CLI run when the first has not finished after `delay`
+    seconds, keeps whichever succeeds first and kills the other. Without a fixed
+    delay the `percentile` of recent successful run latencies is used, once
+    `min_samples` runs have been observed; until then runs are not hedged.
+    """
+    delay: Optional[float] = None
+    percentile: float = 95.0
+    min_samples: int = 20
+    min_delay: float = 0.0
+
+
+@dataclass
+class ResilienceStats:
+    calls: int = 0
+    attempts: int = 0
+    retries: int = 0
+    retries_exhausted: int = 0
+    hedges: int = 0
+    hedge_wins: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(self.__dict__)
+
+
+@dataclass
+class ResilientCaller:
+    """Applies a RetryPolicy and/or HedgePolicy to calls and counts what happened."""
+    retry: Optional[RetryPolicy] = None
+    hedge: Optional[HedgePolicy] = None
+    stats: ResilienceStats = field(default_factory=ResilienceStats)
+    _latency: Histogram = field(init=False, repr=False, default_factory=Histogram)
+    _lock: threading.Lock = field(init=False, repr=False, default_factory=threading.Lock)
+
+    def call(self, fn: Callable[[], T]) -> T:
+        self._count("calls")
+        attempt = 0
+        while True:
+            attempt += 1
+            self._count("attempts")
+            try:
+                result = self._hedged(fn) if self.hedge else self._timed(fn)
+            except Exception as e:
+                if self.retry is None or not self.retry.should_retry(e):
+                    raise
+                if attempt >= self.retry.max_attempts:
+                    self._count("retries_exhausted")
+                    raise
+                self._count("retries")
+                time.sleep(self.retry.delay(attempt))
+                continue
+            event = current_event()
+            if event is not None:
+                event.attributes["attempts"] = attempt
+            return result
+
+    async def acall(self, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        call() for a coroutine function: backoff uses asyncio.sleep and the hedge runs
+        as a second task; the losing task is cancelled, which kills its CLI process.
+        """
+        self._count("calls")
+        attempt = 0
+        while True:
+            attempt += 1
+            self._count("attempts")
+            try:
+                result = await (self._ahedged(fn) if self.hedge else self._atimed(fn))
+            except Exception as e:
+                if self.retry is None or not self.retry.should_retry(e):
+                    raise
+                if attempt >= self.retry.max_attempts:
+                    self._count("retries_exhausted")
+                    raise
+                self._count("retries")
+                await asyncio.sleep(self.retry.delay(attempt))
+                continue
+            event = current_event()
+            if event is not None:
+                event.attributes["attempts"] = attempt
+            return result
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds to wait before hedging, or None while there is too little data."""
+        if self.hedge is None:
+            return None
+        if self.hedge.delay is not None:
+            return self.hedge.delay
+        with self._lock:
+            if self._latency.count < self.hedge.min_samples:
+                return None
+            return max(self.hedge.min_delay, self._latency.percentile(self.hedge.percentile))
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            setattr(self.stats, name, getattr(self.stats, name) + 1)
+
+    def _timed(self, fn: Callable[[], T]) -> T:
+        start = time.perf_counter()
+        result = fn()
+        with self._lock:
+            self._latency.record(time.perf_counter() - start)
+        return result
+
+    async def _atimed(self, fn: Callable[[], Awaitable[T]]) -> T:
+        start = time.perf_counter()
+        result = await fn()
+        with self._lock:
+            self._latency.record(time.perf_counter() - start)
+        return result
+
+    async def _ahedged(self, fn: Callable[[], Awaitable[T]]) -> T:
+        delay = self.hedge_delay()
+        if delay is None:
+            return await self._atimed(fn)
+        tasks = [asyncio.ensure_future(self._atimed(fn))]
+        try:
+            done, pending = await asyncio.wait(tasks, timeout=delay)
+            if not done:
+                self._count("hedges")
+                tasks.append(asyncio.ensure_future(self._atimed(fn)))
+                done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                if pending and all(t.exception() is not None for t in done):
+                    # The first run to finish failed; the other one may still succeed
+                    await asyncio.wait(pending)
+            finished = [t for t in tasks if t.done()]
+            winner = next((t for t in finished if t.exception() is None), finished[0])
+            if winner is not tasks[0] and winner.exception() is None:
+                self._count("hedge_wins")
+            return winner.result()
+        finally:
+            losers = [t for t in tasks if not t.done()]
+            for task in losers:
+                task.cancel()
+            await asyncio.gather(*losers, return_exceptions=True)
+
+    def _hedged(self, fn: Callable[[], T]) -> T:
+        delay = self.hedge_delay()
+        if delay is None:
+            return self._timed(fn)
+        outcomes: "queue.Queue[Tuple[int, Any, Optional[BaseException]]]" = queue.Queue()
+        scopes = [self._start(fn, 0, outcomes)]
+        try:
+            try:
+                index, result, error = outcomes.get(timeout=delay)
+            except queue.Empty:
+                self._count("hedges")
+                scopes.append(self._start(fn, 1, outcomes))
+                index, result, error = outcomes.get()
+                if error is not None:
+                    # The first run to finish failed; the other one may still succeed
+                    other = outcomes.get()
+                    if other[2] is None:
+                        index, result, error = other
+                if error is None and index == 1:
+                    self._count("hedge_wins")
+        finally:
+            for scope in scopes:
+                scope.cancel()
+        if error is not None:
+            raise error
+        return result
+
+    def _start(
+        self,
+        fn: Callable[[], T],
+        index: int,
+        outcomes: "queue.Queue[Tuple[int, Any, Optional[BaseException]]]",
+    ) -> CancelScope:
+        scope = CancelScope()
+        context = contextvars.copy_context()
+
+        def run() -> None:
+            _cancel_scope.set(scope)
+            try:
+                outcomes.put((index, self._timed(fn), None))
+            except BaseException as e:
+                outcomes.put((index, None, e))
+
+        threading.Thread(target=context.run, args=(run,), daemon=True, name="convo_hedge").start()
+        return scope
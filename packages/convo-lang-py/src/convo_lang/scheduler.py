@@ -0,0 +1,273 @@
+from __future__ import annotations
+import asyncio
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass, field
+import math
+import re
+import threading
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
+
+# Last `__model = "..."` assignment in the .convo source selects the model
+_MODEL_ASSIGNMENT = re.compile(r"""^\s*__model\s*=\s*['"]([^'"]+)['"]""", re.MULTILINE)
+_THROTTLE_MARKERS = ("429", "rate limit", "rate_limit", "ratelimit", "too many requests", "quota")
+DEFAULT_MODEL_KEY = "*"
+
+
+def resolve_model(convo_text: str, config: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Model a completion will use: `__model` in the source, else config chatModel,
+    else config defaultModel, else "*".
+    """
+    matches = _MODEL_ASSIGNMENT.findall(convo_text)
+    if matches:
+        return matches[-1]
+    config = config or {}
+    return config.get("chatModel") or config.get("defaultModel") or DEFAULT_MODEL_KEY
+
+
+def estimate_tokens(convo_text: str) -> int:
+    """Rough prompt size in tokens (about 4 characters per token)."""
+    return math.ceil(len(convo_text) / 4)
+
+
+def is_throttle_error(error: BaseException) -> bool:
+    """True if a CLI failure looks like a provider rate limit (HTTP 429 / quota)."""
+    text = str(error).lower()
+    return any(marker in text for marker in _THROTTLE_MARKERS)
+
+
+@dataclass
+class ModelLimits:
+    """
+    Budgets for one model. Rates are per minute; None means unlimited.
+    completion_tokens is added to every prompt estimate to account for the reply.
+    """
+    requests_per_minute: Optional[float] = None
+    tokens_per_minute: Optional[float] = None
+    max_concurrency: int = 8
+    min_concurrency: int = 1
+    completion_tokens: int = 512
+
+
+class TokenBucket:
+    """
+    Token bucket refilled at `rate` per second up to `capacity`. reserve() always
+    succeeds and returns how long the caller must wait, so callers are served in order.
+    Not thread-safe by itself; CompletionScheduler serializes access.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self._updated = time.monotonic()
+
+    def reserve(self, amount: float) -> float:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        # A single request larger than the bucket can never fit; let it through at full capacity
+        self.tokens -= min(amount, self.capacity)
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+
+@dataclass
+class AIMDController:
+    """Additive-increase / multiplicative-decrease concurrency limit."""
+    limit: float
+    minimum: float = 1.0
+    maximum: float = 8.0
+    decrease_factor: float = 0.5
+    cooldown: float = 1.0
+    _last_decrease: float = field(default=-math.inf, repr=False)
+
+    def on_success(self) -> None:
+        # Roughly +1 per `limit` successful requests
+        self.limit = min(self.maximum, self.limit + 1.0 / max(self.limit, 1.0))
+
+    def on_throttle(self) -> None:
+        # A burst of 429s from one overload only counts once per cooldown window
+        now = time.monotonic()
+        if now - self._last_decrease < self.cooldown:
+            return
+        self._last_decrease = now
+        self.limit = max(self.minimum, self.limit * self.decrease_factor)
+
+
+@dataclass
+class ModelSchedulerStats:
+    admitted: int = 0
+    succeeded: int = 0
+    throttled: int = 0
+    failed: int = 0
+    in_flight: int = 0
+    concurrency_limit: float = 0.0
+    total_wait: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(self.__dict__)
+
+
+class _ModelState:
+    def __init__(self, limits: ModelLimits):
+        self.limits = limits
+        self.requests = (
+            TokenBucket(limits.requests_per_minute / 60, max(1.0, limits.requests_per_minute / 60))
+            if limits.requests_per_minute else None
+        )
+        self.tokens = (
+            TokenBucket(limits.tokens_per_minute / 60, limits.tokens_per_minute / 60 * 10)
+            if limits.tokens_per_minute else None
+        )
+        self.aimd = AIMDController(
+            limit=float(limits.max_concurrency),
+            minimum=float(limits.min_concurrency),
+            maximum=float(limits.max_concurrency),
+        )
+        self.stats = ModelSchedulerStats(concurrency_limit=self.aimd.limit)
+        self.paused_until = 0.0
+
+
+def _wake(waiter: "asyncio.Future[None]") -> None:
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class CompletionScheduler:
+    """
+    Admits CLI runs per model under request/token budgets and an adaptive concurrency
+    limit. Runs wait until a concurrency slot is free and both token buckets allow
+    them; provider throttling halves the model's concurrency and pauses admissions
+    for `throttle_pause` seconds, successes grow it back one slot at a time.
+
+    Pass it to ConvoCLIRunner(scheduler=...) or ConvoCLIPool(scheduler=...), or to the
+    async runners, which use aadmit(); it is thread-safe, can be used from several
+    event loops and is meant to be shared by every runner hitting the same provider.
+    """
+
+    def __init__(
+        self,
+        limits: Optional[Dict[str, ModelLimits]] = None,
+        *,
+        default_limits: Optional[ModelLimits] = None,
+        is_throttle: Callable[[BaseException], bool] = is_throttle_error,
+        throttle_pause: float = 1.0,
+    ):
+        self.limits = dict(limits or {})
+        self.throttle_pause = throttle_pause
+        self.default_limits = default_limits or ModelLimits()
+        self.is_throttle = is_throttle
+        self._models: Dict[str, _ModelState] = {}
+        self._cond = threading.Condition()
+        # Coroutines in aadmit() waiting for a slot, woken like threads waiting on _cond
+        self._async_waiters: List[Tuple[asyncio.AbstractEventLoop, "asyncio.Future[None]"]] = []
+
+    def _state(self, model: str) -> _ModelState:
+        state = self._models.get(model)
+        if state is None:
+            limits = self.limits.get(model) or self.limits.get(DEFAULT_MODEL_KEY) or self.default_limits
+            state = self._models[model] = _ModelState(limits)
+        return state
+
+    def _can_start(self, state: _ModelState) -> bool:
+        return state.stats.in_flight < max(1, int(state.aimd.limit))
+
+    def _start(self, state: _ModelState, tokens: int) -> float:
+        """Count a run as started (with self._cond held) and return how long it must wait."""
+        state.stats.in_flight += 1
+        state.stats.admitted += 1
+        delay = max(0.0, state.paused_until - time.monotonic())
+        if state.requests:
+            delay = max(delay, state.requests.reserve(1))
+        if state.tokens:
+            delay = max(delay, state.tokens.reserve(tokens + state.limits.completion_tokens))
+        return delay
+
+    def _finish(self, state: _ModelState, error: Optional[BaseException]) -> None:
+        """Classify a finished run, free its slot and wake waiters."""
+        with self._cond:
+            if error is None:
+                state.stats.succeeded += 1
+                state.aimd.on_success()
+            elif isinstance(error, Exception) and self.is_throttle(error):
+                state.stats.throttled += 1
+                state.aimd.on_throttle()
+                state.paused_until = time.monotonic() + self.throttle_pause
+            else:
+                state.stats.failed += 1
+            state.stats.in_flight -= 1
+            state.stats.concurrency_limit = state.aimd.limit
+            self._cond.notify_all()
+            waiters, self._async_waiters = self._async_waiters, []
+        for loop, waiter in waiters:
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(_wake, waiter)
+
+    def _waited(self, state: _ModelState, start: float) -> None:
+        with self._cond:
+            state.stats.total_wait += time.monotonic() - start
+
+    @contextmanager
+    def admit(self, model: str, *, tokens: int = 0) -> Iterator[None]:
+        """
+        Block until a run of `model` using about `tokens` prompt tokens may start.
+        Exceptions raised inside the block are classified to adapt concurrency.
+        """
+        start = time.monotonic()
+        with self._cond:
+            state = self._state(model)
+            while not self._can_start(state):
+                self._cond.wait()
+            delay = self._start(state, tokens)
+        try:
+            if delay > 0:
+                time.sleep(delay)
+            self._waited(state, start)
+            yield
+        except BaseException as e:
+            self._finish(state, e)
+            raise
+        else:
+            self._finish(state, None)
+
+    @asynccontextmanager
+    async def aadmit(self, model: str, *, tokens: int = 0) -> AsyncIterator[None]:
+        """admit() for coroutines: waits without blocking the event loop."""
+        start = time.monotonic()
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._cond:
+                state = self._state(model)
+                if self._can_start(state):
+                    delay = self._start(state, tokens)
+                    break
+                waiter = loop.create_future()
+                self._async_waiters.append((loop, waiter))
+            await waiter
+        try:
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._waited(state, start)
+            yield
+        except BaseException as e:
+            self._finish(state, e)
+            raise
+        else:
+            self._finish(state, None)
+
+    @contextmanager
+    def admit_source(self, convo_text: str, config: Optional[Dict[str, Any]] = None) -> Iterator[None]:
+        """admit() for a .convo source, resolving its model and estimating its tokens."""
+        with self.admit(resolve_model(convo_text, config), tokens=estimate_tokens(convo_text)):
+            yield
+
+    @asynccontextmanager
+    async def aadmit_source(self, convo_text: str, config: Optional[Dict[str, Any]] = None) -> AsyncIterator[None]:
+        """aadmit() for a .convo source."""
+        async with self.aadmit(resolve_model(convo_text, config), tokens=estimate_tokens(convo_text)):
+            yield
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._cond:
+            return {model: state.stats.to_dict() for model, state in self._models.items()}
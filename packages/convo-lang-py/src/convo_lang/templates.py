@@ -0,0 +1,126 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+import hashlib
+import os
+from pathlib import Path
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple, Union
+
+from .conversation import Conversation
+from .convo_segments import ConvoSegment
+
+PathLike = Union[str, "os.PathLike[str]"]
+
+
+@dataclass(frozen=True)
+class ConvoTemplate:
+    """
+    Immutable .convo source loaded from one or more files. Conversations created
+    from it share its segments and rendered text as their prefix instead of copying it.
+    """
+    paths: Tuple[str, ...]
+    segments: Tuple[ConvoSegment, ...]
+    text: str
+    digest: str
+
+    def __len__(self) -> int:
+        return len(self.text)
+
+    def conversation(self, **kwargs: Any) -> Conversation:
+        """New Conversation starting with this template; kwargs go to the constructor."""
+        return Conversation.from_template(self, **kwargs)
+
+
+@dataclass
+class _Entry:
+    template: ConvoTemplate
+    mtime_ns: int
+    size: int
+    checked: float
+
+
+@dataclass
+class TemplateRegistry:
+    """
+    Loads .convo files once and reuses them until they change on disk.
+    A file is stat-ed at most every `check_interval` seconds (0 = on every use); if its
+    mtime or size changed it is re-read, and a new template is only built when the
+    content hash differs. Combinations of files are cached as one template too.
+    Thread-safe; share one registry per process.
+    """
+    check_interval: float = 0.0
+    _entries: Dict[str, _Entry] = field(init=False, repr=False, default_factory=dict)
+    _composed: Dict[Tuple[str, ...], ConvoTemplate] = field(init=False, repr=False, default_factory=dict)
+    _lock: threading.Lock = field(init=False, repr=False, default_factory=threading.Lock)
+
+    def get(self, path: PathLike) -> ConvoTemplate:
+        """Template for one .convo file. Raises FileNotFoundError or ValueError like add_convo_file."""
+        # abspath rather than resolve(): no filesystem access on the cached path
+        key = os.path.abspath(path)
+        resolved = Path(key)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry.checked < self.check_interval:
+                return entry.template
+        if resolved.suffix != ".convo":
+            raise ValueError("Only .convo files are supported")
+        try:
+            stat = resolved.stat()
+        except FileNotFoundError as e:
+            raise FileNotFoundError(f"Convo file not found: {resolved}") from e
+        if entry is not None and (stat.st_mtime_ns, stat.st_size) == (entry.mtime_ns, entry.size):
+            with self._lock:
+                entry.checked = now
+            return entry.template
+        content = resolved.read_text(encoding="utf-8")
+        digest = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        with self._lock:
+            current = self._entries.get(key)
+            if current is not None and current.template.digest == digest:
+                template = current.template
+            else:
+                segment = ConvoSegment.from_file(key, content)
+                template = ConvoTemplate((key,), (segment,), segment.source, digest)
+                if current is not None:
+                    self._drop_compositions(current.template.digest)
+            self._entries[key] = _Entry(template, stat.st_mtime_ns, stat.st_size, now)
+        return template
+
+    def compose(self, *paths: PathLike) -> ConvoTemplate:
+        """Template for several files in order, cached until any of them changes."""
+        parts = [self.get(path) for path in paths]
+        if len(parts) == 1:
+            return parts[0]
+        key = tuple(part.digest for part in parts)
+        with self._lock:
+            template = self._composed.get(key)
+            if template is None:
+                template = ConvoTemplate(
+                    paths=tuple(p for part in parts for p in part.paths),
+                    segments=tuple(s for part in parts for s in part.segments),
+                    text="".join(part.text for part in parts),
+                    digest=hashlib.sha256("\0".join(key).encode("ascii")).hexdigest(),
+                )
+                self._composed[key] = template
+        return template
+
+    def conversation(self, *paths: PathLike, **kwargs: Any) -> Conversation:
+        """New Conversation starting with the given files; kwargs go to the constructor."""
+        return self.compose(*paths).conversation(**kwargs)
+
+    def _drop_compositions(self, digest: str) -> None:
+        for key in [k for k in self._composed if digest in k]:
+            del self._composed[key]
+
+    def invalidate(self, path: Optional[PathLike] = None) -> None:
+        """Forget one file (or everything) so it is re-read on next use."""
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+                self._composed.clear()
+            else:
+                entry = self._entries.pop(os.path.abspath(path), None)
+                if entry is not None:
+                    self._drop_compositions(entry.template.digest)
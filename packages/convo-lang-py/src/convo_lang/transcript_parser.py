@@ -0,0 +1,249 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+import json
+import re
+from typing import Any, Dict, List, Optional, Union
+
+from . import json_backend
+from .errors import ParseError
+
+_ASSISTANT_HEADER = re.compile(r"^>\s*assistant\s*$", re.MULTILINE)
+_ROLE_HEADER = re.compile(r"^>\s*\w+")
+_ESCAPED_HEADER = re.compile(r"^([ \t]*\\*)\\>", re.MULTILINE)
+_ESCAPED_VAR = re.compile(r"(\\*)\\\{\{")
+_ERROR_TRANSCRIPT_LIMIT = 10_000
+
+
+@dataclass(frozen=True)
+class OutputProfile:
+    """
+    Which JSON sections the CLI prints after a completion (and the parser decodes).
+    Sections that are not requested are neither printed nor decoded; the matching
+    ParsedTranscript attribute is left empty. Without flat messages the reply is read
+    from the last `> assistant` block of the transcript instead.
+    """
+    name: str
+    state: bool = False
+    syntax_messages: bool = False
+    messages: bool = False
+
+    @property
+    def args(self) -> List[str]:
+        """CLI flags that request this profile's sections."""
+        args = []
+        if self.state:
+            args.append("--print-state")
+        if self.syntax_messages:
+            args.append("--print-messages")
+        if self.messages:
+            args.append("--print-flat")
+        return args
+
+
+OUTPUT_PROFILES: Dict[str, OutputProfile] = {
+    # state, syntax_messages and messages; what complete() always returned before
+    "full": OutputProfile("full", state=True, syntax_messages=True, messages=True),
+    # flat messages only
+    "messages": OutputProfile("messages", messages=True),
+    # only the transcript; the CLI also skips flattening the conversation
+    "text": OutputProfile("text"),
+}
+FULL_OUTPUT = OUTPUT_PROFILES["full"]
+
+OutputSpec = Union[str, OutputProfile]
+
+
+def output_profile(spec: Optional[OutputSpec]) -> OutputProfile:
+    """Resolve a profile name ("full", "messages", "text") or OutputProfile; None means full."""
+    if spec is None:
+        return FULL_OUTPUT
+    if isinstance(spec, OutputProfile):
+        return spec
+    try:
+        return OUTPUT_PROFILES[spec]
+    except KeyError:
+        raise ValueError(
+            f"Unknown output profile {spec!r}; expected one of {', '.join(OUTPUT_PROFILES)}"
+        ) from None
+
+
+def count_assistant_blocks(convo_text: str) -> int:
+    """Number of `> assistant` role headers in .convo source."""
+    return len(_ASSISTANT_HEADER.findall(convo_text))
+
+
+@dataclass
+class ParsedTranscript:
+    """Structured result of a --prefixOutput CLI transcript."""
+    state: Dict[str, Any] = field(default_factory=dict)
+    syntax_messages: List[Dict[str, Any]] = field(default_factory=list)
+    messages: List[Dict[str, Any]] = field(default_factory=list)
+    convo_text: str = ""
+    # Last assistant text read from the transcript; only set when messages weren't decoded
+    reply: Optional[str] = None
+
+
+def _unescape(content: str) -> str:
+    """Undo the CLI's escaping of `>` at line starts and of `{{` in message content."""
+    if ">" in content:
+        content = _ESCAPED_HEADER.sub(r"\1>", content)
+    if "{{" in content:
+        content = _ESCAPED_VAR.sub(r"\1{{", content)
+    return content
+
+
+def last_assistant_text(lines: List[str]) -> Optional[str]:
+    """
+    Content of the last `> assistant` block in transcript lines, or None if there is none.
+    Tags and blank lines at the end of the block belong to the next block and are dropped.
+    """
+    start = None
+    for i in range(len(lines) - 1, -1, -1):
+        if _ASSISTANT_HEADER.match(lines[i]):
+            start = i + 1
+            break
+    if start is None:
+        return None
+    end = start
+    while end < len(lines) and not _ROLE_HEADER.match(lines[end]):
+        end += 1
+    block = lines[start:end]
+    while block and (not block[-1].strip() or block[-1].startswith("@")):
+        block.pop()
+    return _unescape("\n".join(block))
+
+
+def _decode_sections(
+    state_parts: List[str],
+    syntax_parts: List[str],
+    flat_parts: List[str],
+    result_lines: List[str],
+    profile: OutputProfile = FULL_OUTPUT,
+) -> ParsedTranscript:
+    try:
+        state = json_backend.loads("".join(state_parts)) if state_parts and profile.state else {}
+        syntax_messages = (
+            json_backend.loads("".join(syntax_parts)) if syntax_parts and profile.syntax_messages else []
+        )
+        messages = json_backend.loads("".join(flat_parts)) if flat_parts and profile.messages else []
+    except json.JSONDecodeError as e:
+        raise ParseError(f"Failed to parse CLI output JSON: {e}") from e
+    return ParsedTranscript(
+        state=state,
+        syntax_messages=syntax_messages,
+        messages=messages,
+        convo_text="\n\n".join(result_lines).strip(),
+        reply=None if profile.messages else last_assistant_text(result_lines),
+    )
+
+
+def parse_prefixed(transcript: str, profile: OutputProfile = FULL_OUTPUT) -> ParsedTranscript:
+    """
+    Parse a complete --prefixOutput transcript in a single pass over its lines,
+    dispatching on the line prefix. Sections outside `profile` are skipped without
+    being decoded. Raises ParseError on malformed JSON sections.
+    """
+    state_parts: List[str] = []
+    syntax_parts: List[str] = []
+    flat_parts: List[str] = []
+    result_lines: List[str] = []
+    sections = {
+        head: parts
+        for head, parts, wanted in (
+            ("s", state_parts, profile.state),
+            ("m", syntax_parts, profile.syntax_messages),
+            ("f", flat_parts, profile.messages),
+        )
+        if wanted
+    }
+    for line in transcript.splitlines():
+        head = line[:1]
+        if head == ":":
+            result_lines.append(line[2:] if line[1:2] == " " else line[1:])
+        elif line[1:2] == ":":
+            parts = sections.get(head)
+            if parts is not None:
+                parts.append(line[2:])
+    try:
+        return _decode_sections(state_parts, syntax_parts, flat_parts, result_lines, profile)
+    except ParseError as e:
+        shown = transcript
+        if len(shown) > _ERROR_TRANSCRIPT_LIMIT:
+            shown = shown[:_ERROR_TRANSCRIPT_LIMIT] + f"\n... ({len(transcript)} chars total)"
+        raise ParseError(f"{e}\nTranscript:\n{shown}") from e.__cause__
+
+
+class PrefixedTranscriptParser:
+    """
+    Incremental parser for the CLI's prefixed output (`s:`, `m:`, `f:` and `:` lines).
+    Lines are fed one at a time; feed_line returns text belonging to new assistant
+    messages as soon as it is seen, so callers can stream it. Assistant blocks that
+    were already part of the input are skipped via `skip_assistant_blocks`.
+    Sections outside `profile` are ignored.
+    """
+
+    def __init__(self, *, skip_assistant_blocks: int = 0, profile: OutputProfile = FULL_OUTPUT):
+        self._profile = profile
+        self._state_parts: List[str] = []
+        self._syntax_parts: List[str] = []
+        self._flat_parts: List[str] = []
+        self._result_lines: List[str] = []
+        self._skip = skip_assistant_blocks
+        self._assistant_seen = 0
+        self._in_new_assistant = False
+        self._block_started = False
+        self._emitted = False
+        self._pending: List[str] = []
+
+    def feed_line(self, line: str) -> Optional[str]:
+        """Consume one transcript line (without newline); return streamed assistant text, if any."""
+        if line.startswith("s:"):
+            if self._profile.state:
+                self._state_parts.append(line[2:])
+        elif line.startswith("m:"):
+            if self._profile.syntax_messages:
+                self._syntax_parts.append(line[2:])
+        elif line.startswith("f:"):
+            if self._profile.messages:
+                self._flat_parts.append(line[2:])
+        elif line.startswith(":"):
+            text = line[2:] if line.startswith(": ") else line[1:]
+            self._result_lines.append(text)
+            return self._assistant_text(text)
+        return None
+
+    def _assistant_text(self, text: str) -> Optional[str]:
+        if text.startswith(">"):
+            self._pending.clear()
+            self._block_started = False
+            if _ASSISTANT_HEADER.match(text):
+                self._assistant_seen += 1
+                self._in_new_assistant = self._assistant_seen > self._skip
+            else:
+                self._in_new_assistant = False
+            return None
+        if not self._in_new_assistant:
+            return None
+        if not text.strip() or text.startswith("@"):
+            # Blank lines and tags may belong to the next block; hold until content follows
+            if self._block_started:
+                self._pending.append(text)
+            return None
+        if self._block_started:
+            chunk = "\n" + "\n".join(self._pending + [text])
+        else:
+            chunk = ("\n\n" if self._emitted else "") + text
+        self._pending.clear()
+        self._block_started = True
+        self._emitted = True
+        return chunk
+
+    def result(self) -> ParsedTranscript:
+        """Decode the collected JSON sections; raises ParseError on malformed output."""
+        return _decode_sections(
+            self._state_parts,
+            self._syntax_parts,
+            self._flat_parts,
+            self._result_lines,
+            self._profile,
+        )
@@ -0,0 +1,160 @@
+from __future__ import annotations
+from dataclasses import dataclass
+import functools
+import re
+from typing import Callable, List, Optional, Tuple
+
+from .scheduler import estimate_tokens
+
+# Role header (`> user`, `> define`, ...) plus any `@tag` lines directly above it
+_BLOCK_START = re.compile(r"^(?:@[^\n]*\n)*>[ \t]*(\w+)", re.MULTILINE)
+SUMMARY_MARKER = "Summary of the earlier conversation:"
+
+
+@functools.lru_cache(maxsize=1)
+def _tiktoken_encoding():
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+
+@functools.lru_cache(maxsize=8192)
+def count_tokens(text: str) -> int:
+    """
+    Token count of `text` with tiktoken's cl100k_base encoding when installed, else
+    the 4-characters-per-token estimate. Results are cached per block of text, so
+    re-windowing a long conversation only tokenizes new blocks.
+    """
+    encoding = _tiktoken_encoding()
+    if encoding is None:
+        return estimate_tokens(text)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+@dataclass
+class WindowPolicy:
+    """
+    Keeps a Conversation's source within `max_tokens` before each run.
+    Blocks whose role is not in `turn_roles` (define, system, function, ...) are
+    pinned. The rest are grouped into turns, each starting at a user block, and the
+    oldest turns are dropped first; the last `keep_last_turns` are always kept.
+    With `summarize`, the dropped source (including an earlier summary) is passed to
+    it and its result is kept as a system block in their place; `summary_tokens` is
+    reserved for it when choosing what to drop.
+    """
+    max_tokens: int
+    keep_last_turns: int = 1
+    turn_roles: Tuple[str, ...] = ("user", "assistant", "call", "result")
+    summarize: Optional[Callable[[str], str]] = None
+    summary_tokens: int = 256
+    tokenizer: Callable[[str], int] = count_tokens
+
+
+@dataclass
+class WindowReport:
+    """What the last windowing pass did; token counts use the policy's tokenizer."""
+    max_tokens: int = 0
+    tokens_before: int = 0
+    tokens_after: int = 0
+    dropped_turns: int = 0
+    summarized: bool = False
+
+    @property
+    def trimmed_tokens(self) -> int:
+        return self.tokens_before - self.tokens_after
+
+    @property
+    def within_budget(self) -> bool:
+        return self.tokens_after <= self.max_tokens
+
+
+@dataclass
+class _Unit:
+    blocks: List[Tuple[str, str]]
+    pinned: bool
+    summary: bool = False
+
+    @property
+    def text(self) -> str:
+        return "".join(text for _, text in self.blocks)
+
+
+def split_blocks(convo_text: str) -> List[Tuple[str, str]]:
+    """Split .convo source into (role, text) blocks; text before the first header has role ""."""
+    starts = [(m.start(), m.group(1)) for m in _BLOCK_START.finditer(convo_text)]
+    blocks: List[Tuple[str, str]] = []
+    if not starts or starts[0][0] > 0:
+        blocks.append(("", convo_text[:starts[0][0] if starts else len(convo_text)]))
+    for i, (start, role) in enumerate(starts):
+        end = starts[i + 1][0] if i + 1 < len(starts) else len(convo_text)
+        blocks.append((role, convo_text[start:end]))
+    return blocks
+
+
+def _is_summary(text: str) -> bool:
+    lines = text.split("\n", 2)
+    return len(lines) > 1 and lines[1].strip() == SUMMARY_MARKER
+
+
+def _units(blocks: List[Tuple[str, str]], policy: WindowPolicy) -> List[_Unit]:
+    units: List[_Unit] = []
+    turn: Optional[_Unit] = None
+    for role, text in blocks:
+        if role == "system" and _is_summary(text):
+            units.append(_Unit([(role, text)], pinned=False, summary=True))
+            turn = None
+        elif role not in policy.turn_roles:
+            units.append(_Unit([(role, text)], pinned=True))
+            turn = None
+        elif turn is None or role == "user":
+            turn = _Unit([(role, text)], pinned=False)
+            units.append(turn)
+        else:
+            turn.blocks.append((role, text))
+    return units
+
+
+def apply_window(convo_text: str, policy: WindowPolicy) -> Tuple[str, WindowReport]:
+    """Return `convo_text` trimmed to the policy's budget and a report of what was removed."""
+    tokens = policy.tokenizer
+    units = _units(split_blocks(convo_text), policy)
+    sizes = [sum(tokens(text) for _, text in unit.blocks) for unit in units]
+    total = sum(sizes)
+    report = WindowReport(tokens_before=total, tokens_after=total, max_tokens=policy.max_tokens)
+    if total <= policy.max_tokens:
+        return convo_text, report
+
+    turn_indexes = [i for i, unit in enumerate(units) if not unit.pinned and not unit.summary]
+    droppable = turn_indexes[:max(0, len(turn_indexes) - policy.keep_last_turns)]
+    summaries = [i for i, unit in enumerate(units) if unit.summary]
+    budget = policy.max_tokens - (policy.summary_tokens if policy.summarize else 0)
+    remaining = total
+    dropped: List[int] = []
+    for i in droppable:
+        if remaining <= budget:
+            break
+        dropped.append(i)
+        remaining -= sizes[i]
+    if not dropped:
+        return convo_text, report
+
+    removed = set(dropped)
+    summary_block: Optional[str] = None
+    if policy.summarize:
+        removed.update(summaries)
+        source = "".join(units[i].text for i in sorted(removed))
+        summary_block = f"> system\n{SUMMARY_MARKER}\n{policy.summarize(source).strip()}\n\n"
+    first = min(removed)
+    parts: List[str] = []
+    for i, unit in enumerate(units):
+        if i == first and summary_block:
+            parts.append(summary_block)
+        if i not in removed:
+            parts.append(unit.text)
+    windowed = "".join(parts)
+    report.tokens_after = sum(tokens(text) for _, text in split_blocks(windowed))
+    report.dropped_turns = len(dropped)
+    report.summarized = summary_block is not None
+    return windowed, report
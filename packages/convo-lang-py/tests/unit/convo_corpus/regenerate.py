@@ -0,0 +1,51 @@
+"""
+Rewrite the expected `<name>.json` of every `.convo` file in this directory.
+
+By default the expected output comes from the Convo-Lang CLI (`convo <file> --parse`),
+which is the reference the Python parser is tested against. `--python` writes the
+Python parser's output instead; review the diff by hand before committing it.
+The committed files were written with `--python`, so test_convo_parser.py treats them
+as snapshots and checks conformance against a live `convo --parse` when the CLI is installed.
+
+    python tests/unit/convo_corpus/regenerate.py [--python] [names...]
+"""
+import json
+import os
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.abspath(os.path.join(HERE, "..", "..", "..", "src")))
+from convo_lang.convo_cli_path import discover_convo_bin
+from convo_lang.convo_parser import parse_convo
+
+
+def cli_parse(path: str) -> list:
+    out = subprocess.run(
+        [discover_convo_bin(), path, "--parse"],
+        check=True, capture_output=True, text=True, encoding="utf-8",
+    )
+    return json.loads(out.stdout)
+
+
+def python_parse(path: str) -> list:
+    with open(path, encoding="utf-8") as f:
+        return parse_convo(f.read())
+
+
+def main(argv: list) -> None:
+    parse = python_parse if "--python" in argv else cli_parse
+    names = [a for a in argv if not a.startswith("--")]
+    for file in sorted(os.listdir(HERE)):
+        name, ext = os.path.splitext(file)
+        if ext != ".convo" or (names and name not in names):
+            continue
+        messages = parse(os.path.join(HERE, file))
+        with open(os.path.join(HERE, name + ".json"), "w", encoding="utf-8") as f:
+            json.dump(messages, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+        print(f"{file}: {len(messages)} messages")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,186 @@
+import asyncio
+import os
+import sys
+import textwrap
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "..", "src")
+))
+from convo_lang import Conversation
+from convo_lang.async_convo_cli_runner import AsyncConvoCLIRunner
+from convo_lang.errors import ConvoNotFound, ConvoRuntimeError, ExecFailed, Timeout
+from convo_lang.mock_runner import MockConvoRunner
+
+FAKE_CLI = textwrap.dedent('''
+    import os, subprocess, sys, time
+    src = open(sys.argv[1], encoding="utf-8").read()
+    if "sleep" in src:
+        child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+        open(os.environ["CHILD_PID_FILE"], "w").write(str(child.pid))
+        time.sleep(30)
+    if "fail" in src:
+        sys.stderr.write("Runtime error: boom")
+        sys.exit(2)
+    sys.stdout.write('f:[{"role":"assistant","content":"async hi"}]\\n')
+    sys.stdout.write(": > assistant\\n: async hi\\n")
+    sys.stdout.write("args:" + " ".join(sys.argv[2:]) + "\\n")
+''')
+
+
+@pytest.fixture
+def fake_cli(tmp_path):
+    script = tmp_path / "fake_convo"
+    script.write_text(f"#!{sys.executable}\n" + FAKE_CLI)
+    script.chmod(0o755)
+    return str(script)
+
+
+def test_run_text_returns_stdout(fake_cli):
+    runner = AsyncConvoCLIRunner(convo_bin=fake_cli)
+    out = asyncio.run(runner.run_text("> user\nhi", variables={"x": 1}))
+    assert "async hi" in out
+    assert "--prefixOutput" in out
+    assert "--vars {x:1}" in out
+
+
+def test_nonzero_exit_maps_errors_like_sync_runner(fake_cli):
+    runner = AsyncConvoCLIRunner(convo_bin=fake_cli)
+    with pytest.raises(ConvoRuntimeError):
+        asyncio.run(runner.run_text("> user\nfail"))
+
+
+def test_run_many_awaits_every_item(fake_cli):
+    runner = AsyncConvoCLIRunner(convo_bin=fake_cli)
+    seen = []
+    batch = asyncio.run(runner.run_many(
+        [{"n": n} for n in range(4)] + [None],
+        convo_text="> user\nhi",
+        max_concurrency=2,
+        on_result=seen.append,
+    ))
+    assert batch.errors == [] and len(seen) == 5
+    assert all("async hi" in value for value in batch.values)
+    assert "--vars {n:3}" in batch.values[3]
+    failed = asyncio.run(runner.run_many([{}, {}], convo_text="> user\nfail"))
+    assert [type(r.error) for r in failed.results] == [ConvoRuntimeError, ConvoRuntimeError]
+
+
+@pytest.mark.skipif(os.name != "posix", reason="process groups are POSIX only")
+def test_timeout_kills_process_group(fake_cli, tmp_path, monkeypatch):
+    pid_file = tmp_path / "child.pid"
+    monkeypatch.setenv("CHILD_PID_FILE", str(pid_file))
+    runner = AsyncConvoCLIRunner(convo_bin=fake_cli)
+    start = time.monotonic()
+    with pytest.raises(Timeout):
+        asyncio.run(runner.run_text("> user\nsleep", timeout=1.0))
+    assert time.monotonic() - start < 10
+    child_pid = int(pid_file.read_text())
+    for _ in range(50):
+        try:
+            os.kill(child_pid, 0)
+        except ProcessLookupError:
+            break
+        time.sleep(0.05)
+    else:
+        pytest.fail("child process survived timeout")
+
+
+def test_missing_binary_raises_convonotfound(tmp_path):
+    runner = AsyncConvoCLIRunner(convo_bin=str(tmp_path / "missing_convo"))
+    with pytest.raises(ConvoNotFound):
+        asyncio.run(runner.run_text("> user\nhi"))
+
+
+def test_empty_text_raises():
+    runner = AsyncConvoCLIRunner(convo_bin="convo")
+    with pytest.raises(ExecFailed):
+        asyncio.run(runner.run_text("   "))
+
+
+def test_acomplete_with_async_runner(fake_cli):
+    c = Conversation(async_convo_cli_runner=AsyncConvoCLIRunner(convo_bin=fake_cli))
+    c.add_user_message("hi")
+    assert asyncio.run(c.acomplete()) == "async hi"
+    assert c.messages[-1]["role"] == "assistant"
+
+
+def test_acomplete_runs_sync_runner_off_loop():
+    c = Conversation(convo_cli_runner=MockConvoRunner())
+    c.add_user_message("hi")
+    assert asyncio.run(c.acomplete()) == "Hi there!"
+
+
+def test_run_text_use_stdin(tmp_path):
+    script = tmp_path / "stdin_convo"
+    script.write_text(f"#!{sys.executable}\n"
+                      "import sys\n"
+                      "sys.stdout.write(' '.join(sys.argv[1:]) + '|' + sys.stdin.read())\n")
+    script.chmod(0o755)
+    runner = AsyncConvoCLIRunner(convo_bin=str(script), use_stdin=True)
+    out = asyncio.run(runner.run_text("> user\nfrom stdin"))
+    assert out == "--stdin --prefixOutput|> user\nfrom stdin"
+
+
+def test_stream_text_and_astream(tmp_path):
+    script = tmp_path / "stream_convo"
+    script.write_text(f"#!{sys.executable}\n" + textwrap.dedent('''
+        import sys
+        print(": > user", flush=True)
+        print(": hi", flush=True)
+        print(": > assistant", flush=True)
+        print(": streamed", flush=True)
+        print('f:[{"role":"assistant","content":"streamed"}]', flush=True)
+    '''))
+    script.chmod(0o755)
+    runner = AsyncConvoCLIRunner(convo_bin=str(script))
+
+    async def collect_lines():
+        return [l async for l in runner.stream_text("> user\nhi")]
+
+    assert asyncio.run(collect_lines())[-1].startswith("f:")
+
+    c = Conversation(async_convo_cli_runner=runner)
+    c.add_user_message("hi")
+
+    async def collect_tokens():
+        return [t async for t in c.astream()]
+
+    assert asyncio.run(collect_tokens()) == ["streamed"]
+    assert c.messages == [{"role": "assistant", "content": "streamed"}]
+
+
+def test_astream_handles_lines_over_64_kib(tmp_path):
+    reply = "word " * 30000
+    script = tmp_path / "long_convo"
+    script.write_text(f"#!{sys.executable}\n" + textwrap.dedent('''
+        import json, sys
+        reply = "word " * 30000
+        print(": > user\\n: hi\\n: > assistant", flush=True)
+        print(": " + reply, flush=True)
+        sys.stdout.write("f:" + json.dumps([{"role": "assistant", "content": reply.strip()}]))
+    '''))
+    script.chmod(0o755)
+    c = Conversation(async_convo_cli_runner=AsyncConvoCLIRunner(convo_bin=str(script)))
+    c.add_user_message("hi")
+
+    async def collect_tokens():
+        return [t async for t in c.astream()]
+
+    assert "".join(asyncio.run(collect_tokens())).strip() == reply.strip()
+    assert c.messages[-1]["content"] == reply.strip()
+
+
+def test_stream_text_timeout_kills_cli(tmp_path):
+    script = tmp_path / "slow_convo"
+    script.write_text(f"#!{sys.executable}\nimport time\ntime.sleep(10)\n")
+    script.chmod(0o755)
+    runner = AsyncConvoCLIRunner(convo_bin=str(script))
+
+    async def collect():
+        return [l async for l in runner.stream_text("> user\nhi", timeout=0.3)]
+
+    with pytest.raises(Timeout):
+        asyncio.run(collect())
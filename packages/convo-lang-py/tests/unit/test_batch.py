@@ -0,0 +1,134 @@
+import os
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "..", "src")
+))
+from convo_lang import Conversation
+from convo_lang.batch import BatchStats, percentile, run_batch
+from convo_lang.convo_cli_runner import ConvoCLIRunner
+from convo_lang.errors import ExecFailed
+from convo_lang.mock_runner import MockConvoRunner
+
+
+def test_percentile_interpolates():
+    values = [1.0, 2.0, 3.0, 4.0]
+    assert percentile(values, 0) == 1.0
+    assert percentile(values, 50) == 2.5
+    assert percentile(values, 100) == 4.0
+    assert percentile([], 50) == 0.0
+
+
+def test_run_batch_orders_results_and_collects_errors():
+    def fn(x):
+        time.sleep(0.01 * (5 - x))
+        if x == 2:
+            raise ValueError("bad item")
+        return x * 10
+
+    result = run_batch(fn, range(5), max_concurrency=5)
+    assert [r.index for r in result.results] == [0, 1, 2, 3, 4]
+    assert result.values == [0, 10, None, 30, 40]
+    assert len(result.errors) == 1
+    assert isinstance(result.errors[0].error, ValueError)
+    assert result.stats.count == 5
+    assert result.stats.failed == 1
+    assert result.stats.succeeded == 4
+    assert result.stats.throughput > 0
+    assert result.stats.latency_p50 <= result.stats.latency_p99
+
+
+def test_run_batch_completion_order_and_callback():
+    seen = []
+
+    def fn(x):
+        time.sleep(0.02 * (3 - x))
+        return x
+
+    result = run_batch(fn, range(3), max_concurrency=3, ordered=False, on_result=seen.append)
+    assert [r.value for r in result.results] == [2, 1, 0]
+    assert [r.value for r in seen] == [2, 1, 0]
+
+
+def test_run_batch_bounds_concurrency_and_consumes_lazily():
+    lock = threading.Lock()
+    active = {"now": 0, "max": 0}
+    pulled = []
+
+    def items():
+        for i in range(20):
+            pulled.append(i)
+            yield i
+
+    def fn(x):
+        with lock:
+            active["now"] += 1
+            active["max"] = max(active["max"], active["now"])
+        time.sleep(0.005)
+        with lock:
+            active["now"] -= 1
+        return x
+
+    result = run_batch(fn, items(), max_concurrency=3)
+    assert active["max"] <= 3
+    assert result.values == list(range(20))
+
+
+def test_stats_from_empty_results():
+    stats = BatchStats.from_results([], 0.0)
+    assert stats.count == 0
+    assert stats.throughput == 0.0
+
+
+def test_runner_run_many_shares_one_script(monkeypatch):
+    calls = []
+
+    def fake_run_subprocess(cmd, *, timeout, working_dir):
+        calls.append(cmd)
+        vars_arg = cmd[cmd.index("--vars") + 1]
+        if "fail" in vars_arg:
+            return SimpleNamespace(returncode=1, stdout="", stderr="runtime error")
+        return SimpleNamespace(returncode=0, stdout=vars_arg, stderr="")
+
+    runner = ConvoCLIRunner(convo_bin="convo")
+    monkeypatch.setattr(runner, "_run_subprocess", fake_run_subprocess)
+    result = runner.run_many(
+        [{"n": 1}, {"n": "fail"}, {"n": 3}],
+        convo_text="> user\n{{n}}",
+        max_concurrency=2,
+    )
+    assert result.values == ["{n:1}", None, "{n:3}"]
+    assert isinstance(result.results[1].error, ExecFailed)
+    script_paths = {cmd[1] for cmd in calls}
+    assert len(script_paths) == 1
+    assert not os.path.exists(script_paths.pop())
+
+
+def test_runner_run_many_requires_one_source():
+    runner = ConvoCLIRunner(convo_bin="convo")
+    with pytest.raises(ValueError):
+        runner.run_many([{}])
+    with pytest.raises(ValueError):
+        runner.run_many([{}], script_path="a.convo", convo_text="> user\nhi")
+
+
+def test_conversation_complete_many_leaves_conversation_unchanged():
+    class EchoRunner(MockConvoRunner):
+        def run_text(self, convo_text, *, variables=None, **kwargs):
+            if variables["name"] == "boom":
+                raise ExecFailed("boom")
+            name = variables["name"]
+            return f'f:[{{"role":"assistant","content":"hi {name}"}}]\n'
+
+    c = Conversation(convo_cli_runner=EchoRunner())
+    c.add_user_message("Say hi to {{name}}")
+    result = c.complete_many([{"name": "a"}, {"name": "boom"}, {"name": "b"}])
+    assert result.values == ["hi a", None, "hi b"]
+    assert result.stats.failed == 1
+    assert c.messages == []
+    assert c.to_convo() == "> user\nSay hi to {{name}}\n\n"
@@ -0,0 +1,143 @@
+import asyncio
+import os
+import sys
+import textwrap
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "..", "src")
+))
+from convo_lang import Conversation
+from convo_lang.callback_bridge import CallbackBridge
+from convo_lang.convo_cli_runner import ConvoCLIRunner
+from convo_lang.errors import ConvoCLIError
+
+
+def _run_bridge(callbacks, lines, **kwargs):
+    out = []
+    with CallbackBridge(callbacks, out.append, **kwargs) as bridge:
+        for line in lines:
+            bridge.dispatch(line)
+    return out, bridge.calls
+
+
+def test_calls_run_concurrently_and_reply_in_call_order():
+    def slow(x):
+        time.sleep(0.3)
+        return {"slow": x}
+
+    def fast(x):
+        return x * 2
+
+    start = time.monotonic()
+    out, calls = _run_bridge(
+        {"slow": slow, "fast": fast},
+        ['CALL:{"fn":"slow","args":[1]}', 'CALL:{"fn":"slow","args":[2]}', 'CALL:{"fn":"fast","args":[3]}'],
+    )
+    assert time.monotonic() - start < 0.55
+    assert out == ['RESULT:{"slow": 1}\n', 'RESULT:{"slow": 2}\n', "RESULT:6\n"]
+    assert [c.index for c in calls] == [0, 1, 2]
+    assert calls[0].latency >= 0.3 and calls[2].ok
+
+
+def test_coroutine_callbacks_run_on_the_bridge_loop():
+    async def fetch(name):
+        await asyncio.sleep(0.2)
+        return f"hi {name}"
+
+    start = time.monotonic()
+    out, calls = _run_bridge(
+        {"fetch": fetch},
+        ['CALL:{"fn":"fetch","args":["a"]}', 'CALL:{"fn":"fetch","args":["b"]}'],
+    )
+    assert time.monotonic() - start < 0.35
+    assert out == ['RESULT:"hi a"\n', 'RESULT:"hi b"\n']
+
+
+def test_awaitables_from_concurrent_sync_callbacks_share_one_loop():
+    loops = set()
+
+    async def record():
+        loops.add(asyncio.get_running_loop())
+        return "ok"
+
+    def wrapped(_):
+        return record()
+
+    lines = [f'CALL:{{"fn":"wrapped","args":[{i}]}}' for i in range(16)]
+    out, _ = _run_bridge({"wrapped": wrapped}, lines, max_workers=16)
+    assert out == ['RESULT:"ok"\n'] * 16
+    assert len(loops) == 1
+
+
+def test_errors_unknown_functions_and_timeouts_are_reported():
+    def boom():
+        raise RuntimeError("bad\nthing")
+
+    def hang():
+        time.sleep(1)
+
+    seen = []
+    out, calls = _run_bridge(
+        {"boom": boom, "hang": hang},
+        ['CALL:{"fn":"boom","args":[]}', 'CALL:{"fn":"missing"}', 'CALL:{"fn":"hang","args":[]}', "CALL:not json"],
+        timeout=0.2,
+        on_call=seen.append,
+    )
+    assert out[0] == "ERROR:RuntimeError: bad thing\n"
+    assert out[1].startswith("ERROR:LookupError: Unknown function 'missing'")
+    assert "timed out" in out[2] and calls[2].timed_out
+    assert out[3].startswith("ERROR:")
+    assert seen == calls
+
+
+def _write_cmd_mode_cli(tmp_path):
+    script = tmp_path / "fake_convo"
+    script.write_text(f"#!{sys.executable}\n" + textwrap.dedent('''
+        import json, sys
+        assert "--cmd-mode" in sys.argv and "--stdin" not in sys.argv
+        print('CALL:' + json.dumps({"fn": "setPinHigh", "args": [True]}), flush=True)
+        print('CALL:' + json.dumps({"fn": "lookup", "args": ["x"]}), flush=True)
+        replies = [sys.stdin.readline().strip() for _ in range(2)]
+        print(": > assistant")
+        print(": " + " | ".join(replies))
+        print("FLAT:")
+        print('f:[{"role":"assistant","content":' + json.dumps(" | ".join(replies)) + '}]')
+        print("END:")
+    '''))
+    script.chmod(0o755)
+    return str(script)
+
+
+def test_conversation_complete_invokes_callbacks_through_cmd_mode(tmp_path):
+    pins = []
+
+    def set_pin_high(state):
+        pins.append(state)
+        return "ok"
+
+    async def lookup(key):
+        return {"key": key}
+
+    convo = Conversation(
+        callbacks={"setPinHigh": set_pin_high, "lookup": lookup},
+        convo_cli_runner=ConvoCLIRunner(convo_bin=_write_cmd_mode_cli(tmp_path), use_stdin=True),
+    )
+    convo.add_user_message("turn on the lights")
+    answer = convo.complete()
+    assert answer == 'RESULT:"ok" | RESULT:{"key": "x"}'
+    assert pins == [True]
+    assert [c.fn for c in convo.callback_calls] == ["setPinHigh", "lookup"]
+    assert all(c.latency is not None for c in convo.callback_calls)
+    assert "END:" not in convo.to_convo()
+
+
+def test_run_with_callbacks_maps_cli_failure(tmp_path):
+    script = tmp_path / "fake_convo"
+    script.write_text(f"#!{sys.executable}\nimport sys\nsys.stderr.write('boom')\nsys.exit(3)\n")
+    script.chmod(0o755)
+    runner = ConvoCLIRunner(convo_bin=str(script))
+    with pytest.raises(ConvoCLIError):
+        runner.run_with_callbacks("> user\nhi", callbacks={"f": lambda: 1})
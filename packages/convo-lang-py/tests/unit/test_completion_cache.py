@@ -0,0 +1,151 @@
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "..", "src")
+))
+from convo_lang import Conversation
+from convo_lang.completion_cache import (
+    MemoryCompletionCache,
+    SQLiteCompletionCache,
+    completion_cache_key,
+)
+from convo_lang.mock_runner import MockConvoRunner
+
+TRANSCRIPT = (
+    ': > user\n: hi\n: > assistant\n: cached\n'
+    'f:[{"role":"user","content":"hi"},{"role":"assistant","content":"cached"}]\n'
+)
+
+
+class CountingRunner(MockConvoRunner):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.calls = 0
+
+    def run_text(self, convo_text, **kwargs):
+        self.calls += 1
+        return super().run_text(convo_text, **kwargs)
+
+    def stream_text(self, convo_text, **kwargs):
+        self.calls += 1
+        yield from super().stream_text(convo_text, **kwargs)
+
+
+def test_key_is_stable_and_sensitive_to_inputs():
+    base = completion_cache_key("> user\nhi", {"a": 1, "b": [1, 2]}, {"m": "x", "n": 1})
+    assert base == completion_cache_key("> user\nhi", {"a": 1, "b": [1, 2]}, {"n": 1, "m": "x"})
+    assert base != completion_cache_key("> user\nhi!", {"a": 1, "b": [1, 2]}, {"m": "x", "n": 1})
+    assert base != completion_cache_key("> user\nhi", {"a": 2, "b": [1, 2]}, {"m": "x", "n": 1})
+    assert base != completion_cache_key("> user\nhi", {"a": 1, "b": [1, 2]}, {"m": "y", "n": 1})
+    assert completion_cache_key("ab", None) != completion_cache_key("a", None, None, ["b"])
+
+
+def test_memory_cache_lru_eviction_and_stats():
+    cache = MemoryCompletionCache(max_entries=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    assert cache.get("a") == "1"
+    cache.set("c", "3")
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert cache.get("c") == "3"
+    assert cache.stats.evictions == 1
+    assert cache.stats.hits == 3
+    assert cache.stats.misses == 1
+    assert cache.stats.hit_rate == 0.75
+
+
+def test_memory_cache_byte_bound_and_ttl(monkeypatch):
+    cache = MemoryCompletionCache(max_bytes=10, ttl=60)
+    cache.set("a", "x" * 6)
+    cache.set("b", "y" * 6)
+    assert len(cache) == 1
+    assert cache.get("b") == "y" * 6
+    now = time.time()
+    monkeypatch.setattr("convo_lang.completion_cache.time.time", lambda: now + 120)
+    assert cache.get("b") is None
+    assert cache.stats.expirations == 1
+
+
+def test_sqlite_cache_persists_and_evicts(tmp_path, monkeypatch):
+    path = tmp_path / "cache" / "completions.db"
+    cache = SQLiteCompletionCache(str(path), max_entries=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    now = time.time()
+    monkeypatch.setattr("convo_lang.completion_cache.time.time", lambda: now + 1)
+    assert cache.get("a") == "1"
+    cache.set("c", "3")
+    assert len(cache) == 2
+    assert cache.stats.evictions == 1
+    cache.close()
+
+    reopened = SQLiteCompletionCache(str(path), max_entries=2)
+    assert reopened.get("b") is None
+    assert reopened.get("a") == "1"
+    assert reopened.get("c") == "3"
+    reopened.close()
+
+
+def test_sqlite_cache_ttl_and_size_bound(tmp_path, monkeypatch):
+    cache = SQLiteCompletionCache(str(tmp_path / "c.db"), max_entries=None, max_bytes=10, ttl=5)
+    cache.set("a", "x" * 6)
+    cache.set("b", "y" * 6)
+    assert len(cache) == 1
+    now = time.time()
+    monkeypatch.setattr("convo_lang.completion_cache.time.time", lambda: now + 10)
+    assert cache.get("b") is None
+    assert cache.stats.expirations == 1
+    cache.close()
+
+
+@pytest.mark.parametrize("method", ["complete", "stream"])
+def test_conversation_consults_cache_before_runner(method):
+    runner = CountingRunner(response=TRANSCRIPT)
+    cache = MemoryCompletionCache()
+
+    def run(variables):
+        c = Conversation(convo_cli_runner=runner, completion_cache=cache)
+        c.add_user_message("hi")
+        if method == "complete":
+            return c.complete(variables=variables), c
+        return "".join(c.stream(variables=variables)), c
+
+    first, _ = run({"x": 1})
+    second, c2 = run({"x": 1})
+    third, _ = run({"x": 2})
+    assert first == second == third == "cached"
+    assert c2.messages[-1]["content"] == "cached"
+    assert runner.calls == 2
+    assert cache.stats.hits == 1
+    assert cache.stats.misses == 2
+
+
+def test_acomplete_and_complete_many_use_cache():
+    import asyncio
+
+    runner = CountingRunner(response=TRANSCRIPT)
+    cache = MemoryCompletionCache()
+    c = Conversation(convo_cli_runner=runner, completion_cache=cache)
+    c.add_user_message("hi")
+    result = c.complete_many([{"x": 1}, {"x": 1}], max_concurrency=1)
+    assert result.values == ["cached", "cached"]
+    assert runner.calls == 1
+    assert asyncio.run(c.acomplete(variables={"x": 1})) == "cached"
+    assert runner.calls == 1
+
+
+def test_unparseable_transcripts_are_not_cached():
+    from convo_lang.errors import ParseError
+
+    runner = CountingRunner(response='s:{"bad": }\n')
+    cache = MemoryCompletionCache()
+    c = Conversation(convo_cli_runner=runner, completion_cache=cache)
+    c.add_user_message("hi")
+    with pytest.raises(ParseError):
+        c.complete()
+    assert len(cache) == 0
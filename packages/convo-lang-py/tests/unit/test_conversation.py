@@ -61,3 +61,175 @@ def test_complete_raises_on_invalid_json_with_mock_runner():
     with pytest.raises(ParseError):
         c.complete()
 
+
+STREAM_TRANSCRIPT = (
+    ': > user\n'
+    ': hi\n'
+    ': > assistant\n'
+    ': hello\n'
+    ': world\n'
+    'f:[{"role":"user","content":"hi"},{"role":"assistant","content":"hello\\nworld"}]\n'
+    's:{"n":1}\n'
+)
+
+def test_stream_yields_tokens_and_populates_state_at_end():
+    c = Conversation()
+    c.add_user_message("hi")
+    c.convo_cli_runner = MockConvoRunner(response=STREAM_TRANSCRIPT)
+    seen = []
+    tokens = []
+    for token in c.stream(on_token=seen.append):
+        tokens.append(token)
+        assert c.messages == []
+    assert tokens == ["hello", "\nworld"]
+    assert seen == tokens
+    assert c.state == {"n": 1}
+    assert c.messages[-1]["content"] == "hello\nworld"
+
+def test_complete_with_on_token_streams():
+    c = Conversation()
+    c.add_user_message("hi")
+    c.convo_cli_runner = MockConvoRunner(response=STREAM_TRANSCRIPT)
+    seen = []
+    assert c.complete(on_token=seen.append) == "hello\nworld"
+    assert "".join(seen) == "hello\nworld"
+
+def test_stream_falls_back_to_run_text_for_runners_without_stream_text():
+    class PlainRunner:
+        def run_text(self, convo_text, **kwargs):
+            return STREAM_TRANSCRIPT
+
+    c = Conversation(convo_cli_runner=PlainRunner())
+    c.add_user_message("hi")
+    assert list(c.stream()) == ["hello", "\nworld"]
+    assert c.state == {"n": 1}
+
+def test_astream_with_sync_runner():
+    import asyncio
+
+    c = Conversation()
+    c.add_user_message("hi")
+    c.convo_cli_runner = MockConvoRunner(response=STREAM_TRANSCRIPT)
+
+    async def collect():
+        return [t async for t in c.astream()]
+
+    assert asyncio.run(collect()) == ["hello", "\nworld"]
+    assert c.state == {"n": 1}
+
+
+def test_segments_render_lazily_and_track_size():
+    conv = Conversation(convo_text="> define\nx=1\n\n")
+    conv.add_message("user", "hi  ")
+    conv.add_convo_text("*convo*\n> assistant\nhello\n")
+    assert [s.kind for s in conv.segments] == ["source", "message", "text"]
+    expected = "> define\nx=1\n\n> user\nhi\n\n> assistant\nhello\n\n"
+    assert conv.to_convo() == expected
+    assert conv.to_convo() is conv.to_convo()
+    assert conv.source_size == len(expected)
+    assert conv.message_count == 3
+
+
+def test_convo_text_assignment_replaces_segments(tmp_path):
+    p = tmp_path / "a.convo"
+    p.write_text("> user\nfrom file\n", encoding="utf-8")
+    conv = Conversation()
+    conv.add_convo_file(str(p))
+    assert conv.segments[0].path == str(p)
+    conv.convo_text = "> user\nreplaced\n"
+    assert conv.to_convo() == "> user\nreplaced\n"
+    assert len(conv.segments) == 1
+    conv.clear()
+    assert conv.convo_text == "" and conv.segments == () and conv.source_size == 0
+
+
+def test_equality_and_repr_use_the_rendered_source():
+    import dataclasses
+    rendered = Conversation(convo_text="> user\nhi\n")
+    rendered.to_convo()
+    assert rendered == Conversation(convo_text="> user\nhi\n")
+    assert rendered != Conversation(convo_text="> user\nbye\n")
+    assert "convo_text='> user\\nhi\\n'" in repr(rendered)
+    assert "_segments" not in repr(rendered)
+    assert "convo_text" in [f.name for f in dataclasses.fields(Conversation)]
+
+
+def test_fork_shares_prefix_and_keeps_branches_independent():
+    from convo_lang import Conversation
+    base = Conversation()
+    base.add_system_message("be brief")
+    base.add_user_message("hi")
+    base.state["n"] = 1
+    a = base.fork()
+    b = base.fork()
+    assert a._prefix is b._prefix and a._prefix_text is b._prefix_text
+    a.add_user_message("option a")
+    b.add_user_message("option b")
+    a.state["n"] = 2
+    assert base.to_convo() == "> system\nbe brief\n\n> user\nhi\n\n"
+    assert a.to_convo().endswith("> user\noption a\n\n")
+    assert b.to_convo().endswith("> user\noption b\n\n")
+    assert a.message_count == 3 and base.message_count == 2
+    assert a.source_size == len(a.to_convo())
+    assert base.state == {"n": 1}
+
+
+def test_complete_all_runs_forks_concurrently():
+    from convo_lang import complete_all
+
+    class EchoRunner:
+        config = {}
+
+        def run_text(self, convo_text, **kwargs):
+            last = convo_text.rstrip().splitlines()[-1]
+            return (
+                's:{}\nm:[]\n'
+                f'f:[{{"role":"assistant","content":"{last}"}}]\n'
+                f': {convo_text.rstrip()}\n'
+            )
+
+    base = Conversation(convo_cli_runner=EchoRunner())
+    base.add_user_message("root")
+    forks = []
+    for i in range(5):
+        f = base.fork()
+        f.add_user_message(f"v{i}")
+        forks.append(f)
+    result = complete_all(forks, max_concurrency=3)
+    assert result.values == [f"v{i}" for i in range(5)]
+    assert forks[2].messages[-1]["content"] == "v2"
+    assert base.messages == []
+
+
+def test_output_profiles_limit_cli_flags_and_parsed_attributes():
+    transcript = (
+        's:{"foo":1}\n'
+        'm:[]\n'
+        'f:[{"role":"assistant","content":"hello"}]\n'
+        ':> user\n'
+        ':hi\n'
+        ':\n'
+        ':> assistant\n'
+        ':hello\n'
+    )
+    calls = []
+
+    class RecordingRunner(MockConvoRunner):
+        def run_text(self, convo_text, **kwargs):
+            calls.append(kwargs["extra_args"])
+            return super().run_text(convo_text, **kwargs)
+
+    c = Conversation(convo_cli_runner=RecordingRunner(response=transcript), output="text")
+    c.add_user_message("hi")
+    assert c.complete() == "hello"
+    assert calls[-1] == []
+    assert c.messages == [] and c.state == {} and c.syntax_messages == []
+    assert "> assistant" in c.convo_text
+
+    assert c.complete(output="messages") == "hello"
+    assert calls[-1] == ["--print-flat"]
+    assert c.messages == [{"role": "assistant", "content": "hello"}] and c.state == {}
+
+    assert c.complete(output="full") == "hello"
+    assert c.state == {"foo": 1}
+    assert c.fork().output == "text"
@@ -0,0 +1,173 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "..", "src")
+))
+from convo_lang import Conversation, ConversationStore
+from convo_lang.mock_runner import MockConvoRunner
+
+
+def _store(tmp_path, **kwargs):
+    runner = MockConvoRunner(reply_bytes=40)
+    kwargs.setdefault("conversation_kwargs", {"convo_cli_runner": runner})
+    return ConversationStore(str(tmp_path / "sessions.sqlite"), **kwargs)
+
+
+def test_sessions_are_created_and_kept_in_memory(tmp_path):
+    store = _store(tmp_path)
+    with store.session("a") as convo:
+        convo.add_user_message("hello")
+    with store.session("a") as convo:
+        assert "hello" in convo.convo_text
+    assert store.resident() == ["a"] and store.spilled() == []
+    assert store.memory_bytes == len(convo.dump())
+    assert (store.stats.creates, store.stats.hits) == (1, 1)
+    with pytest.raises(KeyError):
+        with store.session("missing", create=False):
+            pass
+    assert "missing" not in store and len(store) == 1
+
+
+def test_least_recently_used_sessions_spill_and_reload(tmp_path):
+    store = _store(tmp_path, max_bytes=1500)
+    for sid in ("a", "b", "c"):
+        with store.session(sid) as convo:
+            convo.add_user_message(sid * 500)
+    assert store.resident() == ["b", "c"]
+    assert store.spilled() == ["a"]
+    assert store.memory_bytes <= 1500
+    assert store.stats.spills == 1 and 0 < store.stats.spilled_bytes < 500
+
+    with store.session("a") as convo:
+        assert convo.messages == [] and "a" * 500 in convo.convo_text
+        assert convo.convo_cli_runner is store.conversation_kwargs["convo_cli_runner"]
+    assert store.stats.loads == 1
+    assert store.resident() == ["c", "a"] and store.spilled() == ["b"]
+    assert sorted(["a", "b", "c"]) == sorted(store.resident() + store.spilled())
+    assert len(store) == 3
+
+
+def test_complete_round_trips_state_through_disk(tmp_path):
+    store = _store(tmp_path, max_bytes=0)
+    with store.session("s") as convo:
+        convo.add_user_message("hi")
+    reply = store.complete("s")
+    assert store.spilled() == ["s"] and store.resident() == []
+    with store.session("s") as convo:
+        assert convo.messages[-1] == {"role": "assistant", "content": reply}
+
+
+def test_same_session_calls_are_serialized(tmp_path):
+    store = _store(tmp_path)
+    active = []
+    overlaps = []
+
+    def turn(n):
+        with store.session("shared") as convo:
+            active.append(n)
+            overlaps.append(len(active))
+            time.sleep(0.01)
+            convo.add_user_message(f"turn {n}")
+            active.remove(n)
+
+    threads = [threading.Thread(target=turn, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert max(overlaps) == 1
+    with store.session("shared") as convo:
+        assert convo.convo_text.count("> user") == 8
+
+
+def test_sessions_in_use_are_not_spilled(tmp_path):
+    store = _store(tmp_path, max_bytes=0)
+    with store.session("busy") as busy:
+        busy.add_user_message("x" * 100)
+        with store.session("other") as other:
+            other.add_user_message("y")
+        assert store.resident() == ["busy"]
+    assert store.resident() == []
+
+
+def test_put_delete_and_reopen(tmp_path):
+    store = _store(tmp_path)
+    convo = Conversation()
+    convo.add_system_message("be brief")
+    store.put("p", convo)
+    store.put("q", Conversation())
+    assert store.delete("q") and not store.delete("q")
+    store.close()
+
+    reopened = _store(tmp_path)
+    assert reopened.spilled() == ["p"]
+    with reopened.session("p") as loaded:
+        assert loaded.convo_text == convo.convo_text
+    reopened.close()
+
+
+def test_temporary_file_is_removed_on_close():
+    store = ConversationStore(max_bytes=0)
+    with store.session("t") as convo:
+        convo.add_user_message("hi")
+    assert store.spilled() == ["t"]
+    store.close()
+    assert not store.path.exists()
+
+
+def test_loaded_sessions_stay_on_disk_until_spilled_again(tmp_path):
+    store = _store(tmp_path, max_bytes=0)
+    with store.session("s") as convo:
+        convo.add_user_message("keep me")
+    with store.session("s") as convo:
+        assert store.spilled() == [] and store.resident() == ["s"]
+        # A process that dies here, before "s" is spilled again, still has it on disk
+        survivor = _store(tmp_path)
+        with survivor.session("s", create=False) as copy:
+            assert "keep me" in copy.convo_text
+        survivor.close()
+        convo.add_user_message("more")
+    with store.session("s") as convo:
+        assert "more" in convo.convo_text
+    store.close()
+
+
+def test_release_only_re_measures_changed_sources(tmp_path, monkeypatch):
+    store = _store(tmp_path)
+    dumps = []
+    original = Conversation.dump
+    monkeypatch.setattr(Conversation, "dump", lambda self, **kw: dumps.append(1) or original(self, **kw))
+    with store.session("a") as convo:
+        convo.add_user_message("hi")
+    for _ in range(3):
+        with store.session("a"):
+            pass
+    assert len(dumps) == 1
+    with store.session("a") as convo:
+        convo.add_user_message("again")
+    assert len(dumps) == 2 and store.memory_bytes == len(original(convo))
+
+
+def test_flush_waits_for_sessions_in_use(tmp_path):
+    store = _store(tmp_path)
+    entered = threading.Event()
+
+    def hold():
+        with store.session("busy") as convo:
+            entered.set()
+            time.sleep(0.1)
+            convo.add_user_message("x")
+
+    thread = threading.Thread(target=hold)
+    thread.start()
+    entered.wait()
+    store.flush()
+    thread.join()
+    assert store.spilled() == ["busy"] and store.resident() == []
+    with store.session("busy") as convo:
+        assert "x" in convo.convo_text
@@ -0,0 +1,172 @@
+import os
+import sys
+import textwrap
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "..", "src")
+))
+from convo_lang import Conversation
+from convo_lang.convo_cli_pool import ConvoCLIPool, resolve_cli_module
+from convo_lang.errors import ConvoCLIError, ConvoValidationError, ExecFailed, Timeout
+
+FAKE_WORKER = textwrap.dedent('''
+    import json, os, sys, time
+    for line in sys.stdin:
+        job = json.loads(line)
+        src = job["source"]
+        if src.startswith("sleep:"):
+            time.sleep(float(src.split(":")[1]))
+        if src == "crash":
+            sys.exit(3)
+        if src == "bad":
+            out = {"id": job["id"], "ok": False, "stdout": "", "error": "Syntax error: nope"}
+        else:
+            out = {"id": job["id"], "ok": True, "stdout": json.dumps({
+                "pid": os.getpid(), "args": job["args"], "cwd": job["cwd"],
+                "sourcePath": job["sourcePath"], "source": src,
+            })}
+        sys.stdout.write(json.dumps(out) + "\\n")
+        sys.stdout.flush()
+''')
+
+
+@pytest.fixture
+def pool(tmp_path):
+    script = tmp_path / "fake_worker.py"
+    script.write_text(FAKE_WORKER)
+    p = ConvoCLIPool(worker_cmd=[sys.executable, str(script)], size=2)
+    yield p
+    p.close()
+
+
+def _run(pool, text, **kwargs):
+    import json
+    return json.loads(pool.run_text(text, **kwargs))
+
+
+def test_run_text_reuses_warm_worker(pool):
+    first = _run(pool, "> user\nhi")
+    second = _run(pool, "> user\nhi again")
+    assert first["pid"] == second["pid"]
+    assert second["source"] == "> user\nhi again"
+    assert "--prefixOutput" in first["args"]
+
+
+def test_run_file_forwards_path_vars_and_args(pool, tmp_path):
+    import json
+    script = tmp_path / "agent.convo"
+    script.write_text("> user\nhello")
+    out = json.loads(pool.run_file(
+        str(script),
+        variables={"x": 1},
+        extra_args=["--print-state"],
+        working_dir=str(tmp_path),
+    ))
+    assert out["source"] == "> user\nhello"
+    assert out["sourcePath"] == str(script.resolve())
+    assert out["cwd"] == str(tmp_path)
+    assert out["args"][out["args"].index("--vars") + 1] == "{x:1}"
+    assert "--print-state" in out["args"]
+
+
+def test_jobs_run_in_parallel_across_workers(pool):
+    results = []
+    start = time.monotonic()
+    threads = [
+        threading.Thread(target=lambda: results.append(_run(pool, "sleep:0.5")))
+        for _ in range(2)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert time.monotonic() - start < 0.95
+    assert len({r["pid"] for r in results}) == 2
+
+
+def test_timeout_replaces_worker_without_killing_pool(pool):
+    with pytest.raises(Timeout):
+        pool.run_text("sleep:5", timeout=0.2)
+    assert _run(pool, "after")["source"] == "after"
+    assert len(pool._workers) <= pool.size
+
+
+def test_crashed_worker_is_restarted(pool):
+    with pytest.raises(ConvoCLIError):
+        pool.run_text("crash")
+    assert _run(pool, "again")["source"] == "again"
+
+
+def test_failed_job_maps_errors_like_cli_runner(pool):
+    with pytest.raises(ConvoValidationError):
+        pool.run_text("bad")
+
+
+def test_empty_text_and_closed_pool_raise(pool):
+    with pytest.raises(ExecFailed):
+        pool.run_text("  ")
+    pool.close()
+    with pytest.raises(ExecFailed):
+        pool.run_text("hi")
+
+
+def test_pool_is_drop_in_for_conversation(tmp_path):
+    script = tmp_path / "fake_worker.py"
+    script.write_text(textwrap.dedent('''
+        import json, sys
+        for line in sys.stdin:
+            job = json.loads(line)
+            out = 'f:[{"role":"assistant","content":"pooled"}]\\n: > assistant\\n: pooled\\n'
+            sys.stdout.write(json.dumps({"id": job["id"], "ok": True, "stdout": out}) + "\\n")
+            sys.stdout.flush()
+    '''))
+    with ConvoCLIPool(worker_cmd=[sys.executable, str(script)], size=1) as p:
+        c = Conversation(convo_cli_runner=p)
+        c.add_user_message("hi")
+        assert c.complete() == "pooled"
+
+
+def test_run_many_runs_each_item_on_pooled_workers(pool, tmp_path):
+    import json
+    results = pool.run_many([{"i": 0}, {"i": 1}, {"i": 2}], convo_text="> user\nhi")
+    outputs = [json.loads(v) for v in results.values]
+    assert [o["args"][o["args"].index("--vars") + 1] for o in outputs] == ["{i:0}", "{i:1}", "{i:2}"]
+    assert len({o["pid"] for o in outputs}) <= pool.size
+
+    script = tmp_path / "agent.convo"
+    script.write_text("> user\nhello")
+    out = json.loads(pool.run_many([None], script_path=str(script)).values[0])
+    assert out["sourcePath"] == str(script.resolve())
+    with pytest.raises(ValueError):
+        pool.run_many([None])
+
+
+def test_stream_text_and_callbacks_use_single_shot_cli(tmp_path):
+    cli = tmp_path / "fake_convo"
+    cli.write_text(f"#!{sys.executable}\n" + textwrap.dedent('''
+        import sys
+        print(": > assistant", flush=True)
+        print(": streamed", flush=True)
+    '''))
+    cli.chmod(0o755)
+    script = tmp_path / "fake_worker.py"
+    script.write_text(FAKE_WORKER)
+    with ConvoCLIPool(convo_bin=str(cli), worker_cmd=[sys.executable, str(script)], size=1) as p:
+        assert list(p.stream_text("> user\nhi")) == [": > assistant", ": streamed"]
+        assert p._fallback.convo_bin == str(cli)
+        assert hasattr(p, "run_with_callbacks")
+    with pytest.raises(ExecFailed):
+        p.stream_text("> user\nhi")
+
+
+def test_resolve_cli_module_walks_up_from_bin(tmp_path):
+    pkg = tmp_path / "lib" / "node_modules" / "@convo-lang" / "convo-lang-cli"
+    (pkg / "bin").mkdir(parents=True)
+    (pkg / "package.json").write_text('{"name":"@convo-lang/convo-lang-cli"}')
+    bin_path = pkg / "bin" / "convo"
+    bin_path.write_text("")
+    assert resolve_cli_module(str(bin_path)) == str(pkg)
@@ -248,3 +248,199 @@ def test_run_subprocess_maps_oserror_to_execfailed(monkeypatch):
     with pytest.raises(ExecFailed):
         runner._run_subprocess(["convo", "x.convo"], timeout=1.0, working_dir=None)
 
+
+def test_run_text_use_stdin_pipes_source_without_temp_file(monkeypatch):
+    captured = {}
+
+    def fake_run_subprocess(cmd, *, timeout, working_dir, input_text=None):
+        captured["cmd"] = cmd
+        captured["input_text"] = input_text
+        return SimpleNamespace(returncode=0, stdout="ok", stderr="")
+
+    def no_temp_files(*args, **kwargs):
+        raise AssertionError("temp file should not be created")
+
+    runner = ConvoCLIRunner(convo_bin="convo", use_stdin=True)
+    monkeypatch.setattr(runner, "_run_subprocess", fake_run_subprocess)
+    monkeypatch.setattr("convo_lang.convo_cli_runner.tempfile.NamedTemporaryFile", no_temp_files)
+    out = runner.run_text("> user\nhi", variables={"x": 1})
+    assert out == "ok"
+    assert captured["cmd"][:2] == ["convo", "--stdin"]
+    assert "--vars" in captured["cmd"]
+    assert captured["input_text"] == "> user\nhi"
+
+def test_run_subprocess_passes_input_text(monkeypatch):
+    captured = {}
+
+    def fake_run(cmd, **kwargs):
+        captured.update(kwargs)
+        return SimpleNamespace(returncode=0, stdout="ok", stderr="")
+
+    monkeypatch.setattr(subprocess, "run", fake_run)
+    runner = ConvoCLIRunner(convo_bin="convo")
+    runner._run_subprocess(["convo", "--stdin"], timeout=1.0, working_dir=None, input_text="src")
+    assert captured["input"] == "src"
+
+def test_cache_config_reuses_content_hashed_file(monkeypatch, tmp_path):
+    script = tmp_path / "script.convo"
+    script.write_text("dummy")
+    seen = []
+
+    def fake_run_subprocess(cmd, *, timeout, working_dir):
+        seen.append(Path(cmd[cmd.index("--config") + 1]))
+        return SimpleNamespace(returncode=0, stdout="ok", stderr="")
+
+    cache_dir = tmp_path / "cache"
+    runner = ConvoCLIRunner(convo_bin="convo", config={"a": 1, "b": 2},
+                            cache_config=True, cache_dir=str(cache_dir))
+    monkeypatch.setattr(runner, "_run_subprocess", fake_run_subprocess)
+    runner.run_file(str(script))
+    runner.run_file(str(script))
+    assert seen[0] == seen[1]
+    assert seen[0].parent == cache_dir
+    assert seen[0].exists()
+    assert json.loads(seen[0].read_text()) == {"a": 1, "b": 2}
+    if os.name == "posix":
+        assert seen[0].stat().st_mode & 0o777 == 0o600
+
+    other = ConvoCLIRunner(convo_bin="convo", config={"b": 2, "a": 1},
+                           cache_config=True, cache_dir=str(cache_dir))
+    monkeypatch.setattr(other, "_run_subprocess", fake_run_subprocess)
+    other.run_file(str(script))
+    assert seen[2] == seen[0]
+
+    runner.config = {"a": 3}
+    runner.run_file(str(script))
+    assert seen[3] != seen[0]
+
+def _write_fake_cli(tmp_path, body):
+    import textwrap
+    script = tmp_path / "fake_convo"
+    script.write_text(f"#!{sys.executable}\n" + textwrap.dedent(body))
+    script.chmod(0o755)
+    return str(script)
+
+def test_stream_text_yields_lines_before_exit(tmp_path):
+    cli = _write_fake_cli(tmp_path, '''
+        import sys, time
+        print(": > assistant", flush=True)
+        print(": first", flush=True)
+        time.sleep(0.5)
+        print(": second", flush=True)
+    ''')
+    import time
+    runner = ConvoCLIRunner(convo_bin=cli)
+    start = time.monotonic()
+    lines = runner.stream_text("> user\nhi")
+    assert next(lines) == ": > assistant"
+    assert next(lines) == ": first"
+    assert time.monotonic() - start < 0.45
+    assert list(lines) == [": second"]
+
+def test_stream_text_raises_mapped_error_after_output(tmp_path):
+    from convo_lang.errors import ConvoValidationError
+    cli = _write_fake_cli(tmp_path, '''
+        import sys
+        print(": partial", flush=True)
+        sys.stderr.write("Syntax error at line 1")
+        sys.exit(1)
+    ''')
+    runner = ConvoCLIRunner(convo_bin=cli, use_stdin=True)
+    lines = []
+    with pytest.raises(ConvoValidationError):
+        for line in runner.stream_text("> user\nhi"):
+            lines.append(line)
+    assert lines == [": partial"]
+
+def test_stream_text_timeout(tmp_path):
+    cli = _write_fake_cli(tmp_path, '''
+        import time
+        time.sleep(10)
+    ''')
+    runner = ConvoCLIRunner(convo_bin=cli)
+    with pytest.raises(Timeout):
+        list(runner.stream_text("> user\nhi", timeout=0.3))
+
+def test_vars_transport_auto_switches_to_deduplicated_files(tmp_path):
+    runner = ConvoCLIRunner(convo_bin="convo", vars_file_threshold=4096)
+    small = runner._build_cmd(Path("a.convo"), variables={"x": 1}, extra_args=None)
+    assert small[2:4] == ["--vars", "{x:1}"]
+
+    doc = "word " * 2000
+    variables = {"name": "Ann", "job_description": doc}
+    cmd = runner._build_cmd(Path("a.convo"), variables=variables, extra_args=None)
+    assert "--vars" not in cmd
+    paths = [cmd[i + 1] for i, a in enumerate(cmd) if a == "--vars-path"]
+    assert len(paths) == 2
+    assert Path(paths[0]).read_text(encoding="utf-8") == '{name:"Ann"}'
+    assert doc.strip() in Path(paths[1]).read_text(encoding="utf-8")
+    assert all(doc not in a for a in cmd)
+
+    again = runner._build_cmd(Path("a.convo"), variables={"name": "Bob", "job_description": doc}, extra_args=None)
+    again_paths = [again[i + 1] for i, a in enumerate(again) if a == "--vars-path"]
+    assert again_paths[1] == paths[1]
+    assert again_paths[0] != paths[0]
+    assert Path(paths[0]).parent != tmp_path
+    if os.name == "posix":
+        assert Path(paths[0]).parent.stat().st_mode & 0o777 == 0o700
+
+
+def test_vars_files_are_private_and_evicted_after_runs(tmp_path, monkeypatch):
+    from convo_lang import content_store
+    files = content_store.private_files()
+    monkeypatch.setattr(files, "max_bytes", 0)
+    script = tmp_path / "script.convo"
+    script.write_text("dummy")
+    seen = []
+
+    def fake_run_subprocess(cmd, *, timeout, working_dir):
+        path = Path(cmd[cmd.index("--vars-path") + 1])
+        seen.append((path, path.exists()))
+        return SimpleNamespace(returncode=0, stdout="ok", stderr="")
+
+    runner = ConvoCLIRunner(convo_bin="convo", vars_transport="file")
+    monkeypatch.setattr(runner, "_run_subprocess", fake_run_subprocess)
+    runner.run_file(str(script), variables={"ssn": "123-45-6789"})
+    path, existed = seen[0]
+    assert existed and not path.exists()
+    assert path.parent == files.root != content_store.default_cache_dir()
+
+
+def test_content_files_evict_least_recently_used_unheld_files(tmp_path):
+    from convo_lang.content_store import ContentAddressedFiles
+    files = ContentAddressedFiles(str(tmp_path / "c"), max_bytes=10)
+    held = files.acquire("a" * 6)
+    old = files.write("b" * 4)
+    assert files.total_bytes == 10 and old.exists()
+    new = files.write("c" * 4)
+    assert held.exists() and new.exists() and not old.exists()
+    files.release(held)
+    files.write("d")
+    assert not held.exists() and new.exists() and files.total_bytes == 5
+
+
+@pytest.mark.skipif(os.name != "posix", reason="POSIX permissions")
+def test_shared_cache_dir_must_be_private(tmp_path):
+    from convo_lang.content_store import ContentAddressedFiles
+    loose = tmp_path / "loose"
+    loose.mkdir(mode=0o777)
+    loose.chmod(0o777)
+    ContentAddressedFiles(str(loose)).write("{}")
+    assert loose.stat().st_mode & 0o777 == 0o700
+
+    target = tmp_path / "target"
+    target.mkdir()
+    link = tmp_path / "link"
+    link.symlink_to(target)
+    with pytest.raises(PermissionError):
+        ContentAddressedFiles(str(link)).write("{}")
+
+def test_vars_transport_argv_and_validation(tmp_path):
+    runner = ConvoCLIRunner(convo_bin="convo", vars_transport="argv", vars_file_threshold=1)
+    cmd = runner._build_cmd(Path("a.convo"), variables={"doc": "x" * 5000}, extra_args=None)
+    assert cmd[2] == "--vars"
+    file_runner = ConvoCLIRunner(convo_bin="convo", vars_transport="file")
+    cmd = file_runner._build_cmd(None, variables={"x": 1}, extra_args=None)
+    assert cmd[2] == "--vars-path" and cmd[1] == "--stdin"
+    with pytest.raises(ValueError):
+        ConvoCLIRunner(convo_bin="convo", vars_transport="pipe")
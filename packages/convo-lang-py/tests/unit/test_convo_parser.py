@@ -0,0 +1,137 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "..", "src")
+))
+from convo_lang import Conversation, ConvoSyntaxError, UnsupportedConvoSyntax, parse_convo
+from convo_lang.convo_cli_path import discover_convo_bin
+from convo_lang.convo_parser import define_variables, validate_convo
+
+CORPUS = os.path.join(os.path.dirname(__file__), "convo_corpus")
+CORPUS_FILES = sorted(f for f in os.listdir(CORPUS) if f.endswith(".convo"))
+
+
+def _read(name):
+    with open(os.path.join(CORPUS, name), encoding="utf-8") as f:
+        return f.read()
+
+
+def _convo_bin():
+    try:
+        return discover_convo_bin()
+    except Exception:
+        return None
+
+
+CONVO_BIN = _convo_bin()
+
+
+# The stored .json files are snapshots of the Python parser (regenerate.py --python);
+# they catch regressions, while the conformance test below checks against the CLI.
+@pytest.mark.parametrize("name", CORPUS_FILES)
+def test_corpus_matches_parse_snapshot(name):
+    with open(os.path.join(CORPUS, name[:-len(".convo")] + ".json"), encoding="utf-8") as f:
+        expected = json.load(f)
+    assert parse_convo(_read(name)) == expected
+
+
+@pytest.mark.skipif(CONVO_BIN is None, reason="convo CLI not installed")
+@pytest.mark.parametrize("name", CORPUS_FILES)
+def test_corpus_matches_live_cli_parse(name):
+    out = subprocess.run(
+        [CONVO_BIN, os.path.join(CORPUS, name), "--parse"],
+        check=True, capture_output=True, text=True, encoding="utf-8", timeout=60,
+    )
+    assert parse_convo(_read(name)) == json.loads(out.stdout)
+
+
+@pytest.mark.parametrize("name", CORPUS_FILES)
+def test_corpus_messages_cover_the_source(name):
+    source = _read(name)
+    messages = parse_convo(source)
+    assert messages[-1]["e"] == len(source) + 1
+    for prev, msg in zip(messages, messages[1:]):
+        assert prev["e"] == msg["s"]
+
+
+def test_content_messages_are_trimmed_and_unescaped():
+    messages = parse_convo("> system\n  be brief  \n\n> user\n\\> quoted\nuse \\{{x}} literally\n")
+    assert [m["role"] for m in messages] == ["system", "user"]
+    assert messages[0]["content"] == "be brief"
+    assert messages[1]["content"] == "> quoted\nuse {{x}} literally"
+    assert "statement" not in messages[1]
+
+
+def test_source_without_a_role_is_a_user_message():
+    assert parse_convo("hello")[0]["content"] == "hello"
+
+
+def test_tags_and_comments_belong_to_the_next_message():
+    messages = parse_convo("> user\nhi\n\n# Answer as json\n@json Answer\n@label a\n> assistant\n{}\n")
+    assert messages[0]["content"] == "hi"
+    assert "tags" not in messages[0]
+    assert messages[1]["description"] == "Answer as json"
+    assert messages[1]["tags"] == [{"name": "json", "value": "Answer"}, {"name": "label", "value": "a"}]
+    assert messages[1]["label"] == "a"
+    assert messages[1]["s"] == messages[0]["e"] == messages[0]["s"] + len("> user\nhi\n")
+
+
+def test_embeds_become_md_statements():
+    msg = parse_convo("> user\nHi {{name}}, {{add(1 2)}}!")[0]
+    assert "content" not in msg
+    statement = msg["statement"]
+    assert statement["fn"] == "md"
+    parts = statement["params"]
+    assert [p.get("value") for p in parts[::2]] == ["\nHi ", ", ", "!\n"]
+    assert parts[1]["ref"] == "name"
+    assert parts[3]["fn"] == "add" and [p["value"] for p in parts[3]["params"]] == [1, 2]
+
+
+def test_function_messages():
+    fn = parse_convo("# Sums\n> add(a:number b:number) -> (\n    return(add(a b))\n)\n")[0]["fn"]
+    assert fn["name"] == "add" and fn["description"] == "Sums"
+    assert [(p["label"], p["ref"]) for p in fn["params"]] == [("a", "number"), ("b", "number")]
+    assert fn["body"][0]["fn"] == "return"
+
+    extern = parse_convo("> extern getWeather(city:string)")[0]["fn"]
+    assert extern["extern"] is True and "body" not in extern
+    plain = parse_convo("> lookup(query:string)")[0]["fn"]
+    assert plain["body"] == [{"s": 0, "e": 0, "fn": "return", "params": [{"s": 0, "e": 0, "ref": "query"}]}]
+
+
+def test_define_variables_returns_literal_assignments():
+    source = (
+        "> define\nname = 'Ada'\nage = 36\nopts = {debug:true tags:['a' \"b\"]}\n"
+        "Person = struct(name:string)\nother = name\n\n> user\nhi"
+    )
+    assert define_variables(source) == {
+        "name": "Ada", "age": 36, "opts": {"debug": True, "tags": ["a", "b"]},
+    }
+
+
+def test_syntax_errors_report_line_numbers():
+    with pytest.raises(ConvoSyntaxError) as info:
+        parse_convo("> user\nhi\n\n> define\nx = exec('rm')\n")
+    assert info.value.line == 5
+    assert "illegal function (exec)" in str(info.value)
+    error = validate_convo("> add(a:number) -> (\n    return(a}\n)")
+    assert isinstance(error, ConvoSyntaxError) and error.line == 2
+    assert validate_convo("> user\nhi") is None
+
+
+def test_unsupported_syntax_is_reported_separately():
+    with pytest.raises(UnsupportedConvoSyntax):
+        parse_convo("> define\nx = ??? (+ answer)\nhi\n???\n")
+    assert validate_convo("> user\n@on user\n> onUser() -> ()") is None
+
+
+def test_conversation_parse():
+    c = Conversation()
+    c.add_system_message("be brief")
+    c.add_user_message("hello")
+    assert [(m["role"], m["content"]) for m in c.parse()] == [("system", "be brief"), ("user", "hello")]
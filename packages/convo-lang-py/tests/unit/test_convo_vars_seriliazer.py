@@ -70,3 +70,41 @@ def test_fallback_branch_normalizes_newlines_and_strips_for_non_str_with_replace
     s = ConvoVarsSerializer()
     v = WeirdText("  hello\r\nworld\nok  ")
     assert s.to_convo_vars(OrderedDict([("a", v)])) == '{a:"hello world ok"}'
+
+def test_deeply_nested_values_do_not_hit_recursion_limit():
+    s = ConvoVarsSerializer()
+    depth = sys.getrecursionlimit() * 2
+    value = []
+    for _ in range(depth):
+        value = [value]
+    out = s.to_convo_vars({"a": value})
+    assert out == "{a:" + "[" * (depth + 1) + "]" * (depth + 1) + "}"
+
+def test_circular_reference_raises_value_error():
+    s = ConvoVarsSerializer()
+    d = {"x": 1}
+    d["self"] = d
+    with pytest.raises(ValueError, match="Circular"):
+        s.to_convo_vars({"a": d})
+    shared = [1]
+    assert s.to_convo_vars({"a": shared, "b": shared}) == "{a:[1], b:[1]}"
+
+def test_sniff_json_can_be_disabled():
+    s = ConvoVarsSerializer(sniff_json=False)
+    assert s.to_convo_vars({"a": '{"x": 1}'}) == '{a:"{\\"x\\": 1}"}'
+    assert ConvoVarsSerializer().to_convo_vars({"a": '  [1, "[2]"]  '}) == "{a:[1, [2]]}"
+
+def test_dataclasses_and_pydantic_style_models_are_encoded_as_objects():
+    from dataclasses import dataclass
+
+    @dataclass
+    class Candidate:
+        name: str
+        skills: list
+
+    class Model:
+        def model_dump(self):
+            return {"id": 7, "candidate": Candidate("Ann", ["py"])}
+
+    s = ConvoVarsSerializer()
+    assert s.to_convo_vars({"m": Model()}) == '{m:{id:7, candidate:{name:"Ann", skills:["py"]}}}'
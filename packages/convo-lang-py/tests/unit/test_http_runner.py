@@ -0,0 +1,297 @@
+import asyncio
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "..", "src")
+))
+from convo_lang import AsyncHttpChatRunner, Conversation, HttpChatRunner, Timeout
+from convo_lang.errors import ConvoRuntimeError, ConvoValidationError
+from convo_lang.http_runner import chat_request
+from convo_lang.mock_runner import MockConvoRunner
+from convo_lang.resilience import RetryPolicy
+from convo_lang.scheduler import CompletionScheduler
+
+
+class StubChatServer(ThreadingHTTPServer):
+    """OpenAI-compatible chat endpoint that records requests and the client ports they came from."""
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _StubHandler)
+        self.requests = []
+        self.ports = []
+        self.reply = "Hello Ada!"
+        self.status = 200
+        self.delay = 0.0
+        self.chunks = None
+        self.failures = 0  # requests to answer with 503 before using `status`
+
+    def handle_error(self, request, client_address):
+        pass  # clients that time out hang up mid-response
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        server.requests.append({"path": self.path, "headers": dict(self.headers), "body": body})
+        server.ports.append(self.client_address[1])
+        if server.delay:
+            threading.Event().wait(server.delay)
+        if server.failures:
+            server.failures -= 1
+            self._send(503, b'{"error":{"message":"busy"}}')
+        elif server.status != 200:
+            self._send(server.status, b'{"error":{"message":"nope"}}')
+        elif body.get("stream"):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for chunk in server.chunks or [server.reply]:
+                event = {"choices": [{"delta": {"content": chunk}}]}
+                self._chunk(f"data: {json.dumps(event)}\n\n".encode())
+            self._chunk(b"data: [DONE]\n\n")
+            self.wfile.write(b"0\r\n\r\n")
+        else:
+            reply = {"choices": [{"message": {"role": "assistant", "content": server.reply}}]}
+            self._send(200, json.dumps(reply).encode())
+
+    def _send(self, status, data):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _chunk(self, data):
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+
+@pytest.fixture
+def server():
+    server = StubChatServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _config(server):
+    return {"apiBaseUrl": server.url, "apiKey": "sk-test", "chatModel": "stub-model"}
+
+
+def _conversation(server, **kwargs):
+    c = Conversation(config=_config(server), **kwargs)
+    c.add_system_message("be brief")
+    c.add_user_message("Say hello to {{name}}")
+    return c
+
+
+SIMPLE = "> define\nname = 'Ada'\n\n> system\nbe brief\n\n> user\nSay hello to {{name}}\n"
+
+
+def test_chat_request_for_plain_conversations():
+    request = chat_request(SIMPLE, variables={"n": 1}, config={"apiBaseUrl": "http://x/", "apiKey": "k"})
+    assert request.url == "http://x/v1/chat/completions"
+    assert request.model == "gpt-4.1"
+    assert request.messages == (
+        {"role": "system", "content": "be brief"},
+        {"role": "user", "content": "Say hello to Ada"},
+    )
+    assert request.state == {"n": 1, "name": "Ada"}
+    assert request.headers()["Authorization"] == "Bearer k"
+    assert chat_request(SIMPLE.replace("'Ada'", "1.0"), config={}).messages[1]["content"] == "Say hello to 1"
+    assert chat_request("> define\n__model = 'small'\n" + SIMPLE, config={"chatModel": "big"}).model == "small"
+    assert chat_request("> user\nhi", config={"env": {"OPENAI_CHAT_MODEL": "env-model"}}).model == "env-model"
+
+
+@pytest.mark.parametrize("source", [
+    "> user\nhi {{missing}}",
+    "> user\nhi {{add(1 2)}}",
+    "> define\n__trackTime = true\n\n> user\nhi",
+    "> define\nx = add(1 2)\n\n> user\nhi",
+    "@json\n> user\nhi",
+    "> add(a:number) -> (return(a))\n\n> user\nhi",
+    "> extern getWeather(city:string)\n\n> user\nhi",
+    "> user\nhi\n\n> assistant\nhello",
+    "> user\nhi\n\n> define\nx = exec('rm')",
+])
+def test_chat_request_leaves_other_conversations_to_the_cli(source):
+    assert chat_request(source, config={}) is None
+
+
+def test_complete_posts_directly_and_reuses_connections(server):
+    runner = HttpChatRunner(config=_config(server))
+    c = _conversation(server, convo_cli_runner=runner)
+    assert c.complete(variables={"name": "Ada"}) == "Hello Ada!"
+    assert c.state["name"] == "Ada"
+    assert [m["role"] for m in c.messages] == ["system", "user", "assistant"]
+    assert c.parse()[-1] == {**c.parse()[-1], "role": "assistant", "content": "Hello Ada!"}
+
+    c.add_user_message("And to Bob?")
+    server.reply = "Hello Bob!"
+    assert c.complete(variables={"name": "Ada"}) == "Hello Bob!"
+    first, second = server.requests
+    assert first["path"] == "/v1/chat/completions"
+    assert first["headers"]["Authorization"] == "Bearer sk-test"
+    assert first["body"] == {
+        "model": "stub-model",
+        "messages": [
+            {"role": "system", "content": "be brief"},
+            {"role": "user", "content": "Say hello to Ada"},
+        ],
+    }
+    assert second["body"]["messages"][-2:] == [
+        {"role": "assistant", "content": "Hello Ada!"},
+        {"role": "user", "content": "And to Bob?"},
+    ]
+    assert server.ports[0] == server.ports[1]
+    assert (runner.direct_runs, runner.fallback_runs) == (2, 0)
+    runner.close()
+
+
+def test_reply_lines_that_look_like_convo_syntax_are_escaped(server):
+    server.reply = "> not a header\nuse {{x}} as is"
+    c = _conversation(server, convo_cli_runner=HttpChatRunner(config=_config(server)))
+    assert c.complete(variables={"name": "Ada"}) == server.reply
+    assert c.messages[-1]["content"] == server.reply
+
+
+def test_stream_yields_reply_as_it_arrives(server):
+    server.chunks = ["Hel", "lo\nA", "da!"]
+    c = _conversation(server, convo_cli_runner=HttpChatRunner(config=_config(server)))
+    tokens = list(c.stream(variables={"name": "Ada"}))
+    assert "".join(tokens).strip() == "Hello\nAda!"
+    assert c.messages[-1] == {"role": "assistant", "content": "Hello\nAda!"}
+    assert server.requests[0]["body"]["stream"] is True
+
+
+def test_other_conversations_fall_back(server):
+    fallback = MockConvoRunner(response='f:[{"role":"assistant","content":"from the cli"}]\n')
+    runner = HttpChatRunner(config=_config(server), fallback=fallback)
+    c = Conversation(config=_config(server), convo_cli_runner=runner)
+    c.add_user_message("hi {{missing}}")
+    assert c.complete() == "from the cli"
+    assert (runner.direct_runs, runner.fallback_runs) == (0, 1)
+    assert server.requests == []
+
+
+@pytest.mark.parametrize("status, error", [(500, ConvoRuntimeError), (429, ConvoRuntimeError), (401, ConvoValidationError)])
+def test_http_errors(server, status, error):
+    server.status = status
+    runner = HttpChatRunner(config=_config(server))
+    with pytest.raises(error, match=str(status)):
+        runner.run_text(SIMPLE)
+
+
+def test_timeout(server):
+    server.delay = 0.5
+    with pytest.raises(Timeout):
+        HttpChatRunner(config=_config(server)).run_text(SIMPLE, timeout=0.1)
+
+
+def test_unreachable_server_is_a_runtime_error():
+    runner = HttpChatRunner(config={"apiBaseUrl": "http://127.0.0.1:9"})
+    with pytest.raises(ConvoRuntimeError):
+        runner.run_text(SIMPLE, timeout=2)
+
+
+def test_async_complete_and_stream(server):
+    runner = AsyncHttpChatRunner(config=_config(server))
+
+    async def main():
+        c = _conversation(server, async_convo_cli_runner=runner)
+        reply = await c.acomplete(variables={"name": "Ada"})
+        c.add_user_message("Again")
+        server.chunks = ["Hi ", "again"]
+        tokens = [t async for t in c.astream(variables={"name": "Ada"})]
+        return reply, tokens, c
+
+    reply, tokens, c = asyncio.run(main())
+    assert reply == "Hello Ada!"
+    assert "".join(tokens).strip() == "Hi again"
+    assert c.messages[-1]["content"] == "Hi again"
+    assert server.ports[0] == server.ports[1]
+    assert runner.direct_runs == 2
+
+
+def test_async_errors(server):
+    runner = AsyncHttpChatRunner(config=_config(server))
+    server.status = 503
+    with pytest.raises(ConvoRuntimeError, match="503"):
+        asyncio.run(runner.run_text(SIMPLE))
+    server.status = 200
+    server.delay = 0.5
+    with pytest.raises(Timeout):
+        asyncio.run(runner.run_text(SIMPLE, timeout=0.1))
+
+
+def test_retry_applies_to_direct_requests(server):
+    server.failures = 1
+    runner = HttpChatRunner(config=_config(server), retry=RetryPolicy(backoff_base=0.01))
+    assert "Hello Ada!" in runner.run_text(SIMPLE)
+    server.failures = 1
+    async_runner = AsyncHttpChatRunner(config=_config(server), retry=RetryPolicy(backoff_base=0.01))
+    assert "Hello Ada!" in asyncio.run(async_runner.run_text(SIMPLE))
+    assert runner.resilience_stats.retries == async_runner.resilience_stats.retries == 1
+
+
+def test_scheduler_admits_direct_requests_by_chat_model(server):
+    scheduler = CompletionScheduler()
+    HttpChatRunner(config=_config(server), scheduler=scheduler).run_text(SIMPLE)
+    runner = AsyncHttpChatRunner(config=_config(server), scheduler=scheduler)
+    asyncio.run(runner.run_text(SIMPLE))
+    lines = asyncio.run(_collect(runner.stream_text(SIMPLE)))
+    assert any("Hello Ada!" in line for line in lines)
+    assert scheduler.stats()["stub-model"]["succeeded"] == 3
+
+
+async def _collect(lines):
+    return [line async for line in lines]
+
+
+def test_chunked_response_cut_off_by_the_peer_is_an_error():
+    from convo_lang.http_runner import _AsyncResponse
+
+    async def read(data):
+        reader = asyncio.StreamReader()
+        reader.feed_data(data)
+        reader.feed_eof()
+        response = _AsyncResponse(reader, 200, {"transfer-encoding": "chunked"}, True)
+        return await response.read(), response
+
+    body, response = asyncio.run(read(b"2\r\nhi\r\n0\r\n\r\n"))
+    assert body == b"hi" and response.done and response.reusable
+    with pytest.raises(ConnectionResetError):
+        asyncio.run(read(b"2\r\nhi\r\n"))
+
+
+def test_idle_connections_are_closed_with_their_event_loop(server):
+    import gc
+    import warnings
+    runner = AsyncHttpChatRunner(config=_config(server))
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        asyncio.run(runner.run_text(SIMPLE))
+        asyncio.run(runner.run_text(SIMPLE))
+        gc.collect()
+    assert not [w for w in caught if issubclass(w.category, ResourceWarning)]
+    assert len(set(server.ports)) == 2
@@ -0,0 +1,208 @@
+import asyncio
+import os
+import sys
+import textwrap
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "..", "src")
+))
+from convo_lang import Conversation
+from convo_lang.async_convo_cli_runner import AsyncConvoCLIRunner
+from convo_lang.convo_cli_runner import ConvoCLIRunner
+from convo_lang.errors import Timeout
+from convo_lang.instrumentation import (
+    Histogram,
+    HistogramAggregator,
+    Instrumentation,
+    InstrumentationHook,
+    SpanEmitter,
+)
+from convo_lang.mock_runner import MockConvoRunner
+
+
+def _write_fake_cli(tmp_path, body):
+    script = tmp_path / "fake_convo"
+    script.write_text(f"#!{sys.executable}\n" + textwrap.dedent(body))
+    script.chmod(0o755)
+    return str(script)
+
+
+class Recorder(InstrumentationHook):
+    def __init__(self):
+        self.pre_events = []
+        self.events = []
+
+    def pre(self, event):
+        self.pre_events.append(event.name)
+
+    def post(self, event):
+        self.events.append(event)
+
+
+def test_histogram_percentiles_are_within_precision():
+    hist = Histogram(precision=0.01)
+    for v in range(1, 1001):
+        hist.record(v / 1000)
+    assert hist.count == 1000
+    assert hist.percentile(50) == pytest.approx(0.5, rel=0.02)
+    assert hist.percentile(99) == pytest.approx(0.99, rel=0.02)
+    assert hist.percentile(100) == 1.0
+    assert hist.summary()["min"] == 0.001
+
+
+def test_runner_records_spawn_wall_rusage_and_output_sizes(tmp_path):
+    cli = _write_fake_cli(tmp_path, '''
+        import sys
+        print(": > assistant")
+        print(": hello")
+        sys.stderr.write("warn")
+    ''')
+    recorder = Recorder()
+    aggregator = HistogramAggregator()
+    runner = ConvoCLIRunner(convo_bin=cli, instrumentation=Instrumentation([recorder, aggregator]))
+    out = runner.run_text("> user\nhi")
+    assert out == ": > assistant\n: hello\n"
+    event = recorder.events[-1]
+    assert event.name == "cli" and event.attributes == {"transport": "file"}
+    assert event.spawn_time > 0 and event.cli_wall_time > 0
+    assert event.stdout_bytes == len(out) and event.stderr_bytes == 4
+    assert event.returncode == 0 and event.error_class is None
+    if hasattr(os, "wait4"):
+        assert event.cpu_user is not None and event.max_rss_bytes > 0
+    snap = aggregator.snapshot()
+    assert snap["metrics"]["cli"]["cli_wall_time"]["count"] == 1
+    assert "cli" in aggregator.dump()
+
+
+def test_errors_are_recorded_by_class(tmp_path):
+    cli = _write_fake_cli(tmp_path, '''
+        import time
+        time.sleep(5)
+    ''')
+    aggregator = HistogramAggregator()
+    runner = ConvoCLIRunner(convo_bin=cli, use_stdin=True, instrumentation=Instrumentation([aggregator]))
+    with pytest.raises(Timeout):
+        runner.run_text("> user\nhi", timeout=0.3)
+    assert aggregator.snapshot()["errors"] == {"cli": {"Timeout": 1}}
+
+
+def test_conversation_complete_records_parse_time_and_cache_hit():
+    recorder = Recorder()
+
+    class BrokenHook(InstrumentationHook):
+        def post(self, event):
+            raise RuntimeError("hooks must not break completions")
+
+    convo = Conversation(
+        convo_cli_runner=MockConvoRunner(),
+        instrumentation=Instrumentation([recorder, BrokenHook()]),
+    )
+    convo.add_user_message("hi")
+    assert convo.complete() == "Hi there!"
+    event = recorder.events[-1]
+    assert recorder.pre_events == ["complete"]
+    assert event.name == "complete" and event.parse_time is not None
+    assert event.attributes["cache_hit"] is False and event.duration >= event.parse_time
+
+
+def test_streamed_complete_records_a_complete_span():
+    from convo_lang.completion_cache import MemoryCompletionCache
+    recorder = Recorder()
+    convo = Conversation(
+        convo_cli_runner=MockConvoRunner(),
+        instrumentation=Instrumentation([recorder]),
+        completion_cache=MemoryCompletionCache(),
+    )
+    convo.add_user_message("hi")
+    source = convo.convo_text
+    tokens = []
+    assert convo.complete(on_token=tokens.append) == "Hi there!"
+    event = recorder.events[-1]
+    assert event.name == "complete" and event.attributes["cache_hit"] is False
+    convo.convo_text = source
+    convo.complete(on_token=tokens.append)
+    assert recorder.events[-1].attributes["cache_hit"] is True
+
+
+def test_astream_records_a_complete_span(tmp_path):
+    from convo_lang.completion_cache import MemoryCompletionCache
+    cli = _write_fake_cli(tmp_path, '''
+        print(": > assistant")
+        print(": hello")
+    ''')
+    recorder = Recorder()
+    instrumentation = Instrumentation([recorder])
+    convo = Conversation(
+        async_convo_cli_runner=AsyncConvoCLIRunner(convo_bin=cli, instrumentation=instrumentation),
+        instrumentation=instrumentation,
+        completion_cache=MemoryCompletionCache(),
+    )
+    convo.add_user_message("hi")
+    source = convo.convo_text
+
+    async def consume():
+        return [token async for token in convo.astream()]
+
+    assert "".join(asyncio.run(consume())) == "hello"
+    assert [e.name for e in recorder.events] == ["complete"]
+    assert recorder.events[-1].attributes["cache_hit"] is False
+    convo.convo_text = source
+    asyncio.run(consume())
+    assert recorder.events[-1].attributes["cache_hit"] is True
+
+
+def test_streamed_cli_runs_record_rusage(tmp_path):
+    cli = _write_fake_cli(tmp_path, '''
+        print(": > assistant")
+        print(": hello")
+    ''')
+    recorder = Recorder()
+    runner = ConvoCLIRunner(convo_bin=cli, instrumentation=Instrumentation([recorder]))
+    assert list(runner.stream_text("> user\nhi")) == [": > assistant", ": hello"]
+    event = recorder.events[-1]
+    assert event.name == "cli_stream" and event.returncode == 0
+    if hasattr(os, "wait4"):
+        assert event.cpu_user is not None and event.max_rss_bytes > 0
+
+
+def test_span_emitter_uses_tracer_style_api(tmp_path):
+    cli = _write_fake_cli(tmp_path, '''
+        print(': > assistant')
+        print(': hi')
+        print('f:[{"role":"assistant","content":"hi"}]')
+    ''')
+
+    class Span:
+        def __init__(self, name, attributes):
+            self.name, self.attributes, self.ended = name, dict(attributes), False
+
+        def set_attribute(self, key, value):
+            self.attributes[key] = value
+
+        def end(self):
+            self.ended = True
+
+    class Tracer:
+        def __init__(self):
+            self.spans = []
+
+        def start_span(self, name, attributes=None, **kwargs):
+            span = Span(name, attributes or {})
+            self.spans.append(span)
+            return span
+
+    tracer = Tracer()
+    instrumentation = Instrumentation([SpanEmitter(tracer)])
+    convo = Conversation(
+        async_convo_cli_runner=AsyncConvoCLIRunner(convo_bin=cli, instrumentation=instrumentation),
+        instrumentation=instrumentation,
+    )
+    convo.add_user_message("hi")
+    assert asyncio.run(convo.acomplete()) == "hi"
+    names = [s.name for s in tracer.spans]
+    assert names == ["convo_lang.complete", "convo_lang.cli"]
+    assert all(s.ended for s in tracer.spans)
+    assert tracer.spans[1].attributes["convo_lang.returncode"] == 0
+    assert "convo_lang.parse_time" in tracer.spans[0].attributes
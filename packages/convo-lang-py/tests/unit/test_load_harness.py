@@ -0,0 +1,71 @@
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "..", "src")
+))
+from convo_lang import Conversation
+from convo_lang.load_harness import run_load
+from convo_lang.mock_runner import LogNormalLatency, MockConvoRunner, UniformLatency
+from convo_lang.scheduler import CompletionScheduler, ModelLimits
+
+
+def test_latency_distributions_are_seeded():
+    a = [LogNormalLatency(0.5, 0.8).sample(random.Random(1)) for _ in range(3)]
+    b = [LogNormalLatency(0.5, 0.8).sample(random.Random(1)) for _ in range(3)]
+    assert a == b
+    rng = random.Random(0)
+    assert all(0.1 <= UniformLatency(0.1, 0.2).sample(rng) <= 0.2 for _ in range(100))
+    assert LogNormalLatency(1.0, 3.0, maximum=2.0).sample(random.Random(5)) <= 2.0
+
+
+def test_synthetic_transcript_grows_with_the_conversation():
+    runner = MockConvoRunner(reply_bytes=300)
+    convo = Conversation(convo_cli_runner=runner)
+    convo.add_user_message("first")
+    reply = convo.complete()
+    assert 290 <= len(reply) <= 300
+    convo.add_user_message("second")
+    convo.complete()
+    text = convo.to_convo()
+    assert "first" in text and "second" in text and text.count("> assistant") == 2
+
+
+def test_timeouts_and_failures_are_simulated():
+    runner = MockConvoRunner(latency=0.05, failure_rate=1.0)
+    report = run_load(lambda n: Conversation(convo_cli_runner=runner), conversations=4, turns=2, runner=runner)
+    assert report.completions == 0 and report.errors == {"ConvoCLIError": 4}
+
+    slow = MockConvoRunner(latency=1.0)
+    report = run_load(lambda n: Conversation(convo_cli_runner=slow), conversations=2, timeout=0.05)
+    assert report.errors == {"Timeout": 2}
+
+
+def test_run_load_reports_throughput_and_overhead():
+    runner = MockConvoRunner(latency=UniformLatency(0.01, 0.02), failure_rate=0.2, reply_bytes=100, seed=3)
+    report = run_load(
+        lambda n: Conversation(convo_cli_runner=runner),
+        conversations=40,
+        turns=3,
+        concurrency=20,
+        runner=runner,
+    )
+    assert report.completions + report.failures == runner.calls
+    assert report.failures == runner.failures > 0
+    assert report.latency["count"] == report.completions
+    assert report.latency["p50"] >= 0.01
+    assert report.throughput > 0 and report.sdk_overhead is not None
+
+
+def test_run_load_through_scheduler():
+    scheduler = CompletionScheduler(default_limits=ModelLimits(max_concurrency=2))
+    runner = MockConvoRunner(latency=0.01, scheduler=scheduler)
+    report = run_load(
+        lambda n: Conversation(convo_cli_runner=runner),
+        conversations=10,
+        concurrency=10,
+        scheduler=scheduler,
+    )
+    assert report.completions == 10
+    assert report.scheduler["*"]["admitted"] == 10
@@ -0,0 +1,105 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "..", "src")
+))
+from convo_lang import Conversation
+from convo_lang import persistence
+from convo_lang.persistence import LoadedConversation, intern_messages, restore_messages
+
+
+def _conversation():
+    c = Conversation(config={"env": "x"})
+    c.add_system_message("You are helpful")
+    c.add_user_message("Héllo 👋")
+    c.messages = [
+        {"role": "system", "content": "You are helpful"},
+        {"role": "user", "content": "Héllo 👋"},
+        {"role": "assistant", "content": "Hi", "tags": {"x": [1, 2.5, None, True]}},
+    ]
+    c.syntax_messages = [{"role": "user", "content": "Héllo 👋"}]
+    c.state = {"vars": {"n": 3}}
+    return c
+
+
+def _assert_same(a, b):
+    assert b.convo_text == a.convo_text
+    assert b.messages == a.messages
+    assert b.syntax_messages == a.syntax_messages
+    assert b.state == a.state
+
+
+@pytest.mark.parametrize("compression", [None, "zlib"])
+def test_dump_load_round_trip_json(compression):
+    c = _conversation()
+    data = c.dump(codec="json", compression=compression)
+    assert data.startswith(persistence.MAGIC)
+    _assert_same(c, Conversation.load(data))
+
+
+def test_dump_load_round_trip_msgpack_and_zstd():
+    pytest.importorskip("msgpack")
+    c = _conversation()
+    _assert_same(c, Conversation.load(c.dump(codec="msgpack")))
+    pytest.importorskip("zstandard")
+    _assert_same(c, Conversation.load(c.dump(codec="msgpack", compression="zstd")))
+
+
+def test_json_codec_without_orjson(monkeypatch):
+    monkeypatch.setattr(persistence, "orjson", None)
+    c = _conversation()
+    _assert_same(c, Conversation.load(c.dump(codec="json")))
+
+
+@pytest.mark.parametrize("codec", persistence.available_codecs())
+def test_big_ints_and_non_str_keys_round_trip(codec):
+    c = Conversation()
+    c.state = {"big": 2**70, "neg": -2**65, "small": 3, "ids": {1: "a", 2: [2**64]}}
+    c.messages = [{"role": "user", "content": "hi", "n": 2**100}]
+    loaded = Conversation.load(c.dump(codec=codec))
+    assert loaded.state["big"] == 2**70 and type(loaded.state["big"]) is int
+    assert loaded.state["neg"] == -2**65 and loaded.state["small"] == 3
+    assert loaded.messages[0]["n"] == 2**100
+    # JSON object keys are always strings
+    keys = [1, 2] if codec == "msgpack" else ["1", "2"]
+    assert loaded.state["ids"] == dict(zip(keys, ["a", [2**64]]))
+
+
+def test_messages_are_decoded_on_first_access(monkeypatch):
+    calls = []
+    original = LoadedConversation.decode_messages
+
+    def counting(self):
+        calls.append(1)
+        return original(self)
+
+    monkeypatch.setattr(LoadedConversation, "decode_messages", counting)
+    loaded = Conversation.load(_conversation().dump(codec="json"), config={"a": 1})
+    assert loaded.config == {"a": 1} and loaded.state == {"vars": {"n": 3}}
+    assert calls == []
+    assert loaded.messages[2]["tags"]["x"][1] == 2.5
+    loaded.messages
+    assert calls == [1]
+    loaded.messages = []
+    assert loaded.messages == []
+
+
+def test_interning_keeps_key_order_and_odd_messages():
+    messages = [{"role": "user", "content": "a"}, {"content": "b", "role": "assistant"}, {}]
+    interned = intern_messages(messages)
+    assert interned["keys"] == ["role", "content"] and len(interned["shapes"]) == 3
+    restored = restore_messages(interned)
+    assert restored == messages and list(restored[1]) == ["content", "role"]
+    assert intern_messages(["raw", 1]) == ["raw", 1]
+
+
+def test_load_rejects_foreign_and_truncated_data():
+    with pytest.raises(ValueError):
+        Conversation.load(b'{"convo_text": ""}')
+    with pytest.raises(ValueError):
+        Conversation.load(_conversation().dump(codec="json")[:-5])
+    with pytest.raises(ValueError):
+        _conversation().dump(codec="pickle")
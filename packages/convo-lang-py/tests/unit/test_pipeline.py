@@ -0,0 +1,150 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "..", "src")
+))
+from convo_lang import Pipeline
+from convo_lang.errors import ConvoCLIError
+from convo_lang.mock_runner import MockConvoRunner
+
+
+class EchoRunner(MockConvoRunner):
+    """Answers with the step's first line and its variables after a short delay."""
+
+    def __init__(self, delay=0.1, fail=()):
+        super().__init__()
+        self.delay = delay
+        self.fail = fail
+        self.calls = []
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def run_text(self, convo_text, *, variables=None, **kwargs):
+        name = convo_text.split("\n")[1]
+        with self._lock:
+            self.calls.append(name)
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+        if name in self.fail:
+            raise ConvoCLIError(f"{name} failed")
+        answer = name + "(" + ",".join(f"{k}={v}" for k, v in sorted((variables or {}).items())) + ")"
+        return f'f:[{{"role":"assistant","content":"{answer}"}}]\n'
+
+
+def _resume_pipeline(runner):
+    p = Pipeline(runner=runner, max_concurrency=4)
+    p.add("job", convo_text="> system\njob", inputs={"text": "job_description"})
+    p.add("profile", convo_text="> system\nprofile", inputs={"text": "candidate_profile"})
+    p.add("match", convo_text="> system\nmatch", inputs={"job": "job", "profile": "profile"})
+    p.add("writer", convo_text="> system\nwriter", inputs={"job": "job", "match": "match"})
+    p.add("fit", convo_text="> system\nfit", inputs={"job": "job", "match": "match"}, variables={"strict": 1})
+    return p
+
+
+def test_independent_steps_run_concurrently_and_outputs_flow_downstream():
+    runner = EchoRunner()
+    result = _resume_pipeline(runner).run({"job_description": "JD", "candidate_profile": "CP"})
+    assert result.ok
+    assert result["job"] == "job(text=JD)"
+    assert result["match"] == "match(job=job(text=JD),profile=profile(text=CP))"
+    assert result["fit"].startswith("fit(job=job(text=JD),match=match(") and result["fit"].endswith("strict=1)")
+    assert runner.peak == 2
+    # job/profile, then match, then writer/fit
+    assert result.wall_time < 0.45
+    assert result.critical_path[0] in ("job", "profile") and result.critical_path[1] == "match"
+    assert len(result.critical_path) == 3
+    assert result.critical_path_time == pytest.approx(sum(result.steps[n].duration for n in result.critical_path))
+    assert "critical path" in result.timings()
+
+
+def test_changed_input_only_recomputes_downstream_steps():
+    runner = EchoRunner(delay=0.01)
+    pipeline = _resume_pipeline(runner)
+    pipeline.run({"job_description": "JD", "candidate_profile": "CP"})
+    runner.calls.clear()
+    again = pipeline.run({"job_description": "JD", "candidate_profile": "CP"})
+    assert runner.calls == [] and all(r.cached for r in again.steps.values())
+
+    changed = pipeline.run({"job_description": "JD", "candidate_profile": "CP2"})
+    assert sorted(runner.calls) == ["fit", "match", "profile", "writer"]
+    assert changed.steps["job"].cached and not changed.steps["profile"].cached
+
+
+def test_failed_step_skips_dependents_only():
+    runner = EchoRunner(delay=0.01, fail=("profile",))
+    result = _resume_pipeline(runner).run({"job_description": "JD", "candidate_profile": "CP"})
+    assert not result.ok
+    assert isinstance(result.errors["profile"], ConvoCLIError)
+    assert result.steps["job"].ok
+    assert result.steps["match"].skipped and result.steps["writer"].skipped
+    assert "job" in runner.calls and "match" not in runner.calls
+
+
+def test_pipeline_runs_convo_files(tmp_path):
+    agent = tmp_path / "agent.convo"
+    agent.write_text("> system\nagent\n", encoding="utf-8")
+    p = Pipeline(runner=EchoRunner(delay=0))
+    p.add("a", str(agent), variables={"x": 1})
+    assert p.run()["a"] == "agent(x=1)"
+
+
+def test_memo_key_covers_imported_files_and_runner(tmp_path):
+    from convo_lang.completion_cache import MemoryCompletionCache
+    shared = tmp_path / "shared.convo"
+    shared.write_text("> system\nv1\n", encoding="utf-8")
+    agent = tmp_path / "agent.convo"
+    agent.write_text("> system\nagent\n@import ./shared.convo\n", encoding="utf-8")
+    cache = MemoryCompletionCache()
+    runner = EchoRunner(delay=0)
+    p = Pipeline(runner=runner, cache=cache)
+    p.add("a", str(agent))
+    p.run()
+    assert p.run().steps["a"].cached
+
+    shared.write_text("> system\nversion 2\n", encoding="utf-8")
+    assert not p.run().steps["a"].cached
+
+    class OtherRunner(EchoRunner):
+        pass
+
+    other = Pipeline(runner=OtherRunner(delay=0), cache=cache)
+    other.add("a", str(agent))
+    assert not other.run().steps["a"].cached
+    assert len(runner.calls) == 2
+
+
+def test_memo_key_uses_the_runners_config():
+    from convo_lang.completion_cache import MemoryCompletionCache
+    cache = MemoryCompletionCache()
+    first, second = EchoRunner(delay=0), EchoRunner(delay=0)
+    first.config, second.config = {"model": "a"}, {"model": "b"}
+    for runner in (first, second, first):
+        p = Pipeline(runner=runner, cache=cache)
+        p.add("a", convo_text="> user\nhi")
+        p.run()
+    assert len(first.calls) == 1 and len(second.calls) == 1
+
+
+def test_invalid_pipelines_are_rejected():
+    p = Pipeline(runner=EchoRunner())
+    p.add("a", convo_text="> system\na", inputs={"v": "b"})
+    p.add("b", convo_text="> system\nb", inputs={"v": "a"})
+    with pytest.raises(ValueError, match="cycle"):
+        p.run()
+    p = Pipeline(runner=EchoRunner())
+    p.add("a", convo_text="> system\na", inputs={"v": "missing"})
+    with pytest.raises(ValueError, match="unknown input"):
+        p.run()
+    with pytest.raises(ValueError, match="Duplicate"):
+        p.add("a", convo_text="x")
+    with pytest.raises(ValueError):
+        p.add("c")
@@ -0,0 +1,150 @@
+import asyncio
+import os
+import sys
+import textwrap
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "..", "src")
+))
+from convo_lang.async_convo_cli_runner import AsyncConvoCLIRunner
+from convo_lang.convo_cli_runner import ConvoCLIRunner
+from convo_lang.errors import ConvoCLIError, ConvoValidationError
+from convo_lang.resilience import HedgePolicy, ResilientCaller, RetryPolicy
+
+
+def _write_cli(tmp_path, body):
+    script = tmp_path / "fake_convo"
+    script.write_text(f"#!{sys.executable}\nimport os, sys, time\nstate = {str(tmp_path)!r}\n" + textwrap.dedent(body))
+    script.chmod(0o755)
+    return str(script)
+
+
+_COUNT_RUNS = '''
+    n = len(os.listdir(os.path.join(state, "runs")))
+    open(os.path.join(state, "runs", str(n)), "w").write(str(os.getpid()))
+'''
+
+
+def test_retries_transient_failures_with_backoff(tmp_path):
+    (tmp_path / "runs").mkdir()
+    cli = _write_cli(tmp_path, _COUNT_RUNS + '''
+    if n < 2:
+        sys.stderr.write("upstream exploded")
+        sys.exit(1)
+    print(": ok")
+    ''')
+    runner = ConvoCLIRunner(convo_bin=cli, retry=RetryPolicy(max_attempts=3, backoff_base=0.01))
+    assert runner.run_text("> user\nhi") == ": ok\n"
+    assert runner.resilience_stats.to_dict() == {
+        "calls": 1, "attempts": 3, "retries": 2, "retries_exhausted": 0, "hedges": 0, "hedge_wins": 0,
+    }
+
+
+def test_validation_errors_are_not_retried_and_attempts_are_capped(tmp_path):
+    (tmp_path / "runs").mkdir()
+    cli = _write_cli(tmp_path, _COUNT_RUNS + '''
+    sys.stderr.write(sys.argv[-1])
+    sys.exit(1)
+    ''')
+    runner = ConvoCLIRunner(convo_bin=cli, retry=RetryPolicy(max_attempts=2, backoff_base=0.01))
+    with pytest.raises(ConvoValidationError):
+        runner.run_file(str(tmp_path / "a.convo"), extra_args=["syntax error"])
+    assert runner.resilience_stats.attempts == 1
+    with pytest.raises(ConvoCLIError):
+        runner.run_file(str(tmp_path / "a.convo"), extra_args=["boom"])
+    assert runner.resilience_stats.retries_exhausted == 1
+    assert len(os.listdir(tmp_path / "runs")) == 3
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    return True
+
+
+def test_hedge_takes_fast_run_and_kills_slow_one(tmp_path):
+    (tmp_path / "runs").mkdir()
+    cli = _write_cli(tmp_path, _COUNT_RUNS + '''
+    if n == 0:
+        time.sleep(10)
+    print(": run " + str(n))
+    ''')
+    runner = ConvoCLIRunner(convo_bin=cli, use_stdin=True, hedge=HedgePolicy(delay=0.2))
+    start = time.monotonic()
+    assert runner.run_text("> user\nhi") == ": run 1\n"
+    assert time.monotonic() - start < 5
+    assert runner.resilience_stats.hedges == 1 and runner.resilience_stats.hedge_wins == 1
+    slow_pid = int((tmp_path / "runs" / "0").read_text())
+    deadline = time.monotonic() + 5
+    while _alive(slow_pid) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert not _alive(slow_pid)
+
+
+def test_hedge_delay_follows_observed_latency_percentile():
+    caller = ResilientCaller(hedge=HedgePolicy(min_samples=5, min_delay=0.01))
+    assert caller.hedge_delay() is None
+    for _ in range(5):
+        caller.call(lambda: time.sleep(0.02))
+    assert caller.stats.hedges == 0
+    assert 0.015 < caller.hedge_delay() < 0.1
+
+    calls = []
+    lock = threading.Lock()
+
+    def sometimes_slow():
+        with lock:
+            calls.append(1)
+            first = len(calls) == 1
+        time.sleep(0.5 if first else 0.01)
+        return "slow" if first else "fast"
+
+    assert caller.call(sometimes_slow) == "fast"
+    assert caller.stats.hedges == 1 and caller.stats.hedge_wins == 1
+
+
+def test_async_runner_retries_and_hedges(tmp_path):
+    (tmp_path / "runs").mkdir()
+    cli = _write_cli(tmp_path, _COUNT_RUNS + '''
+    if n == 0:
+        sys.stderr.write("upstream exploded")
+        sys.exit(1)
+    if n == 1:
+        time.sleep(10)
+    print(": run " + str(n))
+    ''')
+    runner = AsyncConvoCLIRunner(
+        convo_bin=cli,
+        retry=RetryPolicy(max_attempts=2, backoff_base=0.01),
+        hedge=HedgePolicy(delay=0.2),
+    )
+    start = time.monotonic()
+    assert asyncio.run(runner.run_text("> user\nhi")) == ": run 2\n"
+    assert time.monotonic() - start < 5
+    assert runner.resilience_stats.to_dict() == {
+        "calls": 1, "attempts": 2, "retries": 1, "retries_exhausted": 0, "hedges": 1, "hedge_wins": 1,
+    }
+    slow_pid = int((tmp_path / "runs" / "1").read_text())
+    deadline = time.monotonic() + 5
+    while _alive(slow_pid) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert not _alive(slow_pid)
+
+
+def test_acall_gives_up_on_errors_that_are_not_retried():
+    caller = ResilientCaller(retry=RetryPolicy(max_attempts=3, backoff_base=0.01))
+    attempts = []
+
+    async def invalid():
+        attempts.append(1)
+        raise ConvoValidationError("bad source")
+
+    with pytest.raises(ConvoValidationError):
+        asyncio.run(caller.acall(invalid))
+    assert len(attempts) == 1 and caller.stats.retries == 0
@@ -0,0 +1,137 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "..", "src")
+))
+from convo_lang.async_convo_cli_runner import AsyncConvoCLIRunner
+from convo_lang.convo_cli_runner import ConvoCLIRunner
+from convo_lang.errors import ConvoCLIError, ExecFailed
+from convo_lang.scheduler import CompletionScheduler, ModelLimits, TokenBucket, resolve_model
+
+
+def test_resolve_model_prefers_source_then_config():
+    assert resolve_model("> define\n__model='gpt-4o'\n\n> user\nhi") == "gpt-4o"
+    assert resolve_model("> user\nhi", {"defaultModel": "claude"}) == "claude"
+    assert resolve_model("> user\nhi", {"chatModel": "gpt-4.1-mini", "defaultModel": "claude"}) == "gpt-4.1-mini"
+    assert resolve_model("> define\n__model='gpt-4o'\n\n> user\nhi", {"chatModel": "gpt-4.1-mini"}) == "gpt-4o"
+    assert resolve_model("> user\nhi") == "*"
+
+
+def test_token_bucket_returns_wait_once_empty():
+    bucket = TokenBucket(rate=10, capacity=2)
+    assert bucket.reserve(1) == 0.0
+    assert bucket.reserve(1) == 0.0
+    assert bucket.reserve(1) == pytest.approx(0.1, abs=0.02)
+
+
+def test_concurrency_is_capped_per_model():
+    scheduler = CompletionScheduler({"m": ModelLimits(max_concurrency=2)})
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def work():
+        with scheduler.admit("m"):
+            with lock:
+                active.append(1)
+                peak.append(len(active))
+            time.sleep(0.05)
+            with lock:
+                active.pop()
+
+    threads = [threading.Thread(target=work) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert max(peak) == 2
+    assert scheduler.stats()["m"]["succeeded"] == 6
+
+
+def test_throttling_halves_concurrency_and_success_recovers():
+    scheduler = CompletionScheduler(
+        default_limits=ModelLimits(max_concurrency=8),
+        throttle_pause=0.1,
+    )
+    with pytest.raises(ExecFailed):
+        with scheduler.admit("m"):
+            raise ExecFailed("HTTP 429 Too Many Requests")
+    assert scheduler.stats()["m"]["concurrency_limit"] == 4
+    assert scheduler.stats()["m"]["throttled"] == 1
+
+    start = time.monotonic()
+    with scheduler.admit("m"):
+        pass
+    assert time.monotonic() - start >= 0.08
+    stats = scheduler.stats()["m"]
+    assert 4 < stats["concurrency_limit"] < 5
+    assert stats["succeeded"] == 1
+
+
+def test_other_errors_do_not_reduce_concurrency():
+    scheduler = CompletionScheduler(default_limits=ModelLimits(max_concurrency=4))
+    with pytest.raises(ValueError):
+        with scheduler.admit("m"):
+            raise ValueError("bad input")
+    stats = scheduler.stats()["m"]
+    assert stats["failed"] == 1 and stats["concurrency_limit"] == 4 and stats["in_flight"] == 0
+
+
+def test_runner_runs_are_admitted_by_model(tmp_path):
+    script = tmp_path / "fake_convo"
+    script.write_text(
+        f"#!{sys.executable}\nimport sys\nsys.stderr.write('429: rate limit exceeded')\nsys.exit(1)\n"
+    )
+    script.chmod(0o755)
+    scheduler = CompletionScheduler()
+    runner = ConvoCLIRunner(convo_bin=str(script), config={"defaultModel": "gpt-4o"}, scheduler=scheduler)
+    with pytest.raises(ConvoCLIError):
+        runner.run_text("> user\nhi")
+    assert scheduler.stats()["gpt-4o"]["throttled"] == 1
+
+
+def test_async_admission_shares_limits_with_threads():
+    scheduler = CompletionScheduler({"m": ModelLimits(max_concurrency=2)})
+    active = []
+    peak = []
+
+    async def work():
+        async with scheduler.aadmit("m"):
+            active.append(1)
+            peak.append(len(active))
+            await asyncio.sleep(0.02)
+            active.pop()
+
+    async def main():
+        await asyncio.gather(*(work() for _ in range(6)))
+
+    with scheduler.admit("m"):
+        # One slot is held by this thread, so coroutines only get the other one until it is released
+        thread = threading.Thread(target=asyncio.run, args=(main(),))
+        thread.start()
+        deadline = time.monotonic() + 5
+        while len(peak) < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert peak == [1, 1, 1]
+    thread.join()
+    assert max(peak) == 2
+    assert scheduler.stats()["m"]["succeeded"] == 7 and scheduler.stats()["m"]["in_flight"] == 0
+
+
+def test_async_runner_runs_are_admitted_by_model(tmp_path):
+    script = tmp_path / "fake_convo"
+    script.write_text(
+        f"#!{sys.executable}\nimport sys\nsys.stderr.write('429: rate limit exceeded')\nsys.exit(1)\n"
+    )
+    script.chmod(0o755)
+    scheduler = CompletionScheduler()
+    runner = AsyncConvoCLIRunner(convo_bin=str(script), config={"chatModel": "gpt-4o"}, scheduler=scheduler)
+    with pytest.raises(ConvoCLIError):
+        asyncio.run(runner.run_text("> user\nhi"))
+    assert scheduler.stats()["gpt-4o"]["throttled"] == 1
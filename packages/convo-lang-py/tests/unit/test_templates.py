@@ -0,0 +1,109 @@
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "..", "src")
+))
+from convo_lang import Conversation, TemplateRegistry
+
+
+def _write(path, text, mtime_ns=None):
+    path.write_text(text, encoding="utf-8")
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_registry_reads_each_file_once(tmp_path, monkeypatch):
+    agent = tmp_path / "agent.convo"
+    _write(agent, "> define\nname='a'\n")
+    registry = TemplateRegistry()
+    reads = []
+    original = type(agent).read_text
+
+    def counting_read(self, *args, **kwargs):
+        reads.append(self)
+        return original(self, *args, **kwargs)
+
+    monkeypatch.setattr(type(agent), "read_text", counting_read)
+    first = registry.get(agent)
+    assert registry.get(str(agent)) is first
+    assert len(reads) == 1
+    assert first.text == "> define\nname='a'\n\n"
+
+
+def test_changes_are_picked_up_and_touching_keeps_the_template(tmp_path):
+    agent = tmp_path / "agent.convo"
+    _write(agent, "> system\nv1\n", mtime_ns=1_000_000_000)
+    registry = TemplateRegistry()
+    v1 = registry.get(agent)
+
+    _write(agent, "> system\nv1\n", mtime_ns=2_000_000_000)
+    assert registry.get(agent) is v1
+
+    _write(agent, "> system\nv2\n", mtime_ns=3_000_000_000)
+    v2 = registry.get(agent)
+    assert v2 is not v1 and "v2" in v2.text
+
+    registry.invalidate(agent)
+    assert registry.get(agent) is not v2
+
+
+def test_check_interval_skips_stat(tmp_path):
+    agent = tmp_path / "agent.convo"
+    _write(agent, "> system\nv1\n", mtime_ns=1_000_000_000)
+    registry = TemplateRegistry(check_interval=60)
+    v1 = registry.get(agent)
+    _write(agent, "> system\nchanged\n", mtime_ns=2_000_000_000)
+    assert registry.get(agent) is v1
+
+
+def test_conversations_share_the_template_text(tmp_path):
+    a = tmp_path / "a.convo"
+    b = tmp_path / "b.convo"
+    _write(a, "> define\nx=1\n")
+    _write(b, "> system\nbe nice\n")
+    registry = TemplateRegistry()
+    one = registry.conversation(a, b, config={"k": 1})
+    two = registry.conversation(a, b)
+    assert registry.compose(a, b) is registry.compose(a, b)
+    assert one.to_convo() is two.to_convo()
+    assert one.config == {"k": 1} and one.message_count == 2
+
+    one.add_user_message("hi")
+    assert one.to_convo().endswith("> user\nhi\n\n")
+    assert two.to_convo() == "> define\nx=1\n\n> system\nbe nice\n\n"
+
+    _write(b, "> system\nbe brief\n", mtime_ns=5_000_000_000)
+    assert "be brief" in registry.conversation(a, b).to_convo()
+
+
+def test_add_convo_file_with_registry_matches_plain_load(tmp_path):
+    agent = tmp_path / "agent.convo"
+    _write(agent, "*convo*\n> define\nname='a'\n")
+    registry = TemplateRegistry()
+    plain = Conversation()
+    plain.add_convo_file(str(agent))
+    cached = Conversation()
+    cached.add_convo_file(str(agent), registry=registry)
+    assert cached.to_convo() == plain.to_convo()
+    assert cached.segments[0] is registry.get(agent).segments[0]
+    with pytest.raises(ValueError):
+        registry.get(tmp_path / "agent.txt")
+    with pytest.raises(FileNotFoundError):
+        registry.get(tmp_path / "missing.convo")
+
+
+def test_registry_is_thread_safe(tmp_path):
+    agent = tmp_path / "agent.convo"
+    _write(agent, "> system\nhi\n")
+    registry = TemplateRegistry()
+    seen = []
+    threads = [threading.Thread(target=lambda: seen.append(registry.get(agent))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len({t.digest for t in seen}) == 1
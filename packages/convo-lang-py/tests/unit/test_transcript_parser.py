@@ -0,0 +1,148 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "..", "src")
+))
+from convo_lang.errors import ParseError
+from convo_lang import json_backend
+from convo_lang.transcript_parser import (
+    PrefixedTranscriptParser,
+    count_assistant_blocks,
+    last_assistant_text,
+    output_profile,
+    parse_prefixed,
+)
+
+TRANSCRIPT = [
+    ":> user",
+    ":hi",
+    ":",
+    ":> assistant",
+    ":old answer",
+    ":",
+    ":> user",
+    ":and now?",
+    ":",
+    ":> assistant",
+    ":line one",
+    ":",
+    ":line two",
+    ":",
+    ":@json",
+    ":> assistant",
+    ":second block",
+    'f:[{"role":"assistant",',
+    'f:"content":"second block"}]',
+    's:{"a":1}',
+    'm:[]',
+]
+
+
+def _feed(parser, lines):
+    return [t for t in (parser.feed_line(l) for l in lines) if t]
+
+
+def test_count_assistant_blocks():
+    assert count_assistant_blocks("> user\nhi\n\n> assistant\nyo\n\n> assistant \nx") == 2
+    assert count_assistant_blocks("> assistantish\n") == 0
+
+
+def test_streams_only_new_assistant_text():
+    parser = PrefixedTranscriptParser(skip_assistant_blocks=1)
+    tokens = _feed(parser, TRANSCRIPT)
+    assert tokens == ["line one", "\n\nline two", "\n\nsecond block"]
+    assert "".join(tokens) == "line one\n\nline two\n\nsecond block"
+
+
+def test_result_decodes_multiline_json_sections():
+    parser = PrefixedTranscriptParser()
+    _feed(parser, TRANSCRIPT)
+    parsed = parser.result()
+    assert parsed.state == {"a": 1}
+    assert parsed.syntax_messages == []
+    assert parsed.messages == [{"role": "assistant", "content": "second block"}]
+    assert parsed.convo_text.startswith("> user\n\nhi")
+
+
+def test_space_after_colon_prefix_is_stripped():
+    parser = PrefixedTranscriptParser()
+    assert parser.feed_line(": > assistant") is None
+    assert parser.feed_line(": hello") == "hello"
+
+
+def test_invalid_json_raises_parse_error():
+    parser = PrefixedTranscriptParser()
+    parser.feed_line('s:{"bad": }')
+    with pytest.raises(ParseError):
+        parser.result()
+
+
+def test_parse_prefixed_matches_incremental_parser():
+    transcript = "\n".join(TRANSCRIPT) + "\n"
+    parser = PrefixedTranscriptParser()
+    _feed(parser, TRANSCRIPT)
+    assert parse_prefixed(transcript) == parser.result()
+
+
+def test_parse_prefixed_ignores_unknown_and_short_lines():
+    parsed = parse_prefixed('x:ignored\ns\n:\n:x\nf:[1]\n')
+    assert parsed.messages == [1]
+    assert parsed.convo_text == "x"
+
+
+def test_output_profiles_skip_unrequested_sections():
+    transcript = "\n".join(TRANSCRIPT) + "\n"
+    messages = parse_prefixed(transcript, output_profile("messages"))
+    assert messages.messages == [{"role": "assistant", "content": "second block"}]
+    assert messages.state == {} and messages.syntax_messages == [] and messages.reply is None
+
+    # Malformed sections outside the profile are never decoded
+    text = parse_prefixed('s:{"bad": }\n' + transcript, output_profile("text"))
+    assert text.messages == [] and text.state == {}
+    assert text.reply == "second block"
+    assert text.convo_text == parse_prefixed(transcript).convo_text
+
+    parser = PrefixedTranscriptParser(profile=output_profile("text"))
+    _feed(parser, TRANSCRIPT)
+    assert parser.result() == text
+
+    assert output_profile(None).args == ["--print-state", "--print-messages", "--print-flat"]
+    assert output_profile("text").args == []
+    with pytest.raises(ValueError):
+        output_profile("everything")
+
+
+def test_last_assistant_text_drops_next_block_tags_and_unescapes():
+    lines = ["> user", "hi", "", "> assistant", "a", "\\> quoted", "\\{{x}}", "", "@json", ""]
+    assert last_assistant_text(lines) == "a\n> quoted\n{{x}}"
+    assert last_assistant_text(["> user", "hi"]) is None
+
+
+def test_parse_prefixed_error_includes_truncated_transcript():
+    transcript = 's:{"bad": }\n' + ":" + "x" * 20_000
+    with pytest.raises(ParseError) as exc:
+        parse_prefixed(transcript)
+    assert "Transcript:" in str(exc.value)
+    assert "chars total" in str(exc.value)
+    assert len(str(exc.value)) < 11_000
+
+
+@pytest.mark.parametrize("backend", json_backend.available_backends())
+def test_json_backends_decode_identically(backend):
+    previous = json_backend.get_json_backend()
+    json_backend.set_json_backend(backend)
+    try:
+        parsed = parse_prefixed('s:{"a":[1,2.5,"ü",null,true]}\n')
+        assert parsed.state == {"a": [1, 2.5, "ü", None, True]}
+        with pytest.raises(ParseError):
+            parse_prefixed('f:[1,\n')
+    finally:
+        json_backend.set_json_backend(previous)
+
+
+def test_unknown_json_backend_rejected():
+    with pytest.raises(ValueError):
+        json_backend.set_json_backend("nope")
@@ -0,0 +1,103 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "..", "src")
+))
+from convo_lang import Conversation, Instrumentation, WindowPolicy
+from convo_lang.instrumentation import InstrumentationHook
+from convo_lang.mock_runner import MockConvoRunner
+from convo_lang.windowing import SUMMARY_MARKER, apply_window, split_blocks
+
+
+def _words(text):
+    return len(text.split())
+
+
+def _source(turns):
+    c = Conversation()
+    c.add_convo_text("> define\n__model='gpt-4o'")
+    c.add_system_message("be brief")
+    for i in range(turns):
+        c.add_user_message(f"question {i} " + "x " * 20)
+        c.add_assistant_message(f"answer {i} " + "y " * 20)
+    return c.convo_text
+
+
+def test_split_blocks_keeps_tags_with_their_block_and_round_trips():
+    source = "preamble\n> user\nhi\n\n@json\n> assistant\n{}\n"
+    blocks = split_blocks(source)
+    assert [role for role, _ in blocks] == ["", "user", "assistant"]
+    assert blocks[2][1].startswith("@json\n")
+    assert "".join(text for _, text in blocks) == source
+
+
+def test_oldest_turns_are_dropped_and_pinned_blocks_kept():
+    source = _source(5)
+    windowed, report = apply_window(source, WindowPolicy(max_tokens=120, tokenizer=_words))
+    assert report.tokens_before > 120 >= report.tokens_after
+    assert report.trimmed_tokens == report.tokens_before - report.tokens_after
+    assert report.dropped_turns == 3 and report.within_budget
+    assert windowed.startswith("> define\n__model='gpt-4o'\n\n> system\nbe brief\n\n> user\nquestion 3")
+    assert "answer 4" in windowed and "question 2" not in windowed
+
+
+def test_last_turns_are_kept_even_over_budget():
+    windowed, report = apply_window(_source(3), WindowPolicy(max_tokens=10, keep_last_turns=2, tokenizer=_words))
+    assert report.dropped_turns == 1 and not report.within_budget
+    assert "question 0" not in windowed and "question 1" in windowed
+
+
+def test_summaries_replace_dropped_turns_and_are_merged_later():
+    seen = []
+
+    def summarize(source):
+        seen.append(source)
+        return f"summary {len(seen)}"
+
+    policy = WindowPolicy(max_tokens=150, summarize=summarize, summary_tokens=5, tokenizer=_words)
+    windowed, report = apply_window(_source(5), policy)
+    assert report.summarized
+    assert f"> system\n{SUMMARY_MARKER}\nsummary 1\n\n> user\nquestion" in windowed
+    assert "> define" in windowed and "be brief" in windowed
+
+    windowed += "> user\nmore " + "z " * 60 + "\n\n"
+    windowed, report = apply_window(windowed, policy)
+    assert SUMMARY_MARKER + "\nsummary 1" in seen[1]
+    assert windowed.count(SUMMARY_MARKER) == 1 and "summary 2" in windowed
+
+
+def test_within_budget_is_untouched():
+    source = _source(2)
+    windowed, report = apply_window(source, WindowPolicy(max_tokens=10_000))
+    assert windowed is source and report.trimmed_tokens == 0
+
+
+class _Events(InstrumentationHook):
+    def __init__(self):
+        self.events = []
+
+    def post(self, event):
+        self.events.append(event)
+
+
+def test_conversation_windows_before_running():
+    sent = []
+
+    class RecordingRunner(MockConvoRunner):
+        def run_text(self, convo_text, **kwargs):
+            sent.append(convo_text)
+            return super().run_text(convo_text, **kwargs)
+
+    events = _Events()
+    c = Conversation(
+        convo_cli_runner=RecordingRunner(),
+        window=WindowPolicy(max_tokens=100, tokenizer=_words),
+        instrumentation=Instrumentation([events]),
+    )
+    c.add_convo_text(_source(6))
+    c.complete()
+    assert "question 0" not in sent[0] and "question 5" in sent[0]
+    assert c.last_window.trimmed_tokens > 0
+    assert events.events[-1].attributes["trimmed_tokens"] == c.last_window.trimmed_tokens
+    assert c.fork().window is c.window